@@ -11,10 +11,42 @@ load_dotenv()
 class Config:
     """Configuration class to manage environment variables"""
     
+    # Vector Store Configuration: "qdrant" (QDRANT_URL) or "numpy" (in-process exact search)
+    VECTOR_STORE: str = os.getenv("VECTOR_STORE", "qdrant").lower()
+    # Directory where the numpy store keeps its append-only collection logs ("" = memory only)
+    VECTOR_STORE_PATH: str = os.getenv("VECTOR_STORE_PATH", "")
+    # Worker processes sharing the numpy store's matrices for exact search (0 or 1 = search in this process)
+    NUMPY_SEARCH_WORKERS: int = int(os.getenv("NUMPY_SEARCH_WORKERS", "0"))
+    # Rows per worker below which a search stays in this process (the hand-off would cost more)
+    NUMPY_SEARCH_MIN_SHARD_ROWS: int = int(os.getenv("NUMPY_SEARCH_MIN_SHARD_ROWS", "10000"))
+    
     # Qdrant Configuration
     QDRANT_URL: str = os.getenv("QDRANT_URL", "")
     QDRANT_API_KEY: str = os.getenv("QDRANT_API_KEY", "")
     QDRANT_COLLECTION_NAME: str = os.getenv("QDRANT_COLLECTION_NAME", "fashion_embeddings")
+    # "rest" (JSON over HTTP, port 6333) or "grpc" (protobuf with packed float vectors, QDRANT_GRPC_PORT)
+    QDRANT_TRANSPORT: str = os.getenv("QDRANT_TRANSPORT", "rest").lower()
+    QDRANT_GRPC_PORT: int = int(os.getenv("QDRANT_GRPC_PORT", "6334"))
+    # Batch upserts: points per request and requests in flight
+    QDRANT_UPSERT_CHUNK_SIZE: int = int(os.getenv("QDRANT_UPSERT_CHUNK_SIZE", "256"))
+    QDRANT_UPSERT_PARALLEL: int = int(os.getenv("QDRANT_UPSERT_PARALLEL", "4"))
+    # Pooled keep-alive connections shared by all requests of a worker
+    QDRANT_MAX_CONNECTIONS: int = int(os.getenv("QDRANT_MAX_CONNECTIONS", "32"))
+    # Catalog vector quantization: "none" (float32), "scalar" (int8) or "binary" (1 bit per dimension)
+    QDRANT_QUANTIZATION: str = os.getenv("QDRANT_QUANTIZATION", "none").lower()
+    QDRANT_QUANTIZATION_ALWAYS_RAM: bool = os.getenv("QDRANT_QUANTIZATION_ALWAYS_RAM", "true").lower() == "true"
+    # Default search oversampling of quantized candidates, re-scored with the original vectors
+    QDRANT_SEARCH_OVERSAMPLING: float = float(os.getenv("QDRANT_SEARCH_OVERSAMPLING", "2.0"))
+    QDRANT_SEARCH_RESCORE: bool = os.getenv("QDRANT_SEARCH_RESCORE", "true").lower() == "true"
+    # HNSW graph of new collections: edges per node and build-time beam width (Qdrant defaults 16/100)
+    QDRANT_HNSW_M: int = int(os.getenv("QDRANT_HNSW_M", "16"))
+    QDRANT_HNSW_EF_CONSTRUCT: int = int(os.getenv("QDRANT_HNSW_EF_CONSTRUCT", "100"))
+    # Search-time beam width; 0 = Qdrant's default. Recommendations trade some recall for speed
+    QDRANT_SEARCH_HNSW_EF: int = int(os.getenv("QDRANT_SEARCH_HNSW_EF", "0"))
+    QDRANT_RECOMMENDATIONS_HNSW_EF: int = int(os.getenv("QDRANT_RECOMMENDATIONS_HNSW_EF", "32"))
+    # Keep original vectors, the HNSW graph and payloads on disk (memory-mapped) instead of in RAM;
+    # quantized vectors stay in RAM with QDRANT_QUANTIZATION_ALWAYS_RAM
+    QDRANT_ON_DISK: bool = os.getenv("QDRANT_ON_DISK", "false").lower() == "true"
     
     # Firebase Configuration
     FIREBASE_API_KEY: str = os.getenv("FIREBASE_API_KEY", "")
@@ -36,7 +68,62 @@ class Config:
         "ALLOWED_IMAGE_TYPES", 
         "image/jpeg,image/jpg,image/png,image/gif,image/webp"
     ).split(",")
-    VECTOR_SIZE: int = int(os.getenv("VECTOR_SIZE", "2048"))
+    # 0 = the embedding size of EMBEDDING_MODEL
+    VECTOR_SIZE: int = int(os.getenv("VECTOR_SIZE", "0"))
+    
+    # Embedding Model Configuration ("resnet50", "efficientnet_b0", "mobilenet_v3_large" or "mobilenet_v3_small")
+    EMBEDDING_MODEL: str = os.getenv("EMBEDDING_MODEL", "resnet50")
+    
+    # Image Decoding Configuration
+    MAX_DECODE_PIXELS: int = int(os.getenv("MAX_DECODE_PIXELS", "40000000"))
+    RESIZE_REDUCING_GAP: float = float(os.getenv("RESIZE_REDUCING_GAP", "3.0"))
+    DECODE_WORKERS: int = int(os.getenv("DECODE_WORKERS", "4"))
+    
+    # Inference Batching Configuration
+    EMBEDDING_BATCHING_ENABLED: bool = os.getenv("EMBEDDING_BATCHING_ENABLED", "true").lower() == "true"
+    EMBEDDING_BATCH_MAX_SIZE: int = int(os.getenv("EMBEDDING_BATCH_MAX_SIZE", "16"))
+    EMBEDDING_BATCH_WINDOW_MS: float = float(os.getenv("EMBEDDING_BATCH_WINDOW_MS", "5"))
+    INFERENCE_WORKERS: int = int(os.getenv("INFERENCE_WORKERS", "1"))
+    INFERENCE_MAX_PENDING: int = int(os.getenv("INFERENCE_MAX_PENDING", "64"))
+    INFERENCE_COMPILED: bool = os.getenv("INFERENCE_COMPILED", "true").lower() == "true"
+    INFERENCE_XLA: bool = os.getenv("INFERENCE_XLA", "false").lower() == "true"
+    INFERENCE_WARMUP: bool = os.getenv("INFERENCE_WARMUP", "true").lower() == "true"
+    # When to load the model: "background" (after startup), "lazy" (first request) or "eager" (before serving)
+    MODEL_LOAD_MODE: str = os.getenv("MODEL_LOAD_MODE", "background")
+    
+    # Runtime Profile Configuration ("performance" or "deterministic"; -1 / "auto" keep the profile's choice)
+    RUNTIME_PROFILE: str = os.getenv("RUNTIME_PROFILE", "performance")
+    TF_INTRA_OP_THREADS: int = int(os.getenv("TF_INTRA_OP_THREADS", "-1"))
+    TF_INTER_OP_THREADS: int = int(os.getenv("TF_INTER_OP_THREADS", "-1"))
+    TF_ONEDNN: str = os.getenv("TF_ONEDNN", "auto").lower()
+    # "" = no pinning, "auto" = split the CPUs between CPU_AFFINITY_SLOTS workers, or a list like "0-3"
+    CPU_AFFINITY: str = os.getenv("CPU_AFFINITY", "")
+    CPU_AFFINITY_SLOTS: int = int(os.getenv("CPU_AFFINITY_SLOTS", os.getenv("WEB_CONCURRENCY", "1")))
+    
+    # Inference Backend Configuration ("auto", "keras", "savedmodel", "student" or "tflite_int8")
+    INFERENCE_BACKEND: str = os.getenv("INFERENCE_BACKEND", "auto")
+    # Empty paths default to models/<EMBEDDING_MODEL>_savedmodel and models/<EMBEDDING_MODEL>_int8.tflite
+    MODEL_ARTIFACT_DIR: str = os.getenv("MODEL_ARTIFACT_DIR", "")
+    MODEL_ARTIFACT_VERIFY: bool = os.getenv("MODEL_ARTIFACT_VERIFY", "true").lower() == "true"
+    TFLITE_MODEL_PATH: str = os.getenv("TFLITE_MODEL_PATH", "")
+    TFLITE_NUM_THREADS: int = int(os.getenv("TFLITE_NUM_THREADS", "1"))
+    # Empty path defaults to models/<EMBEDDING_MODEL>_student
+    STUDENT_ARTIFACT_DIR: str = os.getenv("STUDENT_ARTIFACT_DIR", "")
+    
+    # Shared Model Server Configuration (empty socket = load the model in every worker)
+    MODEL_SERVER_SOCKET: str = os.getenv("MODEL_SERVER_SOCKET", "")
+    MODEL_SERVER_AUTHKEY: str = os.getenv("MODEL_SERVER_AUTHKEY", "")
+    MODEL_SERVER_TIMEOUT: float = float(os.getenv("MODEL_SERVER_TIMEOUT", "30"))
+    
+    # Embedding Cache Configuration (empty EMBEDDING_CACHE_DIR = memory tier only)
+    EMBEDDING_CACHE_ENABLED: bool = os.getenv("EMBEDDING_CACHE_ENABLED", "true").lower() == "true"
+    EMBEDDING_CACHE_MAX_ENTRIES: int = int(os.getenv("EMBEDDING_CACHE_MAX_ENTRIES", "4096"))
+    EMBEDDING_CACHE_DIR: str = os.getenv("EMBEDDING_CACHE_DIR", "cache/embeddings")
+    
+    # Near-Duplicate Shortcut Configuration (perceptual hash match reuses a stored vector)
+    NEAR_DUPLICATE_ENABLED: bool = os.getenv("NEAR_DUPLICATE_ENABLED", "true").lower() == "true"
+    NEAR_DUPLICATE_MAX_DISTANCE: int = int(os.getenv("NEAR_DUPLICATE_MAX_DISTANCE", "4"))
+    NEAR_DUPLICATE_MAX_COLOR_DIFF: int = int(os.getenv("NEAR_DUPLICATE_MAX_COLOR_DIFF", "12"))
     
     # Development Configuration
     DEBUG_MODE: bool = os.getenv("DEBUG_MODE", "false").lower() == "true"
@@ -60,10 +147,21 @@ class Config:
         """Validate that required configuration is present"""
         errors = []
         
-        if not cls.QDRANT_URL:
-            errors.append("QDRANT_URL is required")
-        if not cls.QDRANT_API_KEY:
-            errors.append("QDRANT_API_KEY is required")
+        if cls.VECTOR_STORE not in ("qdrant", "numpy"):
+            errors.append(f"VECTOR_STORE must be 'qdrant' or 'numpy', got '{cls.VECTOR_STORE}'")
+        if cls.NUMPY_SEARCH_WORKERS < 0:
+            errors.append("NUMPY_SEARCH_WORKERS must be 0 or more")
+        if cls.NUMPY_SEARCH_MIN_SHARD_ROWS < 1:
+            errors.append("NUMPY_SEARCH_MIN_SHARD_ROWS must be at least 1")
+        if cls.VECTOR_STORE == "qdrant":
+            if not cls.QDRANT_URL:
+                errors.append("QDRANT_URL is required")
+            if not cls.QDRANT_API_KEY:
+                errors.append("QDRANT_API_KEY is required")
+        if cls.QDRANT_TRANSPORT not in ("rest", "grpc"):
+            errors.append(f"QDRANT_TRANSPORT must be 'rest' or 'grpc', got '{cls.QDRANT_TRANSPORT}'")
+        if cls.QDRANT_QUANTIZATION not in ("none", "scalar", "binary"):
+            errors.append(f"QDRANT_QUANTIZATION must be 'none', 'scalar' or 'binary', got '{cls.QDRANT_QUANTIZATION}'")
         
         # Only validate Firebase config if not in mock mode
         if not cls.FIREBASE_MOCK_MODE:
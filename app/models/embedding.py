@@ -0,0 +1,86 @@
+"""
+Internal embedding type
+One image embedding backed by a contiguous float32 NumPy vector; converted to a
+Python list only when it is written to JSON or sent to Qdrant
+"""
+from typing import Any, Dict, List, Sequence, Union
+
+import numpy as np
+
+
+class Embedding:
+    """A single embedding vector (float32, 1-D, C-contiguous)"""
+
+    __slots__ = ("vector",)
+
+    def __init__(self, vector: Union[np.ndarray, Sequence[float]]):
+        """
+        Args:
+            vector: Embedding values; float32 NumPy rows are wrapped without copying
+        """
+        vector = np.asarray(vector, dtype=np.float32)
+        if vector.ndim != 1:
+            vector = vector.reshape(-1)
+        self.vector = np.ascontiguousarray(vector)
+
+    @classmethod
+    def from_any(cls, value: Union["Embedding", np.ndarray, Sequence[float]]) -> "Embedding":
+        """Wrap a list, array or Embedding (returned as is)"""
+        return value if isinstance(value, cls) else cls(value)
+
+    def __len__(self) -> int:
+        return self.vector.shape[0]
+
+    def __getitem__(self, index):
+        return self.vector[index]
+
+    def __array__(self, dtype=None, copy=None):
+        return self.vector if dtype is None else self.vector.astype(dtype)
+
+    def __repr__(self) -> str:
+        return f"Embedding(size={len(self)})"
+
+    @property
+    def shape(self) -> List[int]:
+        """Embedding shape as a JSON-friendly list"""
+        return list(self.vector.shape)
+
+    def validate(self, expected_size: int) -> "Embedding":
+        """
+        Check size and values before storing
+
+        Args:
+            expected_size: Required number of dimensions
+
+        Returns:
+            self
+
+        Raises:
+            ValueError: If the size is wrong or any value is NaN or infinite
+        """
+        if len(self) != expected_size:
+            raise ValueError(f"❌ Invalid embedding shape. Expected {expected_size} floats, got {len(self)}")
+        if not np.isfinite(self.vector).all():
+            raise ValueError("❌ Embedding contains NaN or infinite values")
+        return self
+
+    def stats(self) -> Dict[str, Any]:
+        """Summary statistics of the vector, as reported by the API"""
+        vector = self.vector
+        if len(vector) == 0:
+            return {"min_value": 0.0, "max_value": 0.0, "avg_value": 0.0, "non_zero_count": 0, "total_dimensions": 0}
+        return {
+            "min_value": round(float(vector.min()), 6),
+            "max_value": round(float(vector.max()), 6),
+            "avg_value": round(float(vector.mean(dtype=np.float64)), 6),
+            "non_zero_count": int(np.count_nonzero(vector)),
+            "total_dimensions": len(vector)
+        }
+
+    def tolist(self) -> List[float]:
+        """Python floats, for JSON responses and the Qdrant client"""
+        return self.vector.tolist()
+
+    def preview(self, size: int = 100) -> List[float]:
+        """The first `size` values as Python floats"""
+        return self.vector[:size].tolist()
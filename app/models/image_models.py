@@ -39,6 +39,29 @@ class VectorStoreResponse(BaseModel):
     firebase_uploaded: Optional[bool] = None
     price: Optional[float] = None
     product_name: Optional[str] = None
+    near_duplicate_shortcut: bool = False  # True when a stored near-duplicate's vector was reused
+    near_duplicate_of: Optional[str] = None
+    embedding_normalized: bool = False  # Preview is the stored unit-length copy; embedding_stats omitted
+
+class BatchStoreItem(BaseModel):
+    """Outcome of one image of a batch upload"""
+    filename: str
+    vector_id: Optional[str] = None
+    error: Optional[str] = None
+    firebase_url: Optional[str] = None
+    price: Optional[float] = None
+    product_name: Optional[str] = None
+
+class BatchVectorStoreResponse(BaseModel):
+    """Response model for batch vector storage operations"""
+    batch_id: str
+    message: str
+    total: int
+    stored: int
+    failed: int
+    processing_time: float
+    model_used: Optional[str] = None
+    results: List[BatchStoreItem]  # In upload order
 
 class SimilarImageResponse(BaseModel):
     """Response model for similar image search"""
@@ -46,6 +69,8 @@ class SimilarImageResponse(BaseModel):
     similar_images: List[Dict[str, Any]]
     search_time: float
     total_found: int
+    near_duplicate_shortcut: bool = False  # True when a stored near-duplicate's vector was reused
+    near_duplicate_of: Optional[str] = None
 
 class ErrorResponse(BaseModel):
     """Error response model"""
@@ -76,3 +101,6 @@ class CompleteSimilarityResponse(BaseModel):
     similarity_threshold: float
     similar_embeddings: List[Dict[str, Any]]  # Each contains full embedding data
     message: str
+    near_duplicate_shortcut: bool = False  # True when a stored near-duplicate's vector was reused
+    near_duplicate_of: Optional[str] = None
+    query_embedding_normalized: bool = False  # Preview is the stored unit-length copy; query_embedding_stats omitted
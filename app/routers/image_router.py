@@ -2,6 +2,8 @@ from fastapi import APIRouter, File, UploadFile, HTTPException
 from fastapi.responses import JSONResponse
 from app.models.image_models import ImageUploadResponse, EmbeddingResponse, ErrorResponse
 from app.services.embedding_service import embedding_service
+from app.services.model_registry import MODELS
+from app.services.vector_service import vector_service
 from app.config import config
 import uuid
 import time
@@ -50,7 +52,7 @@ async def get_image_embeddings(file: UploadFile = File(...)):
         
         # Generate actual embeddings using TensorFlow
         try:
-            embeddings_list, shape_list = embedding_service.generate_embeddings(content)
+            embedding, shape_list = await embedding_service.generate_embeddings_async(content)
             model_info = embedding_service.get_model_info()
             
             processing_time = time.time() - start_time
@@ -58,10 +60,10 @@ async def get_image_embeddings(file: UploadFile = File(...)):
             return EmbeddingResponse(
                 id=processing_id,
                 filename=file.filename,
-                message=f"Image '{file.filename}' successfully processed. Generated {len(embeddings_list)} dimensional embeddings using {model_info['model_name']}",
+                message=f"Image '{file.filename}' successfully processed. Generated {len(embedding)} dimensional embeddings using {model_info['model_name']}",
                 embedding_status="completed",
                 processing_time=round(processing_time, 3),
-                embeddings=embeddings_list[:100],  # Return first 100 values for display (full embeddings are too large for UI)
+                embeddings=embedding.preview(100),  # Return first 100 values for display (full embeddings are too large for UI)
                 embedding_shape=shape_list,
                 model_used=model_info['model_name']
             )
@@ -127,6 +129,34 @@ async def upload_image(file: UploadFile = File(...)):
             detail=f"Internal server error while uploading image: {str(e)}"
         )
 
+@router.get("/inference/stats")
+async def inference_stats():
+    """
+    Get micro-batching, cache, near-duplicate and executor metrics for the embedding model
+    
+    - Returns: Batch-size histogram, queue-wait statistics, cache and shortcut hit rates and executor occupancy
+    """
+    return {
+        "model": embedding_service.get_model_info()["model_name"],
+        "startup_timings": embedding_service.startup_timings,
+        "batching": embedding_service.get_batching_stats(),
+        "cache": embedding_service.get_cache_stats(),
+        "near_duplicates": vector_service.hash_index.get_stats(),
+        "executor": embedding_service.get_executor_stats()
+    }
+
+@router.get("/models")
+async def list_models():
+    """
+    List the registered embedding models
+    
+    - Returns: Each model's key, vector size and Qdrant collection, and which one is active (EMBEDDING_MODEL)
+    """
+    return {
+        "active": embedding_service.model_spec.key,
+        "models": [spec.get_info() for spec in MODELS.values()]
+    }
+
 @router.get("/health")
 async def image_service_health():
     """Health check for image processing service"""
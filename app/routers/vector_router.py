@@ -1,6 +1,7 @@
 from fastapi import APIRouter, File, UploadFile, HTTPException, Query, Form
 from fastapi.responses import JSONResponse
-from app.models.image_models import VectorStoreResponse, SimilarImageResponse, ErrorResponse, EmbeddingRetrievalResponse, CompleteSimilarityResponse
+from app.models.image_models import VectorStoreResponse, SimilarImageResponse, ErrorResponse, EmbeddingRetrievalResponse, CompleteSimilarityResponse, BatchVectorStoreResponse, BatchStoreItem
+from app.models.embedding import Embedding
 from app.services.embedding_service import embedding_service
 from app.services.vector_service import vector_service
 from app.services.firebase_service import firebase_service
@@ -8,7 +9,7 @@ from app.config import config
 import uuid
 import time
 import asyncio
-from typing import List, Optional, Dict, Any
+from typing import List, Optional, Dict, Any, Tuple
 import os
 import requests
 
@@ -17,11 +18,51 @@ router = APIRouter(prefix="/api/v1/vectors", tags=["Vector Database"])
 # Configuration from environment
 ALLOWED_IMAGE_TYPES = config.ALLOWED_IMAGE_TYPES
 MAX_FILE_SIZE = config.MAX_FILE_SIZE
+MAX_BATCH_FILES = 100
+
+# Keep a reference so the background task is not garbage-collected
+collection_init_task: Optional[asyncio.Task] = None
 
 @router.on_event("startup")
 async def startup_event():
-    """Initialize Qdrant collection on startup"""
-    await vector_service.initialize_collection()
+    """Initialize Qdrant collections in the background so routes are served immediately"""
+    global collection_init_task
+    # The async client must be used from the server's event loop, where its connection pool lives
+    collection_init_task = asyncio.create_task(vector_service.initialize_collection())
+
+@router.on_event("shutdown")
+async def shutdown_event():
+    """Close the pooled Qdrant connections"""
+    await vector_service.close()
+
+async def embed_or_reuse(content: bytes, hash_cached: bool = False) -> Tuple[Embedding, List[int], Optional[str], Optional[str]]:
+    """
+    Get the embedding for an uploaded image, reusing a stored near-duplicate's vector when possible
+    
+    The embedding cache is consulted first. On a miss the image is decoded once for the
+    model, and the perceptual hash is taken from that decode and checked before running ResNet50.
+    A reused vector is the store's unit-length copy, not the model output, and responses say so.
+    
+    Args:
+        content: Raw image bytes
+        hash_cached: Return the perceptual hash even when the cache answers (the caller stores it)
+    
+    Returns:
+        Tuple of (embedding, shape_list, image_hash, near_duplicate_vector_id)
+    """
+    if not config.NEAR_DUPLICATE_ENABLED:
+        embedding, shape_list = await embedding_service.generate_embeddings_async(content)
+        return embedding, shape_list, None, None
+    
+    prepared = await embedding_service.prepare_image_async(content, hash_cached=hash_cached)
+    # Only vectors from the model this worker runs are interchangeable with its own output
+    if prepared.embedding is None and embedding_service.model_id:
+        match = await vector_service.find_near_duplicate(prepared.image_hash, embedding_service.model_id)
+        if match:
+            return match["embedding"], list(match["embedding"].shape), prepared.image_hash, match["vector_id"]
+    
+    embedding, shape_list = await embedding_service.embed_prepared_async(prepared)
+    return embedding, shape_list, prepared.image_hash, None
 
 @router.post("/upload-and-store", response_model=VectorStoreResponse)
 async def upload_and_store_complete(
@@ -86,9 +127,9 @@ async def upload_and_store_complete(
         # Step 2: Generate embeddings using TensorFlow
         print(f"🤖 Step 2: Generating AI embeddings for {file.filename}...")
         try:
-            embeddings_list, shape_list = embedding_service.generate_embeddings(content)
+            embedding, shape_list, image_hash, near_duplicate_of = await embed_or_reuse(content, hash_cached=True)
             model_info = embedding_service.get_model_info()
-            print(f"✅ Step 2 Complete - Generated {len(embeddings_list)}-dimensional embedding")
+            print(f"✅ Step 2 Complete - Generated {len(embedding)}-dimensional embedding")
             
         except Exception as embedding_error:
             # If embedding fails, we should clean up the Firebase upload
@@ -108,7 +149,7 @@ async def upload_and_store_complete(
         print(f"🏷️ Product name: {product_name}")
         
         vector_id = await vector_service.store_embedding(
-            embedding=embeddings_list,
+            embedding=embedding,
             filename=file.filename,
             file_size=file_size,
             content_type=file.content_type,
@@ -124,19 +165,16 @@ async def upload_and_store_complete(
                 "upload_method": "complete_pipeline",
                 "price": price,  # Also store in metadata for easy access
                 "product_name": product_name  # Also store in metadata for easy access
-            }
+            },
+            image_hash=image_hash,
+            model_id=embedding_service.model_id
         )
         
         print(f"✅ Step 3 Complete - Vector ID: {vector_id}")
         
-        # Calculate embedding statistics for verification
-        embedding_stats = {
-            "min_value": round(min(embeddings_list), 6),
-            "max_value": round(max(embeddings_list), 6),
-            "avg_value": round(sum(embeddings_list) / len(embeddings_list), 6),
-            "non_zero_count": sum(1 for x in embeddings_list if x != 0),
-            "total_dimensions": len(embeddings_list)
-        }
+        # Calculate embedding statistics for verification; a reused vector is normalized, so its
+        # statistics would not describe a model output
+        embedding_stats = embedding.stats() if near_duplicate_of is None else None
         
         # Final success message
         success_message = (
@@ -155,7 +193,7 @@ async def upload_and_store_complete(
             embedding_status="completed",
             vector_stored=True,
             processing_time=round(processing_time, 3),
-            embeddings_preview=embeddings_list[:100],
+            embeddings_preview=embedding.preview(100),
             embedding_shape=shape_list,
             model_used=model_info['model_name'],
             embedding_stats=embedding_stats,
@@ -163,7 +201,10 @@ async def upload_and_store_complete(
             firebase_path=firebase_path,
             firebase_uploaded=firebase_success,
             price=price,
-            product_name=product_name
+            product_name=product_name,
+            near_duplicate_shortcut=near_duplicate_of is not None,
+            near_duplicate_of=near_duplicate_of,
+            embedding_normalized=near_duplicate_of is not None
         )
         
     except HTTPException:
@@ -174,12 +215,137 @@ async def upload_and_store_complete(
             detail=f"Internal server error during complete pipeline: {str(e)}"
         )
 
+@router.post("/upload-and-store-batch", response_model=BatchVectorStoreResponse)
+async def upload_and_store_batch(
+    files: List[UploadFile] = File(...),
+    prices: List[float] = Form(..., description="Product price in USD, one per file"),
+    product_names: List[str] = Form(..., description="Product name, one per file")
+):
+    """
+    Batch pipeline for catalog admins: Firebase uploads → one embedding pass → chunked Qdrant upserts
+    
+    Each image is validated, decoded and stored on its own, so one bad file does not fail the others.
+    
+    - **files**: Up to 100 image files (JPEG, PNG, GIF, WebP supported, max 10MB each)
+    - **prices**: Product prices in USD, in the same order as the files
+    - **product_names**: Product names, in the same order as the files
+    - Returns: Per-image vector IDs or errors
+    """
+    if not (len(files) == len(prices) == len(product_names)):
+        raise HTTPException(
+            status_code=400,
+            detail=f"Got {len(files)} files, {len(prices)} prices and {len(product_names)} product names; counts must match"
+        )
+    if len(files) > MAX_BATCH_FILES:
+        raise HTTPException(status_code=400, detail=f"At most {MAX_BATCH_FILES} files per batch")
+    
+    try:
+        batch_id = str(uuid.uuid4())
+        start_time = time.time()
+        contents = [await file.read() for file in files]
+        results = [
+            BatchStoreItem(filename=file.filename, price=price, product_name=product_name)
+            for file, price, product_name in zip(files, prices, product_names)
+        ]
+        
+        # Step 1: Validate every image, then look the valid ones up in the embedding cache and
+        # decode the rest; failures are reported per image
+        errors: List[Optional[str]] = [None] * len(files)
+        for index, (file, content) in enumerate(zip(files, contents)):
+            if file.content_type not in ALLOWED_IMAGE_TYPES:
+                errors[index] = f"File type {file.content_type} not supported"
+            elif len(content) > MAX_FILE_SIZE:
+                errors[index] = f"File size {len(content)} bytes exceeds maximum allowed size of {MAX_FILE_SIZE} bytes"
+        valid = [index for index, error in enumerate(errors) if error is None]
+        prepared = await embedding_service.prepare_images_async([contents[index] for index in valid], hash_cached=True)
+        for index, error in zip(valid, prepared.errors):
+            errors[index] = error
+        good = [index for index, error in enumerate(errors) if error is None]
+        print(f"📦 Batch {batch_id}: {len(good)} of {len(files)} images readable, "
+              f"{sum(embedding is not None for embedding in prepared.embeddings)} cached")
+        
+        # Step 2: Firebase uploads run concurrently with inference, which goes through the batcher
+        uploads = asyncio.gather(*(
+            firebase_service.upload_image(image_bytes=contents[index], filename=files[index].filename,
+                                          content_type=files[index].content_type)
+            for index in good
+        ))
+        await embedding_service.embed_prepared_batch_async(prepared)
+        embeddings = dict(zip(valid, prepared.embeddings))
+        hashes = dict(zip(valid, prepared.image_hashes))
+        uploaded = await uploads
+        processing_time = time.time() - start_time
+        
+        # Step 3: One batch upsert for every image that made it this far
+        stored_indices, stored_embeddings, payloads = [], [], []
+        for index, (firebase_success, firebase_url, firebase_path) in zip(good, uploaded):
+            if not firebase_success:
+                errors[index] = "Failed to upload image to Firebase Storage"
+                continue
+            embedding = Embedding(embeddings[index])
+            results[index].firebase_url = firebase_url
+            stored_indices.append(index)
+            stored_embeddings.append(embedding)
+            payloads.append(vector_service.build_catalog_payload(
+                filename=files[index].filename,
+                file_size=len(contents[index]),
+                content_type=files[index].content_type,
+                processing_time=round(processing_time / max(len(good), 1), 4),
+                model_used=embedding_service.model_name,
+                firebase_url=firebase_url,
+                firebase_path=firebase_path,
+                price=prices[index],
+                product_name=product_names[index],
+                metadata={
+                    "processing_id": batch_id,
+                    "embedding_shape": embedding.shape,
+                    "upload_method": "batch_pipeline",
+                    "price": prices[index],
+                    "product_name": product_names[index]
+                },
+                image_hash=hashes[index],
+                model_id=embedding_service.model_id
+            ))
+        
+        stored = await vector_service.store_embeddings_batch(stored_embeddings, payloads)
+        for index, outcome in zip(stored_indices, stored):
+            results[index].vector_id = outcome["vector_id"]
+            errors[index] = outcome["error"]
+        for result, error in zip(results, errors):
+            result.error = error
+        
+        processing_time = time.time() - start_time
+        stored_count = sum(1 for result in results if result.vector_id)
+        message = f"✅ Stored {stored_count} of {len(files)} products in {processing_time:.2f}s"
+        print(message)
+        return BatchVectorStoreResponse(
+            batch_id=batch_id,
+            message=message,
+            total=len(files),
+            stored=stored_count,
+            failed=len(files) - stored_count,
+            processing_time=round(processing_time, 3),
+            model_used=embedding_service.model_name,
+            results=results
+        )
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(
+            status_code=500,
+            detail=f"Internal server error during batch pipeline: {str(e)}"
+        )
+
 @router.post("/search", response_model=SimilarImageResponse)
 async def search_similar_images(
     file: UploadFile = File(...),
     limit: int = Query(5, ge=1, le=20, description="Number of similar images to return"),
     threshold: float = Query(0.7, ge=0.0, le=1.0, description="Minimum similarity score"),
-    user_id: Optional[str] = Query(None, description="User ID for saving search embeddings (if logged in)")
+    user_id: Optional[str] = Query(None, description="User ID for saving search embeddings (if logged in)"),
+    oversampling: Optional[float] = Query(None, ge=1.0, le=10.0, description="Quantized candidates re-scored per result"),
+    ef: Optional[int] = Query(None, ge=1, le=4096, description="HNSW search beam width (higher is slower and more accurate)"),
+    exact: bool = Query(False, description="Compare with every stored vector instead of using the HNSW index")
 ):
     """
     Upload an image and search for similar images in the vector database
@@ -187,6 +353,9 @@ async def search_similar_images(
     - **file**: Query image file
     - **limit**: Maximum number of results (1-20)
     - **threshold**: Minimum similarity score (0.0-1.0)
+    - **oversampling**: On a quantized collection, candidates re-scored per result (default QDRANT_SEARCH_OVERSAMPLING)
+    - **ef**: HNSW search beam width (default QDRANT_SEARCH_HNSW_EF)
+    - **exact**: Exact search over all vectors, for admin checks and recall measurements
     - Returns: List of similar images with metadata
     """
     
@@ -217,8 +386,8 @@ async def search_similar_images(
         # Generate embeddings for the query image
         print(f"🔍 Generating embeddings for query image...")
         try:
-            query_embeddings, _ = embedding_service.generate_embeddings(content)
-            print(f"✅ Query embeddings generated - {len(query_embeddings)} dimensions")
+            query_embedding, _, _, near_duplicate_of = await embed_or_reuse(content)
+            print(f"✅ Query embeddings generated - {len(query_embedding)} dimensions")
         except Exception as e:
             raise HTTPException(
                 status_code=500,
@@ -228,9 +397,12 @@ async def search_similar_images(
         # Search for similar images
         print(f"🔎 Searching for similar images (limit: {limit}, threshold: {threshold})...")
         similar_results = await vector_service.search_similar_images(
-            query_embedding=query_embeddings,
+            query_embedding=query_embedding,
             limit=limit,
-            score_threshold=threshold
+            score_threshold=threshold,
+            oversampling=oversampling,
+            hnsw_ef=ef,
+            exact=exact
         )
         
         search_time = time.time() - start_time
@@ -244,7 +416,7 @@ async def search_similar_images(
                 await vector_service.store_user_search_embedding(
                     user_id=user_id,
                     query_filename=file.filename,
-                    query_embedding=query_embeddings,
+                    query_embedding=query_embedding,
                     similar_results_count=len(similar_results)
                 )
                 print(f"✅ User search embeddings saved successfully")
@@ -256,7 +428,9 @@ async def search_similar_images(
             query_id=query_id,
             similar_images=similar_results,
             search_time=round(search_time, 3),
-            total_found=len(similar_results)
+            total_found=len(similar_results),
+            near_duplicate_shortcut=near_duplicate_of is not None,
+            near_duplicate_of=near_duplicate_of
         )
         
     except HTTPException:
@@ -369,7 +543,10 @@ async def complete_similarity_search(
     file: UploadFile = File(...),
     limit: int = Query(5, ge=1, le=20, description="Number of similar images to return"),
     threshold: float = Query(0.7, ge=0.0, le=1.0, description="Minimum similarity score"),
-    include_embeddings: bool = Query(False, description="Include full embedding vectors in response")
+    include_embeddings: bool = Query(False, description="Include full embedding vectors in response"),
+    oversampling: Optional[float] = Query(None, ge=1.0, le=10.0, description="Quantized candidates re-scored per result"),
+    ef: Optional[int] = Query(None, ge=1, le=4096, description="HNSW search beam width (higher is slower and more accurate)"),
+    exact: bool = Query(False, description="Compare with every stored vector instead of using the HNSW index")
 ):
     """
     Complete similarity search with full embedding data
@@ -381,6 +558,9 @@ async def complete_similarity_search(
     - **limit**: Maximum number of results (1-20)
     - **threshold**: Minimum similarity score (0.0-1.0)  
     - **include_embeddings**: Include full embedding vectors in response
+    - **oversampling**: On a quantized collection, candidates re-scored per result (default QDRANT_SEARCH_OVERSAMPLING)
+    - **ef**: HNSW search beam width (default QDRANT_SEARCH_HNSW_EF)
+    - **exact**: Exact search over all vectors, for admin checks and recall measurements
     - Returns: Detailed similarity search results with embeddings
     """
     
@@ -411,30 +591,27 @@ async def complete_similarity_search(
         # Generate embeddings for the query image
         print(f"🔍 Generating embeddings for complete similarity search...")
         try:
-            query_embeddings, query_shape = embedding_service.generate_embeddings(content)
-            print(f"✅ Query embeddings generated - {len(query_embeddings)} dimensions")
+            query_embedding, query_shape, _, near_duplicate_of = await embed_or_reuse(content)
+            print(f"✅ Query embeddings generated - {len(query_embedding)} dimensions")
         except Exception as e:
             raise HTTPException(
                 status_code=500,
                 detail=f"Error generating query embeddings: {str(e)}"
             )
         
-        # Calculate query embedding statistics
-        query_stats = {
-            "min_value": round(min(query_embeddings), 6),
-            "max_value": round(max(query_embeddings), 6),
-            "avg_value": round(sum(query_embeddings) / len(query_embeddings), 6),
-            "non_zero_count": sum(1 for x in query_embeddings if x != 0),
-            "total_dimensions": len(query_embeddings)
-        }
+        # Calculate query embedding statistics (not for a reused, normalized vector)
+        query_stats = query_embedding.stats() if near_duplicate_of is None else None
         
         # Search for similar images with full embedding data
         print(f"🔎 Performing complete similarity search (limit: {limit}, threshold: {threshold})...")
         similar_results = await vector_service.search_similar_complete(
-            query_embedding=query_embeddings,
+            query_embedding=query_embedding,
             limit=limit,
             score_threshold=threshold,
-            include_embeddings=include_embeddings
+            include_embeddings=include_embeddings,
+            oversampling=oversampling,
+            hnsw_ef=ef,
+            exact=exact
         )
         
         search_time = time.time() - start_time
@@ -444,13 +621,16 @@ async def complete_similarity_search(
         return CompleteSimilarityResponse(
             query_id=query_id,
             query_filename=file.filename,
-            query_embedding_preview=query_embeddings[:100] if not include_embeddings else None,
+            query_embedding_preview=query_embedding.preview(100) if not include_embeddings else None,
             query_embedding_stats=query_stats,
             search_time=round(search_time, 3),
             total_similar_found=len(similar_results),
             similarity_threshold=threshold,
             similar_embeddings=similar_results,
-            message=f"Complete similarity search completed successfully. Found {len(similar_results)} similar images."
+            message=f"Complete similarity search completed successfully. Found {len(similar_results)} similar images.",
+            near_duplicate_shortcut=near_duplicate_of is not None,
+            near_duplicate_of=near_duplicate_of,
+            query_embedding_normalized=near_duplicate_of is not None
         )
         
     except HTTPException:
@@ -464,13 +644,15 @@ async def complete_similarity_search(
 @router.get("/recommendations/{user_id}")
 async def get_user_recommendations(
     user_id: str,
-    limit: int = Query(5, ge=1, le=20, description="Number of recommendations to return")
+    limit: int = Query(5, ge=1, le=20, description="Number of recommendations to return"),
+    ef: Optional[int] = Query(None, ge=1, le=4096, description="HNSW search beam width (default QDRANT_RECOMMENDATIONS_HNSW_EF)")
 ):
     """
     Get product recommendations for a user based on their search history
     
     - **user_id**: User's UID from Firebase authentication
     - **limit**: Maximum number of recommendations (1-20)
+    - **ef**: HNSW search beam width; lower is faster
     - Returns: List of recommended products based on user's search patterns
     """
     try:
@@ -478,7 +660,8 @@ async def get_user_recommendations(
         
         recommendations = await vector_service.get_user_recommendations(
             user_uid=user_id,
-            limit=limit
+            limit=limit,
+            hnsw_ef=ef
         )
         
         if not recommendations:
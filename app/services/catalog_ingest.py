@@ -0,0 +1,459 @@
+"""
+Bulk Catalog Ingestion
+Streams a directory, zip/tar archive or CSV manifest of product images into the
+catalog collection: parallel decode, batched inference and chunked upserts
+
+    python -m app.services.catalog_ingest catalog/
+    python -m app.services.catalog_ingest products.csv --report ingest_report.json
+    python -m app.services.catalog_ingest catalog.zip --no-firebase --batch-size 32
+
+CSV manifests have the columns image_path, price and product_name, with paths
+relative to the CSV file. Directory and archive entries use the file name as the
+product name and have no price. Every stored image is appended to the checkpoint
+file, so running the same command again after an interruption skips the images
+that are already stored.
+"""
+import argparse
+import asyncio
+import csv
+import json
+import logging
+import mimetypes
+import os
+import tarfile
+import threading
+import time
+import uuid
+import zipfile
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, Iterator, List, Optional, Set
+
+from app.config import config
+from app.models.embedding import Embedding
+from app.services.image_preprocessing import decode_images
+
+logger = logging.getLogger(__name__)
+
+IMAGE_EXTENSIONS = (".jpg", ".jpeg", ".png", ".gif", ".webp")
+
+
+class CatalogItem:
+    """One product image read from the source"""
+
+    def __init__(self, key: str, filename: str, data: bytes, price: Optional[float] = None,
+                 product_name: Optional[str] = None, error: Optional[str] = None):
+        self.key = key  # Stable identity within the source, used by the checkpoint
+        self.filename = filename
+        self.data = data
+        self.price = price
+        self.product_name = product_name or os.path.splitext(filename)[0]
+        self.error = error  # Why the entry could not be read; it is recorded as failed
+
+
+def _is_image(name: str) -> bool:
+    return name.lower().endswith(IMAGE_EXTENSIONS)
+
+
+def iter_catalog(source: str, skip: Set[str]) -> Iterator[CatalogItem]:
+    """
+    Read product images from a directory, zip or tar archive, or CSV manifest
+
+    Args:
+        source: Path of the directory, archive or .csv file
+        skip: Keys already stored; their image bytes are not read
+
+    Yields:
+        CatalogItem for every image not in `skip`; a manifest row whose image is missing
+        or whose price is not a number yields an item with `error` set
+    """
+    if os.path.isdir(source):
+        for root, dirs, files in os.walk(source):
+            dirs.sort()
+            for name in sorted(files):
+                path = os.path.join(root, name)
+                key = os.path.relpath(path, source).replace(os.sep, "/")
+                if _is_image(name) and key not in skip:
+                    with open(path, "rb") as f:
+                        yield CatalogItem(key, name, f.read())
+
+    elif source.lower().endswith(".csv"):
+        base = os.path.dirname(os.path.abspath(source))
+        with open(source, newline="", encoding="utf-8") as f:
+            for row in csv.DictReader(f):
+                key = row["image_path"]
+                if key in skip:
+                    continue
+                filename, product_name = os.path.basename(key), row.get("product_name")
+                price = row.get("price")
+                try:
+                    price = float(price) if price else None
+                except ValueError:
+                    yield CatalogItem(key, filename, b"", product_name=product_name, error=f"Invalid price {price!r}")
+                    continue
+                try:
+                    with open(os.path.join(base, key), "rb") as image:
+                        data = image.read()
+                except OSError as e:
+                    yield CatalogItem(key, filename, b"", product_name=product_name,
+                                      error=f"Could not read image: {e.strerror or e}")
+                    continue
+                yield CatalogItem(key, filename, data, price=price, product_name=product_name)
+
+    elif zipfile.is_zipfile(source):
+        with zipfile.ZipFile(source) as archive:
+            for info in archive.infolist():
+                if not info.is_dir() and _is_image(info.filename) and info.filename not in skip:
+                    yield CatalogItem(info.filename, os.path.basename(info.filename), archive.read(info))
+
+    elif tarfile.is_tarfile(source):
+        # Stream mode reads compressed archives sequentially instead of seeking
+        with tarfile.open(source, mode="r|*") as archive:
+            for member in archive:
+                if member.isfile() and _is_image(member.name) and member.name not in skip:
+                    yield CatalogItem(member.name, os.path.basename(member.name), archive.extractfile(member).read())
+
+    else:
+        raise ValueError(f"{source} is not a directory, zip/tar archive or CSV manifest")
+
+
+class Checkpoint:
+    """Append-only JSON-lines record of stored images, so interrupted runs resume"""
+
+    def __init__(self, path: str):
+        self.path = path
+        self.stored: Dict[str, str] = {}  # key -> vector_id
+        if os.path.exists(path):
+            with open(path) as f:
+                for line in f:
+                    line = line.strip()
+                    if line:
+                        entry = json.loads(line)
+                        if entry.get("vector_id"):
+                            self.stored[entry["key"]] = entry["vector_id"]
+
+    def record(self, entries: List[Dict[str, Any]]):
+        """Durably append results; only entries with a vector_id count as stored on resume"""
+        with open(self.path, "a") as f:
+            for entry in entries:
+                f.write(json.dumps(entry) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+        for entry in entries:
+            if entry.get("vector_id"):
+                self.stored[entry["key"]] = entry["vector_id"]
+
+
+class CatalogIngester:
+    """Decode, embed and store a stream of catalog images in overlapping pipeline stages"""
+
+    def __init__(
+        self,
+        embedding_service,
+        vector_service,
+        batch_size: int = 32,
+        upsert_chunk: Optional[int] = None,
+        upsert_parallel: Optional[int] = None,
+        upload_to_firebase: bool = True,
+        upload_workers: int = 8,
+        max_in_flight: int = 2
+    ):
+        """
+        Args:
+            embedding_service: ImageEmbeddingService with (or able to load) a model
+            vector_service: Vector store (Qdrant or in-process) whose catalog collection receives the points
+            batch_size: Images per decode/inference batch
+            upsert_chunk: Points per Qdrant upsert request (default QDRANT_UPSERT_CHUNK_SIZE)
+            upsert_parallel: Upsert requests in flight (default QDRANT_UPSERT_PARALLEL)
+            upload_to_firebase: Upload each image to Firebase Storage, as /upload-and-store does
+            upload_workers: Parallel Firebase uploads
+            max_in_flight: Batches allowed between reading and storing (bounds memory)
+        """
+        self.embedding_service = embedding_service
+        self.vector_service = vector_service
+        self.batch_size = batch_size
+        self.upsert_chunk = upsert_chunk or config.QDRANT_UPSERT_CHUNK_SIZE
+        self.upsert_parallel = upsert_parallel or config.QDRANT_UPSERT_PARALLEL
+        self.upload_to_firebase = upload_to_firebase
+        self.upload_workers = upload_workers
+        self.max_in_flight = max_in_flight
+
+        self._pending_embeddings: List[Embedding] = []
+        self._pending_payloads: List[Dict[str, Any]] = []
+        self._pending_keys: List[str] = []
+        self.stage_seconds = {"read": 0.0, "decode": 0.0, "inference": 0.0, "upload": 0.0, "upsert": 0.0}
+        self.stored = 0
+        self.failed = 0
+        self.errors: List[Dict[str, str]] = []
+
+    def _fail(self, key: str, error: str) -> Dict[str, Any]:
+        self.failed += 1
+        if len(self.errors) < 50:
+            self.errors.append({"key": key, "error": error})
+        return {"key": key, "error": error}
+
+    def _decode(self, items: List[CatalogItem]) -> Dict[str, Any]:
+        """Decode stage: parallel decode into one batch buffer plus perceptual hashes"""
+        started = time.perf_counter()
+        errors: List[Optional[str]] = [item.error for item in items]
+        for index, item in enumerate(items):
+            if errors[index] is None and len(item.data) > config.MAX_FILE_SIZE:
+                errors[index] = f"File size {len(item.data)} bytes exceeds maximum allowed size of {config.MAX_FILE_SIZE} bytes"
+        # Only images that can still be stored are decoded
+        readable = [index for index, error in enumerate(errors) if error is None]
+        decode_errors: List[Optional[str]] = []
+        # Stored with the point so later uploads of the same product reuse its vector
+        decode_hashes: List[Optional[str]] = []
+        pixels = decode_images([items[index].data for index in readable], errors=decode_errors, hashes=decode_hashes)
+        hashes: List[Optional[str]] = [None] * len(items)
+        for index, error, image_hash in zip(readable, decode_errors, decode_hashes):
+            if error is not None:
+                errors[index] = error
+            hashes[index] = image_hash
+        self.stage_seconds["decode"] += time.perf_counter() - started
+        return {
+            "items": items,
+            "pixels": pixels,
+            "pixel_rows": {index: row for row, index in enumerate(readable)},
+            "errors": errors,
+            "hashes": hashes
+        }
+
+    def _embed(self, batch: Dict[str, Any]) -> Dict[str, Any]:
+        """Inference stage: one forward pass over the images that decoded"""
+        started = time.perf_counter()
+        good = [index for index, error in enumerate(batch["errors"]) if error is None]
+        rows = [batch["pixel_rows"][index] for index in good]
+        embeddings = self.embedding_service.embed_pixels(batch["pixels"][rows]) if good else None
+        batch["embeddings"] = dict(zip(good, embeddings)) if good else {}
+        batch["inference_s"] = time.perf_counter() - started
+        del batch["pixels"], batch["pixel_rows"]
+        self.stage_seconds["inference"] += batch["inference_s"]
+        return batch
+
+    def _upload(self, item: CatalogItem, content_type: str):
+        return asyncio.run(self.firebase_service.upload_image(item.data, item.filename, content_type))
+
+    def _store(self, batch: Dict[str, Any]):
+        """Store stage: Firebase uploads, payloads, and a batch upsert once enough points accumulate"""
+        items: List[CatalogItem] = batch["items"]
+        content_types = [mimetypes.guess_type(item.filename)[0] or "image/jpeg" for item in items]
+        uploads = [(True, None, None)] * len(items)
+        if self.upload_to_firebase:
+            started = time.perf_counter()
+            with ThreadPoolExecutor(max_workers=self.upload_workers, thread_name_prefix="firebase") as pool:
+                uploads = list(pool.map(
+                    lambda index: self._upload(items[index], content_types[index])
+                    if batch["errors"][index] is None else (True, None, None),
+                    range(len(items))
+                ))
+            self.stage_seconds["upload"] += time.perf_counter() - started
+
+        entries = []
+        per_image_s = batch["inference_s"] / max(len(batch["embeddings"]), 1)
+        for index, item in enumerate(items):
+            error = batch["errors"][index]
+            if error is None and not uploads[index][0]:
+                error = "Failed to upload image to Firebase Storage"
+            if error is not None:
+                entries.append(self._fail(item.key, error))
+                continue
+            try:
+                embedding = Embedding(batch["embeddings"][index]).validate(self.vector_service.vector_size)
+            except ValueError as e:
+                entries.append(self._fail(item.key, str(e)))
+                continue
+
+            _, firebase_url, firebase_path = uploads[index]
+            payload = self.vector_service.build_catalog_payload(
+                filename=item.filename,
+                file_size=len(item.data),
+                content_type=content_types[index],
+                processing_time=round(per_image_s, 4),
+                model_used=self.embedding_service.model_name,
+                firebase_url=firebase_url,
+                firebase_path=firebase_path,
+                price=item.price,
+                product_name=item.product_name,
+                metadata={
+                    "processing_id": str(uuid.uuid4()),
+                    "embedding_shape": embedding.shape,
+                    "upload_method": "bulk_ingest",
+                    "source_key": item.key,
+                    "price": item.price,
+                    "product_name": item.product_name
+                },
+                image_hash=batch["hashes"][index],
+                model_id=self.embedding_service.model_id
+            )
+            self._pending_embeddings.append(embedding)
+            self._pending_payloads.append(payload)
+            self._pending_keys.append(item.key)
+
+        # Failures are recorded right away; stored images once they are upserted
+        if entries:
+            self.checkpoint.record(entries)
+        # Enough points for every parallel upsert request to carry a full chunk
+        if len(self._pending_embeddings) >= self.upsert_chunk * self.upsert_parallel:
+            self._flush()
+
+    def _run_async(self, coroutine):
+        """Run a vector service coroutine on the ingester's event loop, where the Qdrant connection pool lives"""
+        return asyncio.run_coroutine_threadsafe(coroutine, self._loop).result()
+
+    def _flush(self):
+        """Upsert all pending points with store_embeddings_batch and checkpoint the results"""
+        if not self._pending_embeddings:
+            return
+        embeddings, self._pending_embeddings = self._pending_embeddings, []
+        payloads, self._pending_payloads = self._pending_payloads, []
+        keys, self._pending_keys = self._pending_keys, []
+
+        started = time.perf_counter()
+        results = self._run_async(self.vector_service.store_embeddings_batch(
+            embeddings, payloads, chunk_size=self.upsert_chunk, parallel=self.upsert_parallel
+        ))
+        self.stage_seconds["upsert"] += time.perf_counter() - started
+
+        entries = []
+        for key, result in zip(keys, results):
+            if result["vector_id"]:
+                self.stored += 1
+                entries.append({"key": key, "vector_id": result["vector_id"]})
+            else:
+                entries.append(self._fail(key, result["error"]))
+        self.checkpoint.record(entries)
+        print(f"   📦 Stored {self.stored} images ({self.failed} failed)")
+
+    def _batches(self, source: str) -> Iterator[List[CatalogItem]]:
+        """Read stage: group source items into batches, timing only the reading itself"""
+        batch = []
+        iterator = iter_catalog(source, skip=set(self.checkpoint.stored))
+        while True:
+            started = time.perf_counter()
+            item = next(iterator, None)
+            self.stage_seconds["read"] += time.perf_counter() - started
+            if item is None:
+                break
+            batch.append(item)
+            if len(batch) == self.batch_size:
+                yield batch
+                batch = []
+        if batch:
+            yield batch
+
+    def run(self, source: str, checkpoint_path: str) -> Dict[str, Any]:
+        """
+        Ingest every image of a source that is not yet in the checkpoint
+
+        Reading, decoding, inference and storing run on separate threads, so the
+        model works on one batch while the next is decoded and the previous one
+        is uploaded.
+
+        Args:
+            source: Directory, zip/tar archive or CSV manifest
+            checkpoint_path: JSON-lines checkpoint file (created if missing)
+
+        Returns:
+            Throughput report
+        """
+        from app.services.firebase_service import firebase_service
+
+        self.firebase_service = firebase_service
+        self.checkpoint = Checkpoint(checkpoint_path)
+        skipped = len(self.checkpoint.stored)
+        if skipped:
+            print(f"⏩ Resuming: {skipped} images already stored according to {checkpoint_path}")
+
+        # Fork any search workers before the first thread starts
+        self.vector_service.start_search_workers()
+        # The async Qdrant client is bound to one event loop, so all its calls go through this one
+        self._loop = asyncio.new_event_loop()
+        loop_thread = threading.Thread(target=self._loop.run_forever, name="ingest-qdrant", daemon=True)
+        loop_thread.start()
+        # One thread per stage keeps batches in order; decode_images itself uses DECODE_WORKERS threads
+        stages = {name: ThreadPoolExecutor(max_workers=1, thread_name_prefix=f"ingest-{name}")
+                  for name in ("decode", "inference", "store")}
+        in_flight = deque()
+        try:
+            if not self.vector_service.collections_initialized and not self._run_async(self.vector_service.initialize_collection()):
+                raise RuntimeError(f"Could not initialize vector store collections: {self.vector_service.init_error}")
+            self.embedding_service.load_model()
+            started = time.perf_counter()
+            for batch in self._batches(source):
+                decoded = stages["decode"].submit(self._decode, batch)
+                embedded = stages["inference"].submit(lambda f=decoded: self._embed(f.result()))
+                in_flight.append(stages["store"].submit(lambda f=embedded: self._store(f.result())))
+                while len(in_flight) > self.max_in_flight:
+                    in_flight.popleft().result()  # Re-raises a failure of any stage
+            while in_flight:
+                in_flight.popleft().result()
+            stages["store"].submit(self._flush).result()
+        finally:
+            for pool in stages.values():
+                pool.shutdown(wait=True, cancel_futures=True)
+            self._run_async(self.vector_service.close())
+            self._loop.call_soon_threadsafe(self._loop.stop)
+            loop_thread.join()
+            self._loop.close()
+
+        wall_s = time.perf_counter() - started
+        return {
+            "source": source,
+            "collection": self.vector_service.collection_name,
+            "model_id": self.embedding_service.model_id,
+            "batch_size": self.batch_size,
+            "upsert_chunk": self.upsert_chunk,
+            "upsert_parallel": self.upsert_parallel,
+            "stored": self.stored,
+            "failed": self.failed,
+            "skipped_from_checkpoint": skipped,
+            "wall_s": round(wall_s, 2),
+            "images_per_sec": round(self.stored / wall_s, 2) if wall_s > 0 else 0.0,
+            # Stages overlap, so their busy times add up to more than the wall time
+            "stage_busy_s": {name: round(seconds, 2) for name, seconds in self.stage_seconds.items()},
+            "errors": self.errors
+        }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Bulk-ingest catalog images into the vector database")
+    parser.add_argument("source", help="Directory, .zip/.tar(.gz) archive or CSV manifest (image_path,price,product_name)")
+    parser.add_argument("--checkpoint", help="Checkpoint file (default: <source>.ingest.jsonl)")
+    parser.add_argument("--batch-size", type=int, default=32, help="Images per inference batch")
+    parser.add_argument("--upsert-chunk", type=int, help="Points per Qdrant upsert request (default QDRANT_UPSERT_CHUNK_SIZE)")
+    parser.add_argument("--upsert-parallel", type=int, help="Upsert requests in flight (default QDRANT_UPSERT_PARALLEL)")
+    parser.add_argument("--no-firebase", action="store_true", help="Do not upload the images to Firebase Storage")
+    parser.add_argument("--upload-workers", type=int, default=8, help="Parallel Firebase uploads")
+    parser.add_argument("--report", help="Write the throughput report as JSON")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+
+    from app.services.embedding_service import ImageEmbeddingService
+    from app.services.vector_service import vector_service
+
+    ingester = CatalogIngester(
+        ImageEmbeddingService(),
+        vector_service,
+        batch_size=args.batch_size,
+        upsert_chunk=args.upsert_chunk,
+        upsert_parallel=args.upsert_parallel,
+        upload_to_firebase=not args.no_firebase,
+        upload_workers=args.upload_workers
+    )
+    checkpoint = args.checkpoint or f"{args.source.rstrip('/' + os.sep)}.ingest.jsonl"
+    print(f"🚚 Ingesting {args.source} into {vector_service.collection_name} (checkpoint {checkpoint})")
+    report = ingester.run(args.source, checkpoint)
+
+    print(json.dumps(report, indent=2))
+    if args.report:
+        with open(args.report, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"📄 Report written to {args.report}")
+    print(f"✅ Stored {report['stored']} images in {report['wall_s']}s ({report['images_per_sec']} img/s), "
+          f"{report['failed']} failed")
+
+
+if __name__ == "__main__":
+    main()
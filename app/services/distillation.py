@@ -0,0 +1,171 @@
+"""
+Embedding Model Distillation
+Trains a compact student network to reproduce the embeddings of the active
+(teacher) model, so it can serve searches against the vectors already stored
+in Qdrant without re-embedding the catalog
+
+The student is a small registered backbone (MobileNetV3 by default) with a
+linear projection to the teacher's vector size, trained with a cosine loss on
+catalog images and their teacher vectors. It is exported as a SavedModel
+artifact in the teacher's embedding space and served by StudentBackend.
+"""
+import logging
+import time
+from typing import Any, Dict, Optional
+
+import numpy as np
+
+from app.services.model_artifacts import save_artifact
+from app.services.model_registry import get_model_spec
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_BACKBONE = "mobilenet_v3_large"
+
+
+def build_student(embedding_size: int, backbone: str = DEFAULT_BACKBONE, weights: Optional[str] = "imagenet"):
+    """
+    Build a student network: registered backbone plus a linear projection
+
+    Args:
+        embedding_size: Size of the teacher vectors to regress
+        backbone: Registered model key used as the feature extractor
+        weights: Backbone initialization ('imagenet', a weights file, or None)
+
+    Returns:
+        Keras model taking float32 RGB pixels in [0, 255]
+    """
+    import tensorflow as tf
+
+    spec = get_model_spec(backbone)
+    if spec.preprocessing != "raw":
+        raise ValueError(f"Student backbone '{backbone}' must take raw pixels")
+
+    features = spec.build(weights=weights)
+    embeddings = tf.keras.layers.Dense(embedding_size, name="projection")(features.output)
+    return tf.keras.Model(features.input, embeddings, name=f"{backbone}_student")
+
+
+def _set_backbone_trainable(model, trainable: bool):
+    """Freeze or unfreeze everything but the projection; BatchNorm statistics always stay frozen"""
+    import tensorflow as tf
+
+    for layer in model.layers:
+        if layer.name == "projection":
+            continue
+        layer.trainable = trainable and not isinstance(layer, tf.keras.layers.BatchNormalization)
+
+
+def train_student(
+    model,
+    pixels: np.ndarray,
+    targets: np.ndarray,
+    epochs: int = 10,
+    freeze_epochs: int = 2,
+    batch_size: int = 32,
+    learning_rate: float = 1e-3,
+    validation: Optional[tuple] = None
+) -> Dict[str, Any]:
+    """
+    Fit the student to the teacher vectors with a cosine loss
+
+    The first freeze_epochs only train the projection on top of the frozen
+    backbone; the remaining epochs fine-tune the backbone at a tenth of the
+    learning rate.
+
+    Args:
+        model: Network from build_student
+        pixels: uint8 training images of shape (N, 224, 224, 3)
+        targets: float32 teacher vectors of shape (N, embedding_size)
+        epochs: Total training epochs
+        freeze_epochs: Epochs with the backbone frozen
+        batch_size: Images per step
+        learning_rate: Adam learning rate for the frozen phase
+        validation: Optional (pixels, targets) held out for validation loss
+
+    Returns:
+        Per-epoch losses and training time
+    """
+    import tensorflow as tf
+
+    history: Dict[str, list] = {"loss": [], "val_loss": []}
+    started = time.perf_counter()
+    phases = [(min(freeze_epochs, epochs), False, learning_rate), (epochs - min(freeze_epochs, epochs), True, learning_rate / 10)]
+
+    for phase_epochs, fine_tune, phase_lr in phases:
+        if phase_epochs <= 0:
+            continue
+        _set_backbone_trainable(model, fine_tune)
+        # Recompile after changing trainable flags; Qdrant ranks by cosine, so only direction matters
+        model.compile(optimizer=tf.keras.optimizers.Adam(phase_lr), loss=tf.keras.losses.CosineSimilarity(axis=-1))
+        # uint8 batches are cast to float32 by the model input, so the dataset is never copied as floats
+        result = model.fit(
+            pixels, targets,
+            batch_size=batch_size,
+            epochs=phase_epochs,
+            validation_data=validation,
+            shuffle=True,
+            verbose=2
+        )
+        history["loss"] += [round(float(value), 6) for value in result.history["loss"]]
+        history["val_loss"] += [round(float(value), 6) for value in result.history.get("val_loss", [])]
+
+    scale = _match_scale(model, pixels, targets)
+    logger.info(f"Trained student on {len(pixels)} images in {time.perf_counter() - started:.1f}s")
+    return {
+        **history,
+        "epochs": epochs,
+        "images": int(len(pixels)),
+        "norm_scale": round(scale, 6),
+        "train_s": round(time.perf_counter() - started, 1)
+    }
+
+
+def _match_scale(model, pixels: np.ndarray, targets: np.ndarray, sample: int = 256) -> float:
+    """
+    Rescale the projection so student vectors have the teacher's typical length
+
+    The cosine loss leaves the length free. Qdrant ranks by cosine either way, but
+    code that averages or compares raw stored vectors should see familiar magnitudes.
+    """
+    predicted = model.predict(pixels[:sample], batch_size=32, verbose=0)
+    scale = float(np.linalg.norm(targets[:sample], axis=1).mean() / max(np.linalg.norm(predicted, axis=1).mean(), 1e-12))
+    projection = model.get_layer("projection")
+    projection.set_weights([weight * scale for weight in projection.get_weights()])
+    return scale
+
+
+def export_student(
+    model,
+    artifact_dir: str,
+    backbone: str,
+    teacher_model_id: str,
+    teacher_key: Optional[str] = None,
+    evaluation: Optional[Dict[str, Any]] = None
+) -> Dict[str, Any]:
+    """
+    Export a trained student as a SavedModel artifact in the teacher's embedding space
+
+    The manifest's model_key is the teacher's, so the artifact is only loaded
+    against the collection the teacher's vectors live in.
+
+    Args:
+        model: Trained network from build_student
+        artifact_dir: Output directory (must not already contain an artifact)
+        backbone: Registered model key of the student backbone
+        teacher_model_id: model_id() of the backend the targets came from
+        teacher_key: Registered model key of the teacher (defaults to EMBEDDING_MODEL)
+        evaluation: Evaluation report to record in the manifest
+
+    Returns:
+        The written manifest
+    """
+    teacher = get_model_spec(teacher_key)
+    return save_artifact(model, artifact_dir, get_model_spec(backbone), {
+        "model_name": f"{teacher.display_name} student ({get_model_spec(backbone).display_name})",
+        "model_key": teacher.key,
+        "student_backbone": backbone,
+        "distilled_from": teacher_model_id,
+        "parameters": int(model.count_params()),
+        "evaluation": evaluation or {}
+    })
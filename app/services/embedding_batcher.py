@@ -0,0 +1,172 @@
+"""
+Dynamic micro-batching front-end for embedding inference
+Collects concurrent embedding requests for a short window and runs them as one forward pass
+"""
+import asyncio
+import logging
+import time
+from typing import Any, Callable, Dict, List, Optional, Set
+
+logger = logging.getLogger(__name__)
+
+
+class EmbeddingBatcher:
+    """Group concurrent embedding requests into batched model calls"""
+
+    def __init__(
+        self,
+        batch_fn: Callable[[List[Any]], List[Any]],
+        max_batch_size: int = 16,
+        window_ms: float = 5.0,
+        executor=None,
+        max_in_flight: int = 1
+    ):
+        """
+        Args:
+            batch_fn: Synchronous function turning a list of submitted items into one result per item
+                (an exception instance for an item that failed on its own)
+            max_batch_size: Largest number of images sent to the model at once (an item
+                may hold several images; see submit)
+            window_ms: How long to wait for more requests after the first one arrives
+            executor: Executor used to run batch_fn (None uses the loop's default executor)
+            max_in_flight: Batches that may run at once; match it to the executor's workers.
+                While all are busy, new requests keep queueing and form the next batch.
+        """
+        self.batch_fn = batch_fn
+        self.max_batch_size = max(1, max_batch_size)
+        self.window = max(0.0, window_ms) / 1000.0
+        self.executor = executor
+        self.max_in_flight = max(1, max_in_flight)
+        self._queue: Optional[asyncio.Queue] = None
+        self._worker: Optional[asyncio.Task] = None
+        # Batches currently running on the executor
+        self._running: Set[asyncio.Task] = set()
+        # Request that did not fit in the previous batch; it starts the next one
+        self._carried: Optional[tuple] = None
+
+        # Metrics
+        self.total_requests = 0
+        self.total_images = 0
+        self.total_batches = 0
+        self.max_batch_seen = 0
+        self.batch_size_histogram: Dict[int, int] = {}
+        self.total_queue_wait = 0.0
+        self.max_queue_wait = 0.0
+
+    def _ensure_worker(self):
+        """Start the background batching task on the running event loop"""
+        if self._worker is None or self._worker.done():
+            self._queue = asyncio.Queue()
+            self._worker = asyncio.get_running_loop().create_task(self._run())
+
+    async def submit(self, item: Any, images: int = 1) -> Any:
+        """
+        Queue one request and wait for its result from a batched forward pass
+
+        Args:
+            item: What batch_fn receives for this request (e.g. raw image bytes)
+            images: Number of images in the item; a request is never split across batches
+
+        Returns:
+            The result produced by batch_fn for this item
+        """
+        self._ensure_worker()
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put((item, images, future, time.perf_counter()))
+        return await future
+
+    async def _collect_batch(self) -> list:
+        """Wait for the first request, then gather more until the window closes or the batch is full"""
+        if self._carried is not None:
+            batch, self._carried = [self._carried], None
+        else:
+            batch = [await self._queue.get()]
+        images = batch[0][1]
+        deadline = time.perf_counter() + self.window
+
+        while images < self.max_batch_size:
+            remaining = deadline - time.perf_counter()
+            if remaining <= 0:
+                # Still take whatever is already waiting without blocking
+                if self._queue.empty():
+                    break
+                request = self._queue.get_nowait()
+            else:
+                try:
+                    request = await asyncio.wait_for(self._queue.get(), timeout=remaining)
+                except asyncio.TimeoutError:
+                    break
+            if images + request[1] > self.max_batch_size:
+                self._carried = request
+                break
+            batch.append(request)
+            images += request[1]
+
+        return batch
+
+    async def _run(self):
+        """Background loop that turns queued requests into model batches, up to max_in_flight at once"""
+        loop = asyncio.get_running_loop()
+        slots = asyncio.Semaphore(self.max_in_flight)
+        while True:
+            # Only start collecting once a batch can run, so requests that arrive meanwhile join it
+            await slots.acquire()
+            batch = await self._collect_batch()
+            started = time.perf_counter()
+            self._record_batch(batch, [started - enqueued for _, _, _, enqueued in batch])
+
+            task = loop.create_task(self._run_batch(batch))
+            self._running.add(task)
+            task.add_done_callback(self._running.discard)
+            task.add_done_callback(lambda _: slots.release())
+
+    async def _run_batch(self, batch: list):
+        """Run one batch on the executor and hand each caller its result"""
+        try:
+            results = await asyncio.get_running_loop().run_in_executor(
+                self.executor, self.batch_fn, [item for item, _, _, _ in batch]
+            )
+        except Exception as e:
+            logger.error(f"Batched inference failed for {len(batch)} requests: {str(e)}")
+            for _, _, future, _ in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+
+        for (_, _, future, _), result in zip(batch, results):
+            if future.done():
+                continue
+            # An image that failed on its own only fails its own request
+            if isinstance(result, Exception):
+                future.set_exception(result)
+            else:
+                future.set_result(result)
+
+    def _record_batch(self, batch: list, waits: List[float]):
+        """Update batch-size and queue-wait counters"""
+        batch_size = sum(images for _, images, _, _ in batch)
+        self.total_requests += len(batch)
+        self.total_images += batch_size
+        self.total_batches += 1
+        self.max_batch_seen = max(self.max_batch_seen, batch_size)
+        self.batch_size_histogram[batch_size] = self.batch_size_histogram.get(batch_size, 0) + 1
+        self.total_queue_wait += sum(waits)
+        self.max_queue_wait = max(self.max_queue_wait, max(waits))
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get batch-size and queue-wait metrics"""
+        return {
+            "max_batch_size": self.max_batch_size,
+            "window_ms": round(self.window * 1000, 3),
+            "max_in_flight": self.max_in_flight,
+            "in_flight": len(self._running),
+            "total_requests": self.total_requests,
+            "total_images": self.total_images,
+            "total_batches": self.total_batches,
+            "avg_batch_size": round(self.total_images / self.total_batches, 3) if self.total_batches else 0.0,
+            "max_batch_seen": self.max_batch_seen,
+            "batch_size_histogram": {str(size): count for size, count in sorted(self.batch_size_histogram.items())},
+            "avg_queue_wait_ms": round(self.total_queue_wait / self.total_requests * 1000, 3) if self.total_requests else 0.0,
+            "max_queue_wait_ms": round(self.max_queue_wait * 1000, 3),
+            "pending": self._queue.qsize() if self._queue is not None else 0
+        }
@@ -0,0 +1,174 @@
+"""
+Content-hash embedding cache
+Remembers embeddings of byte-identical uploads so they skip decoding and inference
+
+Entries are keyed by the SHA-256 of the image bytes and namespaced by the
+model identity, so switching the model, its weights or the preprocessing
+starts from an empty cache instead of serving stale vectors.
+"""
+import hashlib
+import logging
+import os
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Optional
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+
+class EmbeddingCache:
+    """Two-tier (in-memory LRU + on-disk) cache of float32 embeddings"""
+
+    def __init__(self, model_id: str, max_entries: int = 4096, disk_dir: Optional[str] = None):
+        """
+        Args:
+            model_id: Identity of the model and preprocessing that produced the embeddings
+            max_entries: Most embeddings kept in memory (0 disables the memory tier)
+            disk_dir: Root directory of the on-disk tier (None disables it)
+        """
+        self.model_id = model_id
+        self.namespace = hashlib.sha256(model_id.encode("utf-8")).hexdigest()[:16]
+        self.max_entries = max(0, max_entries)
+        self.disk_dir = os.path.join(disk_dir, self.namespace) if disk_dir else None
+
+        self._memory: "OrderedDict[str, np.ndarray]" = OrderedDict()
+        self._lock = threading.Lock()
+
+        # Metrics
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.disk_writes = 0
+        self.disk_errors = 0
+
+        if self.disk_dir:
+            os.makedirs(self.disk_dir, exist_ok=True)
+            # Record which model a namespace belongs to, for whoever cleans up old ones
+            model_file = os.path.join(self.disk_dir, "model.txt")
+            if not os.path.exists(model_file):
+                with open(model_file, "w") as f:
+                    f.write(model_id + "\n")
+
+    @staticmethod
+    def content_key(image_bytes: bytes) -> str:
+        """Cache key of an uploaded file"""
+        return hashlib.sha256(image_bytes).hexdigest()
+
+    def _disk_path(self, key: str) -> str:
+        return os.path.join(self.disk_dir, key[:2], f"{key}.f32")
+
+    def _remember(self, key: str, embedding: np.ndarray):
+        """Insert into the memory tier, evicting the least recently used entries"""
+        if self.max_entries == 0:
+            return
+        with self._lock:
+            self._memory[key] = embedding
+            self._memory.move_to_end(key)
+            while len(self._memory) > self.max_entries:
+                self._memory.popitem(last=False)
+                self.evictions += 1
+
+    def get_memory(self, key: str) -> Optional[np.ndarray]:
+        """
+        Look a key up in the memory tier only (never touches the disk)
+
+        Returns:
+            The cached embedding, or None without counting a miss
+        """
+        with self._lock:
+            embedding = self._memory.get(key)
+            if embedding is not None:
+                self._memory.move_to_end(key)
+                self.memory_hits += 1
+            return embedding
+
+    def get(self, key: str) -> Optional[np.ndarray]:
+        """
+        Look a key up in memory, then on disk
+
+        Disk hits are promoted to the memory tier.
+
+        Args:
+            key: Value of content_key() for the image
+
+        Returns:
+            Read-only float32 embedding, or None on a miss
+        """
+        embedding = self.get_memory(key)
+        if embedding is not None:
+            return embedding
+
+        if self.disk_dir:
+            path = self._disk_path(key)
+            if os.path.exists(path):
+                try:
+                    embedding = np.fromfile(path, dtype="<f4")
+                except OSError as e:
+                    logger.warning(f"Could not read cached embedding {path}: {str(e)}")
+                else:
+                    embedding.setflags(write=False)
+                    self._remember(key, embedding)
+                    with self._lock:
+                        self.disk_hits += 1
+                    return embedding
+
+        with self._lock:
+            self.misses += 1
+        return None
+
+    def put(self, key: str, embedding: np.ndarray):
+        """
+        Store an embedding in both tiers
+
+        Args:
+            key: Value of content_key() for the image
+            embedding: 1-D embedding vector
+        """
+        embedding = np.array(embedding, dtype=np.float32).reshape(-1)
+        embedding.setflags(write=False)
+        self._remember(key, embedding)
+
+        if self.disk_dir:
+            path = self._disk_path(key)
+            if os.path.exists(path):
+                return
+            # Write to a temporary name first so readers never see a partial vector
+            tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+            try:
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+                embedding.astype("<f4").tofile(tmp_path)
+                os.replace(tmp_path, path)
+            except OSError as e:
+                with self._lock:
+                    self.disk_errors += 1
+                logger.warning(f"Could not write cached embedding {path}: {str(e)}")
+                return
+            with self._lock:
+                self.disk_writes += 1
+
+    def clear_memory(self):
+        """Drop the memory tier (the disk tier is kept)"""
+        with self._lock:
+            self._memory.clear()
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get hit, miss and eviction counters"""
+        with self._lock:
+            lookups = self.memory_hits + self.disk_hits + self.misses
+            return {
+                "model_id": self.model_id,
+                "namespace": self.namespace,
+                "memory_entries": len(self._memory),
+                "max_memory_entries": self.max_entries,
+                "disk_dir": self.disk_dir,
+                "memory_hits": self.memory_hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+                "hit_rate": round((self.memory_hits + self.disk_hits) / lookups, 4) if lookups else 0.0,
+                "evictions": self.evictions,
+                "disk_writes": self.disk_writes,
+                "disk_errors": self.disk_errors
+            }
@@ -1,34 +1,232 @@
 """
 Image Embedding Service using TensorFlow/Keras
 """
-import tensorflow as tf
-from tensorflow.keras.applications import ResNet50
-from tensorflow.keras.applications.resnet50 import preprocess_input
-from tensorflow.keras.preprocessing import image
 import numpy as np
-from PIL import Image
-import io
-from typing import List, Tuple
+import asyncio
+import functools
+import logging
+import threading
+import time
+from contextlib import asynccontextmanager
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, List, Tuple, Optional, Union
+from app.config import config
+from app.models.embedding import Embedding
+from app.services.embedding_batcher import EmbeddingBatcher
+from app.services.embedding_cache import EmbeddingCache
+from app.services.image_preprocessing import (
+    decode_image, decode_image_with_hash, decode_images, get_decode_executor, perceptual_hash, preprocessing_id
+)
+from app.services.inference_backends import InferenceBackend, RemoteBackend, create_backend
+from app.services.model_registry import get_model_spec
+from app.services.runtime_profile import apply_runtime_profile, get_runtime_settings
 
-# Set TensorFlow to be deterministic
-tf.config.experimental.enable_op_determinism()
-# Set random seeds for reproducibility
-tf.random.set_seed(42)
-np.random.seed(42)
+logger = logging.getLogger(__name__)
+
+class PreparedImage:
+    """An upload after the cache lookup: either its cached embedding or its decoded pixels"""
+    
+    __slots__ = ("cache_key", "embedding", "pixels", "image_hash")
+    
+    def __init__(
+        self,
+        cache_key: Optional[str],
+        embedding: Optional[np.ndarray] = None,
+        pixels: Optional[np.ndarray] = None,
+        image_hash: Optional[str] = None
+    ):
+        """
+        Args:
+            cache_key: Content key of the image bytes (None when the cache is disabled)
+            embedding: Cached embedding, when the cache answered
+            pixels: uint8 array of shape (224, 224, 3), when the image had to be decoded
+            image_hash: Perceptual hash, taken from the same decode as the pixels
+        """
+        self.cache_key = cache_key
+        self.embedding = embedding
+        self.pixels = pixels
+        self.image_hash = image_hash
+
+class PreparedBatch:
+    """Several uploads after the cache lookup: cached embeddings, plus one buffer with the others decoded"""
+    
+    __slots__ = ("cache_keys", "embeddings", "pixels", "pixel_rows", "image_hashes", "errors")
+    
+    def __init__(
+        self,
+        cache_keys: List[Optional[str]],
+        embeddings: List[Optional[np.ndarray]],
+        pixels: np.ndarray,
+        pixel_rows: List[int],
+        image_hashes: List[Optional[str]],
+        errors: List[Optional[str]]
+    ):
+        """
+        Args:
+            cache_keys: Content key per image (None when the cache is disabled)
+            embeddings: Per image, the cached embedding or None (filled in by embed_prepared_batch_async)
+            pixels: uint8 array of shape (M, 224, 224, 3) with the images that were not cached, in order
+            pixel_rows: Index of the image behind each row of pixels
+            image_hashes: Perceptual hash per image (None if it could not be decoded)
+            errors: None per image, or why it could not be decoded
+        """
+        self.cache_keys = cache_keys
+        self.embeddings = embeddings
+        self.pixels = pixels
+        self.pixel_rows = pixel_rows
+        self.image_hashes = image_hashes
+        self.errors = errors
 
 class ImageEmbeddingService:
-    def __init__(self):
-        """Initialize the embedding service with a pre-trained model"""
-        # Load pre-trained ResNet50 model without the top classification layer
-        # This gives us a 2048-dimensional feature vector
-        self.model = ResNet50(
-            weights='imagenet',
-            include_top=False,
-            pooling='avg'  # Global average pooling to get fixed-size output
+    def __init__(self, model_server_socket: Optional[str] = None, backend: Optional[str] = None):
+        """
+        Initialize the embedding service
+        
+        The model itself is not loaded here; call load_model() (or start_background_load())
+        or let the first embedding request load it.
+        
+        Args:
+            model_server_socket: Unix socket of a shared model server. None uses
+                MODEL_SERVER_SOCKET from config; an empty string forces an in-process model.
+            backend: In-process inference backend name (defaults to INFERENCE_BACKEND)
+        """
+        if model_server_socket is None:
+            model_server_socket = config.MODEL_SERVER_SOCKET
+        
+        self.model_server_socket = model_server_socket
+        self.backend_name = backend
+        self.backend: Optional[InferenceBackend] = None
+        self.model_state = "not_loaded"  # not_loaded -> loading -> ready | failed
+        self.load_error: Optional[str] = None
+        self._load_lock = threading.Lock()
+        # Startup cost split into runtime import, model load and warmup
+        self.startup_timings = {"import_s": 0.0, "load_s": 0.0, "warmup_s": 0.0}
+        
+        # Registered model selected with EMBEDDING_MODEL
+        self.model_spec = get_model_spec()
+        self.model_name = self.model_spec.display_name
+        self.embedding_size = self.model_spec.embedding_size
+        self._batcher: Optional[EmbeddingBatcher] = None
+        self.model_id: Optional[str] = None
+        self.cache: Optional[EmbeddingCache] = None
+        
+        # Dedicated executor so model forward passes never run on the asyncio event loop
+        self._executor = ThreadPoolExecutor(
+            max_workers=config.INFERENCE_WORKERS,
+            thread_name_prefix="inference"
         )
-        self.model_name = "ResNet50"
-        self.embedding_size = 2048
+        self._pending: Optional[asyncio.Semaphore] = None
+        self._pending_count = 0
+    
+    @property
+    def is_ready(self) -> bool:
+        """Whether the model is loaded and warmed up"""
+        return self.model_state == "ready"
+    
+    def load_model(self) -> InferenceBackend:
+        """
+        Load (or connect to) the model and warm it up, once
+        
+        Safe to call from several threads; later callers wait for the first load.
+        A failed load is retried on the next call.
+        
+        Returns:
+            The ready inference backend
+        """
+        if self.backend is not None:
+            return self.backend
         
+        with self._load_lock:
+            if self.backend is not None:
+                return self.backend
+            
+            self.model_state = "loading"
+            try:
+                # CPU affinity and oneDNN must be settled before any runtime is imported
+                apply_runtime_profile()
+                if self.model_server_socket:
+                    # The model lives in a separate process; this worker only decodes images
+                    backend = RemoteBackend(self.model_server_socket)
+                    server_model = backend.client.get_info().get("model_key", "resnet50")
+                    if server_model != self.model_spec.key:
+                        raise RuntimeError(
+                            f"Model server at {self.model_server_socket} runs '{server_model}' "
+                            f"but EMBEDDING_MODEL is '{self.model_spec.key}'"
+                        )
+                    logger.info(f"Using shared model server at {self.model_server_socket}")
+                else:
+                    backend = create_backend(self.backend_name)
+                
+                timings = {"import_s": 0.0, "load_s": 0.0, "warmup_s": 0.0, **backend.timings}
+                if config.INFERENCE_WARMUP and not isinstance(backend, RemoteBackend):
+                    started = time.perf_counter()
+                    backend.warmup()
+                    timings["warmup_s"] = time.perf_counter() - started
+                model_id = backend.model_id()
+            except Exception as e:
+                self.model_state = "failed"
+                self.load_error = str(e)
+                logger.error(f"Failed to load embedding model: {str(e)}")
+                raise
+            
+            self.startup_timings = {key: round(value, 3) for key, value in timings.items()}
+            self.model_id = model_id
+            self._create_cache()
+            self.backend = backend
+            self.model_state = "ready"
+            self.load_error = None
+            logger.info(
+                f"Embedding model ready ({backend.name}): import {self.startup_timings['import_s']}s, "
+                f"load {self.startup_timings['load_s']}s, warmup {self.startup_timings['warmup_s']}s"
+            )
+            return backend
+    
+    def _create_cache(self):
+        """Set up the embedding cache for the loaded model, if enabled"""
+        if not config.EMBEDDING_CACHE_ENABLED:
+            return
+        try:
+            # Namespaced by model and preprocessing, so a different model never sees old entries
+            self.cache = EmbeddingCache(
+                model_id=f"{self.model_id}|{preprocessing_id()}",
+                max_entries=config.EMBEDDING_CACHE_MAX_ENTRIES,
+                disk_dir=config.EMBEDDING_CACHE_DIR or None
+            )
+        except OSError as e:
+            logger.warning(f"Embedding cache disabled: {str(e)}")
+    
+    def start_background_load(self):
+        """Load the model on the inference executor without blocking the caller"""
+        def load():
+            try:
+                self.load_model()
+            except Exception:
+                pass  # Already recorded in model_state/load_error; requests will retry
+        
+        self._executor.submit(load)
+    
+    def get_readiness(self) -> dict:
+        """Get model readiness for the /ready endpoint"""
+        return {
+            "ready": self.is_ready,
+            "state": self.model_state,
+            "backend": self.backend.name if self.backend is not None else (self.backend_name or config.INFERENCE_BACKEND),
+            "error": self.load_error,
+            "startup_timings": self.startup_timings if self.is_ready else None
+        }
+        
+    def decode_image(self, image_bytes: bytes) -> np.ndarray:
+        """
+        Decode image bytes into model-sized RGB pixels
+        
+        Args:
+            image_bytes: Raw image bytes
+            
+        Returns:
+            uint8 array of shape (224, 224, 3)
+        """
+        return decode_image(image_bytes)
+    
     def preprocess_image(self, image_bytes: bytes) -> np.ndarray:
         """
         Preprocess image bytes for the model
@@ -39,56 +237,399 @@ class ImageEmbeddingService:
         Returns:
             Preprocessed image array ready for model input
         """
-        # Open image from bytes
-        pil_image = Image.open(io.BytesIO(image_bytes))
+        # Add batch dimension
+        img_array = np.expand_dims(self.decode_image(image_bytes), axis=0)
+        
+        # Preprocess for the active model
+        return self.model_spec.preprocess_numpy(img_array)
+    
+    def decode_images(
+        self,
+        images: List[bytes],
+        out: Optional[np.ndarray] = None,
+        errors: Optional[List[Optional[str]]] = None
+    ) -> np.ndarray:
+        """
+        Decode several images in parallel into one batch buffer
+        
+        Args:
+            images: List of raw image bytes
+            out: Optional preallocated uint8 array of shape (N, 224, 224, 3) to fill
+            errors: Optional list receiving None or an error message per image; failed
+                rows are zero-filled instead of raising
+            
+        Returns:
+            uint8 array of shape (N, 224, 224, 3)
+        """
+        return decode_images(images, out=out, errors=errors)
+    
+    def preprocess_images(self, images: List[bytes]) -> np.ndarray:
+        """
+        Preprocess a batch of image bytes for the model
+        
+        Args:
+            images: List of raw image bytes
+            
+        Returns:
+            Preprocessed float32 array of shape (N, 224, 224, 3)
+        """
+        # Preprocess the whole batch at once rather than image by image
+        return self.model_spec.preprocess_numpy(self.decode_images(images))
+    
+    def embed_pixels(self, pixels: np.ndarray) -> np.ndarray:
+        """
+        Run the model on a batch of decoded images
         
-        # Convert to RGB if needed (in case of RGBA, grayscale, etc.)
-        if pil_image.mode != 'RGB':
-            pil_image = pil_image.convert('RGB')
+        Args:
+            pixels: uint8 array of shape (N, 224, 224, 3)
             
-        # Resize to model input size (224x224 for ResNet50)
-        pil_image = pil_image.resize((224, 224))
+        Returns:
+            float32 array of shape (N, embedding_size)
+        """
+        return self.load_model().predict(pixels)
+    
+    def generate_embeddings(self, image_bytes: bytes) -> Tuple[Embedding, List[int]]:
+        """
+        Generate embeddings for an image
         
-        # Convert to numpy array
-        img_array = np.array(pil_image)
+        Args:
+            image_bytes: Raw image bytes
+            
+        Returns:
+            Tuple of (embedding, shape_list)
+        """
+        self.load_model()
         
-        # Add batch dimension
-        img_array = np.expand_dims(img_array, axis=0)
+        # Byte-identical uploads skip decoding and inference
+        cache_key = EmbeddingCache.content_key(image_bytes) if self.cache is not None else None
+        if cache_key is not None:
+            cached = self.cache.get(cache_key)
+            if cached is not None:
+                return Embedding(cached), list(cached.shape)
+        
+        # Decode the image and add batch dimension
+        pixels = np.expand_dims(self.decode_image(image_bytes), axis=0)
         
-        # Preprocess for ResNet50
-        img_array = preprocess_input(img_array)
+        # Generate embeddings
+        embeddings = self.embed_pixels(pixels)
+        if cache_key is not None:
+            self.cache.put(cache_key, embeddings[0])
         
-        return img_array
+        # Wrap the float32 row without copying; lists are only built for JSON/Qdrant
+        embedding = Embedding(embeddings[0])
+        
+        return embedding, embedding.shape
     
-    def generate_embeddings(self, image_bytes: bytes) -> Tuple[List[float], List[int]]:
+    def prepare_image(self, image_bytes: bytes, hash_cached: bool = False) -> PreparedImage:
         """
-        Generate embeddings for an image
+        Look an image up in the embedding cache, decoding (and hashing) it only on a miss
         
         Args:
             image_bytes: Raw image bytes
+            hash_cached: Also compute the perceptual hash when the cache answers
+                (for callers that store it); costs a decode but no inference
+        """
+        cache_key = EmbeddingCache.content_key(image_bytes) if config.EMBEDDING_CACHE_ENABLED else None
+        if cache_key is not None and self.cache is not None:
+            cached = self.cache.get(cache_key)
+            if cached is not None:
+                return PreparedImage(cache_key, embedding=cached,
+                                     image_hash=perceptual_hash(image_bytes) if hash_cached else None)
+        
+        pixels, image_hash = decode_image_with_hash(image_bytes)
+        return PreparedImage(cache_key, pixels=pixels, image_hash=image_hash)
+    
+    def prepare_images(self, images: List[bytes], hash_cached: bool = False) -> PreparedBatch:
+        """
+        prepare_image() for several images: the ones the cache does not answer are decoded
+        in parallel into one batch buffer, with their perceptual hashes
+        
+        Args:
+            images: List of raw image bytes
+            hash_cached: Also compute perceptual hashes for cache hits (costs a decode each)
+        """
+        cache_keys = [
+            EmbeddingCache.content_key(image_bytes) if config.EMBEDDING_CACHE_ENABLED else None
+            for image_bytes in images
+        ]
+        embeddings = [
+            self.cache.get(key) if key is not None and self.cache is not None else None
+            for key in cache_keys
+        ]
+        pixel_rows = [index for index, embedding in enumerate(embeddings) if embedding is None]
+        decode_errors: List[Optional[str]] = []
+        decode_hashes: List[Optional[str]] = []
+        pixels = decode_images([images[index] for index in pixel_rows], errors=decode_errors, hashes=decode_hashes)
+        
+        errors: List[Optional[str]] = [None] * len(images)
+        image_hashes: List[Optional[str]] = [None] * len(images)
+        for index, error, image_hash in zip(pixel_rows, decode_errors, decode_hashes):
+            errors[index] = error
+            image_hashes[index] = image_hash
+        if hash_cached:
+            for index, embedding in enumerate(embeddings):
+                if embedding is not None:
+                    image_hashes[index] = perceptual_hash(images[index])
+        return PreparedBatch(cache_keys, embeddings, pixels, pixel_rows, image_hashes, errors)
+    
+    def _embed_blocks(self, blocks: List[Tuple[np.ndarray, List[Optional[str]]]]) -> List[np.ndarray]:
+        """
+        Embed blocks of decoded images with a single forward pass and add them to the cache
+        
+        Args:
+            blocks: (uint8 array of shape (K, 224, 224, 3), K cache keys) per block
+            
+        Returns:
+            float32 array of shape (K, embedding_size) per block
+        """
+        # Loading the model also creates the cache
+        self.load_model()
+        # A block on its own (the usual case for large blocks) is passed to the model as is
+        pixels = blocks[0][0] if len(blocks) == 1 else np.concatenate([block for block, _ in blocks])
+        embeddings = self.embed_pixels(pixels)
+        results = []
+        offset = 0
+        for block, cache_keys in blocks:
+            rows = embeddings[offset:offset + len(block)]
+            offset += len(block)
+            if self.cache is not None:
+                for key, embedding in zip(cache_keys, rows):
+                    if key is not None:
+                        self.cache.put(key, embedding)
+            results.append(rows)
+        return results
+    
+    def _embed_decodable(self, images: List[bytes]) -> List[Union[np.ndarray, Exception]]:
+        """Embed the images that decode in one forward pass; the others get a ValueError"""
+        # Decode all images in parallel straight into one batch buffer
+        errors: List[Optional[str]] = []
+        pixels = self.decode_images(images, errors=errors)
+        decoded = [index for index, error in enumerate(errors) if error is None]
+        if len(decoded) < len(images):
+            pixels = pixels[decoded]
+        rows = iter(self.embed_pixels(pixels) if decoded else [])
+        return [next(rows) if error is None else ValueError(f"Could not decode image: {error}") for error in errors]
+    
+    def generate_embeddings_batch(self, images: List[bytes]) -> List[Union[Tuple[Embedding, List[int]], Exception]]:
+        """
+        Generate embeddings for several images with a single forward pass
+        
+        Args:
+            images: List of raw image bytes
+            
+        Returns:
+            One (embedding, shape_list) tuple per input image, or a ValueError for an image
+            that could not be decoded (the other images are still embedded)
+        """
+        self.load_model()
+        if self.cache is None:
+            return [
+                result if isinstance(result, Exception) else (Embedding(result), list(result.shape))
+                for result in self._embed_decodable(images)
+            ]
+        
+        # Only run the model on images that are not cached, and on each distinct image once
+        keys = [EmbeddingCache.content_key(image_bytes) for image_bytes in images]
+        vectors = {}
+        to_embed = {}
+        for key, image_bytes in zip(keys, images):
+            if key in vectors or key in to_embed:
+                continue
+            cached = self.cache.get(key)
+            if cached is not None:
+                vectors[key] = cached
+            else:
+                to_embed[key] = image_bytes
+        
+        if to_embed:
+            for key, result in zip(to_embed, self._embed_decodable(list(to_embed.values()))):
+                if not isinstance(result, Exception):
+                    self.cache.put(key, result)
+                vectors[key] = result
+        
+        return [
+            vectors[key] if isinstance(vectors[key], Exception) else (Embedding(vectors[key]), list(vectors[key].shape))
+            for key in keys
+        ]
+    
+    @asynccontextmanager
+    async def _inference_slot(self):
+        """
+        Hold one of INFERENCE_MAX_PENDING inference slots
+        
+        Callers beyond the limit wait here instead of piling up work behind the model.
+        """
+        if self._pending is None:
+            self._pending = asyncio.Semaphore(config.INFERENCE_MAX_PENDING)
+        
+        async with self._pending:
+            self._pending_count += 1
+            try:
+                yield
+            finally:
+                self._pending_count -= 1
+    
+    async def run_in_inference_executor(self, func: Callable, *args) -> Any:
+        """
+        Run a blocking inference call on the dedicated inference executor
+        
+        Args:
+            func: Blocking function to run
+            *args: Positional arguments for func
+            
+        Returns:
+            Whatever func returns
+        """
+        async with self._inference_slot():
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self._executor, functools.partial(func, *args))
+    
+    async def prepare_image_async(self, image_bytes: bytes, hash_cached: bool = False) -> PreparedImage:
+        """
+        prepare_image() without blocking the event loop
+        
+        Memory cache hits are answered on the event loop; disk lookups and decoding
+        run on the shared decode pool, so they never hold an inference thread.
+        """
+        if self.cache is not None and not hash_cached:
+            cache_key = EmbeddingCache.content_key(image_bytes)
+            cached = self.cache.get_memory(cache_key)
+            if cached is not None:
+                return PreparedImage(cache_key, embedding=cached)
+        
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(
+            get_decode_executor(), functools.partial(self.prepare_image, image_bytes, hash_cached)
+        )
+    
+    async def embed_prepared_async(self, image: PreparedImage) -> Tuple[Embedding, List[int]]:
+        """
+        Get the embedding of a prepared image, running the model only if the cache did not answer
+        
+        When EMBEDDING_BATCHING_ENABLED is set, concurrent callers are grouped into
+        one forward pass of up to EMBEDDING_BATCH_MAX_SIZE images, waiting at most
+        EMBEDDING_BATCH_WINDOW_MS for the batch to fill, with up to INFERENCE_WORKERS
+        batches running at once. Either way the model runs on the dedicated
+        inference executor.
+        
+        Returns:
+            Tuple of (embedding, shape_list)
+        """
+        if image.embedding is not None:
+            return Embedding(image.embedding), list(image.embedding.shape)
+        
+        embedding = (await self.embed_block_async(image.pixels[np.newaxis], [image.cache_key]))[0]
+        return Embedding(embedding), list(embedding.shape)
+    
+    async def embed_block_async(self, pixels: np.ndarray, cache_keys: List[Optional[str]]) -> np.ndarray:
+        """
+        Embed a block of decoded images as one request, through the batcher when batching is on
+        
+        The block is never split, so pass at most EMBEDDING_BATCH_MAX_SIZE images; a block
+        that fills a batch on its own reaches the model without being copied.
+        
+        Args:
+            pixels: uint8 array of shape (K, 224, 224, 3)
+            cache_keys: Cache key per image (None entries are not cached)
             
         Returns:
-            Tuple of (embeddings_list, shape_list)
+            float32 array of shape (K, embedding_size)
+        """
+        if not config.EMBEDDING_BATCHING_ENABLED:
+            return (await self.run_in_inference_executor(self._embed_blocks, [(pixels, cache_keys)]))[0]
+        
+        if self._batcher is None:
+            self._batcher = EmbeddingBatcher(
+                batch_fn=self._embed_blocks,
+                max_batch_size=config.EMBEDDING_BATCH_MAX_SIZE,
+                window_ms=config.EMBEDDING_BATCH_WINDOW_MS,
+                executor=self._executor,
+                max_in_flight=config.INFERENCE_WORKERS
+            )
+        
+        async with self._inference_slot():
+            return await self._batcher.submit((pixels, cache_keys), images=len(pixels))
+    
+    async def prepare_images_async(self, images: List[bytes], hash_cached: bool = False) -> PreparedBatch:
+        """prepare_images() without blocking the event loop"""
+        loop = asyncio.get_running_loop()
+        # Not the decode pool itself: decode_images fans out onto it and waits
+        return await loop.run_in_executor(None, functools.partial(self.prepare_images, images, hash_cached))
+    
+    async def embed_prepared_batch_async(self, batch: PreparedBatch):
+        """
+        Fill in batch.embeddings for the images that decoded
+        
+        Consecutive decoded rows are sent as slices of the batch buffer, up to
+        EMBEDDING_BATCH_MAX_SIZE images each, so nothing is copied on the way to the model.
         """
-        # Preprocess the image
-        processed_image = self.preprocess_image(image_bytes)
-          # Generate embeddings
-        embeddings = self.model.predict(processed_image, verbose=0)
+        blocks: List[List[int]] = []  # [start, end) row ranges
+        for row, index in enumerate(batch.pixel_rows):
+            if batch.errors[index] is not None:
+                continue
+            if blocks and blocks[-1][1] == row and blocks[-1][1] - blocks[-1][0] < config.EMBEDDING_BATCH_MAX_SIZE:
+                blocks[-1][1] = row + 1
+            else:
+                blocks.append([row, row + 1])
         
-        # Convert to list and get shape (remove batch dimension)
-        embeddings_list = embeddings.flatten().tolist()
-        # Get the actual embedding shape without batch dimension
-        actual_shape = list(embeddings.shape[1:])  # Remove the first dimension (batch size)
+        results = await asyncio.gather(*(
+            self.embed_block_async(
+                batch.pixels[start:end],
+                [batch.cache_keys[index] for index in batch.pixel_rows[start:end]]
+            )
+            for start, end in blocks
+        ))
+        for (start, end), embeddings in zip(blocks, results):
+            for index, embedding in zip(batch.pixel_rows[start:end], embeddings):
+                batch.embeddings[index] = embedding
+    
+    async def generate_embeddings_async(self, image_bytes: bytes) -> Tuple[Embedding, List[int]]:
+        """
+        Generate embeddings without blocking the event loop
         
-        return embeddings_list, actual_shape
+        The image is looked up in the cache and decoded on the decode pool, then
+        embedded by embed_prepared_async().
+        
+        Args:
+            image_bytes: Raw image bytes
+            
+        Returns:
+            Tuple of (embedding, shape_list)
+        """
+        return await self.embed_prepared_async(await self.prepare_image_async(image_bytes))
+    
+    def get_batching_stats(self) -> dict:
+        """Get batch-size and queue-wait metrics for the micro-batching queue"""
+        if self._batcher is None:
+            return {"enabled": config.EMBEDDING_BATCHING_ENABLED, "started": False}
+        return {"enabled": config.EMBEDDING_BATCHING_ENABLED, "started": True, **self._batcher.get_stats()}
+    
+    def get_cache_stats(self) -> dict:
+        """Get hit, miss and eviction counters of the embedding cache"""
+        if self.cache is None:
+            return {"enabled": config.EMBEDDING_CACHE_ENABLED, "started": False}
+        return {"enabled": True, "started": True, **self.cache.get_stats()}
+    
+    def get_executor_stats(self) -> dict:
+        """Get occupancy of the dedicated inference executor"""
+        return {
+            "workers": config.INFERENCE_WORKERS,
+            "max_pending": config.INFERENCE_MAX_PENDING,
+            "pending": self._pending_count
+        }
     
     def get_model_info(self) -> dict:
         """Get information about the current model"""
         return {
             "model_name": self.model_name,
+            "model_key": self.model_spec.key,
             "embedding_size": self.embedding_size,
             "input_size": (224, 224, 3),
-            "description": "ResNet50 pre-trained on ImageNet, features extracted from global average pooling layer"
+            "description": self.model_spec.description,
+            **(self.backend.get_info() if self.backend is not None else {"backend": self.backend_name or config.INFERENCE_BACKEND}),
+            "model_id": self.model_id,
+            "runtime": get_runtime_settings(),
+            "model_state": self.model_state
         }
 
 # Global instance to reuse across requests
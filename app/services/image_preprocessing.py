@@ -0,0 +1,217 @@
+"""
+Image decoding and preprocessing for the embedding model
+Turns uploaded image bytes into model-sized uint8 RGB pixels
+"""
+import io
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Optional, Sequence, Tuple
+
+import numpy as np
+import PIL
+from PIL import Image
+
+from app.config import config
+from app.services.inference_backends import INPUT_SIZE
+
+# Ask the JPEG decoder for at least this multiple of the model input size, so the
+# final resize still has enough pixels to antialias properly
+DRAFT_OVERSAMPLE = 2
+
+# Difference hash grid: HASH_SIZE x HASH_SIZE gradients give a 64-bit perceptual hash
+HASH_SIZE = 8
+
+_decode_executor: Optional[ThreadPoolExecutor] = None
+_decode_executor_lock = threading.Lock()
+
+
+def get_decode_executor() -> ThreadPoolExecutor:
+    """Shared decode pool (batches and single uploads); Pillow releases the GIL while decoding and resizing"""
+    global _decode_executor
+    if _decode_executor is None:
+        with _decode_executor_lock:
+            if _decode_executor is None:
+                _decode_executor = ThreadPoolExecutor(
+                    max_workers=config.DECODE_WORKERS,
+                    thread_name_prefix="decode"
+                )
+    return _decode_executor
+
+
+def preprocessing_id() -> str:
+    """Identity of the decode/resize settings, since changing them changes the pixels the model sees"""
+    return (
+        f"{INPUT_SIZE[0]}x{INPUT_SIZE[1]}/pillow-{PIL.__version__}"
+        f"/draft{DRAFT_OVERSAMPLE}/gap{config.RESIZE_REDUCING_GAP}"
+    )
+
+
+def open_image(image_bytes: bytes, draft_size: Optional[Tuple[int, int]] = None) -> Image.Image:
+    """
+    Open an image and prepare a cheap decode of its first frame
+
+    Only the header is read here. Images above MAX_DECODE_PIXELS are rejected
+    before any pixel data is decoded. JPEGs are switched to draft mode, so the
+    decoder scales them down by 1/2, 1/4 or 1/8 while decoding. Animated
+    GIF/WebP files are positioned on their first frame, which is the only
+    frame that gets decoded.
+
+    Args:
+        image_bytes: Raw image bytes
+        draft_size: Smallest size the JPEG decoder may scale down to
+            (defaults to DRAFT_OVERSAMPLE times the model input size)
+
+    Returns:
+        PIL image, not yet decoded
+    """
+    pil_image = Image.open(io.BytesIO(image_bytes))
+
+    width, height = pil_image.size
+    if width * height > config.MAX_DECODE_PIXELS:
+        raise ValueError(
+            f"Image is {width}x{height} ({width * height} pixels), "
+            f"above the {config.MAX_DECODE_PIXELS} pixel decode limit"
+        )
+
+    if getattr(pil_image, "is_animated", False):
+        pil_image.seek(0)
+
+    if pil_image.format == "JPEG":
+        pil_image.draft("RGB", draft_size or (INPUT_SIZE[0] * DRAFT_OVERSAMPLE, INPUT_SIZE[1] * DRAFT_OVERSAMPLE))
+
+    return pil_image
+
+
+def _decode_resized(image_bytes: bytes) -> Image.Image:
+    """Decode image bytes into a model-sized RGB PIL image"""
+    pil_image = open_image(image_bytes)
+
+    # Convert to RGB if needed (in case of RGBA, grayscale, etc.)
+    if pil_image.mode != 'RGB':
+        pil_image = pil_image.convert('RGB')
+
+    # Resize to model input size (224x224 for ResNet50), shrinking by whole factors first for large images
+    return pil_image.resize(INPUT_SIZE, reducing_gap=config.RESIZE_REDUCING_GAP)
+
+
+def decode_image(image_bytes: bytes) -> np.ndarray:
+    """
+    Decode image bytes into model-sized RGB pixels
+
+    Args:
+        image_bytes: Raw image bytes
+
+    Returns:
+        uint8 array of shape (224, 224, 3)
+    """
+    return np.asarray(_decode_resized(image_bytes), dtype=np.uint8)
+
+
+def decode_image_with_hash(image_bytes: bytes) -> Tuple[np.ndarray, str]:
+    """
+    Decode image bytes into model-sized RGB pixels and hash them, with a single decode
+
+    Args:
+        image_bytes: Raw image bytes
+
+    Returns:
+        Tuple of (uint8 array of shape (224, 224, 3), perceptual hash)
+    """
+    resized = _decode_resized(image_bytes)
+    return np.asarray(resized, dtype=np.uint8), _hash_image(resized)
+
+
+def perceptual_hash(image_bytes: bytes) -> str:
+    """
+    Perceptual hash of an image: a difference hash (dHash) plus its mean colour
+
+    Re-encoded, recompressed or resized copies of the same photo get the same
+    or a nearly identical dHash. The mean colour tells apart colour variants of
+    a product, whose grayscale gradients are almost the same.
+
+    The hash is taken from the model-sized image, so decode_image_with_hash and
+    decode_images(hashes=...) return the same value without decoding twice; use
+    this only when the pixels are not needed.
+
+    Args:
+        image_bytes: Raw image bytes
+
+    Returns:
+        22 hex characters: the 64-bit dHash followed by the mean RGB colour
+    """
+    return _hash_image(_decode_resized(image_bytes))
+
+
+def _hash_image(pil_image: Image.Image) -> str:
+    """perceptual_hash() of an already decoded RGB image"""
+    thumbnail = pil_image.resize((HASH_SIZE + 1, HASH_SIZE), Image.LANCZOS, reducing_gap=2.0)
+
+    gray = np.asarray(thumbnail.convert("L"), dtype=np.int16)
+    # One bit per horizontal neighbour pair: is the left pixel brighter than the right one?
+    dhash = np.packbits(gray[:, :-1] > gray[:, 1:]).tobytes()
+    mean_color = np.asarray(thumbnail, dtype=np.float32).reshape(-1, 3).mean(axis=0).round().astype(np.uint8).tobytes()
+    return (dhash + mean_color).hex()
+
+
+def decode_images(
+    images: Sequence[bytes],
+    out: Optional[np.ndarray] = None,
+    errors: Optional[List[Optional[str]]] = None,
+    hashes: Optional[List[Optional[str]]] = None
+) -> np.ndarray:
+    """
+    Decode a batch of images straight into one uint8 batch buffer
+
+    Images are decoded in parallel on a shared pool of DECODE_WORKERS threads,
+    and each one is written into its row of the buffer, so no per-image arrays
+    are stacked afterwards.
+
+    Args:
+        images: Raw image bytes, one entry per image
+        out: Optional preallocated uint8 array of shape (len(images), 224, 224, 3)
+        errors: Optional list that receives one entry per image: None when it decoded,
+            otherwise the error message. Failed rows are zero-filled instead of raising.
+        hashes: Optional list that receives the perceptual hash of each image, taken
+            from the same decode (None for images that failed)
+
+    Returns:
+        uint8 array of shape (N, 224, 224, 3); `out` itself when it was given
+
+    Raises:
+        ValueError: If any image cannot be decoded and `errors` is not given (the first failure is raised)
+    """
+    shape = (len(images), INPUT_SIZE[1], INPUT_SIZE[0], 3)
+    if out is None:
+        out = np.empty(shape, dtype=np.uint8)
+    elif out.shape != shape or out.dtype != np.uint8:
+        raise ValueError(f"Batch buffer must be uint8 with shape {shape}, got {out.dtype} {out.shape}")
+
+    if errors is not None:
+        errors[:] = [None] * len(images)
+    if hashes is not None:
+        hashes[:] = [None] * len(images)
+
+    def decode_one(index: int):
+        resized = _decode_resized(images[index])
+        out[index] = resized
+        if hashes is not None:
+            hashes[index] = _hash_image(resized)
+
+    def decode_into(index: int):
+        if errors is None:
+            decode_one(index)
+            return
+        try:
+            decode_one(index)
+        except Exception as e:
+            out[index] = 0
+            errors[index] = str(e)
+
+    if len(images) <= 1 or config.DECODE_WORKERS <= 1:
+        for index in range(len(images)):
+            decode_into(index)
+    else:
+        # list() waits for every image and re-raises the first decode error
+        list(get_decode_executor().map(decode_into, range(len(images))))
+
+    return out
@@ -0,0 +1,417 @@
+"""
+Inference backends for the image embedding model
+Every backend takes decoded uint8 pixels of shape (N, 224, 224, 3) and returns float32 embeddings
+(N, embedding_size) of the model selected with EMBEDDING_MODEL (see app.services.model_registry)
+"""
+import logging
+import os
+import threading
+import time
+from typing import Any, Callable, Dict, Iterable, Optional
+
+import numpy as np
+
+from app.config import config
+from app.services.model_registry import EmbeddingModelSpec, get_model_spec
+from app.services.runtime_profile import configure_tensorflow
+
+logger = logging.getLogger(__name__)
+
+# Model input size (224x224 RGB for every registered model)
+INPUT_SIZE = (224, 224)
+
+# ImageNet channel means used by ResNet50 "caffe" preprocessing, in BGR order
+IMAGENET_BGR_MEAN = np.array([103.939, 116.779, 123.68], dtype=np.float32)
+
+
+def resnet50_preprocess(pixels: np.ndarray) -> np.ndarray:
+    """
+    NumPy equivalent of tensorflow.keras.applications.resnet50.preprocess_input
+
+    Converts RGB to BGR and subtracts the ImageNet channel means, without importing TensorFlow.
+
+    Args:
+        pixels: uint8 or float array of shape (..., 3) in RGB order
+
+    Returns:
+        float32 array of the same shape
+    """
+    # astype() already copies, so subtract in place instead of allocating a second batch
+    preprocessed = pixels[..., ::-1].astype(np.float32)
+    preprocessed -= IMAGENET_BGR_MEAN
+    return preprocessed
+
+
+class InferenceBackend:
+    """Base class for embedding model backends"""
+
+    name = "base"
+    # Seconds spent importing the runtime and loading the model, filled in by subclasses
+    timings: Dict[str, float] = {}
+
+    def predict(self, pixels: np.ndarray) -> np.ndarray:
+        """
+        Run the model on a batch of decoded images
+
+        Args:
+            pixels: uint8 array of shape (N, 224, 224, 3)
+
+        Returns:
+            float32 array of shape (N, embedding_size)
+        """
+        raise NotImplementedError
+
+    def warmup(self, batch_sizes: Iterable[int] = (1,)):
+        """Run dummy batches so one-off setup happens before the first request"""
+        for batch_size in batch_sizes:
+            self.predict(np.zeros((batch_size, INPUT_SIZE[0], INPUT_SIZE[1], 3), dtype=np.uint8))
+
+    def model_id(self) -> str:
+        """
+        Identity of the weights and numerics behind this backend
+
+        Embeddings from backends with different ids must not be mixed (for example in a cache).
+        """
+        return self.name
+
+    def get_info(self) -> Dict[str, Any]:
+        """Describe the backend"""
+        return {"backend": self.name}
+
+
+class KerasBackend(InferenceBackend):
+    """Registered embedding model built from tensorflow.keras.applications"""
+
+    name = "keras"
+
+    def __init__(
+        self,
+        compiled: Optional[bool] = None,
+        xla: Optional[bool] = None,
+        model_key: Optional[str] = None,
+        weights: Optional[str] = "imagenet"
+    ):
+        """
+        Args:
+            compiled: Use the compiled serving function instead of model.predict (defaults to INFERENCE_COMPILED)
+            xla: XLA-compile the serving function (defaults to INFERENCE_XLA)
+            model_key: Registered model to build (defaults to EMBEDDING_MODEL)
+            weights: 'imagenet', a local weights file, or None for random weights (benchmarks only)
+        """
+        self.spec = get_model_spec(model_key)
+        self.weights = weights
+
+        started = time.perf_counter()
+        configure_tensorflow()
+        import tensorflow.keras.applications
+        imported = time.perf_counter()
+
+        self.compiled = config.INFERENCE_COMPILED if compiled is None else compiled
+        self.xla = config.INFERENCE_XLA if xla is None else xla
+
+        # Pre-trained model without the top classification layer; global average
+        # pooling gives a fixed-size feature vector (2048 dimensions for ResNet50)
+        self.model = self.spec.build(weights=weights)
+        self.serving_fn = self.build_serving_function(self.model, jit_compile=self.xla, spec=self.spec) if self.compiled else None
+        self.timings = {"import_s": imported - started, "load_s": time.perf_counter() - imported}
+
+    @staticmethod
+    def build_serving_function(model, jit_compile: bool = False, spec: Optional[EmbeddingModelSpec] = None) -> Callable:
+        """
+        Build a compiled forward pass with a fixed (None, 224, 224, 3) uint8 signature
+
+        Unlike model.predict, which creates a data adapter and step function on
+        every call, this traces once and reuses the same graph for every batch size.
+        The model's preprocessing runs inside the graph. With jit_compile the graph
+        is also XLA-compiled.
+
+        Args:
+            model: Keras feature extractor
+            jit_compile: XLA-compile the function
+            spec: Registered model, for its preprocessing (defaults to ResNet50)
+        """
+        import tensorflow as tf
+
+        spec = spec or get_model_spec("resnet50")
+
+        @tf.function(
+            input_signature=[tf.TensorSpec(shape=(None, INPUT_SIZE[0], INPUT_SIZE[1], 3), dtype=tf.uint8)],
+            jit_compile=jit_compile
+        )
+        def serve(pixels):
+            return model(spec.preprocess_tf(tf.cast(pixels, tf.float32)), training=False)
+
+        return serve
+
+    def predict_compiled(self, pixels: np.ndarray) -> np.ndarray:
+        """Forward pass through the compiled serving function"""
+        if self.serving_fn is None:
+            self.serving_fn = self.build_serving_function(self.model, jit_compile=self.xla, spec=self.spec)
+        return self.serving_fn(pixels).numpy()
+
+    def predict_keras(self, pixels: np.ndarray) -> np.ndarray:
+        """Forward pass through Keras model.predict"""
+        embeddings = self.model.predict(self.spec.preprocess_numpy(pixels), batch_size=len(pixels), verbose=0)
+        return np.asarray(embeddings, dtype=np.float32)
+
+    def predict(self, pixels: np.ndarray) -> np.ndarray:
+        if self.compiled:
+            return self.predict_compiled(pixels)
+        return self.predict_keras(pixels)
+
+    def model_id(self) -> str:
+        # The compiled function and model.predict give identical outputs; XLA may not
+        weights = self.weights if self.weights in ("imagenet", None) else os.path.basename(self.weights)
+        return f"{self.name}/{self.spec.key}-{weights or 'random'}" + ("/xla" if self.xla else "")
+
+    def get_info(self) -> Dict[str, Any]:
+        return {"backend": self.name, "model_key": self.spec.key, "compiled": self.compiled, "xla": self.xla}
+
+
+class SavedModelBackend(InferenceBackend):
+    """Embedding model loaded from a verified SavedModel artifact (see app.services.model_artifacts)"""
+
+    name = "savedmodel"
+
+    def __init__(self, artifact_dir: Optional[str] = None, verify: Optional[bool] = None, xla: Optional[bool] = None):
+        """
+        Args:
+            artifact_dir: Directory created by model_tools.py export-artifact (defaults to MODEL_ARTIFACT_DIR)
+            verify: Check artifact checksums before loading (defaults to MODEL_ARTIFACT_VERIFY)
+            xla: XLA-compile the loaded serving function (defaults to INFERENCE_XLA)
+        """
+        from app.services.model_artifacts import load_artifact
+
+        self.spec = get_model_spec()
+        self.artifact_dir = artifact_dir or config.MODEL_ARTIFACT_DIR or self.spec.artifact_dir()
+        self.verify = config.MODEL_ARTIFACT_VERIFY if verify is None else verify
+        self.xla = config.INFERENCE_XLA if xla is None else xla
+
+        started = time.perf_counter()
+        configure_tensorflow()
+        import tensorflow as tf
+        imported = time.perf_counter()
+
+        # Keep a reference to the loaded object so its variables stay alive
+        self._loaded, self.manifest = load_artifact(self.artifact_dir, verify=self.verify, model_key=self.spec.key)
+        self.serving_fn = self._loaded.serve
+        if self.xla:
+            self.serving_fn = tf.function(self.serving_fn, jit_compile=True)
+        self.timings = {"import_s": imported - started, "load_s": time.perf_counter() - imported}
+
+    def predict(self, pixels: np.ndarray) -> np.ndarray:
+        return self.serving_fn(pixels).numpy()
+
+    def model_id(self) -> str:
+        return f"{self.name}/{self.manifest.get('checksum')}" + ("/xla" if self.xla else "")
+
+    def get_info(self) -> Dict[str, Any]:
+        return {
+            "backend": self.name,
+            "model_key": self.spec.key,
+            "artifact_dir": self.artifact_dir,
+            "artifact_checksum": self.manifest.get("checksum"),
+            "verified": self.verify,
+            "xla": self.xla
+        }
+
+
+class StudentBackend(SavedModelBackend):
+    """
+    Distilled student network that reproduces the active model's embeddings
+    (see app.services.distillation), searching the same stored vectors at a
+    fraction of the cost
+    """
+
+    name = "student"
+
+    def __init__(self, artifact_dir: Optional[str] = None, verify: Optional[bool] = None, xla: Optional[bool] = None):
+        """
+        Args:
+            artifact_dir: Directory created by model_tools.py distill (defaults to STUDENT_ARTIFACT_DIR)
+            verify: Check artifact checksums before loading (defaults to MODEL_ARTIFACT_VERIFY)
+            xla: XLA-compile the loaded serving function (defaults to INFERENCE_XLA)
+        """
+        from app.services.model_artifacts import ModelArtifactError
+
+        artifact_dir = artifact_dir or config.STUDENT_ARTIFACT_DIR or get_model_spec().student_artifact_dir()
+        super().__init__(artifact_dir=artifact_dir, verify=verify, xla=xla)
+        if "distilled_from" not in self.manifest:
+            raise ModelArtifactError(f"{artifact_dir} is not a distilled student artifact")
+
+    def get_info(self) -> Dict[str, Any]:
+        return {
+            **super().get_info(),
+            "student_backbone": self.manifest.get("student_backbone"),
+            "distilled_from": self.manifest.get("distilled_from"),
+            "evaluation": self.manifest.get("evaluation")
+        }
+
+
+class TFLiteInt8Backend(InferenceBackend):
+    """Post-training int8-quantized TFLite export of the same embedding model"""
+
+    name = "tflite_int8"
+
+    def __init__(self, model_path: Optional[str] = None, num_threads: Optional[int] = None):
+        """
+        Args:
+            model_path: Path to the .tflite file (defaults to TFLITE_MODEL_PATH)
+            num_threads: Interpreter threads per inference thread (defaults to TFLITE_NUM_THREADS)
+        """
+        self.spec = get_model_spec()
+        self.model_path = model_path or config.TFLITE_MODEL_PATH or self.spec.tflite_path()
+        self.num_threads = num_threads or config.TFLITE_NUM_THREADS
+        self._model_checksum: Optional[str] = None
+        if not os.path.exists(self.model_path):
+            raise FileNotFoundError(
+                f"TFLite model not found at {self.model_path}. "
+                f"Create it with: python model_tools.py export-tflite --model {self.spec.key} --output {self.model_path}"
+            )
+
+        started = time.perf_counter()
+        try:
+            # The standalone runtime is much smaller than full TensorFlow
+            from tflite_runtime.interpreter import Interpreter
+        except ImportError:
+            import tensorflow as tf
+            Interpreter = tf.lite.Interpreter
+        self._interpreter_cls = Interpreter
+        imported = time.perf_counter()
+
+        # Interpreters are not thread-safe, so each inference thread gets its own
+        self._local = threading.local()
+        self._interpreter()
+        self.timings = {"import_s": imported - started, "load_s": time.perf_counter() - imported}
+
+    def _interpreter(self):
+        interpreter = getattr(self._local, "interpreter", None)
+        if interpreter is None:
+            interpreter = self._interpreter_cls(model_path=self.model_path, num_threads=self.num_threads)
+            interpreter.allocate_tensors()
+            self._local.interpreter = interpreter
+            self._local.batch_size = interpreter.get_input_details()[0]["shape"][0]
+        return interpreter
+
+    def predict(self, pixels: np.ndarray) -> np.ndarray:
+        interpreter = self._interpreter()
+        input_detail = interpreter.get_input_details()[0]
+        output_detail = interpreter.get_output_details()[0]
+
+        if self._local.batch_size != len(pixels):
+            interpreter.resize_tensor_input(input_detail["index"], [len(pixels), INPUT_SIZE[0], INPUT_SIZE[1], 3])
+            interpreter.allocate_tensors()
+            self._local.batch_size = len(pixels)
+
+        # Preprocessing is part of the exported graph, so the model takes raw uint8 pixels
+        interpreter.set_tensor(input_detail["index"], np.ascontiguousarray(pixels, dtype=input_detail["dtype"]))
+        interpreter.invoke()
+        return np.array(interpreter.get_tensor(output_detail["index"]), dtype=np.float32)
+
+    def model_id(self) -> str:
+        if self._model_checksum is None:
+            from app.services.model_artifacts import file_sha256
+            self._model_checksum = file_sha256(self.model_path)
+        return f"{self.name}/{self._model_checksum}"
+
+    def get_info(self) -> Dict[str, Any]:
+        return {"backend": self.name, "model_key": self.spec.key, "model_path": self.model_path, "num_threads": self.num_threads}
+
+    @staticmethod
+    def export(
+        output_path: str,
+        representative_pixels: Optional[np.ndarray] = None,
+        model_key: Optional[str] = None
+    ) -> str:
+        """
+        Export an embedding model as an int8-quantized TFLite model
+
+        With representative_pixels the weights and activations are quantized to
+        int8 (full integer quantization, calibrated on those images). Without them
+        only the weights are quantized (dynamic-range quantization). Input stays
+        uint8 pixels and output stays float32 embeddings either way.
+
+        Args:
+            output_path: Where to write the .tflite file
+            representative_pixels: Optional uint8 calibration images of shape (N, 224, 224, 3)
+            model_key: Registered model to export (defaults to EMBEDDING_MODEL)
+
+        Returns:
+            The output path
+        """
+        import tensorflow as tf
+
+        backend = KerasBackend(compiled=True, xla=False, model_key=model_key)
+        concrete_fn = backend.serving_fn.get_concrete_function()
+        converter = tf.lite.TFLiteConverter.from_concrete_functions([concrete_fn], backend.model)
+        converter.optimizations = [tf.lite.Optimize.DEFAULT]
+
+        if representative_pixels is not None:
+            def representative_dataset():
+                for image in representative_pixels:
+                    yield [image[np.newaxis]]
+
+            converter.representative_dataset = representative_dataset
+            converter.target_spec.supported_ops = [
+                tf.lite.OpsSet.TFLITE_BUILTINS_INT8,
+                tf.lite.OpsSet.TFLITE_BUILTINS
+            ]
+
+        tflite_model = converter.convert()
+        os.makedirs(os.path.dirname(output_path) or ".", exist_ok=True)
+        with open(output_path, "wb") as f:
+            f.write(tflite_model)
+        logger.info(f"Exported int8 TFLite model to {output_path} ({len(tflite_model) / 1e6:.1f} MB)")
+        return output_path
+
+
+class RemoteBackend(InferenceBackend):
+    """Model hosted by a shared model server process (see app.services.model_server)"""
+
+    name = "remote"
+
+    def __init__(self, socket_path: str):
+        from app.services.model_server import ModelServerClient
+
+        self.socket_path = socket_path
+        self.client = ModelServerClient(socket_path)
+
+    def predict(self, pixels: np.ndarray) -> np.ndarray:
+        return self.client.embed(pixels)
+
+    def model_id(self) -> str:
+        # Embeddings come from whatever model the server runs
+        return self.client.get_info()["model_id"]
+
+    def get_info(self) -> Dict[str, Any]:
+        return {"backend": self.name, "socket": self.socket_path}
+
+
+# Backends that can be selected with INFERENCE_BACKEND
+BACKENDS = {
+    KerasBackend.name: KerasBackend,
+    SavedModelBackend.name: SavedModelBackend,
+    StudentBackend.name: StudentBackend,
+    TFLiteInt8Backend.name: TFLiteInt8Backend
+}
+
+
+def create_backend(name: Optional[str] = None) -> InferenceBackend:
+    """
+    Build the inference backend selected in config
+
+    Args:
+        name: Backend name (defaults to INFERENCE_BACKEND). "auto" loads the exported
+            SavedModel artifact when one exists and builds the Keras model otherwise.
+
+    Returns:
+        A ready-to-use InferenceBackend
+    """
+    name = name or config.INFERENCE_BACKEND
+    if name == "auto":
+        from app.services.model_artifacts import artifact_exists
+        artifact_dir = config.MODEL_ARTIFACT_DIR or get_model_spec().artifact_dir()
+        name = SavedModelBackend.name if artifact_exists(artifact_dir) else KerasBackend.name
+    if name not in BACKENDS:
+        raise ValueError(f"Unknown inference backend '{name}'. Available: auto, {', '.join(BACKENDS)}")
+    return BACKENDS[name]()
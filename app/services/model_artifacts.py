@@ -0,0 +1,195 @@
+"""
+Model Artifact Management
+Exports the embedding model once as a SavedModel with a checksum manifest, and loads it at startup
+without rebuilding the model or downloading Keras weights
+"""
+import hashlib
+import json
+import logging
+import os
+from datetime import datetime
+from typing import Any, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+MANIFEST_FILENAME = "artifact.json"
+
+
+class ModelArtifactError(Exception):
+    """Raised when a model artifact is missing, incomplete or fails its checksum"""
+
+
+def file_sha256(path: str) -> str:
+    """SHA-256 of one file"""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def compute_checksums(artifact_dir: str) -> Dict[str, str]:
+    """SHA-256 of every file in the artifact directory, keyed by relative path"""
+    checksums = {}
+    for root, _, files in os.walk(artifact_dir):
+        for name in files:
+            path = os.path.join(root, name)
+            relative = os.path.relpath(path, artifact_dir).replace(os.sep, "/")
+            if relative != MANIFEST_FILENAME:
+                checksums[relative] = file_sha256(path)
+    return dict(sorted(checksums.items()))
+
+
+def artifact_checksum(checksums: Dict[str, str]) -> str:
+    """Single checksum identifying the whole artifact"""
+    digest = hashlib.sha256()
+    for relative, file_hash in checksums.items():
+        digest.update(f"{relative}:{file_hash}\n".encode("utf-8"))
+    return digest.hexdigest()
+
+
+def artifact_exists(artifact_dir: str) -> bool:
+    """Whether an exported artifact with a manifest is present"""
+    return os.path.isfile(os.path.join(artifact_dir, MANIFEST_FILENAME))
+
+
+def read_manifest(artifact_dir: str) -> Dict[str, Any]:
+    """Read the artifact manifest"""
+    path = os.path.join(artifact_dir, MANIFEST_FILENAME)
+    if not os.path.isfile(path):
+        raise ModelArtifactError(f"No model artifact manifest at {path}")
+    with open(path) as f:
+        return json.load(f)
+
+
+def verify_artifact(artifact_dir: str) -> Dict[str, Any]:
+    """
+    Check every file of an artifact against its manifest
+
+    Args:
+        artifact_dir: Directory created by export_artifact
+
+    Returns:
+        The manifest
+
+    Raises:
+        ModelArtifactError: If files are missing, extra or modified
+    """
+    manifest = read_manifest(artifact_dir)
+    expected = manifest.get("files", {})
+    actual = compute_checksums(artifact_dir)
+
+    missing = sorted(set(expected) - set(actual))
+    unexpected = sorted(set(actual) - set(expected))
+    modified = sorted(name for name in set(expected) & set(actual) if expected[name] != actual[name])
+    if missing or unexpected or modified:
+        raise ModelArtifactError(
+            f"Model artifact {artifact_dir} failed verification "
+            f"(missing: {missing}, unexpected: {unexpected}, modified: {modified})"
+        )
+    if artifact_checksum(actual) != manifest.get("checksum"):
+        raise ModelArtifactError(f"Model artifact {artifact_dir} has an inconsistent manifest checksum")
+    return manifest
+
+
+def export_artifact(artifact_dir: str, weights: str = "imagenet", model_key: Optional[str] = None) -> Dict[str, Any]:
+    """
+    Export an embedding model with its compiled serving function as a SavedModel
+
+    The exported function takes uint8 pixels of shape (None, 224, 224, 3) and
+    returns float32 embeddings of shape (None, embedding_size), with the
+    model's preprocessing inside the graph.
+
+    Args:
+        artifact_dir: Output directory (must not already contain an artifact)
+        weights: 'imagenet' or a path to a local Keras weights file
+        model_key: Registered model to export (defaults to EMBEDDING_MODEL)
+
+    Returns:
+        The written manifest
+    """
+    from app.services.model_registry import get_model_spec
+
+    if artifact_exists(artifact_dir):
+        raise ModelArtifactError(f"An artifact already exists at {artifact_dir}; remove it first")
+
+    spec = get_model_spec(model_key)
+    model = spec.build(weights=weights)
+    return save_artifact(model, artifact_dir, spec, {
+        "model_name": spec.display_name,
+        "model_key": spec.key,
+        "weights": weights if weights in ("imagenet", None) else os.path.basename(weights)
+    })
+
+
+def save_artifact(model, artifact_dir: str, preprocessing_spec, fields: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Save a Keras feature extractor as a SavedModel artifact with a checksum manifest
+
+    Args:
+        model: Keras model taking float32 pixels and returning embeddings
+        artifact_dir: Output directory (must not already contain an artifact)
+        preprocessing_spec: Registered model whose preprocessing goes into the graph
+        fields: Manifest entries describing the model; "model_key" names the embedding
+            space the vectors belong to
+
+    Returns:
+        The written manifest
+    """
+    import tensorflow as tf
+    from app.services.inference_backends import INPUT_SIZE, KerasBackend
+
+    if artifact_exists(artifact_dir):
+        raise ModelArtifactError(f"An artifact already exists at {artifact_dir}; remove it first")
+
+    module = tf.Module()
+    # Track only the variables, not the Keras layers, so loading skips reviving the Keras model
+    module.weights = list(model.weights)
+    module.serve = KerasBackend.build_serving_function(model, spec=preprocessing_spec)
+    concrete_fn = module.serve.get_concrete_function()
+    tf.saved_model.save(module, artifact_dir, signatures={"serving_default": concrete_fn})
+
+    checksums = compute_checksums(artifact_dir)
+    manifest = {
+        **fields,
+        "embedding_size": int(model.output_shape[-1]),
+        "input_signature": [None, INPUT_SIZE[0], INPUT_SIZE[1], 3],
+        "input_dtype": "uint8",
+        "tensorflow_version": tf.__version__,
+        "created_at": datetime.now().isoformat(),
+        "files": checksums,
+        "checksum": artifact_checksum(checksums)
+    }
+    with open(os.path.join(artifact_dir, MANIFEST_FILENAME), "w") as f:
+        json.dump(manifest, f, indent=2)
+
+    logger.info(f"Exported model artifact to {artifact_dir} (checksum {manifest['checksum'][:12]})")
+    return manifest
+
+
+def load_artifact(artifact_dir: str, verify: bool = True, model_key: Optional[str] = None):
+    """
+    Load an exported artifact
+
+    Args:
+        artifact_dir: Directory created by export_artifact
+        verify: Check file checksums before loading
+        model_key: Registered model the artifact must contain, if given
+
+    Returns:
+        Tuple of (loaded SavedModel object, manifest)
+
+    Raises:
+        ModelArtifactError: If verification fails or the artifact holds a different model
+    """
+    import tensorflow as tf
+
+    manifest = verify_artifact(artifact_dir) if verify else read_manifest(artifact_dir)
+    # Artifacts exported before the model registry existed are ResNet50
+    artifact_model = manifest.get("model_key", "resnet50")
+    if model_key is not None and artifact_model != model_key:
+        raise ModelArtifactError(
+            f"Model artifact {artifact_dir} contains '{artifact_model}' but EMBEDDING_MODEL is '{model_key}'"
+        )
+    loaded = tf.saved_model.load(artifact_dir)
+    return loaded, manifest
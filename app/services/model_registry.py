@@ -0,0 +1,151 @@
+"""
+Embedding Model Registry
+The image models the service can run, with their vector sizes and preprocessing
+
+Every model is an ImageNet-pretrained tensorflow.keras.applications network with
+its classification head removed and global average pooling on top. Each model
+gets its own Qdrant collection, since vectors from different models (and of
+different sizes) cannot be searched together.
+"""
+from typing import Any, Dict, Optional
+
+import numpy as np
+
+from app.config import config
+
+
+class EmbeddingModelSpec:
+    """One registered embedding model"""
+
+    def __init__(
+        self,
+        key: str,
+        display_name: str,
+        application: str,
+        embedding_size: int,
+        preprocessing: str,
+        description: str
+    ):
+        """
+        Args:
+            key: Identifier used in config (EMBEDDING_MODEL), collection names and payloads
+            display_name: Name reported by the API
+            application: Constructor name in tensorflow.keras.applications
+            embedding_size: Length of the pooled feature vector
+            preprocessing: "caffe" (BGR, ImageNet mean subtracted) or "raw" (the model
+                rescales 0-255 RGB pixels itself)
+            description: Human-readable description for the API
+        """
+        self.key = key
+        self.display_name = display_name
+        self.application = application
+        self.embedding_size = embedding_size
+        self.preprocessing = preprocessing
+        self.description = description
+
+    def build(self, weights: Optional[str] = "imagenet"):
+        """
+        Build the Keras feature extractor (headless, average-pooled)
+
+        Args:
+            weights: 'imagenet', a local weights file, or None for random weights
+        """
+        from tensorflow.keras import applications
+        from app.services.inference_backends import INPUT_SIZE
+
+        return getattr(applications, self.application)(
+            weights=weights,
+            include_top=False,
+            pooling='avg',
+            input_shape=(INPUT_SIZE[0], INPUT_SIZE[1], 3)
+        )
+
+    def preprocess_tf(self, pixels):
+        """In-graph preprocessing of float32 RGB pixels in [0, 255]"""
+        if self.preprocessing == "caffe":
+            from tensorflow.keras.applications.resnet50 import preprocess_input
+            return preprocess_input(pixels)
+        return pixels
+
+    def preprocess_numpy(self, pixels: np.ndarray) -> np.ndarray:
+        """NumPy preprocessing of uint8 RGB pixels, matching preprocess_tf"""
+        from app.services.inference_backends import resnet50_preprocess
+
+        if self.preprocessing == "caffe":
+            return resnet50_preprocess(pixels)
+        return pixels.astype(np.float32)
+
+    def collection_name(self) -> str:
+        """Qdrant collection holding this model's catalog vectors"""
+        # ResNet50 keeps the original collection so existing data stays searchable
+        if self.key == DEFAULT_MODEL:
+            return config.QDRANT_COLLECTION_NAME
+        return f"{config.QDRANT_COLLECTION_NAME}_{self.key}"
+
+    def search_collection_name(self) -> str:
+        """Qdrant collection holding users' search embeddings for this model"""
+        if self.key == DEFAULT_MODEL:
+            return "user_search_embeddings"
+        return f"user_search_embeddings_{self.key}"
+
+    def artifact_dir(self) -> str:
+        """Default SavedModel artifact directory (see model_tools.py export-artifact)"""
+        return f"models/{self.key}_savedmodel"
+
+    def student_artifact_dir(self) -> str:
+        """Default distilled student artifact directory (see model_tools.py distill)"""
+        return f"models/{self.key}_student"
+
+    def tflite_path(self) -> str:
+        """Default int8 TFLite model path (see model_tools.py export-tflite)"""
+        return f"models/{self.key}_int8.tflite"
+
+    def get_info(self) -> Dict[str, Any]:
+        """Describe the model"""
+        return {
+            "key": self.key,
+            "model_name": self.display_name,
+            "embedding_size": self.embedding_size,
+            "collection": self.collection_name(),
+            "description": self.description
+        }
+
+
+DEFAULT_MODEL = "resnet50"
+
+MODELS: Dict[str, EmbeddingModelSpec] = {
+    spec.key: spec for spec in (
+        EmbeddingModelSpec(
+            "resnet50", "ResNet50", "ResNet50", 2048, "caffe",
+            "ResNet50 pre-trained on ImageNet, features extracted from global average pooling layer"
+        ),
+        EmbeddingModelSpec(
+            "efficientnet_b0", "EfficientNetB0", "EfficientNetB0", 1280, "raw",
+            "EfficientNet-B0 pre-trained on ImageNet, features extracted from global average pooling layer"
+        ),
+        EmbeddingModelSpec(
+            "mobilenet_v3_large", "MobileNetV3Large", "MobileNetV3Large", 960, "raw",
+            "MobileNetV3-Large pre-trained on ImageNet, features extracted from global average pooling layer"
+        ),
+        EmbeddingModelSpec(
+            "mobilenet_v3_small", "MobileNetV3Small", "MobileNetV3Small", 576, "raw",
+            "MobileNetV3-Small pre-trained on ImageNet, features extracted from global average pooling layer"
+        ),
+    )
+}
+
+
+def get_model_spec(key: Optional[str] = None) -> EmbeddingModelSpec:
+    """
+    Look up a registered model
+
+    Args:
+        key: Model key (defaults to EMBEDDING_MODEL)
+
+    Raises:
+        ValueError: If the model is not registered
+    """
+    key = key or config.EMBEDDING_MODEL
+    if key not in MODELS:
+        raise ValueError(f"Unknown embedding model '{key}'. Available: {', '.join(MODELS)}")
+    return MODELS[key]
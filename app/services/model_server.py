@@ -0,0 +1,305 @@
+"""
+Shared Model Server
+Runs one embedding model in its own process and serves it to API workers over a Unix socket
+
+API workers decode uploads themselves and send uint8 pixel tensors; the server
+answers with float32 embedding vectors. Requests from different workers that
+arrive while the model is busy are merged into a single forward pass.
+
+Start it with:
+    python -m app.services.model_server --socket /tmp/fashion-model.sock
+and point the API workers at it with MODEL_SERVER_SOCKET=/tmp/fashion-model.sock
+"""
+import argparse
+import json
+import logging
+import os
+import queue
+import struct
+import threading
+from multiprocessing.connection import Client, Listener
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from app.config import config
+from app.services.inference_backends import INPUT_SIZE
+
+logger = logging.getLogger(__name__)
+
+# Wire format: every message is a fixed header followed (optionally) by one payload frame
+REQUEST_HEADER = "!BIII"   # op, batch size, height, width
+RESPONSE_HEADER = "!BII"   # status, rows, embedding size
+
+OP_EMBED = 1
+OP_INFO = 2
+
+STATUS_OK = 0
+STATUS_ERROR = 1
+
+
+class _EmbedJob:
+    """One pending embed request waiting for the inference thread"""
+
+    def __init__(self, pixels: np.ndarray):
+        self.pixels = pixels
+        self.done = threading.Event()
+        self.embeddings: Optional[np.ndarray] = None
+        self.error: Optional[str] = None
+
+
+class ModelServer:
+    """Serve an ImageEmbeddingService to other processes over a Unix socket"""
+
+    def __init__(self, service, socket_path: str, authkey: Optional[bytes] = None, max_batch_size: int = 16):
+        """
+        Args:
+            service: ImageEmbeddingService with an in-process model
+            socket_path: Filesystem path of the Unix socket to listen on
+            authkey: Optional shared secret clients must present
+            max_batch_size: Largest number of images run in one forward pass
+        """
+        self.service = service
+        self.socket_path = socket_path
+        self.authkey = authkey
+        self.max_batch_size = max(1, max_batch_size)
+        self._jobs: "queue.Queue[_EmbedJob]" = queue.Queue()
+
+        self.total_requests = 0
+        self.total_images = 0
+        self.total_batches = 0
+
+    def serve_forever(self):
+        """Accept worker connections until the process is stopped"""
+        if os.path.exists(self.socket_path):
+            os.unlink(self.socket_path)
+
+        listener = Listener(self.socket_path, family="AF_UNIX", authkey=self.authkey)
+        threading.Thread(target=self._inference_loop, name="model-server-inference", daemon=True).start()
+        print(f"🤖 Model server ready on {self.socket_path} ({self.service.model_name}, max batch {self.max_batch_size})")
+
+        try:
+            while True:
+                try:
+                    conn = listener.accept()
+                except Exception as e:
+                    logger.warning(f"Rejected model server connection: {str(e)}")
+                    continue
+                threading.Thread(target=self._handle_connection, args=(conn,), daemon=True).start()
+        finally:
+            listener.close()
+
+    def _handle_connection(self, conn):
+        """Answer requests from one API worker connection"""
+        try:
+            while True:
+                op, batch_size, height, width = struct.unpack(REQUEST_HEADER, conn.recv_bytes())
+
+                if op == OP_INFO:
+                    info = json.dumps(self.get_info()).encode("utf-8")
+                    conn.send_bytes(struct.pack(RESPONSE_HEADER, STATUS_OK, 0, 0))
+                    conn.send_bytes(info)
+                    continue
+
+                if op != OP_EMBED:
+                    self._send_error(conn, f"Unknown model server op {op}")
+                    continue
+
+                payload = conn.recv_bytes()
+                # Checked here, so a bad request never reaches a batch shared with other workers
+                if batch_size < 1 or (width, height) != INPUT_SIZE:
+                    self._send_error(
+                        conn, f"Expected 1 or more images of {INPUT_SIZE[0]}x{INPUT_SIZE[1]}, "
+                              f"got {batch_size} of {width}x{height}"
+                    )
+                    continue
+                try:
+                    pixels = np.frombuffer(payload, dtype=np.uint8).reshape(batch_size, height, width, 3)
+                except ValueError as e:
+                    self._send_error(conn, f"Malformed pixel payload: {str(e)}")
+                    continue
+
+                job = _EmbedJob(pixels)
+                self._jobs.put(job)
+                job.done.wait()
+
+                if job.error is not None:
+                    self._send_error(conn, job.error)
+                    continue
+
+                rows, dim = job.embeddings.shape
+                conn.send_bytes(struct.pack(RESPONSE_HEADER, STATUS_OK, rows, dim))
+                conn.send_bytes(np.ascontiguousarray(job.embeddings, dtype=np.float32).tobytes())
+        except (EOFError, ConnectionError):
+            pass
+        except Exception as e:
+            logger.error(f"Model server connection failed: {str(e)}")
+        finally:
+            conn.close()
+
+    def _send_error(self, conn, message: str):
+        conn.send_bytes(struct.pack(RESPONSE_HEADER, STATUS_ERROR, 0, 0))
+        conn.send_bytes(message.encode("utf-8"))
+
+    def _inference_loop(self):
+        """Merge queued requests from all workers into batched forward passes"""
+        while True:
+            jobs: List[_EmbedJob] = [self._jobs.get()]
+            images = len(jobs[0].pixels)
+
+            # Take everything that queued up while the previous batch was running
+            while images < self.max_batch_size:
+                try:
+                    job = self._jobs.get_nowait()
+                except queue.Empty:
+                    break
+                jobs.append(job)
+                images += len(job.pixels)
+
+            try:
+                pixels = jobs[0].pixels if len(jobs) == 1 else np.concatenate([job.pixels for job in jobs])
+                embeddings = self.service.embed_pixels(pixels)
+                offset = 0
+                for job in jobs:
+                    job.embeddings = embeddings[offset:offset + len(job.pixels)]
+                    offset += len(job.pixels)
+                self.total_batches += 1
+            except Exception as e:
+                logger.error(f"Model server inference failed for {images} images: {str(e)}")
+                if len(jobs) == 1:
+                    jobs[0].error = str(e)
+                    self.total_batches += 1
+                else:
+                    # Retry each request on its own, so only the one that fails gets the error
+                    for job in jobs:
+                        self._run_alone(job)
+
+            self.total_requests += len(jobs)
+            self.total_images += images
+            for job in jobs:
+                job.done.set()
+
+    def _run_alone(self, job: _EmbedJob):
+        """Run one request as its own forward pass"""
+        try:
+            job.embeddings = self.service.embed_pixels(job.pixels)
+        except Exception as e:
+            logger.error(f"Model server inference failed for {len(job.pixels)} images: {str(e)}")
+            job.error = str(e)
+        self.total_batches += 1
+
+    def get_info(self) -> Dict[str, Any]:
+        """Get model information and server counters"""
+        return {
+            **self.service.get_model_info(),
+            "pid": os.getpid(),
+            "max_batch_size": self.max_batch_size,
+            "total_requests": self.total_requests,
+            "total_images": self.total_images,
+            "total_batches": self.total_batches,
+            "pending": self._jobs.qsize()
+        }
+
+
+class ModelServerClient:
+    """Send decoded images to a ModelServer and receive embeddings"""
+
+    def __init__(self, socket_path: str, authkey: Optional[bytes] = None, timeout: Optional[float] = None):
+        """
+        Args:
+            socket_path: Filesystem path of the model server's Unix socket
+            authkey: Shared secret (defaults to MODEL_SERVER_AUTHKEY)
+            timeout: Seconds to wait for a reply (defaults to MODEL_SERVER_TIMEOUT)
+        """
+        self.socket_path = socket_path
+        if authkey is None and config.MODEL_SERVER_AUTHKEY:
+            authkey = config.MODEL_SERVER_AUTHKEY.encode("utf-8")
+        self.authkey = authkey
+        self.timeout = timeout if timeout is not None else config.MODEL_SERVER_TIMEOUT
+        # One connection per thread so several inference threads can talk to the server at once
+        self._local = threading.local()
+
+    def _connection(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = Client(self.socket_path, family="AF_UNIX", authkey=self.authkey)
+            self._local.conn = conn
+        return conn
+
+    def _drop_connection(self):
+        conn = getattr(self._local, "conn", None)
+        self._local.conn = None
+        if conn is not None:
+            try:
+                conn.close()
+            except OSError:
+                pass
+
+    def _request(self, header: bytes, payload: Optional[bytes] = None) -> Tuple[int, int, int, bytes]:
+        """Send one request, reconnecting once if the server was restarted"""
+        for attempt in range(2):
+            try:
+                conn = self._connection()
+                conn.send_bytes(header)
+                if payload is not None:
+                    conn.send_bytes(payload)
+                if not conn.poll(self.timeout):
+                    # A late reply would desynchronise this connection, so throw it away
+                    self._drop_connection()
+                    raise TimeoutError(f"Model server did not answer within {self.timeout}s")
+                status, rows, dim = struct.unpack(RESPONSE_HEADER, conn.recv_bytes())
+                return status, rows, dim, conn.recv_bytes()
+            except (EOFError, ConnectionError, FileNotFoundError) as e:
+                self._drop_connection()
+                if attempt == 1:
+                    raise ConnectionError(f"Model server at {self.socket_path} is unavailable: {str(e)}")
+
+    def embed(self, pixels: np.ndarray) -> np.ndarray:
+        """
+        Get embeddings for a batch of decoded images
+
+        Args:
+            pixels: uint8 array of shape (N, height, width, 3)
+
+        Returns:
+            float32 array of shape (N, embedding_size)
+        """
+        pixels = np.ascontiguousarray(pixels, dtype=np.uint8)
+        batch_size, height, width, _ = pixels.shape
+        status, rows, dim, payload = self._request(
+            struct.pack(REQUEST_HEADER, OP_EMBED, batch_size, height, width),
+            pixels.tobytes()
+        )
+        if status != STATUS_OK:
+            raise RuntimeError(f"Model server error: {payload.decode('utf-8', errors='replace')}")
+        return np.frombuffer(payload, dtype=np.float32).reshape(rows, dim)
+
+    def get_info(self) -> Dict[str, Any]:
+        """Get model information and counters from the server"""
+        status, _, _, payload = self._request(struct.pack(REQUEST_HEADER, OP_INFO, 0, 0, 0))
+        if status != STATUS_OK:
+            raise RuntimeError(f"Model server error: {payload.decode('utf-8', errors='replace')}")
+        return json.loads(payload.decode("utf-8"))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run the shared embedding model server")
+    parser.add_argument("--socket", default=config.MODEL_SERVER_SOCKET or "/tmp/fashion-model.sock",
+                        help="Unix socket path to listen on")
+    parser.add_argument("--max-batch-size", type=int, default=config.EMBEDDING_BATCH_MAX_SIZE,
+                        help="Largest number of images per forward pass")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+
+    from app.services.embedding_service import ImageEmbeddingService
+
+    # Always load the model here, even if MODEL_SERVER_SOCKET is set in the shared .env
+    service = ImageEmbeddingService(model_server_socket="")
+    service.load_model()
+    authkey = config.MODEL_SERVER_AUTHKEY.encode("utf-8") if config.MODEL_SERVER_AUTHKEY else None
+    ModelServer(service, args.socket, authkey=authkey, max_batch_size=args.max_batch_size).serve_forever()
+
+
+if __name__ == "__main__":
+    main()
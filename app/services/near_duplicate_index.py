@@ -0,0 +1,154 @@
+"""
+Near-duplicate image index
+Maps perceptual hashes of stored catalog images to their vector IDs, so
+re-encoded or resized copies of a stored photo can reuse its embedding
+"""
+import logging
+import threading
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+_M1 = np.uint64(0x5555555555555555)
+_M2 = np.uint64(0x3333333333333333)
+_M4 = np.uint64(0x0F0F0F0F0F0F0F0F)
+_H01 = np.uint64(0x0101010101010101)
+
+
+def _popcount64(values: np.ndarray) -> np.ndarray:
+    """Number of set bits in each uint64"""
+    values = values - ((values >> np.uint64(1)) & _M1)
+    values = (values & _M2) + ((values >> np.uint64(2)) & _M2)
+    values = (values + (values >> np.uint64(4))) & _M4
+    return (values * _H01) >> np.uint64(56)
+
+
+def split_hash(image_hash: str) -> Tuple[int, Tuple[int, int, int]]:
+    """Split a perceptual_hash() value into its 64-bit dHash and mean RGB colour"""
+    raw = bytes.fromhex(image_hash)
+    if len(raw) != 11:
+        raise ValueError(f"Not a perceptual hash: {image_hash!r}")
+    return int.from_bytes(raw[:8], "big"), (raw[8], raw[9], raw[10])
+
+
+class _HashTable:
+    """Hashes of the images embedded by one model"""
+
+    def __init__(self):
+        self.vector_ids: List[str] = []
+        self.dhashes: List[int] = []
+        self.colors: List[Tuple[int, int, int]] = []
+        self._arrays: Optional[Tuple[np.ndarray, np.ndarray]] = None
+
+    def arrays(self) -> Tuple[np.ndarray, np.ndarray]:
+        # Rebuilt lazily after changes; lookups vastly outnumber uploads
+        if self._arrays is None:
+            self._arrays = (
+                np.array(self.dhashes, dtype=np.uint64),
+                np.array(self.colors, dtype=np.int16).reshape(-1, 3)
+            )
+        return self._arrays
+
+
+class NearDuplicateIndex:
+    """In-memory Hamming-distance index over perceptual hashes, kept per embedding model"""
+
+    def __init__(self, max_distance: int = 4, max_color_diff: int = 12):
+        """
+        Args:
+            max_distance: Largest dHash Hamming distance (out of 64 bits) treated as the same photo
+            max_color_diff: Largest per-channel mean colour difference treated as the same photo
+        """
+        self.max_distance = max_distance
+        self.max_color_diff = max_color_diff
+        self._tables: Dict[str, _HashTable] = {}
+        self._locations: Dict[str, str] = {}  # vector_id -> model_id
+        self._lock = threading.Lock()
+
+        # Metrics
+        self.lookups = 0
+        self.hits = 0
+
+    def __len__(self) -> int:
+        return len(self._locations)
+
+    def add(self, vector_id: str, image_hash: str, model_id: str):
+        """
+        Index a stored image
+
+        Args:
+            vector_id: Qdrant point ID of the stored embedding
+            image_hash: perceptual_hash() of the stored image
+            model_id: Identity of the model that produced the stored embedding
+        """
+        dhash, color = split_hash(image_hash)
+        with self._lock:
+            if vector_id in self._locations:
+                self._remove_locked(vector_id)
+            table = self._tables.setdefault(model_id, _HashTable())
+            table.vector_ids.append(vector_id)
+            table.dhashes.append(dhash)
+            table.colors.append(color)
+            table._arrays = None
+            self._locations[vector_id] = model_id
+
+    def remove(self, vector_id: str):
+        """Forget a deleted image"""
+        with self._lock:
+            if vector_id in self._locations:
+                self._remove_locked(vector_id)
+
+    def _remove_locked(self, vector_id: str):
+        table = self._tables[self._locations.pop(vector_id)]
+        index = table.vector_ids.index(vector_id)
+        del table.vector_ids[index], table.dhashes[index], table.colors[index]
+        table._arrays = None
+
+    def clear(self):
+        """Drop every entry"""
+        with self._lock:
+            self._tables.clear()
+            self._locations.clear()
+
+    def find(self, image_hash: str, model_id: str) -> Optional[Tuple[str, int]]:
+        """
+        Find the closest stored near-duplicate embedded by the same model
+
+        Args:
+            image_hash: perceptual_hash() of the query image
+            model_id: Identity of the model the caller would otherwise run
+
+        Returns:
+            Tuple of (vector_id, Hamming distance), or None if nothing is close enough
+        """
+        dhash, color = split_hash(image_hash)
+        with self._lock:
+            self.lookups += 1
+            table = self._tables.get(model_id)
+            if table is None or not table.vector_ids:
+                return None
+            dhashes, colors = table.arrays()
+            vector_ids = table.vector_ids
+
+            distances = _popcount64(dhashes ^ np.uint64(dhash)).astype(np.int64)
+            color_diffs = np.abs(colors - np.array(color, dtype=np.int16)).max(axis=1)
+            distances[color_diffs > self.max_color_diff] = 65
+            best = int(np.argmin(distances))
+            if distances[best] > self.max_distance:
+                return None
+            self.hits += 1
+            return vector_ids[best], int(distances[best])
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get index size and shortcut counters"""
+        with self._lock:
+            return {
+                "entries": len(self._locations),
+                "models": len(self._tables),
+                "max_distance": self.max_distance,
+                "max_color_diff": self.max_color_diff,
+                "lookups": self.lookups,
+                "hits": self.hits
+            }
@@ -0,0 +1,507 @@
+"""
+In-process vector store
+Exact cosine search over a contiguous float32 matrix of normalized vectors, for tests,
+benchmarks and catalogs small enough not to need a Qdrant cluster. With VECTOR_STORE_PATH
+each collection is persisted as an append-only log that is compacted on open and close.
+With NUMPY_SEARCH_WORKERS > 1 the matrices live in shared memory and searches are split
+across worker processes (see sharded_search).
+"""
+import asyncio
+import base64
+import bisect
+import functools
+import json
+import logging
+import os
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from app.config import config
+from app.models.embedding import Embedding
+from app.services.sharded_search import ShardedSearchEngine, SharedMatrix, normalize_rows, top_k
+from app.services.vector_store import StoredPoint, VectorStore
+
+logger = logging.getLogger(__name__)
+
+
+def payload_matches(payload: Dict[str, Any], payload_filter: Optional[Dict[str, Any]]) -> bool:
+    """Whether the payload has every field value of the filter"""
+    return not payload_filter or all(payload.get(key) == value for key, value in payload_filter.items())
+
+
+class NumpyCollection:
+    """One collection: normalized vectors in the first len(ids) rows of a growable matrix"""
+
+    def __init__(self, vector_size: int, capacity: int = 1024, shared: bool = False):
+        """
+        Args:
+            vector_size: Dimensions per vector
+            capacity: Initial number of rows; the matrix doubles when it fills up
+            shared: Keep the matrix in shared memory so ShardedSearchEngine workers can read it
+        """
+        self.vector_size = vector_size
+        self.shared = shared
+        self.block: Optional[SharedMatrix] = None
+        self.vectors = self._allocate(capacity)
+        self.ids: List[str] = []
+        self.payloads: List[Dict[str, Any]] = []
+        self.rows: Dict[str, int] = {}
+        # IDs in sorted order for scrolling, rebuilt after points are added or deleted
+        self._sorted_ids: Optional[List[str]] = None
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def _allocate(self, capacity: int) -> np.ndarray:
+        if not self.shared:
+            return np.empty((capacity, self.vector_size), dtype=np.float32)
+        self.block = SharedMatrix(capacity, self.vector_size)
+        return self.block.array
+
+    def release(self):
+        """Free the shared memory block (the collection is unusable afterwards)"""
+        if self.block is not None:
+            self.vectors = None
+            self.block.release()
+            self.block = None
+
+    @property
+    def matrix(self) -> np.ndarray:
+        """The stored vectors, one normalized row per point (a view, not a copy)"""
+        return self.vectors[:len(self.ids)]
+
+    def upsert(self, ids: Sequence[str], vectors: np.ndarray, payloads: Sequence[Dict[str, Any]]):
+        """Insert or replace points; vectors are normalized so a dot product is the cosine similarity"""
+        vectors = normalize_rows(vectors)
+        needed = len(self.ids) + sum(1 for point_id in ids if point_id not in self.rows)
+        if needed > len(self.vectors):
+            old_block = self.block
+            grown = self._allocate(max(needed, 2 * len(self.vectors)))
+            grown[:len(self.ids)] = self.matrix
+            self.vectors = grown
+            if old_block is not None:
+                old_block.release()
+        for point_id, vector, payload in zip(ids, vectors, payloads):
+            row = self.rows.get(point_id)
+            if row is None:
+                row = self.rows[point_id] = len(self.ids)
+                self.ids.append(point_id)
+                self.payloads.append(payload)
+                self._sorted_ids = None
+            else:
+                self.payloads[row] = payload
+            self.vectors[row] = vector
+
+    def delete(self, point_id: str) -> bool:
+        """Remove a point by moving the last row into its place"""
+        row = self.rows.pop(point_id, None)
+        if row is None:
+            return False
+        last = len(self.ids) - 1
+        if row != last:
+            self.vectors[row] = self.vectors[last]
+            self.ids[row] = self.ids[last]
+            self.payloads[row] = self.payloads[last]
+            self.rows[self.ids[row]] = row
+        self.ids.pop()
+        self.payloads.pop()
+        self._sorted_ids = None
+        return True
+
+    def sorted_ids(self) -> List[str]:
+        """Point IDs in sorted order; unlike rows, deletes do not move the remaining points in it"""
+        if self._sorted_ids is None:
+            self._sorted_ids = sorted(self.ids)
+        return self._sorted_ids
+
+    def matching_rows(self, payload_filter: Optional[Dict[str, Any]]) -> Optional[np.ndarray]:
+        """Rows whose payload has every field value of the filter, or None for no filter"""
+        if not payload_filter:
+            return None
+        return np.fromiter(
+            (row for row, payload in enumerate(self.payloads) if payload_matches(payload, payload_filter)),
+            dtype=np.int64
+        )
+
+    def search_batch(
+        self,
+        queries: np.ndarray,
+        limit: int,
+        score_threshold: Optional[float] = None,
+        payload_filter: Optional[Dict[str, Any]] = None
+    ) -> List[List[Tuple[int, float]]]:
+        """
+        Exact top-k by cosine similarity for a (queries, dim) batch, in this process
+
+        Returns:
+            (row, score) pairs per query, best first
+        """
+        rows = self.matching_rows(payload_filter)
+        candidates = self.matrix if rows is None else self.matrix[rows]
+        columns, scores = top_k(normalize_rows(queries) @ candidates.T, limit)
+        if rows is not None:
+            columns = rows[columns]
+        return [
+            [(row, score) for row, score in zip(query_rows.tolist(), query_scores.tolist())
+             if score_threshold is None or score >= score_threshold]
+            for query_rows, query_scores in zip(columns, scores)
+        ]
+
+    def search(
+        self,
+        query: np.ndarray,
+        limit: int,
+        score_threshold: Optional[float] = None,
+        payload_filter: Optional[Dict[str, Any]] = None
+    ) -> List[Tuple[int, float]]:
+        """Exact top-k by cosine similarity for one query"""
+        return self.search_batch(query[np.newaxis], limit, score_threshold, payload_filter)[0]
+
+
+class CollectionLog:
+    """
+    Append-only JSON lines log of a collection's upserts and deletes
+
+    Vectors are stored as base64 float32 so replaying restores them bit for bit.
+    A partially written last line (after a crash) is skipped on replay.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+
+    @staticmethod
+    def _upsert_record(point_id: str, vector: np.ndarray, payload: Dict[str, Any]) -> Dict[str, Any]:
+        return {
+            "op": "upsert",
+            "id": point_id,
+            "vector": base64.b64encode(np.ascontiguousarray(vector, dtype=np.float32).tobytes()).decode("ascii"),
+            "payload": payload
+        }
+
+    def _write(self, mode: str, path: str, records: Iterable[Dict[str, Any]]):
+        with open(path, mode, encoding="utf-8") as f:
+            for record in records:
+                f.write(json.dumps(record, default=str) + "\n")
+
+    def append_upserts(self, ids: Sequence[str], vectors: np.ndarray, payloads: Sequence[Dict[str, Any]]):
+        self._write("a", self.path, (
+            self._upsert_record(point_id, vector, payload) for point_id, vector, payload in zip(ids, vectors, payloads)
+        ))
+
+    def append_deletes(self, ids: Sequence[str]):
+        self._write("a", self.path, ({"op": "delete", "id": point_id} for point_id in ids))
+
+    def replay(self, collection: NumpyCollection) -> int:
+        """Apply the log to an empty collection; returns the number of records applied"""
+        if not os.path.exists(self.path):
+            return 0
+        applied = 0
+        with open(self.path, encoding="utf-8") as f:
+            for line_number, line in enumerate(f, 1):
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError:
+                    logger.warning(f"Skipping unreadable line {line_number} of {self.path}")
+                    continue
+                if record["op"] == "upsert":
+                    vector = np.frombuffer(base64.b64decode(record["vector"]), dtype=np.float32)
+                    collection.upsert([record["id"]], vector[np.newaxis], [record["payload"]])
+                elif record["op"] == "delete":
+                    collection.delete(record["id"])
+                applied += 1
+        return applied
+
+    def compact(self, collection: NumpyCollection):
+        """Rewrite the log as one upsert per live point, atomically replacing the old one"""
+        temporary = self.path + ".tmp"
+        self._write("w", temporary, (
+            self._upsert_record(point_id, vector, payload)
+            for point_id, vector, payload in zip(collection.ids, collection.matrix, collection.payloads)
+        ))
+        os.replace(temporary, self.path)
+
+
+class NumpyVectorStore(VectorStore):
+    """Vector store held in this process, searched exactly with NumPy"""
+
+    name = "numpy"
+    display_name = "NumPy store"
+
+    def __init__(self, path: Optional[str] = None, search_workers: Optional[int] = None):
+        """
+        Args:
+            path: Directory for the collection logs (default VECTOR_STORE_PATH; "" keeps
+                everything in memory)
+            search_workers: Worker processes for sharded search (default NUMPY_SEARCH_WORKERS;
+                0 or 1 searches in this process)
+        """
+        super().__init__()
+        self.path = config.VECTOR_STORE_PATH if path is None else path
+        self.collections: Dict[str, NumpyCollection] = {}
+        self.logs: Dict[str, CollectionLog] = {}
+        workers = config.NUMPY_SEARCH_WORKERS if search_workers is None else search_workers
+        self.search_engine: Optional[ShardedSearchEngine] = None
+        if workers > 1:
+            self.search_engine = ShardedSearchEngine(workers, min_shard_rows=config.NUMPY_SEARCH_MIN_SHARD_ROWS)
+        # With sharded search, writes wait for in-flight searches (rows must not move under
+        # them), and queries arriving meanwhile are answered together by the next batch
+        self._locks: Dict[str, asyncio.Lock] = {}
+        self._pending: Dict[str, list] = {}
+
+    def start_search_workers(self):
+        """Fork the sharded search workers (once); see VectorStore.start_search_workers"""
+        if self.search_engine is None or self.search_engine.started:
+            return
+        self.search_engine.start()
+        print(f"🧮 Sharded search: {self.search_engine.workers} worker processes, "
+              f"shards of at least {self.search_engine.min_shard_rows} rows")
+
+    async def initialize_collection(self) -> bool:
+        """Create the collections, replaying their logs when VECTOR_STORE_PATH is set"""
+        try:
+            if self.path:
+                os.makedirs(self.path, exist_ok=True)
+            # Normally already started by the server's startup hook, before the model loads
+            self.start_search_workers()
+            for name in (self.collection_name, self.search_embeddings_collection):
+                if name in self.collections:
+                    continue
+                collection = NumpyCollection(self.vector_size, shared=self.search_engine is not None)
+                if self.path:
+                    log = CollectionLog(os.path.join(self.path, f"{name}.jsonl"))
+                    log.replay(collection)
+                    log.compact(collection)
+                    self.logs[name] = log
+                self.collections[name] = collection
+                print(f"📁 Collection {name}: {len(collection)} points ({self.display_name}, "
+                      f"{'persisted in ' + self.path if self.path else 'in memory'})")
+
+            if config.NEAR_DUPLICATE_ENABLED:
+                try:
+                    await self.load_hash_index()
+                except Exception as index_error:
+                    print(f"⚠️ Could not load near-duplicate hash index: {index_error}")
+
+            self.collections_initialized = True
+            self.init_error = None
+            return True
+        except Exception as e:
+            logger.error(f"Error initializing collections: {str(e)}")
+            print(f"❌ Error initializing collections: {str(e)}")
+            self.init_error = str(e)
+            return False
+
+    async def close(self):
+        """Compact the collection logs, stop the search workers and free shared memory"""
+        loop = asyncio.get_running_loop()
+        for name, log in self.logs.items():
+            async with self._lock(name):
+                await loop.run_in_executor(None, log.compact, self.collections[name])
+        if self.search_engine is not None:
+            self.search_engine.close()
+            for collection in self.collections.values():
+                collection.release()
+            self.collections.clear()
+            self.logs.clear()
+            self.collections_initialized = False
+
+    async def check_readiness(self) -> Dict[str, Any]:
+        """The store is in-process, so it is ready once the collections are loaded"""
+        return {
+            "ready": self.collections_initialized,
+            "reachable": True,
+            "collections_initialized": self.collections_initialized,
+            "error": self.init_error
+        }
+
+    async def get_collection_info(self) -> Dict[str, Any]:
+        """Get information about the collection"""
+        collection = self.collections.get(self.collection_name)
+        if collection is None:
+            return {}
+        return {
+            "name": self.collection_name,
+            "embedding_model": self.model_spec.key,
+            "store": self.name,
+            "path": self.path or None,
+            "vector_size": self.vector_size,
+            "vectors_count": len(collection),
+            "points_count": len(collection),
+            "memory_mb": round(collection.vectors.nbytes / 1024 ** 2, 2),
+            "search": self.search_engine.get_stats() if self.search_engine is not None else {"workers": 0},
+            "status": "green"
+        }
+
+    def _collection(self, collection_name: str) -> NumpyCollection:
+        collection = self.collections.get(collection_name)
+        if collection is None:
+            raise ValueError(f"Collection {collection_name} not found; call initialize_collection() first")
+        return collection
+
+    def _lock(self, collection_name: str) -> asyncio.Lock:
+        return self._locks.setdefault(collection_name, asyncio.Lock())
+
+    def _stored_point(self, collection: NumpyCollection, row: int, with_vectors: bool,
+                      with_payload: bool = True, payload_fields: Optional[List[str]] = None,
+                      score: Optional[float] = None) -> StoredPoint:
+        payload = None
+        if with_payload:
+            payload = collection.payloads[row]
+            # Copies, like a payload decoded from a Qdrant response
+            payload = {key: payload[key] for key in payload_fields if key in payload} if payload_fields else dict(payload)
+        return StoredPoint(
+            id=collection.ids[row],
+            payload=payload,
+            vector=collection.vectors[row].tolist() if with_vectors else None,
+            score=score
+        )
+
+    async def upsert_points(self, collection_name: str, points: Sequence[StoredPoint], wait: bool = True):
+        collection = self._collection(collection_name)
+        ids = [str(point.id) for point in points]
+        payloads = [point.payload or {} for point in points]
+        vectors = np.stack([Embedding.from_any(point.vector).vector for point in points])
+        async with self._lock(collection_name):
+            collection.upsert(ids, vectors, payloads)
+            if collection_name in self.logs:
+                # Encoding and writing the records is blocking file I/O, so it runs off the event
+                # loop; the lock is held until it is done, so the log keeps the order of the writes
+                await asyncio.get_running_loop().run_in_executor(None, functools.partial(
+                    self.logs[collection_name].append_upserts,
+                    ids, collection.vectors[[collection.rows[i] for i in ids]], payloads
+                ))
+        return "completed"
+
+    async def search_points(
+        self,
+        collection_name: str,
+        vector: Embedding,
+        limit: int,
+        score_threshold: Optional[float] = None,
+        payload_filter: Optional[Dict[str, Any]] = None,
+        with_vectors: bool = False,
+        oversampling: Optional[float] = None,
+        hnsw_ef: Optional[int] = None,
+        exact: bool = False
+    ) -> List[StoredPoint]:
+        # Always exact, so the index tuning parameters have nothing to change
+        collection = self._collection(collection_name)
+        query = Embedding.from_any(vector).vector
+        if self.search_engine is None or payload_filter:
+            # Filtered searches only score the matching rows, in this process
+            hits = collection.search(query, limit, score_threshold, payload_filter)
+            return [self._stored_point(collection, row, with_vectors, score=score) for row, score in hits]
+        return (await self._search_sharded(collection_name, [query], limit, score_threshold, with_vectors))[0]
+
+    async def search_points_batch(
+        self,
+        collection_name: str,
+        vectors: Sequence[Embedding],
+        limit: int,
+        score_threshold: Optional[float] = None,
+        with_vectors: bool = False
+    ) -> List[List[StoredPoint]]:
+        """All queries scored with one matrix product (per shard with sharded search)"""
+        collection = self._collection(collection_name)
+        queries = [Embedding.from_any(vector).vector for vector in vectors]
+        if not queries:
+            return []
+        if self.search_engine is not None:
+            return await self._search_sharded(collection_name, queries, limit, score_threshold, with_vectors)
+        return [
+            [self._stored_point(collection, row, with_vectors, score=score) for row, score in hits]
+            for hits in collection.search_batch(np.stack(queries), limit, score_threshold)
+        ]
+
+    async def _search_sharded(
+        self,
+        collection_name: str,
+        queries: List[np.ndarray],
+        limit: int,
+        score_threshold: Optional[float],
+        with_vectors: bool
+    ) -> List[List[StoredPoint]]:
+        """
+        Queue the queries, then search everything queued for the collection as one batch
+
+        Whoever gets the lock first runs the batch, so queries from concurrent requests
+        (/search, the searches of a recommendation) share one pass over the matrix.
+        """
+        loop = asyncio.get_running_loop()
+        futures = [loop.create_future() for _ in queries]
+        self._pending.setdefault(collection_name, []).extend(
+            (query, limit, score_threshold, with_vectors, future) for query, future in zip(queries, futures)
+        )
+        async with self._lock(collection_name):
+            batch = self._pending.pop(collection_name, [])
+            if batch:
+                await self._run_batch(collection_name, batch)
+        return list(await asyncio.gather(*futures))
+
+    async def _run_batch(self, collection_name: str, batch: list):
+        """Search a queued batch with the largest limit and hand each caller its own results"""
+        try:
+            collection = self._collection(collection_name)
+            hits = await self.search_engine.search_async(
+                collection.block, len(collection), np.stack([item[0] for item in batch]), max(item[1] for item in batch),
+                key=collection_name
+            )
+            results = [
+                [self._stored_point(collection, row, with_vectors, score=score)
+                 for row, score in query_hits[:limit] if score_threshold is None or score >= score_threshold]
+                for (_, limit, score_threshold, with_vectors, _), query_hits in zip(batch, hits)
+            ]
+        except Exception as e:
+            for *_, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+        for (*_, future), points in zip(batch, results):
+            if not future.done():
+                future.set_result(points)
+
+    async def retrieve_points(
+        self, collection_name: str, ids: Sequence[str], with_vectors: bool = False, with_payload: bool = True
+    ) -> List[StoredPoint]:
+        collection = self._collection(collection_name)
+        return [
+            self._stored_point(collection, collection.rows[str(point_id)], with_vectors, with_payload)
+            for point_id in ids if str(point_id) in collection.rows
+        ]
+
+    async def scroll_points(
+        self,
+        collection_name: str,
+        limit: int,
+        offset: Optional[Any] = None,
+        payload_filter: Optional[Dict[str, Any]] = None,
+        with_vectors: bool = False,
+        payload_fields: Optional[List[str]] = None
+    ) -> Tuple[List[StoredPoint], Optional[Any]]:
+        """
+        Pages in point ID order, like Qdrant; the offset is the ID of the first point of the page
+
+        Points deleted or added between pages do not make the remaining ones shift, so
+        deleting while paging neither skips nor repeats points.
+        """
+        collection = self._collection(collection_name)
+        ids = collection.sorted_ids()
+        points: List[StoredPoint] = []
+        for index in range(bisect.bisect_left(ids, str(offset)) if offset is not None else 0, len(ids)):
+            row = collection.rows[ids[index]]
+            if not payload_matches(collection.payloads[row], payload_filter):
+                continue
+            if len(points) == limit:
+                return points, ids[index]
+            points.append(self._stored_point(collection, row, with_vectors, payload_fields=payload_fields))
+        return points, None
+
+    async def delete_points(self, collection_name: str, ids: Sequence[str]):
+        collection = self._collection(collection_name)
+        async with self._lock(collection_name):
+            deleted = [str(point_id) for point_id in ids if collection.delete(str(point_id))]
+            if deleted and collection_name in self.logs:
+                await asyncio.get_running_loop().run_in_executor(
+                    None, self.logs[collection_name].append_deletes, deleted
+                )
@@ -0,0 +1,234 @@
+"""
+Runtime profile for model inference
+Decides determinism, TensorFlow thread pools, oneDNN and CPU affinity for this process
+
+Profiles:
+    performance    Non-deterministic (faster) kernels, one intra-op thread per CPU this
+                   worker may use, a single inter-op thread (ResNet50 is one sequential
+                   graph) and oneDNN enabled
+    deterministic  Op determinism and fixed seeds, TensorFlow's default thread pools
+
+Individual settings can be overridden with TF_INTRA_OP_THREADS, TF_INTER_OP_THREADS,
+TF_ONEDNN and CPU_AFFINITY.
+"""
+import logging
+import os
+import sys
+import tempfile
+import threading
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+from app.config import config
+
+logger = logging.getLogger(__name__)
+
+PROFILES: Dict[str, Dict[str, Any]] = {
+    "performance": {"determinism": False, "intra_op_threads": "cpus", "inter_op_threads": 1, "onednn": True},
+    "deterministic": {"determinism": True, "intra_op_threads": 0, "inter_op_threads": 0, "onednn": None}
+}
+
+_settings: Optional[Dict[str, Any]] = None
+_tensorflow_configured = False
+_lock = threading.Lock()
+_affinity_slot_file = None  # Held open for the life of the process to keep the CPU slot
+
+
+def parse_cpu_list(value: str) -> List[int]:
+    """Parse a CPU list such as '0-3,8,10-11'"""
+    cpus = []
+    for part in value.split(","):
+        part = part.strip()
+        if not part:
+            continue
+        if "-" in part:
+            first, last = part.split("-", 1)
+            cpus.extend(range(int(first), int(last) + 1))
+        else:
+            cpus.append(int(part))
+    return sorted(set(cpus))
+
+
+def format_cpu_list(cpus: List[int]) -> str:
+    """Format CPUs compactly, e.g. [0, 1, 2, 3, 8] -> '0-3,8'"""
+    ranges = []
+    for cpu in sorted(cpus):
+        if ranges and cpu == ranges[-1][1] + 1:
+            ranges[-1][1] = cpu
+        else:
+            ranges.append([cpu, cpu])
+    return ",".join(str(a) if a == b else f"{a}-{b}" for a, b in ranges)
+
+
+def _claim_affinity_slot(cpus: List[int], slots: int) -> List[int]:
+    """
+    Give this worker its own share of the CPUs
+
+    Each worker process takes the first free slot by locking a file in the temp
+    directory; the lock is released automatically when the process exits.
+    """
+    global _affinity_slot_file
+    import fcntl
+
+    slots = max(1, min(slots, len(cpus)))
+    per_slot = len(cpus) // slots
+    for slot in range(slots):
+        handle = open(os.path.join(tempfile.gettempdir(), f"fashion-inference-cpu-slot-{slot}.lock"), "w")
+        try:
+            fcntl.flock(handle, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            handle.close()
+            continue
+        _affinity_slot_file = handle
+        return cpus[slot * per_slot:(slot + 1) * per_slot]
+
+    logger.warning(f"All {slots} CPU affinity slots are taken; this worker is not pinned")
+    return cpus
+
+
+def _set_process_affinity(cpus: List[int]):
+    """
+    Pin every thread of this process to the given CPUs
+
+    On Linux os.sched_setaffinity(0, ...) only pins the calling thread, and a new thread
+    inherits the mask of the thread that starts it. Threads that already exist (the
+    event loop, executor and BLAS threads) are therefore pinned one by one.
+    """
+    try:
+        thread_ids = [int(thread_id) for thread_id in os.listdir("/proc/self/task")]
+    except OSError:
+        thread_ids = [0]
+    for thread_id in thread_ids:
+        try:
+            os.sched_setaffinity(thread_id, cpus)
+        except OSError:
+            # The thread exited meanwhile
+            pass
+
+
+def _apply_affinity() -> Optional[List[int]]:
+    """Pin this process to the CPUs selected by CPU_AFFINITY ('', 'auto' or a CPU list)"""
+    setting = config.CPU_AFFINITY.strip().lower()
+    if not setting or not hasattr(os, "sched_setaffinity"):
+        return None
+
+    available = sorted(os.sched_getaffinity(os.getpid()))
+    if setting == "auto":
+        cpus = _claim_affinity_slot(available, config.CPU_AFFINITY_SLOTS)
+    else:
+        cpus = [cpu for cpu in parse_cpu_list(setting) if cpu in available]
+    if not cpus:
+        logger.warning(f"CPU_AFFINITY={config.CPU_AFFINITY} selects no usable CPU; not pinning")
+        return None
+
+    _set_process_affinity(cpus)
+    return cpus
+
+
+def usable_cpu_count() -> int:
+    """CPUs this process is allowed to run on (the main thread's mask, whichever thread asks)"""
+    if hasattr(os, "sched_getaffinity"):
+        return len(os.sched_getaffinity(os.getpid()))
+    return os.cpu_count() or 1
+
+
+def apply_runtime_profile(name: Optional[str] = None) -> Dict[str, Any]:
+    """
+    Resolve the runtime profile and apply its process-wide parts, once per process
+
+    CPU affinity is applied immediately to every thread and TF_ENABLE_ONEDNN_OPTS is
+    exported so it takes effect when TensorFlow is first imported. The server calls this
+    at startup, before the model loads on an inference thread. Thread pools and determinism are
+    applied by configure_tensorflow() when a TensorFlow backend loads.
+
+    Args:
+        name: Profile name (defaults to RUNTIME_PROFILE)
+
+    Returns:
+        The effective settings
+    """
+    global _settings
+    with _lock:
+        if _settings is not None:
+            return _settings
+
+        name = name or config.RUNTIME_PROFILE
+        if name not in PROFILES:
+            raise ValueError(f"Unknown runtime profile '{name}'. Available: {', '.join(PROFILES)}")
+        profile = PROFILES[name]
+
+        cpus = _apply_affinity()
+
+        intra_op = config.TF_INTRA_OP_THREADS if config.TF_INTRA_OP_THREADS >= 0 else profile["intra_op_threads"]
+        if intra_op == "cpus":
+            intra_op = usable_cpu_count()
+        inter_op = config.TF_INTER_OP_THREADS if config.TF_INTER_OP_THREADS >= 0 else profile["inter_op_threads"]
+
+        onednn = profile["onednn"]
+        if config.TF_ONEDNN in ("true", "false"):
+            onednn = config.TF_ONEDNN == "true"
+        if onednn is not None:
+            if "TF_ENABLE_ONEDNN_OPTS" in os.environ:
+                # An explicit environment variable wins
+                onednn = os.environ["TF_ENABLE_ONEDNN_OPTS"] == "1"
+            elif "tensorflow" in sys.modules:
+                logger.warning("TensorFlow was imported before the runtime profile was applied; oneDNN setting ignored")
+                onednn = None
+            else:
+                os.environ["TF_ENABLE_ONEDNN_OPTS"] = "1" if onednn else "0"
+
+        _settings = {
+            "profile": name,
+            "determinism": profile["determinism"],
+            "intra_op_threads": intra_op,
+            "inter_op_threads": inter_op,
+            "onednn": onednn,
+            "cpu_affinity": format_cpu_list(cpus) if cpus else None,
+            "usable_cpus": usable_cpu_count()
+        }
+        logger.info(
+            f"Runtime profile '{name}': determinism {'on' if _settings['determinism'] else 'off'}, "
+            f"intra-op threads {intra_op or 'auto'}, inter-op threads {inter_op or 'auto'}, "
+            f"oneDNN {'default' if onednn is None else ('on' if onednn else 'off')}, "
+            f"CPU affinity {_settings['cpu_affinity'] or 'none'} ({_settings['usable_cpus']} usable CPUs)"
+        )
+        return _settings
+
+
+def configure_tensorflow() -> Dict[str, Any]:
+    """
+    Apply the runtime profile to TensorFlow before the model is built
+
+    Returns:
+        The effective settings
+    """
+    global _tensorflow_configured
+    settings = apply_runtime_profile()
+    with _lock:
+        if _tensorflow_configured:
+            return settings
+
+        import tensorflow as tf
+
+        try:
+            # 0 means "let TensorFlow decide"
+            tf.config.threading.set_intra_op_parallelism_threads(settings["intra_op_threads"])
+            tf.config.threading.set_inter_op_parallelism_threads(settings["inter_op_threads"])
+        except RuntimeError as e:
+            # The runtime was already initialized by earlier TensorFlow work in this process
+            logger.warning(f"Could not set TensorFlow thread pools: {str(e)}")
+
+        if settings["determinism"]:
+            # Deterministic kernels and fixed seeds: reproducible, but slower
+            tf.config.experimental.enable_op_determinism()
+            tf.random.set_seed(42)
+            np.random.seed(42)
+
+        _tensorflow_configured = True
+        return settings
+
+
+def get_runtime_settings() -> Optional[Dict[str, Any]]:
+    """Effective settings, or None if no model has been loaded in this process yet"""
+    return _settings
@@ -0,0 +1,233 @@
+"""
+Multi-core exact search over a shared-memory embedding matrix
+The matrix lives in one named shared memory block. Worker processes attach to it by name,
+so no worker holds a copy. A batch of queries is split into contiguous row shards. Each
+worker computes the top k of its shard, and the per-shard lists are merged with a heap.
+"""
+import asyncio
+import heapq
+import logging
+import multiprocessing
+from concurrent.futures import Future, ProcessPoolExecutor
+from itertools import islice
+from multiprocessing import resource_tracker, shared_memory
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+Hits = List[Tuple[int, float]]
+
+
+def normalize_rows(vectors: np.ndarray) -> np.ndarray:
+    """Scale rows to unit length so dot products are cosine similarities (zero rows stay zero)"""
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    return (vectors / np.where(norms > 0, norms, 1)).astype(np.float32, copy=False)
+
+
+def top_k(scores: np.ndarray, k: int) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    The k best columns of each row of a (queries, rows) score matrix
+
+    Returns:
+        (columns, scores), both (queries, min(k, rows)) and best first
+    """
+    k = min(k, scores.shape[1])
+    if k <= 0:
+        return np.empty((len(scores), 0), dtype=np.int64), np.empty((len(scores), 0), dtype=scores.dtype)
+    if k < scores.shape[1]:
+        columns = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+    else:
+        columns = np.tile(np.arange(scores.shape[1]), (len(scores), 1))
+    best = np.take_along_axis(scores, columns, axis=1)
+    order = np.argsort(-best, axis=1, kind="stable")
+    return np.take_along_axis(columns, order, axis=1), np.take_along_axis(best, order, axis=1)
+
+
+def merge_top_k(shard_results: List[Tuple[np.ndarray, np.ndarray]], k: int) -> List[Hits]:
+    """Merge per-shard (rows, scores) lists, each sorted best first, into the overall top k per query"""
+    merged = []
+    for query in range(len(shard_results[0][0])):
+        streams = [zip(scores[query].tolist(), rows[query].tolist()) for rows, scores in shard_results]
+        merged.append([
+            (row, score) for score, row in islice(heapq.merge(*streams, key=lambda hit: -hit[0]), k)
+        ])
+    return merged
+
+
+class SharedMatrix:
+    """A float32 matrix in a named shared memory block, owned (and finally unlinked) by its creator"""
+
+    def __init__(self, rows: int, dim: int):
+        self.shape = (rows, dim)
+        self.memory = shared_memory.SharedMemory(create=True, size=max(1, rows * dim * 4))
+        self.array = np.ndarray(self.shape, dtype=np.float32, buffer=self.memory.buf)
+
+    @property
+    def name(self) -> str:
+        return self.memory.name
+
+    def release(self):
+        """Unlink the block; processes that still map it keep their mapping until they let go"""
+        self.array = None
+        self.memory.unlink()
+        try:
+            self.memory.close()
+        except BufferError:
+            # A view of the array is still alive; the mapping goes away with it
+            pass
+
+
+def _attach(name: str) -> shared_memory.SharedMemory:
+    """
+    Attach to a block created by the parent without registering it with the resource tracker
+
+    Attaching registers the block again (Python 3.13 adds track=False for this). The tracker
+    is shared with the parent, so an extra registration would be reported as leaked.
+    """
+    register = resource_tracker.register
+    resource_tracker.register = lambda *args, **kwargs: None
+    try:
+        return shared_memory.SharedMemory(name=name)
+    finally:
+        resource_tracker.register = register
+
+
+# Worker process state: per matrix key (a collection), the name and mapping of its current block
+_worker_blocks: Dict[str, Tuple[str, shared_memory.SharedMemory]] = {}
+
+
+def _worker_ready() -> bool:
+    return True
+
+
+def _search_shard(
+    key: str, block_name: str, shape: Tuple[int, int], start: int, stop: int, queries: np.ndarray, k: int
+) -> Tuple[np.ndarray, np.ndarray]:
+    """Top k of rows [start, stop) for each query, with row numbers of the whole matrix"""
+    attached = _worker_blocks.get(key)
+    if attached is None or attached[0] != block_name:
+        if attached is not None:
+            # This matrix was reallocated (it grew); only its old block is dropped
+            attached[1].close()
+        attached = _worker_blocks[key] = (block_name, _attach(block_name))
+    memory = attached[1]
+    matrix = np.ndarray(shape, dtype=np.float32, buffer=memory.buf)
+    rows, scores = top_k(queries @ matrix[start:stop].T, k)
+    del matrix
+    return rows + start, scores
+
+
+class ShardedSearchEngine:
+    """Exact top-k cosine search over a SharedMatrix, split across a pool of worker processes"""
+
+    def __init__(self, workers: int, min_shard_rows: int = 10000):
+        """
+        Args:
+            workers: Worker processes (and so the most shards per search)
+            min_shard_rows: Smallest shard worth sending to a worker; smaller matrices are
+                searched in the calling process, where there is no hand-off cost
+        """
+        self.workers = max(1, workers)
+        self.min_shard_rows = max(1, min_shard_rows)
+        self._pool: Optional[ProcessPoolExecutor] = None
+
+        # Metrics
+        self.searches = 0
+        self.queries = 0
+        self.sharded_searches = 0
+
+    def start(self):
+        """
+        Start the worker processes
+
+        Workers are forked (a spawned worker would re-import the server's main module and
+        with it TensorFlow), so call this before other threads start: a thread holding a
+        lock at fork time leaves it locked in the worker. The server does so in its startup
+        hook, before the model load is submitted. Set OPENBLAS_NUM_THREADS=1 so the workers
+        do not compete for cores with BLAS threads.
+        """
+        if self._pool is not None or self.workers <= 1:
+            return
+        self._pool = ProcessPoolExecutor(max_workers=self.workers, mp_context=multiprocessing.get_context("fork"))
+        # Submitting one task per worker before any is idle makes the pool fork all of them now
+        for future in [self._pool.submit(_worker_ready) for _ in range(self.workers)]:
+            future.result()
+        logger.info(f"Sharded search started with {self.workers} worker processes")
+
+    @property
+    def started(self) -> bool:
+        return self._pool is not None
+
+    def close(self):
+        if self._pool is not None:
+            self._pool.shutdown()
+            self._pool = None
+
+    def shards(self, rows: int) -> List[Tuple[int, int]]:
+        """Contiguous [start, stop) row ranges, one per worker that gets at least min_shard_rows"""
+        count = max(1, min(self.workers, rows // self.min_shard_rows))
+        bounds = np.linspace(0, rows, count + 1).astype(int)
+        return list(zip(bounds[:-1].tolist(), bounds[1:].tolist()))
+
+    def _submit(
+        self, matrix: SharedMatrix, rows: int, queries: np.ndarray, k: int, key: Optional[str]
+    ) -> Tuple[Optional[List[Future]], Optional[List[Hits]]]:
+        """Either futures of the shard searches or, when not worth sharding, the finished result"""
+        queries = normalize_rows(np.asarray(queries, dtype=np.float32).reshape(-1, matrix.shape[1]))
+        self.searches += 1
+        self.queries += len(queries)
+        if rows == 0 or k <= 0:
+            return None, [[] for _ in queries]
+        shards = self.shards(rows)
+        if self._pool is None or len(shards) == 1:
+            local_rows, scores = top_k(queries @ matrix.array[:rows].T, k)
+            return None, merge_top_k([(local_rows, scores)], k)
+        self.sharded_searches += 1
+        return [
+            self._pool.submit(_search_shard, key or matrix.name, matrix.name, matrix.shape, start, stop, queries, k)
+            for start, stop in shards
+        ], None
+
+    def search(
+        self, matrix: SharedMatrix, rows: int, queries: np.ndarray, k: int, key: Optional[str] = None
+    ) -> List[Hits]:
+        """
+        Exact top k for a batch of queries
+
+        Args:
+            matrix: Normalized vectors; only the first `rows` rows are searched
+            rows: Number of rows in use
+            queries: (queries, dim) or a single (dim,) query; normalized here
+            k: Results per query
+            key: Identity of the matrix across reallocations (e.g. the collection name).
+                Workers keep one block attached per key and only let go of a key's old
+                block when a new one replaces it. Defaults to the block name.
+
+        Returns:
+            (row, score) lists per query, best first
+        """
+        futures, hits = self._submit(matrix, rows, queries, k, key)
+        if futures is None:
+            return hits
+        return merge_top_k([future.result() for future in futures], k)
+
+    async def search_async(
+        self, matrix: SharedMatrix, rows: int, queries: np.ndarray, k: int, key: Optional[str] = None
+    ) -> List[Hits]:
+        """search() that waits for the workers without blocking the event loop"""
+        futures, hits = self._submit(matrix, rows, queries, k, key)
+        if futures is None:
+            return hits
+        results = await asyncio.gather(*(asyncio.wrap_future(future) for future in futures))
+        return merge_top_k(list(results), k)
+
+    def get_stats(self) -> Dict[str, int]:
+        return {
+            "workers": self.workers if self._pool is not None else 0,
+            "min_shard_rows": self.min_shard_rows,
+            "searches": self.searches,
+            "queries": self.queries,
+            "sharded_searches": self.sharded_searches
+        }
@@ -2,76 +2,115 @@
 Qdrant Vector Database Service
 Handles storing and retrieving image embeddings from Qdrant cloud
 """
-from qdrant_client import QdrantClient
+from qdrant_client import AsyncQdrantClient
 from qdrant_client.models import Distance, VectorParams, PointStruct
 from qdrant_client.http import models
-import uuid
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Sequence, Tuple
 import logging
-import asyncio
-import functools
-from datetime import datetime
+import httpx
+import json
 from app.config import config
+from app.models.embedding import Embedding
+from app.services.numpy_vector_store import NumpyVectorStore
+from app.services.vector_store import StoredPoint, VectorStore
 
 logger = logging.getLogger(__name__)
 
-class QdrantVectorService:
+QUANTIZATION_MODES = ("none", "scalar", "binary")
+
+class QdrantVectorService(VectorStore):
+    """Vector store backed by a Qdrant cluster"""
+
+    name = "qdrant"
+    display_name = "Qdrant"
+
     def __init__(self):
         """Initialize Qdrant client with cloud credentials from environment"""
         try:
-            self.client = QdrantClient(
+            # One async client per process: every request shares its keep-alive connection pool,
+            # and concurrent searches overlap instead of blocking the event loop
+            if config.QDRANT_TRANSPORT not in ("rest", "grpc"):
+                raise ValueError(f"Unknown QDRANT_TRANSPORT '{config.QDRANT_TRANSPORT}'; use 'rest' or 'grpc'")
+            if config.QDRANT_QUANTIZATION not in QUANTIZATION_MODES:
+                raise ValueError(
+                    f"Unknown QDRANT_QUANTIZATION '{config.QDRANT_QUANTIZATION}'; use one of {', '.join(QUANTIZATION_MODES)}"
+                )
+            self.client = AsyncQdrantClient(
                 url=config.QDRANT_URL,
                 api_key=config.QDRANT_API_KEY,
-                timeout=30  # Increased timeout for serverless
+                timeout=30,  # Increased timeout for serverless
+                # gRPC sends vectors as 4-byte floats instead of JSON decimal text
+                prefer_grpc=config.QDRANT_TRANSPORT == "grpc",
+                grpc_port=config.QDRANT_GRPC_PORT,
+                limits=httpx.Limits(
+                    max_connections=config.QDRANT_MAX_CONNECTIONS,
+                    max_keepalive_connections=config.QDRANT_MAX_CONNECTIONS
+                )
             )
-            self.collection_name = config.QDRANT_COLLECTION_NAME
-            self.search_embeddings_collection = "user_search_embeddings"  # New collection for search history
-            self.vector_size = config.VECTOR_SIZE
+            super().__init__()
         except Exception as e:
             logger.error(f"Failed to initialize Qdrant client: {e}")
             # In serverless, we might want to handle this more gracefully
             raise
-        
+
     async def initialize_collection(self):
         """Create the collections if they don't exist"""
         try:
-            collections = self.client.get_collections()
+            collections = await self.client.get_collections()
             collection_names = [col.name for col in collections.collections]
             print(f"🔍 DEBUG: Existing collections: {collection_names}")
+            if config.QDRANT_ON_DISK and config.QDRANT_QUANTIZATION == "none":
+                print("⚠️ QDRANT_ON_DISK without QDRANT_QUANTIZATION reads every candidate vector from disk; "
+                      "set QDRANT_QUANTIZATION=scalar to rank in RAM")
             
             # Initialize main fashion embeddings collection
             if self.collection_name not in collection_names:
                 print(f"📁 Creating new collection: {self.collection_name}")
-                self.client.create_collection(
+                await self.client.create_collection(
                     collection_name=self.collection_name,
                     vectors_config=VectorParams(
                         size=self.vector_size,
-                        distance=Distance.COSINE
-                    )
+                        distance=Distance.COSINE,
+                        on_disk=config.QDRANT_ON_DISK
+                    ),
+                    on_disk_payload=config.QDRANT_ON_DISK,
+                    hnsw_config=self.hnsw_config(),
+                    quantization_config=self.quantization_config()
                 )
-                logger.info(f"Created new collection: {self.collection_name}")
+                logger.info(f"Created new collection: {self.collection_name} (quantization: {config.QDRANT_QUANTIZATION})")
             else:
-                collection_info = self.client.get_collection(self.collection_name)
+                collection_info = await self.client.get_collection(self.collection_name)
                 print(f"📁 Collection {self.collection_name} exists:")
                 print(f"   Vector size: {collection_info.config.params.vectors.size}")
                 print(f"   Distance: {collection_info.config.params.vectors.distance}")
                 print(f"   Points count: {collection_info.points_count}")
+                self._check_vector_size(self.collection_name, collection_info)
+                quantization = self.quantization_mode(collection_info)
+                print(f"   Quantization: {quantization}")
+                if quantization != config.QDRANT_QUANTIZATION:
+                    print(f"⚠️ QDRANT_QUANTIZATION is '{config.QDRANT_QUANTIZATION}' but the collection uses '{quantization}'; "
+                          f"convert it with: python qdrant_tools.py quantize")
+                self._check_hnsw_config(self.collection_name, collection_info)
+                self._check_storage(self.collection_name, collection_info)
                 logger.info(f"Collection {self.collection_name} already exists")
             
             # Initialize search embeddings collection
             if self.search_embeddings_collection not in collection_names:
                 print(f"📁 Creating new search embeddings collection: {self.search_embeddings_collection}")
-                self.client.create_collection(
+                await self.client.create_collection(
                     collection_name=self.search_embeddings_collection,
                     vectors_config=VectorParams(
                         size=self.vector_size,
-                        distance=Distance.COSINE
-                    )
+                        distance=Distance.COSINE,
+                        on_disk=config.QDRANT_ON_DISK
+                    ),
+                    on_disk_payload=config.QDRANT_ON_DISK,
+                    hnsw_config=self.hnsw_config()
                 )
                 
                 # Create payload index for user_uid field to enable filtering
                 print(f"📇 Creating payload index for user_uid field...")
-                self.client.create_payload_index(
+                await self.client.create_payload_index(
                     collection_name=self.search_embeddings_collection,
                     field_name="user_uid",
                     field_schema=models.PayloadSchemaType.KEYWORD
@@ -79,19 +118,22 @@ class QdrantVectorService:
                 
                 logger.info(f"Created new search embeddings collection: {self.search_embeddings_collection}")
             else:
-                search_collection_info = self.client.get_collection(self.search_embeddings_collection)
+                search_collection_info = await self.client.get_collection(self.search_embeddings_collection)
                 print(f"📁 Search embeddings collection {self.search_embeddings_collection} exists:")
                 print(f"   Vector size: {search_collection_info.config.params.vectors.size}")
                 print(f"   Distance: {search_collection_info.config.params.vectors.distance}")
                 print(f"   Points count: {search_collection_info.points_count}")
+                self._check_vector_size(self.search_embeddings_collection, search_collection_info)
+                self._check_hnsw_config(self.search_embeddings_collection, search_collection_info)
+                self._check_storage(self.search_embeddings_collection, search_collection_info)
                 
                 # Check if payload index exists, create if not
                 try:
-                    collection_info = self.client.get_collection(self.search_embeddings_collection)
+                    collection_info = await self.client.get_collection(self.search_embeddings_collection)
                     payload_indices = collection_info.payload_schema
                     if "user_uid" not in payload_indices:
                         print(f"📇 Creating missing payload index for user_uid field...")
-                        self.client.create_payload_index(
+                        await self.client.create_payload_index(
                             collection_name=self.search_embeddings_collection,
                             field_name="user_uid",
                             field_schema=models.PayloadSchemaType.KEYWORD
@@ -103,149 +145,295 @@ class QdrantVectorService:
                     print(f"⚠️ Could not check/create payload index: {index_error}")
                 
                 logger.info(f"Search embeddings collection {self.search_embeddings_collection} already exists")
+            
+            if config.NEAR_DUPLICATE_ENABLED:
+                try:
+                    await self.load_hash_index()
+                except Exception as index_error:
+                    print(f"⚠️ Could not load near-duplicate hash index: {index_error}")
                 
+            self.collections_initialized = True
+            self.init_error = None
             return True
         except Exception as e:
             logger.error(f"Error initializing collections: {str(e)}")
             print(f"❌ Error initializing collections: {str(e)}")
+            self.init_error = str(e)
             return False
 
-    async def store_embedding(
-        self,
-        embedding: List[float],
-        filename: str,
-        file_size: int,
-        content_type: str,
-        processing_time: float,
-        model_used: str,
-        firebase_url: Optional[str] = None,
-        firebase_path: Optional[str] = None,
-        price: Optional[float] = None,
-        product_name: Optional[str] = None,
-        metadata: Optional[Dict[str, Any]] = None
-    ) -> str:
-        """Store image embedding in Qdrant with price and product name"""
-        try:
-            point_id = str(uuid.uuid4())
-            payload = {
-                "filename": filename,
-                "file_size": file_size,
-                "content_type": content_type,
-                "processing_time": processing_time,
-                "model_used": model_used,
-                "upload_timestamp": datetime.now().strftime("%Y-%m-%d"),
-                "price": price,  # Store price
-                "product_name": product_name  # Store product name
-            }
-            
-            # Add Firebase information if provided
-            if firebase_url:
-                payload["firebase_url"] = firebase_url
-            if firebase_path:
-                payload["firebase_path"] = firebase_path
-                
-            if metadata:
-                payload.update(metadata)
-
-            print(f"🔍 DEBUG: About to store embedding:")
-            print(f"   Point ID: {point_id}")
-            print(f"   Embedding length: {len(embedding)}")
-            print(f"   First 5 values: {embedding[:5]}")
-            print(f"   Product Name: {product_name}" if product_name else "   Product Name: Not specified")
-            print(f"   Price: ${price:.2f}" if price else "   Price: Not specified")
-            if firebase_url:
-                print(f"   Firebase URL: {firebase_url}")
-            if firebase_path:
-                print(f"   Firebase Path: {firebase_path}")
-
-            # Validation
-            if not isinstance(embedding, list) or len(embedding) != self.vector_size:
-                raise ValueError(f"❌ Invalid embedding shape. Expected 2048 floats, got {len(embedding)}")
-            if any(x is None for x in embedding):
-                raise ValueError("❌ Embedding contains None values")
-
-            # Convert to float
-            embedding = [float(x) for x in embedding]
-
-            point = PointStruct(
-                id=point_id,
-                vector=embedding,
-                payload=payload
+    async def close(self):
+        """Close the pooled Qdrant connections"""
+        await self.client.close()
+
+    def _check_vector_size(self, collection_name: str, collection_info):
+        """
+        Refuse to use a collection built by a model with a different vector size
+
+        Qdrant has no collection-level metadata, so the model is recorded in the
+        collection name and in each point's "embedding_model" payload field.
+        """
+        stored_size = collection_info.config.params.vectors.size
+        if stored_size != self.vector_size:
+            raise ValueError(
+                f"Collection {collection_name} holds {stored_size}-dimensional vectors but "
+                f"{self.model_spec.display_name} produces {self.vector_size}; "
+                f"set QDRANT_COLLECTION_NAME to a new collection or re-embed the catalog"
             )
 
-            loop = asyncio.get_event_loop()
-            result = await loop.run_in_executor(
-                None,
-                functools.partial(
-                    self.client.upsert,
-                    collection_name=self.collection_name,
-                    points=[point]
+    @staticmethod
+    def quantization_config(mode: Optional[str] = None) -> Optional[models.QuantizationConfig]:
+        """
+        Qdrant quantization of the catalog vectors for QDRANT_QUANTIZATION (or `mode`)
+
+        Scalar quantization keeps one int8 per dimension (2 KB instead of 8 KB for a
+        ResNet50 vector), binary one bit (256 bytes). The float32 vectors are kept as
+        well and used to re-score the quantized candidates of each search.
+        """
+        mode = mode or config.QDRANT_QUANTIZATION
+        if mode == "none":
+            return None
+        if mode == "scalar":
+            return models.ScalarQuantization(
+                scalar=models.ScalarQuantizationConfig(
+                    type=models.ScalarType.INT8,
+                    quantile=0.99,  # Clip the 1% most extreme values so they don't stretch the int8 range
+                    always_ram=config.QDRANT_QUANTIZATION_ALWAYS_RAM
                 )
             )
+        if mode == "binary":
+            return models.BinaryQuantization(
+                binary=models.BinaryQuantizationConfig(always_ram=config.QDRANT_QUANTIZATION_ALWAYS_RAM)
+            )
+        raise ValueError(f"Unknown quantization '{mode}'; use one of {', '.join(QUANTIZATION_MODES)}")
 
-            print(f"   ✅ Qdrant upsert result: {result}")
-            logger.info(f"Stored embedding for {filename} with ID: {point_id}")
-            return point_id
+    @staticmethod
+    def quantization_mode(collection_info) -> str:
+        """Quantization of an existing collection: none, scalar, binary or product"""
+        quantization = collection_info.config.quantization_config
+        if quantization is None:
+            return "none"
+        if isinstance(quantization, models.ScalarQuantization):
+            return "scalar"
+        if isinstance(quantization, models.BinaryQuantization):
+            return "binary"
+        return "product"
 
-        except Exception as e:
-            logger.error(f"Error storing embedding: {str(e)}")
-            raise Exception(f"Failed to store embedding in Qdrant: {str(e)}")
+    async def migrate_quantization(self, mode: Optional[str] = None, collection_name: Optional[str] = None) -> Dict[str, str]:
+        """
+        Switch an existing collection to another quantization
+
+        Qdrant builds the quantized vectors from the stored float32 vectors in the
+        background; the collection stays searchable and reports status "yellow" until
+        the optimizers are done.
 
-    async def search_similar_images(
+        Returns:
+            Dict with the collection name and its previous and new quantization
+        """
+        collection_name = collection_name or self.collection_name
+        mode = mode or config.QDRANT_QUANTIZATION
+        quantization = self.quantization_config(mode)
+        previous = self.quantization_mode(await self.client.get_collection(collection_name))
+        await self.client.update_collection(
+            collection_name=collection_name,
+            quantization_config=quantization if quantization is not None else models.Disabled.DISABLED
+        )
+        logger.info(f"Quantization of {collection_name} changed from {previous} to {mode}")
+        return {"collection": collection_name, "previous": previous, "quantization": mode}
+
+    def _search_params(
         self,
-        query_embedding: List[float],
-        limit: int = 5,
-        score_threshold: float = 0.7
-    ) -> List[Dict[str, Any]]:
-        """Search for similar images using embedding"""
-        try:
-            search_result = self.client.search(
-                collection_name=self.collection_name,
-                query_vector=query_embedding,
-                limit=limit,
-                score_threshold=score_threshold
+        oversampling: Optional[float] = None,
+        hnsw_ef: Optional[int] = None,
+        exact: bool = False
+    ) -> Optional[models.SearchParams]:
+        """
+        Search parameters for the catalog collection
+
+        hnsw_ef is the width of the graph search (default QDRANT_SEARCH_HNSW_EF): lower is
+        faster, higher finds more of the true neighbours. exact skips the index and
+        compares the query with every vector. On a quantized collection Qdrant ranks with
+        the quantized vectors, keeps limit x oversampling candidates and re-scores them
+        with the float32 vectors, which recovers most of the recall lost to quantization.
+        """
+        hnsw_ef = hnsw_ef or config.QDRANT_SEARCH_HNSW_EF or None
+        quantization = None
+        if config.QDRANT_QUANTIZATION != "none" or oversampling is not None:
+            quantization = models.QuantizationSearchParams(
+                rescore=config.QDRANT_SEARCH_RESCORE,
+                oversampling=oversampling or config.QDRANT_SEARCH_OVERSAMPLING
             )
-            results = [
-                {
-                    "id": hit.id,
-                    "score": hit.score,
-                    "metadata": hit.payload
-                }
-                for hit in search_result
-            ]
-            logger.info(f"Found {len(results)} similar images")
-            return results
+        if hnsw_ef is None and not exact and quantization is None:
+            return None
+        return models.SearchParams(hnsw_ef=hnsw_ef, exact=exact, quantization=quantization)
 
-        except Exception as e:
-            logger.error(f"Error searching similar images: {str(e)}")
-            raise Exception(f"Failed to search Qdrant: {str(e)}")
+    @staticmethod
+    def hnsw_config() -> models.HnswConfigDiff:
+        """
+        HNSW graph parameters for new collections (QDRANT_HNSW_M, QDRANT_HNSW_EF_CONSTRUCT)
 
-    async def get_embedding_by_id(self, point_id: str) -> Optional[Dict[str, Any]]:
-        """Get a specific embedding by its ID"""
-        try:
-            result = self.client.retrieve(
-                collection_name=self.collection_name,
-                ids=[point_id],
-                with_vectors=True
+        A larger m gives better recall at the same search ef but a larger index in RAM;
+        a larger ef_construct builds a better graph at the cost of slower indexing.
+        """
+        return models.HnswConfigDiff(
+            m=config.QDRANT_HNSW_M,
+            ef_construct=config.QDRANT_HNSW_EF_CONSTRUCT,
+            on_disk=config.QDRANT_ON_DISK
+        )
+
+    def _check_hnsw_config(self, collection_name: str, collection_info):
+        """Report the collection's HNSW parameters and warn when they differ from the configured ones"""
+        hnsw = collection_info.config.hnsw_config
+        print(f"   HNSW: m={hnsw.m}, ef_construct={hnsw.ef_construct}")
+        if (hnsw.m, hnsw.ef_construct) != (config.QDRANT_HNSW_M, config.QDRANT_HNSW_EF_CONSTRUCT):
+            print(f"⚠️ {collection_name} was built with m={hnsw.m}, ef_construct={hnsw.ef_construct} but "
+                  f"QDRANT_HNSW_M={config.QDRANT_HNSW_M}, QDRANT_HNSW_EF_CONSTRUCT={config.QDRANT_HNSW_EF_CONSTRUCT}; "
+                  f"rebuild it with: python qdrant_tools.py hnsw")
+
+    async def migrate_hnsw_config(self, collection_name: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Rebuild an existing collection's HNSW index with the configured m and ef_construct
+
+        Qdrant rebuilds the index in the background; searches keep using the old graph
+        (or a full scan of unindexed segments) until it is done.
+
+        Returns:
+            Dict with the collection name and its previous and new parameters
+        """
+        collection_name = collection_name or self.collection_name
+        hnsw = (await self.client.get_collection(collection_name)).config.hnsw_config
+        new_config = self.hnsw_config()
+        await self.client.update_collection(collection_name=collection_name, hnsw_config=new_config)
+        logger.info(f"HNSW of {collection_name} changed from m={hnsw.m}, ef_construct={hnsw.ef_construct} "
+                    f"to m={new_config.m}, ef_construct={new_config.ef_construct}")
+        return {
+            "collection": collection_name,
+            "previous": {"m": hnsw.m, "ef_construct": hnsw.ef_construct},
+            "hnsw": {"m": new_config.m, "ef_construct": new_config.ef_construct}
+        }
+
+    @staticmethod
+    def storage_mode(collection_info) -> Dict[str, bool]:
+        """Which parts of an existing collection are stored on disk"""
+        collection_config = collection_info.config
+        return {
+            "vectors_on_disk": bool(collection_config.params.vectors.on_disk),
+            "hnsw_on_disk": bool(collection_config.hnsw_config.on_disk),
+            "payload_on_disk": bool(collection_config.params.on_disk_payload)
+        }
+
+    def _check_storage(self, collection_name: str, collection_info):
+        """Report where the collection keeps its data and warn when it differs from QDRANT_ON_DISK"""
+        storage = self.storage_mode(collection_info)
+        print("   On disk: " + ", ".join(f"{part.replace('_on_disk', '')}={on_disk}" for part, on_disk in storage.items()))
+        if any(on_disk != config.QDRANT_ON_DISK for on_disk in storage.values()):
+            print(f"⚠️ QDRANT_ON_DISK is {config.QDRANT_ON_DISK} but {collection_name} differs; "
+                  f"convert it with: python qdrant_tools.py storage")
+
+    async def migrate_storage(self, collection_name: Optional[str] = None, on_disk: Optional[bool] = None) -> Dict[str, Any]:
+        """
+        Move an existing collection's vectors, HNSW graph and payloads to disk (or back to RAM)
+
+        Quantized vectors are not affected and stay in RAM with QDRANT_QUANTIZATION_ALWAYS_RAM.
+        Qdrant rewrites the segments in the background; payload indexes such as user_uid
+        always stay in RAM.
+
+        Returns:
+            Dict with the collection name and its previous and new storage_mode()
+        """
+        collection_name = collection_name or self.collection_name
+        on_disk = config.QDRANT_ON_DISK if on_disk is None else on_disk
+        previous = self.storage_mode(await self.client.get_collection(collection_name))
+        await self.client.update_collection(
+            collection_name=collection_name,
+            vectors_config={"": models.VectorParamsDiff(on_disk=on_disk)},  # "" is the unnamed vector
+            hnsw_config=models.HnswConfigDiff(on_disk=on_disk),
+            collection_params=models.CollectionParamsDiff(on_disk_payload=on_disk)
+        )
+        logger.info(f"Storage of {collection_name} changed from {previous} to on_disk={on_disk}")
+        return {
+            "collection": collection_name,
+            "previous": previous,
+            "storage": {"vectors_on_disk": on_disk, "hnsw_on_disk": on_disk, "payload_on_disk": on_disk}
+        }
+
+    async def estimate_memory_footprint(self, collection_name: Optional[str] = None, payload_sample: int = 200) -> Dict[str, Any]:
+        """
+        Estimate how much of a collection Qdrant keeps in RAM and how much on disk
+
+        Qdrant does not report memory per collection, so this is computed from the
+        collection's configuration: float32 vectors, quantized vectors, level-0 HNSW
+        links (2 x m four-byte IDs per point) and payloads, whose average size is
+        measured on a sample of points. On-disk parts are memory-mapped and use page
+        cache as it is available. Payload indexes are not included.
+
+        Returns:
+            Dict with points_count, bytes per component and RAM/disk totals in MB
+        """
+        collection_name = collection_name or self.collection_name
+        info = await self.client.get_collection(collection_name)
+        points = info.points_count or 0
+        dimensions = info.config.params.vectors.size
+        storage = self.storage_mode(info)
+
+        sample, _ = await self.client.scroll(
+            collection_name=collection_name, limit=payload_sample, with_payload=True, with_vectors=False
+        )
+        payload_bytes = sum(len(json.dumps(point.payload or {}, default=str)) for point in sample) / max(len(sample), 1)
+
+        components = {
+            "vectors": (4 * dimensions * points, not storage["vectors_on_disk"]),
+            "hnsw": (2 * info.config.hnsw_config.m * 4 * points, not storage["hnsw_on_disk"]),
+            "payload": (int(payload_bytes * points), not storage["payload_on_disk"])
+        }
+        quantization = info.config.quantization_config
+        quantized_bytes = {"scalar": dimensions, "binary": (dimensions + 7) // 8}.get(self.quantization_mode(info))
+        if quantized_bytes:
+            quantized = quantization.scalar if isinstance(quantization, models.ScalarQuantization) else quantization.binary
+            components["quantized_vectors"] = (
+                quantized_bytes * points, bool(quantized.always_ram) or not storage["vectors_on_disk"]
             )
-            if result:
-                point = result[0]
-                return {
-                    "id": point.id,
-                    "vector": point.vector,
-                    "metadata": point.payload
-                }
-            return None
+
+        ram = sum(size for size, in_ram in components.values() if in_ram)
+        disk = sum(size for size, in_ram in components.values() if not in_ram)
+        return {
+            "collection": collection_name,
+            "points_count": points,
+            "vector_size": dimensions,
+            "quantization": self.quantization_mode(info),
+            **storage,
+            "components": {name: {"bytes": size, "in_ram": in_ram} for name, (size, in_ram) in components.items()},
+            "ram_mb": round(ram / 1024 ** 2, 2),
+            "disk_mb": round(disk / 1024 ** 2, 2)
+        }
+
+    async def check_readiness(self) -> Dict[str, Any]:
+        """Check that Qdrant is reachable and the collections were initialized"""
+        try:
+            await self.client.get_collections()
+            reachable = True
+            error = self.init_error
         except Exception as e:
-            logger.error(f"Error retrieving embedding: {str(e)}")
-            return None
+            reachable = False
+            error = str(e)
+        return {
+            "ready": reachable and self.collections_initialized,
+            "reachable": reachable,
+            "collections_initialized": self.collections_initialized,
+            "error": error
+        }
 
     async def get_collection_info(self) -> Dict[str, Any]:
         """Get information about the collection"""
         try:
-            info = self.client.get_collection(self.collection_name)
+            info = await self.client.get_collection(self.collection_name)
             return {
                 "name": self.collection_name,
+                "embedding_model": self.model_spec.key,
+                "transport": config.QDRANT_TRANSPORT,
+                "vector_size": info.config.params.vectors.size,
+                "quantization": self.quantization_mode(info),
+                "hnsw": {"m": info.config.hnsw_config.m, "ef_construct": info.config.hnsw_config.ef_construct},
+                "storage": self.storage_mode(info),
                 "vectors_count": info.vectors_count,
                 "points_count": info.points_count,
                 "status": info.status
@@ -254,377 +442,114 @@ class QdrantVectorService:
             logger.error(f"Error getting collection info: {str(e)}")
             return {}
 
-    async def delete_embedding(self, point_id: str) -> bool:
-        """Delete an embedding by its ID"""
-        try:
-            self.client.delete(
-                collection_name=self.collection_name,
-                points_selector=models.PointIdsList(points=[point_id])
-            )
-            logger.info(f"Deleted embedding with ID: {point_id}")
-            return True
-        except Exception as e:
-            logger.error(f"Error deleting embedding: {str(e)}")
-            return False
-
-    async def get_stored_embedding(self, vector_id: str) -> Optional[Dict[str, Any]]:
-        """Retrieve a stored embedding by its vector ID"""
-        try:
-            points = self.client.retrieve(
-                collection_name=self.collection_name,
-                ids=[vector_id],
-                with_vectors=True,
-                with_payload=True
-            )
-            if points:
-                point = points[0]
-                return {
-                    "vector_id": str(point.id),
-                    "embedding": point.vector,
-                    "metadata": point.payload,
-                    "embedding_length": len(point.vector) if point.vector else 0
-                }
-            return None
-        except Exception as e:
-            logger.error(f"Error retrieving embedding {vector_id}: {str(e)}")
+    @staticmethod
+    def _filter(payload_filter: Optional[Dict[str, Any]]) -> Optional[models.Filter]:
+        """Qdrant filter requiring every field of a payload filter dict to match exactly"""
+        if not payload_filter:
             return None
+        return models.Filter(
+            must=[
+                models.FieldCondition(key=key, match=models.MatchValue(value=value))
+                for key, value in payload_filter.items()
+            ]
+        )
 
-    async def get_vector(self, vector_id: str) -> Optional[Dict[str, Any]]:
-        """Get a vector by its ID (alias for get_stored_embedding)"""
-        return await self.get_stored_embedding(vector_id)
+    @staticmethod
+    def _stored_point(point) -> StoredPoint:
+        return StoredPoint(id=point.id, payload=point.payload, vector=point.vector, score=getattr(point, "score", None))
 
-    async def delete_vector(self, vector_id: str) -> bool:
-        """Delete a vector by its ID (alias for delete_embedding)"""
-        return await self.delete_embedding(vector_id)
+    async def upsert_points(self, collection_name: str, points: Sequence[StoredPoint], wait: bool = True):
+        # The Qdrant client takes Python floats; convert once here
+        return await self.client.upsert(
+            collection_name=collection_name,
+            points=[
+                PointStruct(id=point.id, vector=Embedding.from_any(point.vector).tolist(), payload=point.payload)
+                for point in points
+            ],
+            wait=wait
+        )
 
-    async def list_all_embeddings(self, limit: int = 100, offset: int = 0) -> List[Dict[str, Any]]:
-        """List all stored embeddings with metadata"""
-        try:
-            # Use scroll to get all points with pagination
-            points, _ = self.client.scroll(
-                collection_name=self.collection_name,
-                limit=limit,
-                offset=offset,
-                with_payload=True,
-                with_vectors=False  # Don't return vectors for performance
-            )
-            
-            results = []
-            for point in points:
-                # Convert point to dictionary format
-                embedding_data = {
-                    "vector_id": str(point.id),
-                    "filename": point.payload.get("filename", "Unknown"),
-                    "product_name": point.payload.get("product_name"),
-                    "price": point.payload.get("price"),
-                    "file_size": point.payload.get("file_size"),
-                    "content_type": point.payload.get("content_type"),
-                    "processing_time": point.payload.get("processing_time"),
-                    "model_used": point.payload.get("model_used"),
-                    "upload_timestamp": point.payload.get("upload_timestamp"),
-                    "firebase_url": point.payload.get("firebase_url"),
-                    "firebase_path": point.payload.get("firebase_path")
-                }
-                results.append(embedding_data)
-            
-            logger.info(f"Listed {len(results)} embeddings (limit: {limit}, offset: {offset})")
-            return results
-            
-        except Exception as e:
-            logger.error(f"Error listing embeddings: {str(e)}")
-            raise Exception(f"Failed to list embeddings from Qdrant: {str(e)}")
-
-    async def retrieve_embedding(self, vector_id: str, include_vector: bool = False) -> Optional[Dict[str, Any]]:
-        """Retrieve a specific embedding by its vector ID"""
-        try:
-            points = self.client.retrieve(
-                collection_name=self.collection_name,
-                ids=[vector_id],
-                with_vectors=include_vector,
-                with_payload=True
-            )
-            
-            if not points:
-                return None
-                
-            point = points[0]
-            result = {
-                "vector_id": str(point.id),
-                "filename": point.payload.get("filename", "Unknown"),
-                "product_name": point.payload.get("product_name"),
-                "embedding_status": "found",
-                "vector_found": True,
-                "metadata": point.payload,
-                "model_used": point.payload.get("model_used")
-            }
-            
-            if include_vector:
-                result["embedding_full"] = point.vector
-                result["embedding_shape"] = [len(point.vector)] if point.vector else [0]
-                if point.vector:
-                    result["embedding_stats"] = {
-                        "min_value": round(min(point.vector), 6),
-                        "max_value": round(max(point.vector), 6),
-                        "avg_value": round(sum(point.vector) / len(point.vector), 6),
-                        "non_zero_count": sum(1 for x in point.vector if x != 0),
-                        "total_dimensions": len(point.vector)
-                    }
-            else:
-                result["embeddings_preview"] = point.vector[:100] if point.vector else []
-                
-            return result
-            
-        except Exception as e:
-            logger.error(f"Error retrieving embedding {vector_id}: {str(e)}")
-            return None
+    async def search_points(
+        self,
+        collection_name: str,
+        vector: Embedding,
+        limit: int,
+        score_threshold: Optional[float] = None,
+        payload_filter: Optional[Dict[str, Any]] = None,
+        with_vectors: bool = False,
+        oversampling: Optional[float] = None,
+        hnsw_ef: Optional[int] = None,
+        exact: bool = False
+    ) -> List[StoredPoint]:
+        hits = await self.client.search(
+            collection_name=collection_name,
+            query_vector=vector.tolist(),
+            query_filter=self._filter(payload_filter),
+            limit=limit,
+            score_threshold=score_threshold,
+            search_params=self._search_params(oversampling, hnsw_ef, exact),
+            with_payload=True,
+            with_vectors=with_vectors
+        )
+        return [self._stored_point(hit) for hit in hits]
 
-    async def search_similar_complete(self, query_embedding: List[float], limit: int = 5, score_threshold: float = 0.7, include_embeddings: bool = False) -> List[Dict[str, Any]]:
-        """Search for similar images with complete embedding data"""
-        try:
-            search_result = self.client.search(
-                collection_name=self.collection_name,
-                query_vector=query_embedding,
-                limit=limit,
-                score_threshold=score_threshold,
-                with_payload=True,
-                with_vectors=include_embeddings
-            )
-            
-            results = []
-            for hit in search_result:
-                result_data = {
-                    "vector_id": str(hit.id),
-                    "similarity_score": round(hit.score, 6),
-                    "filename": hit.payload.get("filename", "Unknown"),
-                    "product_name": hit.payload.get("product_name"),
-                    "price": hit.payload.get("price"),
-                    "firebase_url": hit.payload.get("firebase_url"),
-                    "metadata": hit.payload
-                }
-                
-                if include_embeddings and hit.vector:
-                    result_data["embedding"] = hit.vector
-                    result_data["embedding_stats"] = {
-                        "min_value": round(min(hit.vector), 6),
-                        "max_value": round(max(hit.vector), 6),
-                        "avg_value": round(sum(hit.vector) / len(hit.vector), 6),
-                        "non_zero_count": sum(1 for x in hit.vector if x != 0),
-                        "total_dimensions": len(hit.vector)
-                    }
-                    
-                results.append(result_data)
-            
-            logger.info(f"Complete search found {len(results)} similar images")
-            return results
-            
-        except Exception as e:
-            logger.error(f"Error in complete similarity search: {str(e)}")
-            raise Exception(f"Failed to perform complete similarity search: {str(e)}")
+    async def retrieve_points(
+        self, collection_name: str, ids: Sequence[str], with_vectors: bool = False, with_payload: bool = True
+    ) -> List[StoredPoint]:
+        points = await self.client.retrieve(
+            collection_name=collection_name,
+            ids=list(ids),
+            with_vectors=with_vectors,
+            with_payload=with_payload
+        )
+        return [self._stored_point(point) for point in points]
 
-    async def store_search_embedding(
+    async def scroll_points(
         self,
-        embedding: List[float],
-        user_uid: str,
-        search_query_filename: str,
-        similar_results_count: int,
-        search_timestamp: str = None
-    ) -> str:
-        """Store user search embedding for future recommendations"""
-        try:
-            point_id = str(uuid.uuid4())
-            
-            if search_timestamp is None:
-                from datetime import datetime
-                search_timestamp = datetime.now().isoformat()
-            
-            payload = {
-                "user_uid": user_uid,
-                "search_query_filename": search_query_filename,
-                "similar_results_count": similar_results_count,
-                "search_timestamp": search_timestamp,
-                "search_type": "similarity_search"
-            }
-            
-            print(f"🔍 DEBUG: Storing search embedding:")
-            print(f"   User UID: {user_uid}")
-            print(f"   Query filename: {search_query_filename}")
-            print(f"   Similar results found: {similar_results_count}")
-            print(f"   Search timestamp: {search_timestamp}")
-            print(f"   Embedding length: {len(embedding)}")
-            
-            # Validation
-            if not isinstance(embedding, list) or len(embedding) != self.vector_size:
-                raise ValueError(f"❌ Invalid embedding shape. Expected {self.vector_size} floats, got {len(embedding)}")
-            if any(x is None for x in embedding):
-                raise ValueError("❌ Embedding contains None values")
-
-            # Convert to float
-            embedding = [float(x) for x in embedding]
-
-            point = PointStruct(
-                id=point_id,
-                vector=embedding,
-                payload=payload
-            )
+        collection_name: str,
+        limit: int,
+        offset: Optional[Any] = None,
+        payload_filter: Optional[Dict[str, Any]] = None,
+        with_vectors: bool = False,
+        payload_fields: Optional[List[str]] = None
+    ) -> Tuple[List[StoredPoint], Optional[Any]]:
+        points, next_offset = await self.client.scroll(
+            collection_name=collection_name,
+            scroll_filter=self._filter(payload_filter),
+            limit=limit,
+            offset=offset,
+            with_payload=models.PayloadSelectorInclude(include=payload_fields) if payload_fields else True,
+            with_vectors=with_vectors
+        )
+        return [self._stored_point(point) for point in points], next_offset
 
-            loop = asyncio.get_event_loop()
-            result = await loop.run_in_executor(
-                None,
-                functools.partial(
-                    self.client.upsert,
-                    collection_name=self.search_embeddings_collection,
-                    points=[point]
-                )
-            )
+    async def delete_points(self, collection_name: str, ids: Sequence[str]):
+        await self.client.delete(
+            collection_name=collection_name,
+            points_selector=models.PointIdsList(points=list(ids))
+        )
 
-            print(f"   ✅ Search embedding stored with ID: {point_id}")
-            logger.info(f"Stored search embedding for user {user_uid} with ID: {point_id}")
-            return point_id
+VECTOR_STORES = {
+    QdrantVectorService.name: QdrantVectorService,
+    NumpyVectorStore.name: NumpyVectorStore
+}
 
-        except Exception as e:
-            logger.error(f"Error storing search embedding: {str(e)}")
-            raise Exception(f"Failed to store search embedding in Qdrant: {str(e)}")
-
-    async def store_user_search_embedding(
-        self, 
-        user_id: str, 
-        query_filename: str, 
-        query_embedding: List[float], 
-        similar_results_count: int
-    ):
-        """Store user search embedding for future recommendations"""
-        try:
-            from datetime import datetime
-            
-            # Generate unique ID for the search entry
-            search_id = str(uuid.uuid4())
-            
-            # Create point data
-            point_data = PointStruct(
-                id=search_id,
-                vector=query_embedding,
-                payload={
-                    "user_uid": user_id,
-                    "search_query_filename": query_filename,
-                    "similar_results_count": similar_results_count,
-                    "search_timestamp": datetime.utcnow().isoformat(),
-                    "search_type": "user_search"
-                }
-            )
-            
-            # Store in Qdrant
-            result = self.client.upsert(
-                collection_name=self.search_embeddings_collection,
-                points=[point_data]
-            )
-            
-            logger.info(f"Stored user search embedding for user {user_id}, search_id: {search_id}")
-            return {
-                "search_id": search_id,
-                "status": "stored",
-                "user_uid": user_id,
-                "similar_results_count": similar_results_count
-            }
-            
-        except Exception as e:
-            logger.error(f"Error storing user search embedding: {str(e)}")
-            raise Exception(f"Failed to store user search embedding: {str(e)}")
 
-    async def get_user_search_history(self, user_uid: str, limit: int = 10) -> List[Dict[str, Any]]:
-        """Get user's search history for recommendations"""
-        try:
-            # Use scroll to get user's search history
-            points, _ = self.client.scroll(
-                collection_name=self.search_embeddings_collection,
-                scroll_filter=models.Filter(
-                    must=[
-                        models.FieldCondition(
-                            key="user_uid",
-                            match=models.MatchValue(value=user_uid)
-                        )
-                    ]
-                ),
-                limit=limit,
-                with_payload=True,
-                with_vectors=True
-            )
-            
-            results = []
-            for point in points:
-                search_data = {
-                    "search_id": str(point.id),
-                    "user_uid": point.payload.get("user_uid"),
-                    "search_query_filename": point.payload.get("search_query_filename"),
-                    "similar_results_count": point.payload.get("similar_results_count"),
-                    "search_timestamp": point.payload.get("search_timestamp"),
-                    "search_type": point.payload.get("search_type"),
-                    "embedding": point.vector
-                }
-                results.append(search_data)
-            
-            # Sort by search_timestamp (most recent first)
-            results.sort(key=lambda x: x.get("search_timestamp", ""), reverse=True)
-            
-            logger.info(f"Retrieved {len(results)} search history entries for user {user_uid}")
-            return results
-            
-        except Exception as e:
-            logger.error(f"Error retrieving user search history: {str(e)}")
-            raise Exception(f"Failed to retrieve user search history: {str(e)}")
+def create_vector_store(name: Optional[str] = None) -> VectorStore:
+    """
+    Build the vector store selected in config
 
-    async def get_user_recommendations(self, user_uid: str, limit: int = 5) -> List[Dict[str, Any]]:
-        """Get product recommendations based on user's search history"""
-        try:
-            # First, get user's search history
-            search_history = await self.get_user_search_history(user_uid, limit=10)
-            
-            if not search_history:
-                logger.info(f"No search history found for user {user_uid}")
-                return []
-            
-            # Get the most recent search embeddings (last 3 searches)
-            recent_searches = search_history[:3]
-            recommendations = []
-            
-            for search in recent_searches:
-                if search.get("embedding"):
-                    # Search for similar products based on this search embedding
-                    similar_products = await self.search_similar_images(
-                        query_embedding=search["embedding"],
-                        limit=10,  # Get more to have variety
-                        score_threshold=0.5  # Lower threshold for recommendations
-                    )
-                    
-                    # Add search context to each recommendation
-                    for product in similar_products:
-                        product["recommendation_source"] = {
-                            "search_id": search["search_id"],
-                            "search_filename": search["search_query_filename"],
-                            "search_timestamp": search["search_timestamp"]
-                        }
-                        recommendations.append(product)
-            
-            # Remove duplicates based on product ID and sort by score
-            seen_ids = set()
-            unique_recommendations = []
-            
-            for rec in recommendations:
-                if rec["id"] not in seen_ids:
-                    seen_ids.add(rec["id"])
-                    unique_recommendations.append(rec)
-            
-            # Sort by similarity score (highest first)
-            unique_recommendations.sort(key=lambda x: x["score"], reverse=True)
-            
-            # Return top recommendations
-            final_recommendations = unique_recommendations[:limit]
-            
-            logger.info(f"Generated {len(final_recommendations)} recommendations for user {user_uid}")
-            return final_recommendations
-            
-        except Exception as e:
-            logger.error(f"Error generating recommendations for user {user_uid}: {str(e)}")
-            raise Exception(f"Failed to generate recommendations: {str(e)}")
+    Args:
+        name: Store name (defaults to VECTOR_STORE): "qdrant" for the Qdrant cluster at
+            QDRANT_URL, "numpy" for the in-process engine
+
+    Returns:
+        A VectorStore; call initialize_collection() before use
+    """
+    name = name or config.VECTOR_STORE
+    if name not in VECTOR_STORES:
+        raise ValueError(f"Unknown vector store '{name}'. Available: {', '.join(VECTOR_STORES)}")
+    return VECTOR_STORES[name]()
 
 # Global instance
-vector_service = QdrantVectorService()
+vector_service = create_vector_store()
@@ -0,0 +1,790 @@
+"""
+Vector store interface
+Catalog and search-history embeddings with cosine search, shared by the Qdrant service
+and the in-process NumPy engine. Subclasses implement the storage primitives
+(upsert, search, retrieve, scroll and delete points, with dict payload filters such as
+{"user_uid": ...}); everything the API calls is built on top of them here.
+"""
+import asyncio
+import logging
+import uuid
+from abc import ABC, abstractmethod
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Sequence, Tuple, Union
+
+from app.config import config
+from app.models.embedding import Embedding
+from app.services.model_registry import get_model_spec
+from app.services.near_duplicate_index import NearDuplicateIndex
+
+logger = logging.getLogger(__name__)
+
+
+class StoredPoint:
+    """One point of a collection, as written to or returned by a store"""
+
+    __slots__ = ("id", "payload", "vector", "score")
+
+    def __init__(
+        self,
+        id: str,
+        payload: Optional[Dict[str, Any]] = None,
+        vector: Optional[Union[Embedding, List[float]]] = None,
+        score: Optional[float] = None
+    ):
+        """
+        Args:
+            id: Point ID (a UUID string)
+            payload: Metadata stored with the vector
+            vector: Embedding on the way in; list of floats (normalized) on the way out, when requested
+            score: Cosine similarity, for search results
+        """
+        self.id = id
+        self.payload = payload
+        self.vector = vector
+        self.score = score
+
+
+class VectorStore(ABC):
+    """Base class for vector stores; a backend must implement every abstract method to be instantiated"""
+
+    name = "base"
+    display_name = "vector store"
+
+    def __init__(self):
+        # Each embedding model has its own collections; route everything to the active model's
+        self.model_spec = get_model_spec()
+        self.collection_name = self.model_spec.collection_name()
+        self.search_embeddings_collection = self.model_spec.search_collection_name()  # New collection for search history
+        self.vector_size = config.VECTOR_SIZE or self.model_spec.embedding_size
+        if self.vector_size != self.model_spec.embedding_size:
+            raise ValueError(
+                f"VECTOR_SIZE={config.VECTOR_SIZE} does not match {self.model_spec.display_name} "
+                f"({self.model_spec.embedding_size} dimensions); leave VECTOR_SIZE unset"
+            )
+        self.collections_initialized = False
+        self.init_error: Optional[str] = None
+        # Perceptual hash -> vector_id index for the near-duplicate shortcut
+        self.hash_index = NearDuplicateIndex(
+            max_distance=config.NEAR_DUPLICATE_MAX_DISTANCE,
+            max_color_diff=config.NEAR_DUPLICATE_MAX_COLOR_DIFF
+        )
+
+    def start_search_workers(self):
+        """
+        Start the store's worker processes, if it uses any (no-op by default)
+
+        Workers are forked, so this must run before other threads start, in particular
+        before the model is loaded on an inference thread.
+        """
+
+    @abstractmethod
+    async def initialize_collection(self) -> bool:
+        """Create or open the catalog and search history collections; False on failure (see init_error)"""
+
+    async def close(self):
+        """Release connections and files"""
+
+    @abstractmethod
+    async def check_readiness(self) -> Dict[str, Any]:
+        """Report whether the store is reachable and the collections were initialized"""
+
+    @abstractmethod
+    async def get_collection_info(self) -> Dict[str, Any]:
+        """Describe the catalog collection"""
+
+    @abstractmethod
+    async def upsert_points(self, collection_name: str, points: Sequence[StoredPoint], wait: bool = True) -> Any:
+        """
+        Insert or replace points
+
+        Args:
+            collection_name: Target collection
+            points: Points with validated Embedding vectors
+            wait: Return only once the points are searchable
+        """
+
+    @abstractmethod
+    async def search_points(
+        self,
+        collection_name: str,
+        vector: Embedding,
+        limit: int,
+        score_threshold: Optional[float] = None,
+        payload_filter: Optional[Dict[str, Any]] = None,
+        with_vectors: bool = False,
+        oversampling: Optional[float] = None,
+        hnsw_ef: Optional[int] = None,
+        exact: bool = False
+    ) -> List[StoredPoint]:
+        """
+        Most similar points by cosine similarity, best first, with payloads
+
+        Args:
+            payload_filter: Only points whose payload has these exact field values
+            oversampling, hnsw_ef, exact: Index tuning, ignored by stores that always search exactly
+        """
+
+    async def search_points_batch(
+        self,
+        collection_name: str,
+        vectors: Sequence[Embedding],
+        limit: int,
+        score_threshold: Optional[float] = None,
+        with_vectors: bool = False
+    ) -> List[List[StoredPoint]]:
+        """search_points for several queries (offline jobs); stores that can batch the work override it"""
+        return list(await asyncio.gather(*(
+            self.search_points(collection_name, vector, limit, score_threshold, with_vectors=with_vectors)
+            for vector in vectors
+        )))
+
+    @abstractmethod
+    async def retrieve_points(
+        self, collection_name: str, ids: Sequence[str], with_vectors: bool = False, with_payload: bool = True
+    ) -> List[StoredPoint]:
+        """Points with the given IDs; unknown IDs are skipped"""
+
+    @abstractmethod
+    async def scroll_points(
+        self,
+        collection_name: str,
+        limit: int,
+        offset: Optional[Any] = None,
+        payload_filter: Optional[Dict[str, Any]] = None,
+        with_vectors: bool = False,
+        payload_fields: Optional[List[str]] = None
+    ) -> Tuple[List[StoredPoint], Optional[Any]]:
+        """
+        Page through a collection
+
+        Returns:
+            The points and the offset of the next page (None after the last page)
+        """
+
+    @abstractmethod
+    async def delete_points(self, collection_name: str, ids: Sequence[str]):
+        """Delete points by ID"""
+
+    async def load_hash_index(self, page_size: int = 1000) -> int:
+        """
+        Load perceptual hashes of stored images into the near-duplicate index
+
+        Only the hash and model fields of the payload are read; vectors stay in the store.
+
+        Returns:
+            Number of indexed images
+        """
+        self.hash_index.clear()
+        offset = None
+        while True:
+            points, offset = await self.scroll_points(
+                self.collection_name,
+                limit=page_size,
+                offset=offset,
+                payload_fields=["image_hash", "model_id"]
+            )
+            for point in points:
+                payload = point.payload or {}
+                if payload.get("image_hash") and payload.get("model_id"):
+                    self.hash_index.add(str(point.id), payload["image_hash"], payload["model_id"])
+            if offset is None:
+                break
+
+        print(f"🔗 Near-duplicate index loaded: {len(self.hash_index)} hashed images")
+        return len(self.hash_index)
+
+    async def find_near_duplicate(self, image_hash: str, model_id: str) -> Optional[Dict[str, Any]]:
+        """
+        Find a stored image that is a near-exact copy of the query and fetch its vector
+
+        Args:
+            image_hash: perceptual_hash() of the query image
+            model_id: Identity of the embedding model in use; only its vectors are reused
+
+        Returns:
+            Dict with vector_id, distance and the stored (normalized) Embedding, or None if there is no match
+        """
+        match = self.hash_index.find(image_hash, model_id)
+        if match is None:
+            return None
+
+        vector_id, distance = match
+        stored = await self.get_stored_embedding(vector_id)
+        if stored is None or not stored.get("embedding"):
+            # Deleted from the store by someone else; stop matching it
+            self.hash_index.remove(vector_id)
+            return None
+
+        # Stores keep cosine vectors normalized, so this is the unit-length copy rather than the
+        # model output: it searches exactly like the raw embedding (and is what storing the raw
+        # one would keep), but its values and statistics differ
+        logger.info(f"Near-duplicate of {vector_id} (distance {distance}), reusing its vector")
+        return {"vector_id": vector_id, "distance": distance, "embedding": Embedding(stored["embedding"])}
+
+    def build_catalog_payload(
+        self,
+        filename: str,
+        file_size: int,
+        content_type: str,
+        processing_time: float,
+        model_used: str,
+        firebase_url: Optional[str] = None,
+        firebase_path: Optional[str] = None,
+        price: Optional[float] = None,
+        product_name: Optional[str] = None,
+        metadata: Optional[Dict[str, Any]] = None,
+        image_hash: Optional[str] = None,
+        model_id: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """Build the payload of a catalog image, as stored by store_embedding"""
+        payload = {
+            "filename": filename,
+            "file_size": file_size,
+            "content_type": content_type,
+            "processing_time": processing_time,
+            "model_used": model_used,
+            "embedding_model": self.model_spec.key,
+            "upload_timestamp": datetime.now().strftime("%Y-%m-%d"),
+            "price": price,  # Store price
+            "product_name": product_name  # Store product name
+        }
+
+        # Add Firebase information if provided
+        if firebase_url:
+            payload["firebase_url"] = firebase_url
+        if firebase_path:
+            payload["firebase_path"] = firebase_path
+
+        # Perceptual hash and model identity let near-duplicate uploads reuse this vector
+        if image_hash:
+            payload["image_hash"] = image_hash
+        if model_id:
+            payload["model_id"] = model_id
+
+        if metadata:
+            payload.update(metadata)
+        return payload
+
+    async def store_embedding(
+        self,
+        embedding: Union[Embedding, List[float]],
+        filename: str,
+        file_size: int,
+        content_type: str,
+        processing_time: float,
+        model_used: str,
+        firebase_url: Optional[str] = None,
+        firebase_path: Optional[str] = None,
+        price: Optional[float] = None,
+        product_name: Optional[str] = None,
+        metadata: Optional[Dict[str, Any]] = None,
+        image_hash: Optional[str] = None,
+        model_id: Optional[str] = None
+    ) -> str:
+        """Store image embedding with price and product name"""
+        try:
+            point_id = str(uuid.uuid4())
+            payload = self.build_catalog_payload(
+                filename=filename,
+                file_size=file_size,
+                content_type=content_type,
+                processing_time=processing_time,
+                model_used=model_used,
+                firebase_url=firebase_url,
+                firebase_path=firebase_path,
+                price=price,
+                product_name=product_name,
+                metadata=metadata,
+                image_hash=image_hash,
+                model_id=model_id
+            )
+
+            embedding = Embedding.from_any(embedding)
+
+            print(f"🔍 DEBUG: About to store embedding:")
+            print(f"   Point ID: {point_id}")
+            print(f"   Embedding length: {len(embedding)}")
+            print(f"   First 5 values: {embedding.preview(5)}")
+            print(f"   Product Name: {product_name}" if product_name else "   Product Name: Not specified")
+            print(f"   Price: ${price:.2f}" if price else "   Price: Not specified")
+            if firebase_url:
+                print(f"   Firebase URL: {firebase_url}")
+            if firebase_path:
+                print(f"   Firebase Path: {firebase_path}")
+
+            # Validation (size and NaN/inf check on the float32 array)
+            embedding.validate(self.vector_size)
+
+            result = await self.upsert_points(
+                self.collection_name,
+                [StoredPoint(id=point_id, vector=embedding, payload=payload)]
+            )
+
+            print(f"   ✅ {self.display_name} upsert result: {result}")
+            if image_hash and model_id:
+                self.hash_index.add(point_id, image_hash, model_id)
+            logger.info(f"Stored embedding for {filename} with ID: {point_id}")
+            return point_id
+
+        except Exception as e:
+            logger.error(f"Error storing embedding: {str(e)}")
+            raise Exception(f"Failed to store embedding in {self.display_name}: {str(e)}")
+
+    async def store_embeddings_batch(
+        self,
+        embeddings: Sequence[Union[Embedding, List[float]]],
+        payloads: Sequence[Dict[str, Any]],
+        point_ids: Optional[Sequence[str]] = None,
+        chunk_size: Optional[int] = None,
+        parallel: Optional[int] = None,
+        wait: bool = True
+    ) -> List[Dict[str, Optional[str]]]:
+        """
+        Store many catalog embeddings with chunked, parallel upserts
+
+        Chunks are sent concurrently with wait=False, so Qdrant answers each one once it
+        is in its write-ahead log instead of after indexing. With wait=True the last
+        chunk is held back until the others were acknowledged and sent with wait=True;
+        Qdrant applies a shard's updates in order, so every point is searchable when
+        the call returns. With wait=False the call returns on acknowledgement alone.
+
+        Args:
+            embeddings: One embedding per point
+            payloads: One payload per point, normally from build_catalog_payload()
+            point_ids: Optional IDs (new UUIDs by default)
+            chunk_size: Points per upsert request (default QDRANT_UPSERT_CHUNK_SIZE)
+            parallel: Upsert requests in flight (default QDRANT_UPSERT_PARALLEL)
+            wait: Return only once all points are searchable
+
+        Returns:
+            One {"vector_id", "error"} dict per input, in input order; exactly one of the
+            two is set. A failed request fails every point of its chunk.
+        """
+        if len(payloads) != len(embeddings) or (point_ids is not None and len(point_ids) != len(embeddings)):
+            raise ValueError("embeddings, payloads and point_ids must have the same length")
+        chunk_size = chunk_size or config.QDRANT_UPSERT_CHUNK_SIZE
+        semaphore = asyncio.Semaphore(parallel or config.QDRANT_UPSERT_PARALLEL)
+
+        results: List[Dict[str, Optional[str]]] = [{"vector_id": None, "error": None} for _ in embeddings]
+        points, indices = [], []
+        for index, (embedding, payload) in enumerate(zip(embeddings, payloads)):
+            try:
+                # Validation (size and NaN/inf check on the float32 array)
+                embedding = Embedding.from_any(embedding).validate(self.vector_size)
+            except ValueError as e:
+                results[index]["error"] = str(e)
+                continue
+            point_id = point_ids[index] if point_ids is not None else str(uuid.uuid4())
+            points.append(StoredPoint(id=point_id, vector=embedding, payload=payload))
+            indices.append(index)
+
+        async def upsert(start: int, wait_for_chunk: bool):
+            chunk = points[start:start + chunk_size]
+            async with semaphore:
+                try:
+                    await self.upsert_points(self.collection_name, chunk, wait=wait_for_chunk)
+                except Exception as e:
+                    logger.error(f"Error storing {len(chunk)} embeddings: {str(e)}")
+                    for index in indices[start:start + chunk_size]:
+                        results[index]["error"] = f"Failed to store embedding in {self.display_name}: {str(e)}"
+                    return
+            for point, index in zip(chunk, indices[start:start + chunk_size]):
+                results[index]["vector_id"] = str(point.id)
+
+        starts = list(range(0, len(points), chunk_size))
+        if wait and starts:
+            await asyncio.gather(*(upsert(start, False) for start in starts[:-1]))
+            await upsert(starts[-1], True)
+        else:
+            await asyncio.gather(*(upsert(start, False) for start in starts))
+
+        # Only index points that are visible; find_near_duplicate drops IDs it cannot fetch
+        if wait:
+            for result, payload in zip(results, payloads):
+                if result["vector_id"] and payload.get("image_hash") and payload.get("model_id"):
+                    self.hash_index.add(result["vector_id"], payload["image_hash"], payload["model_id"])
+
+        stored = sum(1 for result in results if result["vector_id"])
+        logger.info(f"Stored {stored} of {len(results)} embeddings in {len(starts)} upserts")
+        return results
+
+    async def search_similar_images(
+        self,
+        query_embedding: Union[Embedding, List[float]],
+        limit: int = 5,
+        score_threshold: float = 0.7,
+        oversampling: Optional[float] = None,
+        hnsw_ef: Optional[int] = None,
+        exact: bool = False
+    ) -> List[Dict[str, Any]]:
+        """Search for similar images using embedding"""
+        try:
+            search_result = await self.search_points(
+                self.collection_name,
+                Embedding.from_any(query_embedding),
+                limit=limit,
+                score_threshold=score_threshold,
+                oversampling=oversampling,
+                hnsw_ef=hnsw_ef,
+                exact=exact
+            )
+            results = [
+                {
+                    "id": hit.id,
+                    "score": hit.score,
+                    "metadata": hit.payload
+                }
+                for hit in search_result
+            ]
+            logger.info(f"Found {len(results)} similar images")
+            return results
+
+        except Exception as e:
+            logger.error(f"Error searching similar images: {str(e)}")
+            raise Exception(f"Failed to search {self.display_name}: {str(e)}")
+
+    async def get_embedding_by_id(self, point_id: str) -> Optional[Dict[str, Any]]:
+        """Get a specific embedding by its ID"""
+        try:
+            result = await self.retrieve_points(self.collection_name, [point_id], with_vectors=True)
+            if result:
+                point = result[0]
+                return {
+                    "id": point.id,
+                    "vector": point.vector,
+                    "metadata": point.payload
+                }
+            return None
+        except Exception as e:
+            logger.error(f"Error retrieving embedding: {str(e)}")
+            return None
+
+    async def delete_embedding(self, point_id: str) -> bool:
+        """Delete an embedding by its ID"""
+        try:
+            await self.delete_points(self.collection_name, [point_id])
+            self.hash_index.remove(str(point_id))
+            logger.info(f"Deleted embedding with ID: {point_id}")
+            return True
+        except Exception as e:
+            logger.error(f"Error deleting embedding: {str(e)}")
+            return False
+
+    async def get_stored_embedding(self, vector_id: str) -> Optional[Dict[str, Any]]:
+        """Retrieve a stored embedding by its vector ID"""
+        try:
+            points = await self.retrieve_points(self.collection_name, [vector_id], with_vectors=True)
+            if points:
+                point = points[0]
+                return {
+                    "vector_id": str(point.id),
+                    "embedding": point.vector,
+                    "metadata": point.payload,
+                    "embedding_length": len(point.vector) if point.vector else 0
+                }
+            return None
+        except Exception as e:
+            logger.error(f"Error retrieving embedding {vector_id}: {str(e)}")
+            return None
+
+    async def get_vector(self, vector_id: str) -> Optional[Dict[str, Any]]:
+        """Get a vector by its ID (alias for get_stored_embedding)"""
+        return await self.get_stored_embedding(vector_id)
+
+    async def delete_vector(self, vector_id: str) -> bool:
+        """Delete a vector by its ID (alias for delete_embedding)"""
+        return await self.delete_embedding(vector_id)
+
+    async def list_all_embeddings(self, limit: int = 100, offset: int = 0) -> List[Dict[str, Any]]:
+        """List all stored embeddings with metadata"""
+        try:
+            # Use scroll to get all points with pagination
+            points, _ = await self.scroll_points(
+                self.collection_name,
+                limit=limit,
+                offset=offset,
+                with_vectors=False  # Don't return vectors for performance
+            )
+
+            results = []
+            for point in points:
+                # Convert point to dictionary format
+                embedding_data = {
+                    "vector_id": str(point.id),
+                    "filename": point.payload.get("filename", "Unknown"),
+                    "product_name": point.payload.get("product_name"),
+                    "price": point.payload.get("price"),
+                    "file_size": point.payload.get("file_size"),
+                    "content_type": point.payload.get("content_type"),
+                    "processing_time": point.payload.get("processing_time"),
+                    "model_used": point.payload.get("model_used"),
+                    "upload_timestamp": point.payload.get("upload_timestamp"),
+                    "firebase_url": point.payload.get("firebase_url"),
+                    "firebase_path": point.payload.get("firebase_path")
+                }
+                results.append(embedding_data)
+
+            logger.info(f"Listed {len(results)} embeddings (limit: {limit}, offset: {offset})")
+            return results
+
+        except Exception as e:
+            logger.error(f"Error listing embeddings: {str(e)}")
+            raise Exception(f"Failed to list embeddings from {self.display_name}: {str(e)}")
+
+    async def retrieve_embedding(self, vector_id: str, include_vector: bool = False) -> Optional[Dict[str, Any]]:
+        """Retrieve a specific embedding by its vector ID"""
+        try:
+            points = await self.retrieve_points(self.collection_name, [vector_id], with_vectors=include_vector)
+
+            if not points:
+                return None
+
+            point = points[0]
+            result = {
+                "vector_id": str(point.id),
+                "filename": point.payload.get("filename", "Unknown"),
+                "product_name": point.payload.get("product_name"),
+                "embedding_status": "found",
+                "vector_found": True,
+                "metadata": point.payload,
+                "model_used": point.payload.get("model_used")
+            }
+
+            if include_vector:
+                result["embedding_full"] = point.vector
+                result["embedding_shape"] = [len(point.vector)] if point.vector else [0]
+                if point.vector:
+                    result["embedding_stats"] = Embedding(point.vector).stats()
+            else:
+                result["embeddings_preview"] = point.vector[:100] if point.vector else []
+
+            return result
+
+        except Exception as e:
+            logger.error(f"Error retrieving embedding {vector_id}: {str(e)}")
+            return None
+
+    async def search_similar_complete(self, query_embedding: Union[Embedding, List[float]], limit: int = 5, score_threshold: float = 0.7, include_embeddings: bool = False, oversampling: Optional[float] = None, hnsw_ef: Optional[int] = None, exact: bool = False) -> List[Dict[str, Any]]:
+        """Search for similar images with complete embedding data"""
+        try:
+            search_result = await self.search_points(
+                self.collection_name,
+                Embedding.from_any(query_embedding),
+                limit=limit,
+                score_threshold=score_threshold,
+                with_vectors=include_embeddings,
+                oversampling=oversampling,
+                hnsw_ef=hnsw_ef,
+                exact=exact
+            )
+
+            results = []
+            for hit in search_result:
+                result_data = {
+                    "vector_id": str(hit.id),
+                    "similarity_score": round(hit.score, 6),
+                    "filename": hit.payload.get("filename", "Unknown"),
+                    "product_name": hit.payload.get("product_name"),
+                    "price": hit.payload.get("price"),
+                    "firebase_url": hit.payload.get("firebase_url"),
+                    "metadata": hit.payload
+                }
+
+                if include_embeddings and hit.vector:
+                    result_data["embedding"] = hit.vector
+                    result_data["embedding_stats"] = Embedding(hit.vector).stats()
+
+                results.append(result_data)
+
+            logger.info(f"Complete search found {len(results)} similar images")
+            return results
+
+        except Exception as e:
+            logger.error(f"Error in complete similarity search: {str(e)}")
+            raise Exception(f"Failed to perform complete similarity search: {str(e)}")
+
+    async def store_search_embedding(
+        self,
+        embedding: Union[Embedding, List[float]],
+        user_uid: str,
+        search_query_filename: str,
+        similar_results_count: int,
+        search_timestamp: str = None
+    ) -> str:
+        """Store user search embedding for future recommendations"""
+        try:
+            point_id = str(uuid.uuid4())
+
+            if search_timestamp is None:
+                search_timestamp = datetime.now().isoformat()
+
+            payload = {
+                "user_uid": user_uid,
+                "search_query_filename": search_query_filename,
+                "similar_results_count": similar_results_count,
+                "search_timestamp": search_timestamp,
+                "search_type": "similarity_search",
+                "embedding_model": self.model_spec.key
+            }
+
+            print(f"🔍 DEBUG: Storing search embedding:")
+            print(f"   User UID: {user_uid}")
+            print(f"   Query filename: {search_query_filename}")
+            print(f"   Similar results found: {similar_results_count}")
+            print(f"   Search timestamp: {search_timestamp}")
+            embedding = Embedding.from_any(embedding)
+            print(f"   Embedding length: {len(embedding)}")
+
+            # Validation (size and NaN/inf check on the float32 array)
+            embedding.validate(self.vector_size)
+
+            await self.upsert_points(
+                self.search_embeddings_collection,
+                [StoredPoint(id=point_id, vector=embedding, payload=payload)]
+            )
+
+            print(f"   ✅ Search embedding stored with ID: {point_id}")
+            logger.info(f"Stored search embedding for user {user_uid} with ID: {point_id}")
+            return point_id
+
+        except Exception as e:
+            logger.error(f"Error storing search embedding: {str(e)}")
+            raise Exception(f"Failed to store search embedding in {self.display_name}: {str(e)}")
+
+    async def store_user_search_embedding(
+        self,
+        user_id: str,
+        query_filename: str,
+        query_embedding: Union[Embedding, List[float]],
+        similar_results_count: int
+    ):
+        """Store user search embedding for future recommendations"""
+        try:
+            # Generate unique ID for the search entry
+            search_id = str(uuid.uuid4())
+
+            # Create point data
+            point_data = StoredPoint(
+                id=search_id,
+                vector=Embedding.from_any(query_embedding),
+                payload={
+                    "user_uid": user_id,
+                    "search_query_filename": query_filename,
+                    "similar_results_count": similar_results_count,
+                    "search_timestamp": datetime.utcnow().isoformat(),
+                    "search_type": "user_search",
+                    "embedding_model": self.model_spec.key
+                }
+            )
+
+            # Store in the search history collection
+            await self.upsert_points(self.search_embeddings_collection, [point_data])
+
+            logger.info(f"Stored user search embedding for user {user_id}, search_id: {search_id}")
+            return {
+                "search_id": search_id,
+                "status": "stored",
+                "user_uid": user_id,
+                "similar_results_count": similar_results_count
+            }
+
+        except Exception as e:
+            logger.error(f"Error storing user search embedding: {str(e)}")
+            raise Exception(f"Failed to store user search embedding: {str(e)}")
+
+    async def get_user_search_history(self, user_uid: str, limit: int = 10) -> List[Dict[str, Any]]:
+        """Get user's search history for recommendations"""
+        try:
+            # Use scroll to get user's search history
+            points, _ = await self.scroll_points(
+                self.search_embeddings_collection,
+                limit=limit,
+                payload_filter={"user_uid": user_uid},
+                with_vectors=True
+            )
+
+            results = []
+            for point in points:
+                search_data = {
+                    "search_id": str(point.id),
+                    "user_uid": point.payload.get("user_uid"),
+                    "search_query_filename": point.payload.get("search_query_filename"),
+                    "similar_results_count": point.payload.get("similar_results_count"),
+                    "search_timestamp": point.payload.get("search_timestamp"),
+                    "search_type": point.payload.get("search_type"),
+                    "embedding": point.vector
+                }
+                results.append(search_data)
+
+            # Sort by search_timestamp (most recent first)
+            results.sort(key=lambda x: x.get("search_timestamp", ""), reverse=True)
+
+            logger.info(f"Retrieved {len(results)} search history entries for user {user_uid}")
+            return results
+
+        except Exception as e:
+            logger.error(f"Error retrieving user search history: {str(e)}")
+            raise Exception(f"Failed to retrieve user search history: {str(e)}")
+
+    async def get_user_recommendations(self, user_uid: str, limit: int = 5, hnsw_ef: Optional[int] = None) -> List[Dict[str, Any]]:
+        """
+        Get product recommendations based on user's search history
+
+        The similarity searches use a narrow HNSW beam (QDRANT_RECOMMENDATIONS_HNSW_EF by
+        default): a few missed neighbours matter less here than on an explicit search.
+        """
+        try:
+            # First, get user's search history
+            search_history = await self.get_user_search_history(user_uid, limit=10)
+
+            if not search_history:
+                logger.info(f"No search history found for user {user_uid}")
+                return []
+
+            # Get the most recent search embeddings (last 3 searches)
+            recent_searches = [search for search in search_history[:3] if search.get("embedding")]
+            recommendations = []
+
+            # Search for similar products based on each search embedding, concurrently
+            similar_per_search = await asyncio.gather(*(
+                self.search_similar_images(
+                    query_embedding=search["embedding"],
+                    limit=10,  # Get more to have variety
+                    score_threshold=0.5,  # Lower threshold for recommendations
+                    hnsw_ef=hnsw_ef or config.QDRANT_RECOMMENDATIONS_HNSW_EF or None
+                )
+                for search in recent_searches
+            ))
+
+            for search, similar_products in zip(recent_searches, similar_per_search):
+                # Add search context to each recommendation
+                for product in similar_products:
+                    product["recommendation_source"] = {
+                        "search_id": search["search_id"],
+                        "search_filename": search["search_query_filename"],
+                        "search_timestamp": search["search_timestamp"]
+                    }
+                    recommendations.append(product)
+
+            # Remove duplicates based on product ID and sort by score
+            seen_ids = set()
+            unique_recommendations = []
+
+            for rec in recommendations:
+                if rec["id"] not in seen_ids:
+                    seen_ids.add(rec["id"])
+                    unique_recommendations.append(rec)
+
+            # Sort by similarity score (highest first)
+            unique_recommendations.sort(key=lambda x: x["score"], reverse=True)
+
+            # Return top recommendations
+            final_recommendations = unique_recommendations[:limit]
+
+            logger.info(f"Generated {len(final_recommendations)} recommendations for user {user_uid}")
+            return final_recommendations
+
+        except Exception as e:
+            logger.error(f"Error generating recommendations for user {user_uid}: {str(e)}")
+            raise Exception(f"Failed to generate recommendations: {str(e)}")
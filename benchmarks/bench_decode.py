@@ -0,0 +1,104 @@
+"""
+Benchmark decode + resize time and peak memory for upload-sized images
+
+Compares the current decoder (JPEG draft mode, reducing_gap resize, first frame
+only) against a full decode followed by resize. Each measurement runs in a
+fresh subprocess so peak RSS is not polluted by earlier cases.
+
+Usage:
+    python -m benchmarks.bench_decode --repeats 10
+"""
+import argparse
+import io
+import json
+import os
+import subprocess
+import sys
+import tempfile
+
+import numpy as np
+from PIL import Image
+
+from benchmarks.common import make_synthetic_image, summarize_latencies, write_results
+
+SIZES = {
+    "vga_640x480": (640, 480),
+    "fullhd_1920x1080": (1920, 1080),
+    "phone_12mp_4032x3024": (4032, 3024),
+}
+FORMATS = ("JPEG", "PNG", "WEBP")
+
+
+def full_decode(image_bytes: bytes) -> np.ndarray:
+    """The original preprocessing: decode every pixel, then resize"""
+    pil_image = Image.open(io.BytesIO(image_bytes))
+    if pil_image.mode != 'RGB':
+        pil_image = pil_image.convert('RGB')
+    return np.asarray(pil_image.resize((224, 224)), dtype=np.uint8)
+
+
+def run_case(path: str, decoder: str, repeats: int) -> dict:
+    """Decode one file repeatedly inside this process and report latency and peak RSS"""
+    from benchmarks.common import peak_rss_mb, time_calls
+
+    with open(path, "rb") as f:
+        image_bytes = f.read()
+
+    if decoder == "draft":
+        from app.services.image_preprocessing import decode_image
+    else:
+        decode_image = full_decode
+
+    rss_before = peak_rss_mb()
+    samples = time_calls(lambda: decode_image(image_bytes), repeats, warmup=1)
+    return {"samples": samples, "peak_rss_increase_mb": round(peak_rss_mb() - rss_before, 2)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark image decode + resize")
+    parser.add_argument("--repeats", type=int, default=10)
+    parser.add_argument("--output", default="bench_decode.json")
+    parser.add_argument("--case", nargs=3, metavar=("PATH", "DECODER", "REPEATS"), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.case:
+        path, decoder, repeats = args.case
+        print(json.dumps(run_case(path, decoder, int(repeats))))
+        return
+
+    from app.services.image_preprocessing import decode_image
+
+    results = []
+    with tempfile.TemporaryDirectory() as tmp:
+        for size_name, size in SIZES.items():
+            for fmt in FORMATS:
+                image_bytes = make_synthetic_image(seed=7, size=size, fmt=fmt)
+                path = os.path.join(tmp, f"{size_name}.{fmt.lower()}")
+                with open(path, "wb") as f:
+                    f.write(image_bytes)
+
+                # How far the fast decoder drifts from a full decode, in 0-255 pixel units
+                pixel_mae = float(np.abs(decode_image(image_bytes).astype(np.int16) - full_decode(image_bytes)).mean())
+
+                for decoder in ("full", "draft"):
+                    output = subprocess.run(
+                        [sys.executable, "-m", "benchmarks.bench_decode", "--case", path, decoder, str(args.repeats)],
+                        capture_output=True, text=True, check=True
+                    ).stdout
+                    case = json.loads(output.strip().splitlines()[-1])
+                    stats = summarize_latencies(case["samples"])
+                    results.append({
+                        "size": size_name, "format": fmt, "decoder": decoder,
+                        "file_kb": round(len(image_bytes) / 1024, 1),
+                        "peak_rss_increase_mb": case["peak_rss_increase_mb"],
+                        "pixel_mae_vs_full": round(pixel_mae, 3) if decoder == "draft" else 0.0,
+                        **stats
+                    })
+                    print(f"{size_name:<22} {fmt:<5} {decoder:<6} p50={stats['p50_ms']:8.2f}ms "
+                          f"peak RSS +{case['peak_rss_increase_mb']:.1f}MB")
+
+    write_results(args.output, "decode", results)
+
+
+if __name__ == "__main__":
+    main()
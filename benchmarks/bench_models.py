@@ -0,0 +1,65 @@
+"""
+Benchmark inference cost of each registered embedding model
+
+Builds every model in app.services.model_registry with the compiled Keras
+serving function and reports parameter count, vector size, single-image
+latency and batch throughput, relative to ResNet50.
+
+Usage:
+    python -m benchmarks.bench_models --repeats 30
+    python -m benchmarks.bench_models --models resnet50,mobilenet_v3_large --weights none
+"""
+import argparse
+import time
+
+import numpy as np
+
+from benchmarks.common import summarize_latencies, time_calls, write_results
+
+
+def main():
+    from app.services.inference_backends import KerasBackend
+    from app.services.model_registry import MODELS
+
+    parser = argparse.ArgumentParser(description="Benchmark the registered embedding models")
+    parser.add_argument("--models", default=",".join(MODELS))
+    parser.add_argument("--batch-sizes", default="1,8")
+    parser.add_argument("--repeats", type=int, default=30)
+    parser.add_argument("--weights", default="imagenet",
+                        help="'imagenet', or 'none' for random weights (same cost, no download)")
+    parser.add_argument("--output", default="bench_models.json")
+    args = parser.parse_args()
+
+    batch_sizes = [int(size) for size in args.batch_sizes.split(",")]
+    weights = None if args.weights == "none" else args.weights
+    rng = np.random.default_rng(0)
+
+    results = []
+    baseline = {}
+    for key in args.models.split(","):
+        started = time.perf_counter()
+        backend = KerasBackend(compiled=True, xla=False, model_key=key, weights=weights)
+        backend.warmup(batch_sizes)
+        load_s = time.perf_counter() - started
+        params = backend.model.count_params()
+        print(f"{key:<20} {backend.spec.embedding_size:>5} dims {params / 1e6:6.2f}M params load={load_s:.1f}s")
+
+        for batch_size in batch_sizes:
+            pixels = rng.integers(0, 256, (batch_size, 224, 224, 3), dtype=np.uint8)
+            stats = summarize_latencies(
+                time_calls(lambda: backend.predict(pixels), args.repeats, warmup=1),
+                items_per_call=batch_size
+            )
+            if key == "resnet50":
+                baseline[batch_size] = stats["p50_ms"]
+            speedup = round(baseline[batch_size] / stats["p50_ms"], 2) if batch_size in baseline else None
+            results.append({"model": key, "embedding_size": backend.spec.embedding_size, "params": params,
+                            "batch_size": batch_size, "speedup_vs_resnet50": speedup, **stats})
+            print(f"{'':<20} batch={batch_size:<3} p50={stats['p50_ms']:8.2f}ms p99={stats['p99_ms']:8.2f}ms "
+                  f"({stats['items_per_sec']} img/s)" + (f" {speedup}x vs ResNet50" if speedup else ""))
+
+    write_results(args.output, "models", results)
+
+
+if __name__ == "__main__":
+    main()
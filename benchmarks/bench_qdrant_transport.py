@@ -0,0 +1,250 @@
+"""
+Benchmark Qdrant REST (JSON) against gRPC (protobuf) for the calls QdrantVectorService makes
+
+Two parts:
+
+    encoding  Client-side CPU and message size for each call, with no server: the request
+              is encoded and the response decoded exactly as qdrant-client does for each
+              transport (pydantic models <-> JSON, or <-> protobuf messages)
+    live      Per-call latency and client CPU against QDRANT_URL over both transports,
+              using a temporary collection that is deleted afterwards
+
+Calls: search (with and without returned vectors, as /search-complete does with
+include_embeddings), retrieve with vectors, and upsert of single points and of
+store_embeddings_batch-sized chunks.
+
+Usage:
+    python -m benchmarks.bench_qdrant_transport
+    python -m benchmarks.bench_qdrant_transport --live --points 2000
+"""
+import argparse
+import asyncio
+import json
+import os
+import time
+import uuid
+from typing import Any, Callable, Dict, List, Tuple
+
+import numpy as np
+
+from benchmarks.common import summarize_latencies, write_results
+
+
+def make_points(count: int, vector_size: int, seed: int = 0) -> List[Any]:
+    """Catalog-like points: random vectors with a payload shaped like build_catalog_payload's"""
+    from qdrant_client.http import models
+
+    rng = np.random.default_rng(seed)
+    return [
+        models.PointStruct(
+            id=str(uuid.UUID(int=int(rng.integers(1 << 62)))),
+            vector=rng.standard_normal(vector_size).astype(np.float32).tolist(),
+            payload={
+                "filename": f"product_{i}.jpg",
+                "file_size": 350000,
+                "content_type": "image/jpeg",
+                "processing_time": 0.21,
+                "model_used": "ResNet50",
+                "embedding_model": "resnet50",
+                "upload_timestamp": "2026-01-01",
+                "price": 49.99,
+                "product_name": f"Product {i}",
+                "firebase_url": f"https://firebasestorage.googleapis.com/v0/b/bucket/o/fashion_images%2Fproduct_{i}.jpg",
+                "image_hash": "05025393226b32a57f7f7f",
+            }
+        )
+        for i in range(count)
+    ]
+
+
+def encoding_cases(vector_size: int, limit: int, chunk: int) -> Dict[str, Dict[str, Tuple[Callable, Callable, int]]]:
+    """
+    For each call and transport, (encode request, decode response, response size in bytes)
+
+    Server-side encoding of the responses is done once up front and not measured.
+    """
+    from qdrant_client import grpc
+    from qdrant_client.conversions.conversion import GrpcToRest, RestToGrpc
+    from qdrant_client.http import models
+    from qdrant_client.http.api.points_api import jsonable_encoder
+    from qdrant_client.http.api_client import parse_as_type
+
+    collection = "fashion_embeddings"
+    points = make_points(max(limit, chunk), vector_size)
+    query = points[0].vector
+    scored = [models.ScoredPoint(id=p.id, version=1, score=0.9, payload=p.payload, vector=p.vector) for p in points[:limit]]
+    scored_without_vectors = [models.ScoredPoint(id=p.id, version=1, score=0.9, payload=p.payload) for p in points[:limit]]
+    records = [models.Record(id=p.id, payload=p.payload, vector=p.vector) for p in points[:1]]
+
+    def rest(request, response_type, response_result):
+        # jsonable_encoder returns the JSON text the client sends as the request body
+        result = [json.loads(jsonable_encoder(item)) for item in response_result] if isinstance(response_result, list) \
+            else json.loads(jsonable_encoder(response_result))
+        response_bytes = json.dumps({"result": result, "status": "ok", "time": 0.001}).encode()
+        return (
+            lambda: jsonable_encoder(request).encode(),
+            lambda: parse_as_type(json.loads(response_bytes)["result"], response_type),
+            len(response_bytes),
+        )
+
+    def rest_search(with_vector: bool):
+        request = models.SearchRequest(vector=query, limit=limit, with_payload=True, with_vector=with_vector)
+        return rest(request, List[models.ScoredPoint], scored if with_vector else scored_without_vectors)
+
+    def grpc_search(with_vector: bool):
+        request = models.SearchRequest(vector=query, limit=limit, with_payload=True, with_vector=with_vector)
+        response_bytes = grpc.SearchResponse(
+            result=[RestToGrpc.convert_scored_point(p) for p in (scored if with_vector else scored_without_vectors)]
+        ).SerializeToString()
+        return (
+            lambda: RestToGrpc.convert_search_request(request, collection).SerializeToString(),
+            lambda: [GrpcToRest.convert_scored_point(p) for p in grpc.SearchResponse.FromString(response_bytes).result],
+            len(response_bytes),
+        )
+
+    def grpc_retrieve():
+        ids = [RestToGrpc.convert_extended_point_id(p.id) for p in records]
+        response_bytes = grpc.GetResponse(result=[RestToGrpc.convert_record(r) for r in records]).SerializeToString()
+        return (
+            lambda: grpc.GetPoints(collection_name=collection, ids=ids, with_vectors=RestToGrpc.convert_with_vectors(True),
+                                   with_payload=RestToGrpc.convert_with_payload_interface(True)).SerializeToString(),
+            lambda: [GrpcToRest.convert_retrieved_point(p) for p in grpc.GetResponse.FromString(response_bytes).result],
+            len(response_bytes),
+        )
+
+    def upsert(count: int):
+        batch = points[:count]
+        result = models.UpdateResult(operation_id=1, status=models.UpdateStatus.ACKNOWLEDGED)
+        rest_case = rest(models.PointsList(points=batch), models.UpdateResult, result)
+        response_bytes = grpc.PointsOperationResponse(result=RestToGrpc.convert_update_result(result)).SerializeToString()
+        grpc_case = (
+            lambda: grpc.UpsertPoints(collection_name=collection, wait=False,
+                                      points=[RestToGrpc.convert_point_struct(p) for p in batch]).SerializeToString(),
+            lambda: GrpcToRest.convert_update_result(grpc.PointsOperationResponse.FromString(response_bytes).result),
+            len(response_bytes),
+        )
+        return {"rest": rest_case, "grpc": grpc_case}
+
+    return {
+        f"search_top{limit}": {"rest": rest_search(False), "grpc": grpc_search(False)},
+        f"search_top{limit}_with_vectors": {"rest": rest_search(True), "grpc": grpc_search(True)},
+        "retrieve_with_vector": {
+            "rest": rest(models.PointRequest(ids=[p.id for p in records], with_payload=True, with_vector=True),
+                         List[models.Record], records),
+            "grpc": grpc_retrieve(),
+        },
+        "upsert_1": upsert(1),
+        f"upsert_{chunk}": upsert(chunk),
+    }
+
+
+def cpu_per_call(func: Callable, repeats: int) -> Tuple[float, Any]:
+    """Mean CPU milliseconds per call, and the last return value"""
+    result = func()
+    started = time.process_time()
+    for _ in range(repeats):
+        result = func()
+    return (time.process_time() - started) / repeats * 1000, result
+
+
+def run_encoding(vector_size: int, limit: int, chunk: int, repeats: int) -> List[dict]:
+    results = []
+    for call, transports in encoding_cases(vector_size, limit, chunk).items():
+        for transport, (encode, decode, response_bytes) in transports.items():
+            encode_ms, request = cpu_per_call(encode, repeats)
+            decode_ms, _ = cpu_per_call(decode, repeats)
+            results.append({
+                "part": "encoding", "call": call, "transport": transport,
+                "request_bytes": len(request),
+                "response_bytes": response_bytes,
+                "encode_cpu_ms": round(encode_ms, 4),
+                "decode_cpu_ms": round(decode_ms, 4),
+                "client_cpu_ms": round(encode_ms + decode_ms, 4),
+            })
+    return results
+
+
+async def run_live(transport: str, vector_size: int, points: int, limit: int, chunk: int, repeats: int) -> List[dict]:
+    """Latency and client CPU per call against the configured Qdrant cluster"""
+    from qdrant_client import AsyncQdrantClient
+    from qdrant_client.http import models
+    from app.config import config
+
+    client = AsyncQdrantClient(url=config.QDRANT_URL, api_key=config.QDRANT_API_KEY, timeout=30,
+                               prefer_grpc=transport == "grpc", grpc_port=config.QDRANT_GRPC_PORT)
+    collection = f"bench_transport_{uuid.uuid4().hex[:8]}"
+    await client.create_collection(collection, vectors_config=models.VectorParams(size=vector_size, distance=models.Distance.COSINE))
+    try:
+        base = make_points(points, vector_size, seed=1)
+        for start in range(0, points, 256):
+            await client.upsert(collection, points=base[start:start + 256], wait=True)
+        query = base[0].vector
+        new_points = make_points(chunk * (repeats + 2), vector_size, seed=2)
+        batches = iter(range(0, len(new_points), chunk))
+        singles = iter(new_points)
+
+        calls = {
+            f"search_top{limit}": lambda: client.search(collection, query_vector=query, limit=limit, with_payload=True),
+            f"search_top{limit}_with_vectors": lambda: client.search(collection, query_vector=query, limit=limit,
+                                                                      with_payload=True, with_vectors=True),
+            "retrieve_with_vector": lambda: client.retrieve(collection, ids=[base[1].id], with_vectors=True),
+            "upsert_1": lambda: client.upsert(collection, points=[next(singles)], wait=False),
+            f"upsert_{chunk}": lambda: client.upsert(collection, points=new_points[next(batches):][:chunk], wait=False),
+        }
+        results = []
+        for call, make_call in calls.items():
+            for _ in range(2):
+                await make_call()
+            samples = []
+            cpu_started = time.process_time()
+            for _ in range(repeats):
+                started = time.perf_counter()
+                await make_call()
+                samples.append(time.perf_counter() - started)
+            cpu_ms = (time.process_time() - cpu_started) / repeats * 1000
+            result = {"part": "live", "call": call, "transport": transport,
+                      "client_cpu_ms": round(cpu_ms, 3), **summarize_latencies(samples)}
+            print(f"   {transport:<5} {call:<28} p50={result['p50_ms']:8.2f}ms p99={result['p99_ms']:8.2f}ms "
+                  f"cpu={cpu_ms:7.3f}ms/call")
+            results.append(result)
+        return results
+    finally:
+        await client.delete_collection(collection)
+        await client.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare Qdrant REST and gRPC transports")
+    parser.add_argument("--vector-size", type=int, default=2048)
+    parser.add_argument("--limit", type=int, default=20, help="Search results (the /search-complete maximum)")
+    parser.add_argument("--chunk", type=int, default=int(os.getenv("QDRANT_UPSERT_CHUNK_SIZE", "256")),
+                        help="Points per batch upsert")
+    parser.add_argument("--repeats", type=int, default=50)
+    parser.add_argument("--live", action="store_true", help="Also measure against QDRANT_URL (creates a temporary collection)")
+    parser.add_argument("--points", type=int, default=1000, help="Points in the temporary collection for --live")
+    parser.add_argument("--output", default="bench_qdrant_transport.json")
+    args = parser.parse_args()
+
+    print("🧮 Client-side encoding (no server)")
+    results = run_encoding(args.vector_size, args.limit, args.chunk, args.repeats)
+    by_call: Dict[str, Dict[str, dict]] = {}
+    for result in results:
+        by_call.setdefault(result["call"], {})[result["transport"]] = result
+    for call, transports in by_call.items():
+        rest, grpc = transports["rest"], transports["grpc"]
+        print(f"   {call:<28} bytes sent {rest['request_bytes']:>9} -> {grpc['request_bytes']:>8}  "
+              f"received {rest['response_bytes']:>7} -> {grpc['response_bytes']:>7}  "
+              f"encode {rest['encode_cpu_ms']:7.2f} -> {grpc['encode_cpu_ms']:7.2f} ms  "
+              f"decode {rest['decode_cpu_ms']:6.2f} -> {grpc['decode_cpu_ms']:6.2f} ms")
+    print("   (REST -> gRPC; CPU is client-side per call)")
+
+    if args.live:
+        for transport in ("rest", "grpc"):
+            print(f"🌐 Live calls over {transport}")
+            results += asyncio.run(run_live(transport, args.vector_size, args.points, args.limit, args.chunk, args.repeats))
+
+    write_results(args.output, "qdrant_transport", results)
+
+
+if __name__ == "__main__":
+    main()
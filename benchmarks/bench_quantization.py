@@ -0,0 +1,223 @@
+"""
+Compare recall and latency of quantized catalog collections against float32
+
+Two parts:
+
+    simulated  Recall@k of int8 scalar and binary quantization with oversampling and
+               full-precision rescoring, computed in NumPy the way Qdrant scores
+               quantized vectors, plus the RAM each vector needs. No server needed.
+    live       Latency and recall against QDRANT_URL with one temporary collection per
+               quantization mode (deleted afterwards), searched with the same
+               oversampling values. Recall is measured against exact float32 search.
+
+Vectors come from the catalog collection (--qdrant-sample), a .npy file (--vectors) or
+a synthetic set of non-negative clustered vectors shaped like pooled CNN features.
+The first --queries vectors are held out and used as queries.
+
+Usage:
+    python -m benchmarks.bench_quantization
+    python -m benchmarks.bench_quantization --qdrant-sample 20000 --live
+"""
+import argparse
+import asyncio
+import time
+import uuid
+from typing import List, Tuple
+
+import numpy as np
+
+from benchmarks.common import summarize_latencies, write_results
+
+MODES = ("none", "scalar", "binary")
+SCALAR_QUANTILE = 0.99  # As QdrantVectorService.quantization_config()
+
+
+def synthetic_vectors(count: int, dim: int, clusters: int, seed: int = 0) -> np.ndarray:
+    """Non-negative, sparse-ish clustered vectors (pooled ResNet features are ReLU outputs)"""
+    rng = np.random.default_rng(seed)
+    centers = rng.standard_normal((clusters, dim)).astype(np.float32)
+    labels = rng.integers(clusters, size=count)
+    return np.maximum(centers[labels] + 0.7 * rng.standard_normal((count, dim)).astype(np.float32), 0)
+
+
+async def sample_collection(sample: int) -> np.ndarray:
+    """Read up to `sample` stored vectors from the active model's catalog collection"""
+    from qdrant_client import AsyncQdrantClient
+    from app.config import config
+    from app.services.model_registry import get_model_spec
+
+    client = AsyncQdrantClient(url=config.QDRANT_URL, api_key=config.QDRANT_API_KEY, timeout=60)
+    vectors, offset = [], None
+    try:
+        while len(vectors) < sample:
+            points, offset = await client.scroll(get_model_spec().collection_name(), limit=min(1000, sample - len(vectors)),
+                                                 offset=offset, with_payload=False, with_vectors=True)
+            vectors += [point.vector for point in points if point.vector]
+            if offset is None:
+                break
+    finally:
+        await client.close()
+    return np.asarray(vectors, dtype=np.float32)
+
+
+def normalize(vectors: np.ndarray) -> np.ndarray:
+    """Qdrant normalizes vectors of cosine collections on insert"""
+    return vectors / np.maximum(np.linalg.norm(vectors, axis=1, keepdims=True), 1e-12)
+
+
+def exact_top_k(base: np.ndarray, queries: np.ndarray, k: int) -> np.ndarray:
+    scores = queries @ base.T
+    top = np.argpartition(-scores, k, axis=1)[:, :k]
+    return np.take_along_axis(top, np.argsort(-np.take_along_axis(scores, top, axis=1), axis=1), axis=1)
+
+
+def quantized_scores(mode: str, base: np.ndarray, queries: np.ndarray) -> np.ndarray:
+    """Approximate scores from the quantized representation Qdrant keeps in RAM"""
+    if mode == "scalar":
+        # One int8 code per value over the range of the central 99% of all values
+        low, high = np.quantile(base, [(1 - SCALAR_QUANTILE) / 2, 1 - (1 - SCALAR_QUANTILE) / 2])
+        scale = (high - low) / 255
+
+        def dequantize(x):
+            return np.clip(np.round((x - low) / scale), 0, 255) * scale + low
+
+        return dequantize(queries) @ dequantize(base).T
+    if mode == "binary":
+        # One bit per dimension (value > 0); similarity falls with the Hamming distance
+        base_bits, query_bits = (base > 0).astype(np.float32), (queries > 0).astype(np.float32)
+        hamming = query_bits @ (1 - base_bits).T + (1 - query_bits) @ base_bits.T
+        return -hamming
+    return queries @ base.T
+
+
+def search_quantized(mode: str, base: np.ndarray, queries: np.ndarray, k: int, oversampling: float) -> np.ndarray:
+    """Top-k after selecting k x oversampling quantized candidates and re-scoring them in float32"""
+    candidates = max(k, int(round(k * oversampling)))
+    approx = quantized_scores(mode, base, queries)
+    top = np.argpartition(-approx, candidates, axis=1)[:, :candidates]
+    rescored = np.einsum("qd,qcd->qc", queries, base[top])
+    order = np.argsort(-rescored, axis=1)[:, :k]
+    return np.take_along_axis(top, order, axis=1)
+
+
+def recall(found: np.ndarray, truth: np.ndarray) -> float:
+    k = truth.shape[1]
+    return float(np.mean([len(set(f) & set(t)) / k for f, t in zip(found, truth)]))
+
+
+def bytes_per_vector(mode: str, dim: int) -> int:
+    """RAM per vector used for ranking: float32, one int8 per dimension, or one bit"""
+    return {"none": 4 * dim, "scalar": dim, "binary": (dim + 7) // 8}[mode]
+
+
+def run_simulated(base: np.ndarray, queries: np.ndarray, k: int, oversamplings: List[float]) -> List[dict]:
+    truth = exact_top_k(base, queries, k)
+    results = []
+    for mode in MODES[1:]:
+        for oversampling in oversamplings:
+            value = recall(search_quantized(mode, base, queries, k, oversampling), truth)
+            results.append({"part": "simulated", "mode": mode, "oversampling": oversampling,
+                            f"recall@{k}": round(value, 4), "bytes_per_vector": bytes_per_vector(mode, base.shape[1])})
+    return results
+
+
+async def create_collection(client, mode: str, base: np.ndarray) -> str:
+    """Temporary collection with the service's quantization config, indexed like a large catalog"""
+    from qdrant_client.http import models
+    from app.services.vector_service import QdrantVectorService
+
+    name = f"bench_quantization_{mode}_{uuid.uuid4().hex[:8]}"
+    await client.create_collection(
+        name,
+        vectors_config=models.VectorParams(size=base.shape[1], distance=models.Distance.COSINE),
+        quantization_config=QdrantVectorService.quantization_config(mode),
+        # Build the HNSW index and quantized vectors even for a small sample
+        optimizers_config=models.OptimizersConfigDiff(indexing_threshold=1000)
+    )
+    for start in range(0, len(base), 256):
+        batch = base[start:start + 256]
+        await client.upsert(name, points=models.Batch(ids=list(range(start, start + len(batch))), vectors=batch.tolist()),
+                            wait=start + 256 >= len(base))
+    while (await client.get_collection(name)).status != models.CollectionStatus.GREEN:
+        await asyncio.sleep(1)
+    return name
+
+
+async def run_live(base: np.ndarray, queries: np.ndarray, k: int, oversamplings: List[float]) -> List[dict]:
+    from qdrant_client import AsyncQdrantClient
+    from qdrant_client.http import models
+    from app.config import config
+
+    client = AsyncQdrantClient(url=config.QDRANT_URL, api_key=config.QDRANT_API_KEY, timeout=60,
+                               prefer_grpc=config.QDRANT_TRANSPORT == "grpc", grpc_port=config.QDRANT_GRPC_PORT)
+    truth = exact_top_k(normalize(base), normalize(queries), k)
+    results = []
+    try:
+        for mode in MODES:
+            print(f"🌐 Uploading {len(base)} vectors to a {mode} collection")
+            name = await create_collection(client, mode, base)
+            try:
+                for oversampling in (oversamplings if mode != "none" else [None]):
+                    params = None if oversampling is None else models.SearchParams(
+                        quantization=models.QuantizationSearchParams(rescore=True, oversampling=oversampling))
+                    found, samples = [], []
+                    for query in queries.tolist():
+                        started = time.perf_counter()
+                        hits = await client.search(name, query_vector=query, limit=k, search_params=params)
+                        samples.append(time.perf_counter() - started)
+                        found.append([hit.id for hit in hits] + [-1] * (k - len(hits)))
+                    result = {"part": "live", "mode": mode, "oversampling": oversampling,
+                              f"recall@{k}": round(recall(np.asarray(found), truth), 4), **summarize_latencies(samples)}
+                    print(f"   {mode:<6} oversampling={oversampling or '-':<4} recall@{k}={result[f'recall@{k}']:.3f} "
+                          f"p50={result['p50_ms']:7.2f}ms p99={result['p99_ms']:7.2f}ms")
+                    results.append(result)
+            finally:
+                await client.delete_collection(name)
+    finally:
+        await client.close()
+    return results
+
+
+def load_vectors(args) -> Tuple[np.ndarray, np.ndarray]:
+    if args.qdrant_sample:
+        vectors = asyncio.run(sample_collection(args.qdrant_sample))
+    elif args.vectors:
+        vectors = np.load(args.vectors).astype(np.float32)
+    else:
+        vectors = synthetic_vectors(args.points + args.queries, args.vector_size, args.clusters)
+    if len(vectors) <= args.queries:
+        raise SystemExit(f"Need more than {args.queries} vectors, got {len(vectors)}")
+    return vectors[args.queries:], vectors[:args.queries]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Recall and latency of quantized Qdrant collections")
+    parser.add_argument("--qdrant-sample", type=int, default=0, help="Use this many vectors from the catalog collection")
+    parser.add_argument("--vectors", help=".npy file of vectors to use instead")
+    parser.add_argument("--points", type=int, default=10000, help="Synthetic catalog size")
+    parser.add_argument("--vector-size", type=int, default=2048)
+    parser.add_argument("--clusters", type=int, default=200)
+    parser.add_argument("--queries", type=int, default=200, help="Vectors held out as queries")
+    parser.add_argument("--top-k", type=int, default=10)
+    parser.add_argument("--oversampling", default="1,2,4", help="Comma-separated oversampling factors")
+    parser.add_argument("--live", action="store_true", help="Also measure against QDRANT_URL (creates temporary collections)")
+    parser.add_argument("--output", default="bench_quantization.json")
+    args = parser.parse_args()
+
+    oversamplings = [float(value) for value in args.oversampling.split(",")]
+    base, queries = load_vectors(args)
+    print(f"🧮 Simulated quantization ({len(base)} vectors, {len(queries)} queries, {base.shape[1]} dimensions)")
+    results = run_simulated(normalize(base), normalize(queries), args.top_k, oversamplings)
+    for result in results:
+        print(f"   {result['mode']:<6} oversampling={result['oversampling']:<4} "
+              f"recall@{args.top_k}={result[f'recall@{args.top_k}']:.3f} "
+              f"{result['bytes_per_vector']:>5} bytes/vector (float32: {bytes_per_vector('none', base.shape[1])})")
+
+    if args.live:
+        results += asyncio.run(run_live(base, queries, args.top_k, oversamplings))
+
+    write_results(args.output, "quantization", results)
+
+
+if __name__ == "__main__":
+    main()
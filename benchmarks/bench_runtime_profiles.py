@@ -0,0 +1,114 @@
+"""
+Benchmark inference throughput under each runtime profile
+
+TensorFlow thread pools, determinism and oneDNN can only be set once per
+process, so every profile runs in a fresh subprocess with RUNTIME_PROFILE
+(and optional thread overrides) set in its environment. Each run reports
+single-image latency, batch throughput and throughput with several
+concurrent inference threads (as with INFERENCE_WORKERS > 1).
+
+Usage:
+    python -m benchmarks.bench_runtime_profiles --repeats 30
+    python -m benchmarks.bench_runtime_profiles --profiles performance,deterministic --batch-sizes 1,16
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+from benchmarks.common import summarize_latencies, write_results
+
+
+def run_case(batch_sizes, repeats: int, concurrency: int) -> dict:
+    """Load the configured backend under the current environment and time it"""
+    from benchmarks.common import time_calls
+    from app.services.inference_backends import create_backend
+    from app.services.runtime_profile import get_runtime_settings
+
+    started = time.perf_counter()
+    backend = create_backend()
+    backend.warmup(batch_sizes)
+    load_s = time.perf_counter() - started
+
+    rng = np.random.default_rng(0)
+    latencies = {}
+    for batch_size in batch_sizes:
+        pixels = rng.integers(0, 256, (batch_size, 224, 224, 3), dtype=np.uint8)
+        latencies[batch_size] = time_calls(lambda: backend.predict(pixels), repeats, warmup=1)
+
+    # Several threads sharing the model, each sending single images
+    pixels = rng.integers(0, 256, (1, 224, 224, 3), dtype=np.uint8)
+    calls = repeats * concurrency
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        started = time.perf_counter()
+        list(pool.map(lambda _: backend.predict(pixels), range(calls)))
+        concurrent_s = time.perf_counter() - started
+
+    return {
+        "backend": backend.name,
+        "runtime": get_runtime_settings(),
+        "load_s": round(load_s, 3),
+        "latencies": {str(size): samples for size, samples in latencies.items()},
+        "concurrent_items_per_sec": round(calls / concurrent_s, 2)
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark inference under each runtime profile")
+    parser.add_argument("--profiles", default="performance,deterministic",
+                        help="Comma-separated profiles; append :INTRA:INTER to override thread counts, "
+                             "e.g. performance:2:1")
+    parser.add_argument("--batch-sizes", default="1,8")
+    parser.add_argument("--repeats", type=int, default=30)
+    parser.add_argument("--concurrency", type=int, default=4, help="Threads in the concurrent throughput test")
+    parser.add_argument("--output", default="bench_runtime_profiles.json")
+    parser.add_argument("--case", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    batch_sizes = [int(size) for size in args.batch_sizes.split(",")]
+
+    if args.case:
+        print(json.dumps(run_case(batch_sizes, args.repeats, args.concurrency)))
+        return
+
+    results = []
+    for spec in args.profiles.split(","):
+        name, *threads = spec.split(":")
+        env = {**os.environ, "RUNTIME_PROFILE": name}
+        if threads:
+            env["TF_INTRA_OP_THREADS"] = threads[0]
+            if len(threads) > 1:
+                env["TF_INTER_OP_THREADS"] = threads[1]
+
+        output = subprocess.run(
+            [sys.executable, "-m", "benchmarks.bench_runtime_profiles", "--case",
+             "--batch-sizes", args.batch_sizes, "--repeats", str(args.repeats),
+             "--concurrency", str(args.concurrency)],
+            capture_output=True, text=True, check=True, env=env
+        ).stdout
+        case = json.loads(output.strip().splitlines()[-1])
+        runtime = case["runtime"]
+        print(f"{spec:<22} {case['backend']}: determinism={runtime['determinism']} "
+              f"intra={runtime['intra_op_threads']} inter={runtime['inter_op_threads']} "
+              f"oneDNN={runtime['onednn']} load={case['load_s']}s")
+
+        for batch_size in batch_sizes:
+            stats = summarize_latencies(case["latencies"][str(batch_size)], items_per_call=batch_size)
+            results.append({"profile": spec, "backend": case["backend"], "runtime": runtime,
+                            "batch_size": batch_size, **stats})
+            print(f"{'':<22} batch={batch_size:<3} p50={stats['p50_ms']:8.2f}ms p99={stats['p99_ms']:8.2f}ms "
+                  f"({stats['items_per_sec']} img/s)")
+        results.append({"profile": spec, "backend": case["backend"], "runtime": runtime,
+                        "concurrency": args.concurrency, "items_per_sec": case["concurrent_items_per_sec"]})
+        print(f"{'':<22} {args.concurrency} concurrent threads: {case['concurrent_items_per_sec']} img/s")
+
+    write_results(args.output, "runtime_profiles", results)
+
+
+if __name__ == "__main__":
+    main()
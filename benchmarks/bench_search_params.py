@@ -0,0 +1,115 @@
+"""
+Measure the recall/latency trade-off of HNSW build and search parameters against QDRANT_URL
+
+For each --m/--ef-construct pair a temporary collection is built (and deleted afterwards)
+and searched with every --ef value and with exact=True. Recall@k is measured against
+exact float32 search in NumPy, so the numbers show what a given ef costs and loses:
+use them to choose QDRANT_SEARCH_HNSW_EF, QDRANT_RECOMMENDATIONS_HNSW_EF and the
+QDRANT_HNSW_* build settings.
+
+Vectors are chosen as in bench_quantization (--qdrant-sample, --vectors or synthetic).
+
+Usage:
+    python -m benchmarks.bench_search_params --ef 16,32,64,128
+    python -m benchmarks.bench_search_params --qdrant-sample 20000 --m 16,32 --ef-construct 100,200
+"""
+import argparse
+import asyncio
+import time
+import uuid
+from typing import List
+
+import numpy as np
+
+from benchmarks.bench_quantization import exact_top_k, load_vectors, normalize, recall
+from benchmarks.common import summarize_latencies, write_results
+
+
+async def build_collection(client, base: np.ndarray, m: int, ef_construct: int) -> str:
+    from qdrant_client.http import models
+
+    name = f"bench_hnsw_m{m}_ef{ef_construct}_{uuid.uuid4().hex[:8]}"
+    await client.create_collection(
+        name,
+        vectors_config=models.VectorParams(size=base.shape[1], distance=models.Distance.COSINE),
+        hnsw_config=models.HnswConfigDiff(m=m, ef_construct=ef_construct),
+        # Index even a small sample so searches go through the graph
+        optimizers_config=models.OptimizersConfigDiff(indexing_threshold=1000)
+    )
+    started = time.perf_counter()
+    for start in range(0, len(base), 256):
+        batch = base[start:start + 256]
+        await client.upsert(name, points=models.Batch(ids=list(range(start, start + len(batch))), vectors=batch.tolist()),
+                            wait=start + 256 >= len(base))
+    while (await client.get_collection(name)).status != models.CollectionStatus.GREEN:
+        await asyncio.sleep(1)
+    print(f"🏗️ m={m} ef_construct={ef_construct}: uploaded and indexed in {time.perf_counter() - started:.1f}s")
+    return name
+
+
+async def run(base: np.ndarray, queries: np.ndarray, k: int, ms: List[int], ef_constructs: List[int],
+              efs: List[int]) -> List[dict]:
+    from qdrant_client import AsyncQdrantClient
+    from qdrant_client.http import models
+    from app.config import config
+
+    client = AsyncQdrantClient(url=config.QDRANT_URL, api_key=config.QDRANT_API_KEY, timeout=60,
+                               prefer_grpc=config.QDRANT_TRANSPORT == "grpc", grpc_port=config.QDRANT_GRPC_PORT)
+    truth = exact_top_k(normalize(base), normalize(queries), k)
+    results = []
+    try:
+        for m in ms:
+            for ef_construct in ef_constructs:
+                name = await build_collection(client, base, m, ef_construct)
+                try:
+                    settings = [(ef, False) for ef in efs] + [(None, True)]
+                    for ef, exact in settings:
+                        params = models.SearchParams(hnsw_ef=ef, exact=exact)
+                        for query in queries[:5].tolist():
+                            await client.search(name, query_vector=query, limit=k, search_params=params)
+                        found, samples = [], []
+                        for query in queries.tolist():
+                            started = time.perf_counter()
+                            hits = await client.search(name, query_vector=query, limit=k, search_params=params)
+                            samples.append(time.perf_counter() - started)
+                            found.append([hit.id for hit in hits] + [-1] * (k - len(hits)))
+                        result = {"m": m, "ef_construct": ef_construct, "ef": ef, "exact": exact,
+                                  f"recall@{k}": round(recall(np.asarray(found), truth), 4), **summarize_latencies(samples)}
+                        label = "exact" if exact else f"ef={ef}"
+                        print(f"   {label:<9} recall@{k}={result[f'recall@{k}']:.3f} "
+                              f"p50={result['p50_ms']:7.2f}ms p99={result['p99_ms']:7.2f}ms")
+                        results.append(result)
+                finally:
+                    await client.delete_collection(name)
+    finally:
+        await client.close()
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Recall and latency of HNSW build and search parameters")
+    parser.add_argument("--qdrant-sample", type=int, default=0, help="Use this many vectors from the catalog collection")
+    parser.add_argument("--vectors", help=".npy file of vectors to use instead")
+    parser.add_argument("--points", type=int, default=10000, help="Synthetic catalog size")
+    parser.add_argument("--vector-size", type=int, default=2048)
+    parser.add_argument("--clusters", type=int, default=200)
+    parser.add_argument("--queries", type=int, default=200, help="Vectors held out as queries")
+    parser.add_argument("--top-k", type=int, default=10)
+    parser.add_argument("--m", default="16", help="Comma-separated HNSW m values")
+    parser.add_argument("--ef-construct", default="100", help="Comma-separated HNSW ef_construct values")
+    parser.add_argument("--ef", default="16,32,64,128", help="Comma-separated search ef values")
+    parser.add_argument("--output", default="bench_search_params.json")
+    args = parser.parse_args()
+
+    base, queries = load_vectors(args)
+    results = asyncio.run(run(
+        base, queries, args.top_k,
+        [int(value) for value in args.m.split(",")],
+        [int(value) for value in args.ef_construct.split(",")],
+        [int(value) for value in args.ef.split(",")]
+    ))
+    write_results(args.output, "search_params", results)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,44 @@
+"""
+Compare the compiled serving function against Keras model.predict
+
+Usage:
+    python -m benchmarks.bench_serving_function --repeats 50 --batch-sizes 1,8
+"""
+import argparse
+
+import numpy as np
+
+from benchmarks.common import summarize_latencies, time_calls, write_results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark compiled inference against model.predict")
+    parser.add_argument("--repeats", type=int, default=50)
+    parser.add_argument("--batch-sizes", default="1,8")
+    parser.add_argument("--output", default="bench_serving_function.json")
+    args = parser.parse_args()
+
+    from app.services.inference_backends import KerasBackend
+    from app.config import config
+
+    backend = KerasBackend(compiled=True)
+
+    results = []
+    for batch_size in [int(size) for size in args.batch_sizes.split(",")]:
+        pixels = np.random.randint(0, 256, (batch_size, 224, 224, 3), dtype=np.uint8)
+
+        # Both paths must produce the same vectors
+        max_diff = float(np.abs(backend.predict_keras(pixels) - backend.predict_compiled(pixels)).max())
+
+        for path, func in (("predict", backend.predict_keras), ("compiled", backend.predict_compiled)):
+            stats = summarize_latencies(time_calls(lambda: func(pixels), args.repeats), items_per_call=batch_size)
+            results.append({"path": path, "batch_size": batch_size, "xla": config.INFERENCE_XLA, **stats})
+            print(f"{path:>9} batch={batch_size:<3} p50={stats['p50_ms']:.2f}ms p99={stats['p99_ms']:.2f}ms "
+                  f"({stats['items_per_sec']} img/s)")
+        print(f"          max |predict - compiled| = {max_diff:.2e}")
+
+    write_results(args.output, "serving_function", results)
+
+
+if __name__ == "__main__":
+    main()
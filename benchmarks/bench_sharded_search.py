@@ -0,0 +1,84 @@
+"""
+Measure exact search throughput of ShardedSearchEngine across worker counts and query batch sizes
+
+The catalog matrix is written once to shared memory; every worker count searches the same
+block. Results are checked against a single-process search, so every setting returns the
+exact top k and only latency and queries/s differ. Use the numbers to choose
+NUMPY_SEARCH_WORKERS and NUMPY_SEARCH_MIN_SHARD_ROWS.
+
+Vectors are chosen as in bench_quantization (--qdrant-sample, --vectors or synthetic).
+Run with OPENBLAS_NUM_THREADS=1 so only the worker processes add parallelism.
+
+Usage:
+    OPENBLAS_NUM_THREADS=1 python -m benchmarks.bench_sharded_search --workers 1,2,4 --batch 1,8,32
+    OPENBLAS_NUM_THREADS=1 python -m benchmarks.bench_sharded_search --points 300000 --vector-size 2048
+"""
+import argparse
+import os
+from typing import List
+
+import numpy as np
+
+from benchmarks.bench_quantization import load_vectors, normalize
+from benchmarks.common import summarize_latencies, time_calls, write_results
+
+
+def run(base: np.ndarray, queries: np.ndarray, k: int, workers: List[int], batches: List[int],
+        repeats: int) -> List[dict]:
+    from app.services.sharded_search import ShardedSearchEngine, SharedMatrix, top_k
+
+    matrix = SharedMatrix(len(base), base.shape[1])
+    matrix.array[:] = normalize(base)
+    expected = top_k(normalize(queries) @ matrix.array.T, k)[0]
+    print(f"🧮 {len(base)} x {base.shape[1]} matrix ({matrix.array.nbytes / 1024 ** 2:.0f} MB shared), "
+          f"BLAS threads {os.getenv('OPENBLAS_NUM_THREADS', 'default')}")
+    results = []
+    try:
+        for count in workers:
+            # min_shard_rows=1: shard even when it does not pay off, to show the cost
+            engine = ShardedSearchEngine(count, min_shard_rows=1)
+            engine.start()
+            try:
+                found = engine.search(matrix, len(base), queries, k)
+                assert [[row for row, _ in hits] for hits in found] == expected.tolist(), "sharded results differ"
+                for batch_size in batches:
+                    batch = queries[:batch_size]
+                    samples = time_calls(lambda: engine.search(matrix, len(base), batch, k), repeats)
+                    result = {"workers": count, "batch": len(batch), **summarize_latencies(samples, len(batch))}
+                    print(f"   workers={count:<3} batch={len(batch):<4} p50={result['p50_ms']:8.2f}ms "
+                          f"queries/s={result['items_per_sec']:9.1f}")
+                    results.append(result)
+            finally:
+                engine.close()
+    finally:
+        matrix.release()
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Exact search throughput across worker processes and batch sizes")
+    parser.add_argument("--qdrant-sample", type=int, default=0, help="Use this many vectors from the catalog collection")
+    parser.add_argument("--vectors", help=".npy file of vectors to use instead")
+    parser.add_argument("--points", type=int, default=100000, help="Synthetic catalog size")
+    parser.add_argument("--vector-size", type=int, default=2048)
+    parser.add_argument("--clusters", type=int, default=200)
+    parser.add_argument("--queries", type=int, default=64, help="Vectors held out as queries")
+    parser.add_argument("--top-k", type=int, default=10)
+    parser.add_argument("--workers", default=f"1,{os.cpu_count() or 1}", help="Comma-separated worker counts")
+    parser.add_argument("--batch", default="1,8,32", help="Comma-separated queries per search")
+    parser.add_argument("--repeats", type=int, default=20)
+    parser.add_argument("--output", default="bench_sharded_search.json")
+    args = parser.parse_args()
+
+    base, queries = load_vectors(args)
+    results = run(
+        base, queries, args.top_k,
+        sorted({int(value) for value in args.workers.split(",")}),
+        [int(value) for value in args.batch.split(",")],
+        args.repeats
+    )
+    write_results(args.output, "sharded_search", results)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,228 @@
+"""
+Offline benchmark suite for the embedding pipeline
+
+Measures ImageEmbeddingService directly (no server, no Qdrant) stage by stage:
+
+    decode        decode_image() of one image, per image size and format
+    decode_batch  decode_images() of a batch, per batch size and DECODE_WORKERS
+    preprocess    model preprocessing of a decoded batch, per batch size
+    inference     embed_pixels() of a decoded batch, per backend, thread setting and batch size
+    end_to_end    generate_embeddings_batch() from encoded bytes, same matrix as inference
+
+Images are synthetic product-like pictures plus test_image.png when present.
+Every setting runs in a fresh subprocess, because TensorFlow thread pools and the
+decode pool are fixed once created. The embedding cache is disabled so every call
+does the full work. Results are written as JSON with the commit they ran on; pass
+--compare with an earlier results file to print the p50 change per measurement.
+
+Usage:
+    python -m benchmarks.bench_suite
+    python -m benchmarks.bench_suite --backends keras,savedmodel,tflite_int8 --threads default,1,2:1
+    python -m benchmarks.bench_suite --stages decode --decode-workers 1,4 --compare bench_suite_main.json
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+from typing import Dict, List
+
+import numpy as np
+
+from benchmarks.common import make_synthetic_image, summarize_latencies, time_calls, write_results
+
+SIZES = {
+    "vga_640x480": (640, 480),
+    "fullhd_1920x1080": (1920, 1080),
+    "phone_12mp_4032x3024": (4032, 3024),
+}
+FORMATS = ("JPEG", "PNG", "WEBP")
+# Batches are built from distinct Full HD JPEGs, the most common upload
+BATCH_IMAGE = ("fullhd_1920x1080", "JPEG")
+
+
+def write_images(directory: str, sizes: List[str], formats: List[str], max_batch: int) -> Dict[str, str]:
+    """Write the benchmark images once so every subprocess reads identical bytes"""
+    paths = {}
+    for size_name in sizes:
+        for fmt in formats:
+            path = os.path.join(directory, f"{size_name}.{fmt.lower()}")
+            with open(path, "wb") as f:
+                f.write(make_synthetic_image(seed=7, size=SIZES[size_name], fmt=fmt))
+            paths[f"{size_name}/{fmt}"] = path
+    if os.path.exists("test_image.png"):
+        paths["test_image.png"] = os.path.abspath("test_image.png")
+
+    size, fmt = BATCH_IMAGE
+    for seed in range(max_batch):
+        path = os.path.join(directory, f"batch_{seed}.jpg")
+        with open(path, "wb") as f:
+            f.write(make_synthetic_image(seed=seed, size=SIZES[size], fmt=fmt))
+    return paths
+
+
+def read(path: str) -> bytes:
+    with open(path, "rb") as f:
+        return f.read()
+
+
+def run_decode_case(image_dir: str, batch_sizes: List[int], repeats: int) -> List[dict]:
+    """Decode and preprocess measurements under the current DECODE_WORKERS"""
+    from app.config import config
+    from app.services.embedding_service import ImageEmbeddingService
+
+    service = ImageEmbeddingService(model_server_socket="")
+    with open(os.path.join(image_dir, "images.json")) as f:
+        paths = json.load(f)
+
+    results = []
+    for name, path in paths.items():
+        image_bytes = read(path)
+        samples = time_calls(lambda: service.decode_image(image_bytes), repeats, warmup=1)
+        results.append({"stage": "decode", "image": name, "file_kb": round(len(image_bytes) / 1024, 1),
+                        **summarize_latencies(samples)})
+
+    batch = [read(os.path.join(image_dir, f"batch_{i}.jpg")) for i in range(max(batch_sizes))]
+    for batch_size in batch_sizes:
+        images = batch[:batch_size]
+        buffer = np.empty((batch_size, 224, 224, 3), dtype=np.uint8)
+        samples = time_calls(lambda: service.decode_images(images, out=buffer), repeats, warmup=1)
+        results.append({"stage": "decode_batch", "decode_workers": config.DECODE_WORKERS,
+                        "batch_size": batch_size, **summarize_latencies(samples, items_per_call=batch_size)})
+
+        pixels = service.decode_images(images)
+        samples = time_calls(lambda: service.model_spec.preprocess_numpy(pixels), repeats, warmup=1)
+        results.append({"stage": "preprocess", "model": service.model_spec.key,
+                        "batch_size": batch_size, **summarize_latencies(samples, items_per_call=batch_size)})
+    return results
+
+
+def run_inference_case(image_dir: str, backend: str, batch_sizes: List[int], repeats: int) -> List[dict]:
+    """Inference and end-to-end measurements for one backend under the current thread settings"""
+    from app.services.embedding_service import ImageEmbeddingService
+    from app.services.runtime_profile import get_runtime_settings
+
+    service = ImageEmbeddingService(model_server_socket="", backend=backend)
+    service.load_model()
+    runtime = get_runtime_settings()
+    common = {"backend": backend, "model_id": service.model_id,
+              "intra_op_threads": runtime["intra_op_threads"], "inter_op_threads": runtime["inter_op_threads"]}
+
+    results = [{"stage": "startup", **common, **service.startup_timings}]
+    batch = [read(os.path.join(image_dir, f"batch_{i}.jpg")) for i in range(max(batch_sizes))]
+    for batch_size in batch_sizes:
+        images = batch[:batch_size]
+        pixels = service.decode_images(images)
+        samples = time_calls(lambda: service.embed_pixels(pixels), repeats, warmup=1)
+        results.append({"stage": "inference", **common, "batch_size": batch_size,
+                        **summarize_latencies(samples, items_per_call=batch_size)})
+
+        samples = time_calls(lambda: service.generate_embeddings_batch(images), repeats, warmup=1)
+        results.append({"stage": "end_to_end", **common, "batch_size": batch_size,
+                        **summarize_latencies(samples, items_per_call=batch_size)})
+    return results
+
+
+def run_subprocess(args: List[str], env: Dict[str, str]) -> List[dict]:
+    output = subprocess.run(
+        [sys.executable, "-m", "benchmarks.bench_suite", *args],
+        capture_output=True, text=True, check=True, env={**os.environ, **env}
+    ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def result_key(result: dict) -> str:
+    """Identify a measurement independently of its numbers, for --compare"""
+    fields = ("stage", "image", "model", "backend", "intra_op_threads", "inter_op_threads", "decode_workers", "batch_size")
+    return " ".join(f"{field}={result[field]}" for field in fields if field in result)
+
+
+def compare(previous_path: str, results: List[dict]):
+    """Print the p50 change of every measurement also present in an earlier results file"""
+    with open(previous_path) as f:
+        previous = json.load(f)
+    before = {result_key(result): result for result in previous["results"] if "p50_ms" in result}
+    print(f"\n📊 p50 compared with {previous_path} (commit {previous['environment'].get('commit')})")
+    for result in results:
+        key = result_key(result)
+        if "p50_ms" in result and key in before:
+            old, new = before[key]["p50_ms"], result["p50_ms"]
+            print(f"   {key:<80} {old:9.2f}ms -> {new:9.2f}ms ({(new - old) / old * 100:+6.1f}%)")
+
+
+def print_result(result: dict):
+    if "p50_ms" not in result:
+        return
+    print(f"   {result_key(result):<80} p50={result['p50_ms']:9.2f}ms p99={result['p99_ms']:9.2f}ms "
+          f"({result['items_per_sec']}/s)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Offline benchmark suite for decode, preprocess and inference")
+    parser.add_argument("--stages", default="decode,inference",
+                        help="'decode' (decode, decode_batch, preprocess) and/or 'inference' (inference, end_to_end)")
+    parser.add_argument("--sizes", default=",".join(SIZES))
+    parser.add_argument("--formats", default=",".join(FORMATS))
+    parser.add_argument("--batch-sizes", default="1,8")
+    parser.add_argument("--backends", default="keras", help="Comma-separated INFERENCE_BACKEND values")
+    parser.add_argument("--threads", default="default",
+                        help="Comma-separated INTRA[:INTER] TensorFlow thread counts; 'default' keeps the profile's")
+    parser.add_argument("--decode-workers", default="", help="Comma-separated DECODE_WORKERS values (default: config)")
+    parser.add_argument("--repeats", type=int, default=10)
+    parser.add_argument("--output", default="bench_suite.json")
+    parser.add_argument("--compare", help="Earlier results file to compare against")
+    parser.add_argument("--case", choices=("decode", "inference"), help=argparse.SUPPRESS)
+    parser.add_argument("--image-dir", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    batch_sizes = [int(size) for size in args.batch_sizes.split(",")]
+    # Repeated images must not be answered from the embedding cache
+    os.environ["EMBEDDING_CACHE_ENABLED"] = "false"
+
+    if args.case == "decode":
+        print(json.dumps(run_decode_case(args.image_dir, batch_sizes, args.repeats)))
+        return
+    if args.case == "inference":
+        print(json.dumps(run_inference_case(args.image_dir, args.backends, batch_sizes, args.repeats)))
+        return
+
+    stages = args.stages.split(",")
+    case_args = ["--batch-sizes", args.batch_sizes, "--repeats", str(args.repeats)]
+    results = []
+    with tempfile.TemporaryDirectory() as tmp:
+        paths = write_images(tmp, args.sizes.split(","), args.formats.split(","), max(batch_sizes))
+        with open(os.path.join(tmp, "images.json"), "w") as f:
+            json.dump(paths, f)
+
+        if "decode" in stages:
+            for workers in [w for w in args.decode_workers.split(",") if w] or [None]:
+                env = {"DECODE_WORKERS": workers} if workers else {}
+                print(f"🖼️ Decode and preprocess (DECODE_WORKERS={workers or 'config'})")
+                for result in run_subprocess(["--case", "decode", "--image-dir", tmp, *case_args], env):
+                    print_result(result)
+                    results.append(result)
+
+        if "inference" in stages:
+            for backend in args.backends.split(","):
+                for threads in args.threads.split(","):
+                    env = {}
+                    if threads != "default":
+                        intra, _, inter = threads.partition(":")
+                        env["TF_INTRA_OP_THREADS"] = intra
+                        if inter:
+                            env["TF_INTER_OP_THREADS"] = inter
+                    print(f"🧠 Inference with {backend} (threads {threads})")
+                    for result in run_subprocess(
+                        ["--case", "inference", "--image-dir", tmp, "--backends", backend, *case_args], env
+                    ):
+                        print_result(result)
+                        results.append(result)
+
+    write_results(args.output, "suite", results)
+    if args.compare:
+        compare(args.compare, results)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,113 @@
+"""
+Shared helpers for the offline benchmarks
+"""
+import json
+import platform
+import subprocess
+import time
+from datetime import datetime
+from typing import Any, Callable, Dict, List
+
+import numpy as np
+
+
+def time_calls(func: Callable, repeats: int, warmup: int = 2) -> List[float]:
+    """Call func repeatedly and return per-call latencies in seconds"""
+    for _ in range(warmup):
+        func()
+    samples = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        func()
+        samples.append(time.perf_counter() - start)
+    return samples
+
+
+def summarize_latencies(samples: List[float], items_per_call: int = 1) -> Dict[str, float]:
+    """Turn raw latencies into p50/p90/p99 milliseconds and throughput"""
+    latencies = np.asarray(samples, dtype=np.float64) * 1000
+    return {
+        "calls": len(samples),
+        "mean_ms": round(float(latencies.mean()), 3),
+        "p50_ms": round(float(np.percentile(latencies, 50)), 3),
+        "p90_ms": round(float(np.percentile(latencies, 90)), 3),
+        "p99_ms": round(float(np.percentile(latencies, 99)), 3),
+        "min_ms": round(float(latencies.min()), 3),
+        "items_per_sec": round(items_per_call * len(samples) / (latencies.sum() / 1000), 2)
+    }
+
+
+def peak_rss_mb() -> float:
+    """
+    Peak resident memory of this process in MB
+
+    Reads VmHWM from /proc on Linux, because ru_maxrss is inherited across exec
+    and would report the parent's peak in freshly spawned benchmark processes.
+    """
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    import resource
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def environment_info() -> Dict[str, Any]:
+    """Describe the machine and commit the benchmark ran on"""
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except Exception:
+        commit = None
+    return {
+        "timestamp": datetime.now().isoformat(),
+        "commit": commit,
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "processor": platform.processor()
+    }
+
+
+def write_results(path: str, benchmark: str, results: Any):
+    """Write results as JSON together with environment information"""
+    with open(path, "w") as f:
+        json.dump({"benchmark": benchmark, "environment": environment_info(), "results": results}, f, indent=2)
+    print(f"📄 Results written to {path}")
+
+
+def make_synthetic_image(seed: int, size=(640, 480), fmt: str = "JPEG") -> bytes:
+    """
+    Create a reproducible product-like test image (shapes on a plain background)
+
+    Args:
+        seed: Random seed, so the same seed always gives the same image
+        size: (width, height) in pixels
+        fmt: PIL format name such as JPEG, PNG or WEBP
+
+    Returns:
+        Encoded image bytes
+    """
+    import io
+    from PIL import Image, ImageDraw
+
+    rng = np.random.default_rng(seed)
+    width, height = size
+    background = tuple(int(c) for c in rng.integers(150, 256, 3))
+    img = Image.new("RGB", size, color=background)
+    draw = ImageDraw.Draw(img)
+    for _ in range(int(rng.integers(3, 8))):
+        x0, y0 = int(rng.integers(0, width // 2)), int(rng.integers(0, height // 2))
+        x1, y1 = int(rng.integers(x0 + 10, width)), int(rng.integers(y0 + 10, height))
+        color = tuple(int(c) for c in rng.integers(0, 256, 3))
+        if rng.random() < 0.5:
+            draw.ellipse([x0, y0, x1, y1], fill=color)
+        else:
+            draw.rectangle([x0, y0, x1, y1], fill=color)
+
+    img_bytes = io.BytesIO()
+    img.save(img_bytes, format=fmt)
+    return img_bytes.getvalue()
@@ -40,6 +40,29 @@ export const uploadAndStoreImage = async (file, price, productName) => {
   return response.json();
 };
 
+// Upload several products in one request (Firebase + one embedding pass + batch Qdrant upsert)
+// products: [{ file, price, productName }]; the response has one result per product, in order
+export const uploadAndStoreBatch = async (products) => {
+  const formData = new FormData();
+  products.forEach(({ file, price, productName }) => {
+    formData.append('files', file);
+    formData.append('prices', price);
+    formData.append('product_names', productName);
+  });
+
+  const response = await fetch(`${API_URL}/api/v1/vectors/upload-and-store-batch`, {
+    method: 'POST',
+    body: formData,
+  });
+  
+  if (!response.ok) {
+    const errorText = await response.text();
+    throw new Error(`Batch upload failed: ${response.status} - ${errorText}`);
+  }
+  
+  return response.json();
+};
+
 // Search for similar images
 export const searchSimilarImages = async (file, limit = 5, threshold = 0.7, userId = null) => {
   const formData = new FormData();
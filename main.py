@@ -1,9 +1,12 @@
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
-from fastapi.responses import FileResponse
+from fastapi.responses import FileResponse, JSONResponse
 from app.routers import image_router, vector_router, config_router
+from app.services.embedding_service import embedding_service
+from app.services.vector_service import vector_service
 from app.services.firebase_service import configure_firebase
+from app.services.runtime_profile import apply_runtime_profile
 from app.config import config
 import logging
 import os
@@ -12,6 +15,10 @@ import os
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Pin CPUs and export the oneDNN setting for the whole process before the model loads on
+# an inference thread (affinity set from that thread would only cover that thread)
+apply_runtime_profile()
+
 app = FastAPI(
     title="Fashion FYP API",
     description="Backend API for Fashion Final Year Project - Image Embeddings & Vector Database",
@@ -52,6 +59,28 @@ app.include_router(image_router.router)
 app.include_router(vector_router.router)
 app.include_router(config_router.router)
 
+@app.on_event("startup")
+async def load_embedding_model():
+    """Load the embedding model according to MODEL_LOAD_MODE without delaying lightweight routes"""
+    # Forked search workers must exist before any thread starts loading TensorFlow
+    vector_service.start_search_workers()
+    if config.MODEL_LOAD_MODE == "background":
+        embedding_service.start_background_load()
+    elif config.MODEL_LOAD_MODE == "eager":
+        await embedding_service.run_in_inference_executor(embedding_service.load_model)
+    # "lazy": the first embedding request loads the model
+
+@app.get("/ready")
+async def readiness():
+    """Readiness probe: model and vector store readiness reported separately (503 until both are ready)"""
+    model_status = embedding_service.get_readiness()
+    qdrant_status = await vector_service.check_readiness()
+    ready = model_status["ready"] and qdrant_status["ready"]
+    return JSONResponse(
+        status_code=200 if ready else 503,
+        content={"ready": ready, "model": model_status, "qdrant": qdrant_status}
+    )
+
 # Mount static files (conditional for serverless)
 if not os.getenv("VERCEL"):
     # Local development - mount static files
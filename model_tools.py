@@ -0,0 +1,368 @@
+#!/usr/bin/env python3
+"""
+Model maintenance tools for the embedding service
+
+    python model_tools.py export-artifact --output models/resnet50_savedmodel
+    python model_tools.py verify-artifact models/resnet50_savedmodel
+    python model_tools.py export-tflite --output models/resnet50_int8.tflite --calibration-dir catalog/
+    python model_tools.py export-artifact --model mobilenet_v3_large
+    python model_tools.py distill --qdrant-sample 5000 --images catalog/ --epochs 10
+    python model_tools.py drift --reference keras --candidate tflite_int8 --images catalog/ --qdrant-sample 200
+"""
+import argparse
+import json
+import os
+from typing import Dict, List, Tuple
+
+import numpy as np
+
+from app.config import config
+from app.services.image_preprocessing import decode_images
+from app.services.model_registry import MODELS, get_model_spec
+
+IMAGE_EXTENSIONS = (".jpg", ".jpeg", ".png", ".gif", ".webp")
+
+
+def load_image_dir(directory: str, limit: int) -> List[Tuple[str, bytes]]:
+    """Read up to `limit` images from a directory"""
+    images = []
+    for name in sorted(os.listdir(directory)):
+        if name.lower().endswith(IMAGE_EXTENSIONS):
+            with open(os.path.join(directory, name), "rb") as f:
+                images.append((name, f.read()))
+        if len(images) >= limit:
+            break
+    return images
+
+
+def collect_images(images_dir: str, synthetic: int, limit: int) -> List[Tuple[str, bytes]]:
+    """Gather evaluation images from a directory, test_image.png and synthetic images"""
+    from benchmarks.common import make_synthetic_image
+
+    images = load_image_dir(images_dir, limit) if images_dir else []
+    if os.path.exists("test_image.png"):
+        with open("test_image.png", "rb") as f:
+            images.append(("test_image.png", f.read()))
+    images += [(f"synthetic_{seed}.jpg", make_synthetic_image(seed)) for seed in range(synthetic)]
+    return images
+
+
+def embed_all(backend, pixels: np.ndarray, batch_size: int = 16) -> np.ndarray:
+    """Run a backend over all pixels in chunks"""
+    return np.concatenate([backend.predict(pixels[i:i + batch_size]) for i in range(0, len(pixels), batch_size)])
+
+
+def normalize(vectors: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    return vectors / np.maximum(norms, 1e-12)
+
+
+def drift_report(reference: np.ndarray, candidate: np.ndarray, top_k: int) -> Dict[str, float]:
+    """
+    Compare candidate embeddings with reference embeddings of the same images
+
+    Cosine agreement measures how close each candidate vector is to its reference.
+    Top-k overlap searches the reference vectors (what Qdrant stores) with both the
+    reference and the candidate query, and compares the two result lists.
+    """
+    ref, cand = normalize(reference), normalize(candidate)
+    cosine = np.sum(ref * cand, axis=1)
+    rel_l2 = np.linalg.norm(reference - candidate, axis=1) / np.maximum(np.linalg.norm(reference, axis=1), 1e-12)
+
+    k = min(top_k, len(ref))
+    ref_scores = ref @ ref.T
+    cand_scores = cand @ ref.T
+    ref_top = np.argsort(-ref_scores, axis=1)[:, :k]
+    cand_top = np.argsort(-cand_scores, axis=1)[:, :k]
+    overlap = [len(set(a) & set(b)) / k for a, b in zip(ref_top, cand_top)]
+    self_match = np.mean(np.argmax(cand_scores, axis=1) == np.arange(len(ref)))
+
+    return {
+        "images": int(len(ref)),
+        "cosine_mean": round(float(cosine.mean()), 6),
+        "cosine_min": round(float(cosine.min()), 6),
+        "cosine_p05": round(float(np.percentile(cosine, 5)), 6),
+        "relative_l2_mean": round(float(rel_l2.mean()), 6),
+        "relative_l2_max": round(float(rel_l2.max()), 6),
+        f"top{k}_overlap_mean": round(float(np.mean(overlap)), 4),
+        "self_match_rate": round(float(self_match), 4)
+    }
+
+
+def fetch_qdrant_sample(sample: int) -> Tuple[List[bytes], np.ndarray]:
+    """Download catalog images and their stored vectors from the active model's collection"""
+    import requests
+    from qdrant_client import QdrantClient
+
+    client = QdrantClient(url=config.QDRANT_URL, api_key=config.QDRANT_API_KEY, timeout=30)
+    points, _ = client.scroll(
+        collection_name=get_model_spec().collection_name(),
+        limit=sample,
+        with_payload=True,
+        with_vectors=True
+    )
+
+    images, vectors = [], []
+    for point in points:
+        url = (point.payload or {}).get("firebase_url")
+        if not url or not point.vector:
+            continue
+        try:
+            response = requests.get(url, timeout=30)
+            response.raise_for_status()
+        except Exception as e:
+            print(f"⚠️ Skipping {point.id}: {str(e)}")
+            continue
+        images.append(response.content)
+        vectors.append(point.vector)
+    return images, np.asarray(vectors, dtype=np.float32)
+
+
+def collection_topk_overlap(reference: np.ndarray, candidate: np.ndarray, top_k: int) -> Dict[str, float]:
+    """
+    Search the active model's Qdrant collection with reference and candidate vectors
+    and compare the returned point IDs
+    """
+    from qdrant_client import QdrantClient
+
+    client = QdrantClient(url=config.QDRANT_URL, api_key=config.QDRANT_API_KEY, timeout=30)
+    collection = get_model_spec().collection_name()
+    overlaps = []
+    for ref, cand in zip(reference, candidate):
+        ref_ids = {hit.id for hit in client.search(collection_name=collection, query_vector=ref.tolist(), limit=top_k)}
+        cand_ids = {hit.id for hit in client.search(collection_name=collection, query_vector=cand.tolist(), limit=top_k)}
+        overlaps.append(len(ref_ids & cand_ids) / max(len(ref_ids), 1))
+    return {
+        "collection": collection,
+        "queries": len(overlaps),
+        f"top{top_k}_overlap_mean": round(float(np.mean(overlaps)), 4),
+        f"top{top_k}_overlap_p05": round(float(np.percentile(overlaps, 5)), 4)
+    }
+
+
+def cmd_export_artifact(args):
+    from app.services.model_artifacts import export_artifact
+
+    output = args.output or get_model_spec(args.model).artifact_dir()
+    manifest = export_artifact(output, weights=args.weights, model_key=args.model)
+    print(f"✅ Exported {output} ({len(manifest['files'])} files, checksum {manifest['checksum'][:12]})")
+
+
+def cmd_verify_artifact(args):
+    from app.services.model_artifacts import ModelArtifactError, verify_artifact
+
+    artifact_dir = args.artifact_dir or get_model_spec().artifact_dir()
+    try:
+        manifest = verify_artifact(artifact_dir)
+    except ModelArtifactError as e:
+        print(f"❌ {str(e)}")
+        raise SystemExit(1)
+    print(f"✅ {artifact_dir} verified ({manifest['model_name']}, checksum {manifest['checksum'][:12]})")
+
+
+def cmd_export_tflite(args):
+    from app.services.inference_backends import TFLiteInt8Backend
+
+    representative = None
+    if args.calibration_dir:
+        calibration = load_image_dir(args.calibration_dir, args.calibration_images)
+        representative = decode_images([data for _, data in calibration])
+        print(f"📏 Calibrating int8 activations on {len(representative)} images")
+    else:
+        print("📏 No calibration images given, using dynamic-range (weights-only) int8 quantization")
+
+    output = args.output or get_model_spec(args.model).tflite_path()
+    TFLiteInt8Backend.export(output, representative, model_key=args.model)
+    print(f"✅ Exported {output} ({os.path.getsize(output) / 1e6:.1f} MB)")
+
+
+def cmd_drift(args):
+    from app.services.inference_backends import create_backend
+
+    images = collect_images(args.images, args.synthetic, args.limit)
+    pixels = decode_images([data for _, data in images])
+    print(f"🖼️ Comparing {args.reference} and {args.candidate} on {len(pixels)} images")
+
+    reference_backend = create_backend(args.reference)
+    candidate_backend = create_backend(args.candidate)
+    candidate = embed_all(candidate_backend, pixels)
+
+    report = {
+        "reference": args.reference,
+        "candidate": args.candidate,
+        "images": drift_report(embed_all(reference_backend, pixels), candidate, args.top_k)
+    }
+
+    if args.qdrant_sample:
+        stored_images, stored_vectors = fetch_qdrant_sample(args.qdrant_sample)
+        if len(stored_images):
+            stored_pixels = decode_images(stored_images)
+            report["stored_vectors"] = drift_report(stored_vectors, embed_all(candidate_backend, stored_pixels), args.top_k)
+
+    print(json.dumps(report, indent=2))
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"📄 Report written to {args.output}")
+
+    worst = min(section["cosine_min"] for key, section in report.items() if isinstance(section, dict))
+    if worst < args.min_cosine:
+        print(f"❌ Minimum cosine agreement {worst} is below {args.min_cosine}; stored vectors may not stay compatible")
+        raise SystemExit(1)
+    print(f"✅ Minimum cosine agreement {worst} >= {args.min_cosine}")
+
+
+def cmd_distill(args):
+    from benchmarks.common import summarize_latencies, time_calls
+    from app.services.distillation import build_student, export_student, train_student
+    from app.services.inference_backends import KerasBackend, create_backend
+
+    teacher_spec = get_model_spec()
+    output = args.output or teacher_spec.student_artifact_dir()
+    images, targets = [], []
+
+    # Stored vectors are the exact targets: the student must match what Qdrant already holds
+    if args.qdrant_sample:
+        stored_images, stored_vectors = fetch_qdrant_sample(args.qdrant_sample)
+        images += stored_images
+        targets += list(stored_vectors)
+        print(f"📥 {len(stored_images)} catalog images with stored vectors from {teacher_spec.collection_name()}")
+
+    teacher = None
+    local = collect_images(args.images, args.synthetic, args.limit) if (args.images or args.synthetic) else []
+    if local:
+        teacher = create_backend(args.teacher)
+        local_bytes = [data for _, data in local]
+        images += local_bytes
+        targets += list(embed_all(teacher, decode_images(local_bytes)))
+        print(f"🧑‍🏫 {len(local)} local images embedded by the teacher ({teacher.model_id()})")
+
+    if len(images) < 2:
+        print("❌ Need at least two training images (use --qdrant-sample, --images or --synthetic)")
+        raise SystemExit(1)
+
+    pixels = decode_images(images)
+    targets = np.asarray(targets, dtype=np.float32)
+    order = np.random.default_rng(args.seed).permutation(len(pixels))
+    holdout_count = max(1, int(len(pixels) * args.holdout))
+    holdout, train = order[:holdout_count], order[holdout_count:]
+    print(f"🏋️ Training {args.backbone} student on {len(train)} images, evaluating on {len(holdout)}")
+
+    student = build_student(teacher_spec.embedding_size, backbone=args.backbone,
+                            weights=None if args.backbone_weights == "none" else args.backbone_weights)
+    history = train_student(
+        student, pixels[train], targets[train],
+        epochs=args.epochs, freeze_epochs=args.freeze_epochs, batch_size=args.batch_size,
+        learning_rate=args.learning_rate, validation=(pixels[holdout], targets[holdout])
+    )
+
+    serve = KerasBackend.build_serving_function(student, spec=get_model_spec(args.backbone))
+    student_vectors = np.concatenate([serve(pixels[holdout][i:i + 16]).numpy() for i in range(0, len(holdout), 16)])
+    report = {
+        "teacher": teacher_spec.key,
+        "student_backbone": args.backbone,
+        "student_parameters": int(student.count_params()),
+        "training": history,
+        "holdout": drift_report(targets[holdout], student_vectors, args.top_k)
+    }
+    if args.qdrant_sample and args.collection_queries:
+        # Held-out catalog images: their stored vector and the student's, searched against the whole collection
+        stored_holdout = holdout[holdout < len(targets) - len(local)][:args.collection_queries]
+        if len(stored_holdout):
+            stored_student = np.concatenate([serve(pixels[[i]]).numpy() for i in stored_holdout])
+            report["collection"] = collection_topk_overlap(targets[stored_holdout], stored_student, args.top_k)
+
+    single = pixels[:1]
+    report["latency_batch1"] = {"student": summarize_latencies(time_calls(lambda: serve(single).numpy(), 20))}
+    if teacher is not None:
+        report["latency_batch1"]["teacher"] = summarize_latencies(time_calls(lambda: teacher.predict(single), 20))
+        report["latency_batch1"]["speedup"] = round(
+            report["latency_batch1"]["teacher"]["p50_ms"] / report["latency_batch1"]["student"]["p50_ms"], 2
+        )
+
+    print(json.dumps(report, indent=2))
+    if args.report:
+        with open(args.report, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"📄 Report written to {args.report}")
+
+    cosine = report["holdout"]["cosine_mean"]
+    if cosine < args.min_cosine:
+        print(f"❌ Held-out cosine agreement {cosine} is below {args.min_cosine}; student not exported")
+        raise SystemExit(1)
+
+    summary = {key: value for key, value in report.items() if key in ("holdout", "collection", "latency_batch1")}
+    teacher_id = teacher.model_id() if teacher is not None else f"qdrant/{teacher_spec.collection_name()}"
+    manifest = export_student(student, output, args.backbone, teacher_model_id=teacher_id, evaluation=summary)
+    print(f"✅ Exported {output} (checksum {manifest['checksum'][:12]}); serve it with INFERENCE_BACKEND=student")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Embedding model maintenance tools")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    artifact = subparsers.add_parser("export-artifact", help="Export the model as a verified SavedModel artifact")
+    artifact.add_argument("--model", default=config.EMBEDDING_MODEL, choices=list(MODELS))
+    artifact.add_argument("--output", default=config.MODEL_ARTIFACT_DIR or None,
+                          help="Defaults to models/<model>_savedmodel")
+    artifact.add_argument("--weights", default="imagenet", help="'imagenet' or a local Keras weights file")
+    artifact.set_defaults(func=cmd_export_artifact)
+
+    verify = subparsers.add_parser("verify-artifact", help="Check an exported artifact against its checksums")
+    verify.add_argument("artifact_dir", nargs="?", default=config.MODEL_ARTIFACT_DIR or None)
+    verify.set_defaults(func=cmd_verify_artifact)
+
+    export = subparsers.add_parser("export-tflite", help="Export an int8-quantized TFLite embedding model")
+    export.add_argument("--model", default=config.EMBEDDING_MODEL, choices=list(MODELS))
+    export.add_argument("--output", default=config.TFLITE_MODEL_PATH or None,
+                        help="Defaults to models/<model>_int8.tflite")
+    export.add_argument("--calibration-dir", help="Directory of catalog images for full int8 calibration")
+    export.add_argument("--calibration-images", type=int, default=200)
+    export.set_defaults(func=cmd_export_tflite)
+
+    drift = subparsers.add_parser("drift", help="Measure embedding drift between two backends")
+    drift.add_argument("--reference", default="keras")
+    drift.add_argument("--candidate", default="tflite_int8")
+    drift.add_argument("--images", help="Directory of evaluation images")
+    drift.add_argument("--limit", type=int, default=200, help="Maximum images read from --images")
+    drift.add_argument("--synthetic", type=int, default=16, help="Number of synthetic images to add")
+    drift.add_argument("--qdrant-sample", type=int, default=0,
+                       help="Also compare against this many vectors stored in Qdrant")
+    drift.add_argument("--top-k", type=int, default=5)
+    drift.add_argument("--min-cosine", type=float, default=0.98,
+                       help="Fail if any image's cosine agreement is below this")
+    drift.add_argument("--output", help="Write the report as JSON")
+    drift.set_defaults(func=cmd_drift)
+
+    distill = subparsers.add_parser("distill", help="Distill a compact student that reproduces the stored embeddings")
+    distill.add_argument("--qdrant-sample", type=int, default=0,
+                         help="Train on this many catalog images and their stored vectors")
+    distill.add_argument("--images", help="Directory of extra training images, embedded by the teacher")
+    distill.add_argument("--limit", type=int, default=10000, help="Maximum images read from --images")
+    distill.add_argument("--synthetic", type=int, default=0, help="Number of synthetic images to add")
+    distill.add_argument("--teacher", default="auto", help="Backend that embeds local images")
+    distill.add_argument("--backbone", default="mobilenet_v3_large",
+                         choices=[key for key, spec in MODELS.items() if spec.preprocessing == "raw"])
+    distill.add_argument("--backbone-weights", default="imagenet", help="'imagenet', 'none' or a weights file")
+    distill.add_argument("--epochs", type=int, default=10)
+    distill.add_argument("--freeze-epochs", type=int, default=2, help="Epochs training only the projection")
+    distill.add_argument("--batch-size", type=int, default=32)
+    distill.add_argument("--learning-rate", type=float, default=1e-3)
+    distill.add_argument("--holdout", type=float, default=0.1, help="Fraction of images held out for evaluation")
+    distill.add_argument("--seed", type=int, default=0)
+    distill.add_argument("--top-k", type=int, default=10)
+    distill.add_argument("--collection-queries", type=int, default=100,
+                         help="Held-out catalog images searched against the Qdrant collection")
+    distill.add_argument("--min-cosine", type=float, default=0.9,
+                         help="Do not export if the held-out mean cosine agreement is below this")
+    distill.add_argument("--output", default=config.STUDENT_ARTIFACT_DIR or None,
+                         help="Defaults to models/<EMBEDDING_MODEL>_student")
+    distill.add_argument("--report", help="Write the evaluation report as JSON")
+    distill.set_defaults(func=cmd_distill)
+
+    args = parser.parse_args()
+    args.func(args)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,44 @@
+"""
+Helpers for tests that run QdrantVectorService offline against Qdrant's in-memory mode
+"""
+from contextlib import contextmanager
+from typing import Dict, List
+
+from qdrant_client import AsyncQdrantClient
+from app.config import config
+from app.services.vector_service import QdrantVectorService
+
+@contextmanager
+def config_override(**settings):
+    """Set Config attributes for the duration of a block, then restore their previous values"""
+    previous = {name: getattr(config, name) for name in settings}
+    for name, value in settings.items():
+        setattr(config, name, value)
+    try:
+        yield
+    finally:
+        for name, value in previous.items():
+            setattr(config, name, value)
+
+def local_service() -> QdrantVectorService:
+    """Vector service backed by an in-memory Qdrant instead of the cloud cluster"""
+    service = QdrantVectorService()
+    service.client = AsyncQdrantClient(":memory:")
+    return service
+
+def record_client_calls(service: QdrantVectorService, *methods: str) -> Dict[str, List[dict]]:
+    """
+    Record the keyword arguments of every call to the given client methods
+
+    The calls still reach the in-memory Qdrant. Returns method name -> list of kwargs.
+    """
+    calls: Dict[str, List[dict]] = {method: [] for method in methods}
+    for method in methods:
+        original = getattr(service.client, method)
+
+        async def recording(_original=original, _calls=calls[method], **kwargs):
+            _calls.append(kwargs)
+            return await _original(**kwargs)
+
+        setattr(service.client, method, recording)
+    return calls
@@ -0,0 +1,178 @@
+#!/usr/bin/env python3
+"""
+Qdrant collection maintenance tools
+
+    python qdrant_tools.py quantize                    # apply QDRANT_QUANTIZATION to the catalog collection
+    python qdrant_tools.py quantize --mode binary --no-wait
+    python qdrant_tools.py quantize --mode none        # back to float32 only
+    python qdrant_tools.py hnsw                        # rebuild indexes with QDRANT_HNSW_M/QDRANT_HNSW_EF_CONSTRUCT
+    python qdrant_tools.py storage --on-disk --report storage_report.json
+    python qdrant_tools.py footprint                   # estimated RAM and disk use per collection
+"""
+import argparse
+import asyncio
+import json
+import time
+from typing import Any, Dict
+
+from app.config import config
+from app.services.vector_service import QUANTIZATION_MODES, QdrantVectorService
+
+
+async def wait_until_green(service: QdrantVectorService, collection_name: str, timeout: float) -> str:
+    """Poll the collection until the optimizers have rebuilt it, or the timeout passes"""
+    deadline = time.time() + timeout
+    while True:
+        info = await service.client.get_collection(collection_name)
+        status = getattr(info.status, "value", info.status)
+        if status == "green" or time.time() > deadline:
+            return status
+        print(f"   ⏳ {collection_name} is {status} ({info.indexed_vectors_count or 0}/{info.points_count} vectors indexed)")
+        await asyncio.sleep(5)
+
+
+async def quantize(args):
+    service = QdrantVectorService()
+    try:
+        collection_name = args.collection or service.collection_name
+        result = await service.migrate_quantization(args.mode, collection_name)
+        print(f"🔧 {collection_name}: quantization {result['previous']} -> {result['quantization']}")
+        if args.wait:
+            status = await wait_until_green(service, collection_name, args.timeout)
+            print(f"✅ {collection_name} is {status}" if status == "green"
+                  else f"⚠️ {collection_name} is still {status}; Qdrant keeps optimizing in the background")
+        if result["quantization"] != config.QDRANT_QUANTIZATION:
+            print(f"ℹ️ Set QDRANT_QUANTIZATION={result['quantization']} so the service searches it with rescoring "
+                  f"and stops warning at startup")
+    finally:
+        await service.close()
+
+
+async def hnsw(args):
+    service = QdrantVectorService()
+    try:
+        collections = [args.collection] if args.collection else [service.collection_name, service.search_embeddings_collection]
+        for collection_name in collections:
+            result = await service.migrate_hnsw_config(collection_name)
+            previous, new = result["previous"], result["hnsw"]
+            print(f"🔧 {collection_name}: m {previous['m']} -> {new['m']}, "
+                  f"ef_construct {previous['ef_construct']} -> {new['ef_construct']}")
+        if args.wait:
+            for collection_name in collections:
+                status = await wait_until_green(service, collection_name, args.timeout)
+                print(f"✅ {collection_name} is {status}" if status == "green"
+                      else f"⚠️ {collection_name} is still {status}; Qdrant keeps indexing in the background")
+    finally:
+        await service.close()
+
+
+def print_footprint(footprint: Dict[str, Any], label: str = ""):
+    parts = ", ".join(f"{name} {component['bytes'] / 1024 ** 2:.1f} MB {'RAM' if component['in_ram'] else 'disk'}"
+                      for name, component in footprint["components"].items())
+    print(f"   {label or footprint['collection']}: {footprint['points_count']} points, RAM {footprint['ram_mb']} MB, "
+          f"disk {footprint['disk_mb']} MB ({parts})")
+
+
+def write_report(path: str, report: Any):
+    with open(path, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"📄 Report written to {path}")
+
+
+async def storage(args):
+    service = QdrantVectorService()
+    try:
+        collections = [args.collection] if args.collection else [service.collection_name, service.search_embeddings_collection]
+        report = []
+        for collection_name in collections:
+            before = await service.estimate_memory_footprint(collection_name)
+            result = await service.migrate_storage(collection_name, args.on_disk)
+            print(f"🔧 {collection_name}: {result['previous']} -> on_disk={args.on_disk}")
+            report.append({"collection": collection_name, "before": before})
+        for entry in report:
+            if args.wait:
+                status = await wait_until_green(service, entry["collection"], args.timeout)
+                if status != "green":
+                    print(f"⚠️ {entry['collection']} is still {status}; the footprint after may be incomplete")
+            entry["after"] = await service.estimate_memory_footprint(entry["collection"])
+            print(f"📊 {entry['collection']}")
+            print_footprint(entry["before"], "before")
+            print_footprint(entry["after"], "after")
+        if args.on_disk != config.QDRANT_ON_DISK:
+            print(f"ℹ️ Set QDRANT_ON_DISK={str(args.on_disk).lower()} so new collections match and startup stops warning")
+        if args.report:
+            write_report(args.report, report)
+    finally:
+        await service.close()
+
+
+async def footprint(args):
+    service = QdrantVectorService()
+    try:
+        collections = [args.collection] if args.collection else [service.collection_name, service.search_embeddings_collection]
+        report = [await service.estimate_memory_footprint(collection_name) for collection_name in collections]
+        print("📊 Estimated memory footprint")
+        for entry in report:
+            print_footprint(entry)
+        if args.report:
+            write_report(args.report, report)
+    finally:
+        await service.close()
+
+
+def cmd_quantize(args):
+    asyncio.run(quantize(args))
+
+
+def cmd_hnsw(args):
+    asyncio.run(hnsw(args))
+
+
+def cmd_storage(args):
+    asyncio.run(storage(args))
+
+
+def cmd_footprint(args):
+    asyncio.run(footprint(args))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Qdrant collection maintenance tools")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    quantize_parser = subparsers.add_parser("quantize", help="Change the vector quantization of an existing collection")
+    quantize_parser.add_argument("--mode", default=config.QDRANT_QUANTIZATION, choices=list(QUANTIZATION_MODES))
+    quantize_parser.add_argument("--collection", help="Defaults to the active model's catalog collection")
+    quantize_parser.add_argument("--no-wait", dest="wait", action="store_false",
+                                 help="Return without waiting for Qdrant to rebuild the collection")
+    quantize_parser.add_argument("--timeout", type=float, default=3600, help="Seconds to wait for status green")
+    quantize_parser.set_defaults(func=cmd_quantize)
+
+    hnsw_parser = subparsers.add_parser("hnsw", help="Rebuild HNSW indexes with QDRANT_HNSW_M and QDRANT_HNSW_EF_CONSTRUCT")
+    hnsw_parser.add_argument("--collection", help="Defaults to the catalog and search history collections")
+    hnsw_parser.add_argument("--no-wait", dest="wait", action="store_false",
+                             help="Return without waiting for Qdrant to rebuild the indexes")
+    hnsw_parser.add_argument("--timeout", type=float, default=3600, help="Seconds to wait for status green")
+    hnsw_parser.set_defaults(func=cmd_hnsw)
+
+    storage_parser = subparsers.add_parser("storage", help="Move vectors, HNSW graphs and payloads to disk or back to RAM")
+    storage_parser.add_argument("--on-disk", dest="on_disk", action="store_true", default=config.QDRANT_ON_DISK)
+    storage_parser.add_argument("--in-ram", dest="on_disk", action="store_false")
+    storage_parser.add_argument("--collection", help="Defaults to the catalog and search history collections")
+    storage_parser.add_argument("--no-wait", dest="wait", action="store_false",
+                                help="Return without waiting for Qdrant to rewrite the segments")
+    storage_parser.add_argument("--timeout", type=float, default=3600, help="Seconds to wait for status green")
+    storage_parser.add_argument("--report", help="Write the footprint before and after as JSON")
+    storage_parser.set_defaults(func=cmd_storage)
+
+    footprint_parser = subparsers.add_parser("footprint", help="Estimate RAM and disk use of the collections")
+    footprint_parser.add_argument("--collection", help="Defaults to the catalog and search history collections")
+    footprint_parser.add_argument("--report", help="Write the estimate as JSON")
+    footprint_parser.set_defaults(func=cmd_footprint)
+
+    args = parser.parse_args()
+    args.func(args)
+
+
+if __name__ == "__main__":
+    main()
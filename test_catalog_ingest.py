@@ -0,0 +1,108 @@
+"""
+Test bulk catalog ingestion sources and checkpoints (runs offline, no server or model needed)
+"""
+import io
+import os
+import tarfile
+import tempfile
+import zipfile
+import numpy as np
+from PIL import Image
+from app.services.catalog_ingest import CatalogIngester, CatalogItem, Checkpoint, iter_catalog
+from app.services.image_preprocessing import decode_images
+
+def make_image(color):
+    buffer = io.BytesIO()
+    Image.new("RGB", (64, 48), color).save(buffer, format="JPEG")
+    return buffer.getvalue()
+
+def write_catalog(directory):
+    """Two product images in a subfolder plus a file that is not an image"""
+    os.makedirs(os.path.join(directory, "shoes"))
+    for name, color in (("red.jpg", (255, 0, 0)), ("blue.jpg", (0, 0, 255))):
+        with open(os.path.join(directory, "shoes", name), "wb") as f:
+            f.write(make_image(color))
+    with open(os.path.join(directory, "notes.txt"), "w") as f:
+        f.write("not an image")
+
+def test_all_source_types_yield_the_same_images():
+    """Directories, zip and tar archives and CSV manifests all produce catalog items"""
+    print("🔍 Testing catalog sources...")
+    with tempfile.TemporaryDirectory() as tmp:
+        folder = os.path.join(tmp, "catalog")
+        write_catalog(folder)
+        keys = sorted(item.key for item in iter_catalog(folder, skip=set()))
+        assert keys == ["shoes/blue.jpg", "shoes/red.jpg"]
+
+        with zipfile.ZipFile(os.path.join(tmp, "catalog.zip"), "w") as archive:
+            for key in keys:
+                archive.write(os.path.join(folder, key), key)
+        with tarfile.open(os.path.join(tmp, "catalog.tar.gz"), "w:gz") as archive:
+            for key in keys:
+                archive.add(os.path.join(folder, key), key)
+        for archive in ("catalog.zip", "catalog.tar.gz"):
+            assert sorted(item.key for item in iter_catalog(os.path.join(tmp, archive), skip=set())) == keys
+
+        with open(os.path.join(tmp, "products.csv"), "w") as f:
+            f.write("image_path,price,product_name\n")
+            f.write("catalog/shoes/red.jpg,49.99,Red Sneaker\n")
+            f.write("catalog/shoes/blue.jpg,,Blue Sneaker\n")
+        items = list(iter_catalog(os.path.join(tmp, "products.csv"), skip={"catalog/shoes/blue.jpg"}))
+        assert len(items) == 1
+        assert items[0].price == 49.99 and items[0].product_name == "Red Sneaker"
+        assert items[0].data == make_image((255, 0, 0))
+    print("✅ Directory, zip, tar.gz and CSV sources read")
+
+def test_bad_manifest_rows_fail_alone():
+    """A missing image or a non-numeric price fails its own row; the rest of the CSV is read"""
+    print("🔍 Testing bad manifest rows...")
+    with tempfile.TemporaryDirectory() as tmp:
+        write_catalog(os.path.join(tmp, "catalog"))
+        with open(os.path.join(tmp, "products.csv"), "w") as f:
+            f.write("image_path,price,product_name\n")
+            f.write("catalog/shoes/missing.jpg,10,Gone\n")
+            f.write("catalog/shoes/red.jpg,cheap,Red Sneaker\n")
+            f.write("catalog/shoes/blue.jpg,19.5,Blue Sneaker\n")
+        items = list(iter_catalog(os.path.join(tmp, "products.csv"), skip=set()))
+        assert [item.key for item in items] == [
+            "catalog/shoes/missing.jpg", "catalog/shoes/red.jpg", "catalog/shoes/blue.jpg"
+        ]
+        assert "Could not read image" in items[0].error and "Invalid price" in items[1].error
+        assert items[2].error is None and items[2].price == 19.5
+
+        ingester = CatalogIngester(embedding_service=None, vector_service=None)
+        batch = ingester._decode(items + [CatalogItem("green.jpg", "green.jpg", make_image((0, 255, 0)))])
+        assert batch["errors"][:3] == [items[0].error, items[1].error, None]
+        assert batch["pixel_rows"] == {2: 0, 3: 1} and len(batch["pixels"]) == 2
+    print(f"✅ Failed rows reported: {items[0].error}; {items[1].error}")
+
+def test_checkpoint_resumes_only_stored_images():
+    """Stored images are skipped on resume; failed ones are retried"""
+    print("🔍 Testing checkpoint...")
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "ingest.jsonl")
+        Checkpoint(path).record([{"key": "a.jpg", "vector_id": "1"}, {"key": "b.jpg", "error": "broken"}])
+        resumed = Checkpoint(path)
+        assert resumed.stored == {"a.jpg": "1"}
+    print("✅ Checkpoint round trip works")
+
+def test_decode_errors_are_collected_per_image():
+    """One corrupt upload must not fail the whole batch when errors are collected"""
+    print("🔍 Testing per-image decode errors...")
+    errors = []
+    pixels = decode_images([make_image((255, 0, 0)), b"not an image"], errors=errors)
+    assert errors[0] is None and errors[1]
+    assert pixels[0].any() and not pixels[1].any()
+    try:
+        decode_images([b"not an image"])
+    except Exception:
+        pass
+    else:
+        raise AssertionError("Corrupt image was accepted without an errors list")
+    print(f"✅ Corrupt image reported: {errors[1]}")
+
+if __name__ == "__main__":
+    test_all_source_types_yield_the_same_images()
+    test_bad_manifest_rows_fail_alone()
+    test_checkpoint_resumes_only_stored_images()
+    test_decode_errors_are_collected_per_image()
@@ -0,0 +1,186 @@
+"""
+Test the micro-batching inference queue (runs offline, no server or model needed)
+"""
+import asyncio
+import io
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+from PIL import Image
+from app.services.embedding_batcher import EmbeddingBatcher
+from app.services.embedding_cache import EmbeddingCache
+from app.services.embedding_service import ImageEmbeddingService
+
+def make_image(value):
+    buffer = io.BytesIO()
+    Image.new("RGB", (64, 48), (value, value, value)).save(buffer, format="PNG")
+    return buffer.getvalue()
+
+def fake_batch_fn(calls):
+    """Build a batch function that records every batch it receives"""
+    def batch_fn(images):
+        calls.append(list(images))
+        time.sleep(0.01)
+        return [(list(image), [len(image)]) for image in images]
+    return batch_fn
+
+def test_concurrent_requests_share_a_batch():
+    """Concurrent submissions should be grouped and each caller gets its own result"""
+    print("🔍 Testing concurrent requests are batched...")
+    calls = []
+    batcher = EmbeddingBatcher(fake_batch_fn(calls), max_batch_size=8, window_ms=50)
+
+    async def run():
+        return await asyncio.gather(*(batcher.submit(bytes([i])) for i in range(5)))
+
+    results = asyncio.run(run())
+
+    assert [r[0] for r in results] == [[i] for i in range(5)]
+    assert len(calls) == 1 and len(calls[0]) == 5
+    stats = batcher.get_stats()
+    assert stats["total_requests"] == 5
+    assert stats["total_batches"] == 1
+    assert stats["batch_size_histogram"] == {"5": 1}
+    print(f"✅ 5 requests served by {stats['total_batches']} batch, avg wait {stats['avg_queue_wait_ms']}ms")
+
+def test_batches_are_capped_at_max_size():
+    """Requests beyond max_batch_size should spill into a second forward pass"""
+    print("🔍 Testing max batch size...")
+    calls = []
+    batcher = EmbeddingBatcher(fake_batch_fn(calls), max_batch_size=4, window_ms=50)
+
+    async def run():
+        return await asyncio.gather(*(batcher.submit(bytes([i])) for i in range(10)))
+
+    results = asyncio.run(run())
+
+    assert len(results) == 10
+    assert all(len(batch) <= 4 for batch in calls)
+    assert sum(len(batch) for batch in calls) == 10
+    assert batcher.get_stats()["max_batch_seen"] == 4
+    print(f"✅ Batch sizes: {[len(batch) for batch in calls]}")
+
+def test_bad_image_fails_only_its_caller():
+    """An image that cannot be decoded fails its own request; the rest of the batch is embedded"""
+    print("🔍 Testing per-image error propagation...")
+    service = ImageEmbeddingService()
+    service.cache = None
+    service.load_model = lambda: None
+    embedded = []
+
+    def embed_pixels(pixels):
+        embedded.append(len(pixels))
+        return np.repeat(pixels.reshape(len(pixels), -1).mean(axis=1, dtype=np.float32)[:, None], 4, axis=1)
+
+    service.embed_pixels = embed_pixels
+    batcher = EmbeddingBatcher(service.generate_embeddings_batch, max_batch_size=4, window_ms=50)
+    images = [make_image(10), b"garbage", make_image(200)]
+
+    async def run():
+        return await asyncio.gather(*(batcher.submit(image) for image in images), return_exceptions=True)
+
+    results = asyncio.run(run())
+
+    assert isinstance(results[1], ValueError)
+    assert not isinstance(results[0], Exception) and not isinstance(results[2], Exception)
+    assert results[0][0].vector[0] < results[2][0].vector[0]
+    assert embedded == [2] and batcher.get_stats()["total_batches"] == 1
+    print("✅ Only the undecodable image failed; the other two shared one forward pass")
+
+def test_blocks_are_never_split():
+    """A request holding several images counts them all and waits for the next batch if it does not fit"""
+    print("🔍 Testing multi-image requests...")
+    calls = []
+    batcher = EmbeddingBatcher(fake_batch_fn(calls), max_batch_size=4, window_ms=50)
+
+    async def run():
+        return await asyncio.gather(*(batcher.submit(bytes(size), images=size) for size in (3, 3, 1)))
+
+    results = asyncio.run(run())
+
+    assert [len(result[0]) for result in results] == [3, 3, 1]
+    assert [sum(len(item) for item in batch) for batch in calls] == [3, 4]
+    stats = batcher.get_stats()
+    assert stats["total_requests"] == 3 and stats["total_images"] == 7 and stats["max_batch_seen"] == 4
+    print(f"✅ Image counts per batch: {[sum(len(item) for item in batch) for batch in calls]}")
+
+def test_batches_run_in_parallel_up_to_max_in_flight():
+    """With two inference workers, a second batch starts while the first one is still running"""
+    print("🔍 Testing batches in flight...")
+    running = []
+    overlap = []
+    lock = threading.Lock()
+
+    def batch_fn(images):
+        with lock:
+            running.append(len(images))
+            overlap.append(len(running))
+        time.sleep(0.1)
+        with lock:
+            running.pop()
+        return [(list(image), [len(image)]) for image in images]
+
+    executor = ThreadPoolExecutor(max_workers=2)
+    batcher = EmbeddingBatcher(batch_fn, max_batch_size=2, window_ms=5, executor=executor, max_in_flight=2)
+
+    async def run():
+        return await asyncio.gather(*(batcher.submit(bytes([i])) for i in range(6)))
+
+    started = time.perf_counter()
+    results = asyncio.run(run())
+    elapsed = time.perf_counter() - started
+    executor.shutdown()
+
+    assert [r[0] for r in results] == [[i] for i in range(6)]
+    assert max(overlap) == 2 and batcher.get_stats()["total_batches"] == 3
+    assert batcher.get_stats()["max_in_flight"] == 2
+    assert elapsed < 0.28, f"3 batches of 0.1s took {elapsed:.2f}s"
+    print(f"✅ 3 batches on 2 workers finished in {elapsed:.2f}s")
+
+def test_batch_upload_reuses_cache_and_buffer_slices():
+    """Batch uploads skip cached images and send the decoded rows to the model as slices, not copies"""
+    print("🔍 Testing batch uploads through the cache and batcher...")
+    service = ImageEmbeddingService()
+    service.load_model = lambda: None
+    service.cache = EmbeddingCache("model-a")
+    embedded = []
+
+    def embed_pixels(pixels):
+        embedded.append(len(pixels))
+        return np.repeat(pixels.reshape(len(pixels), -1).mean(axis=1, dtype=np.float32)[:, None], 4, axis=1)
+
+    service.embed_pixels = embed_pixels
+    images = [make_image(10), b"garbage", make_image(20), make_image(30)]
+    slices = []
+
+    async def run():
+        prepared = service.prepare_images(images, hash_cached=True)
+
+        def embed_blocks(blocks):
+            slices.extend(np.shares_memory(block, prepared.pixels) for block, _ in blocks)
+            return service._embed_blocks(blocks)
+
+        service._batcher = EmbeddingBatcher(embed_blocks, max_batch_size=16, window_ms=20, executor=service._executor)
+        await service.embed_prepared_batch_async(prepared)
+        again = service.prepare_images(images, hash_cached=True)
+        await service.embed_prepared_batch_async(again)
+        return prepared, again
+
+    prepared, again = asyncio.run(run())
+
+    assert prepared.errors[1] is not None and prepared.embeddings[1] is None
+    assert [prepared.embeddings[index][0] for index in (0, 2, 3)] == [10, 20, 30]
+    assert slices == [True, True] and sum(embedded) == 3
+    assert again.pixel_rows == [1] and again.image_hashes == prepared.image_hashes
+    assert all(np.array_equal(again.embeddings[index], prepared.embeddings[index]) for index in (0, 2, 3))
+    assert service.get_batching_stats()["total_images"] == 3
+    print(f"✅ 3 images embedded once from 2 buffer slices; the re-upload came from the cache")
+
+if __name__ == "__main__":
+    test_concurrent_requests_share_a_batch()
+    test_batches_are_capped_at_max_size()
+    test_bad_image_fails_only_its_caller()
+    test_blocks_are_never_split()
+    test_batches_run_in_parallel_up_to_max_in_flight()
+    test_batch_upload_reuses_cache_and_buffer_slices()
@@ -0,0 +1,75 @@
+"""
+Test the content-hash embedding cache (runs offline, no server or model needed)
+"""
+import io
+import tempfile
+import numpy as np
+from PIL import Image
+from app.services import embedding_service as embedding_service_module
+from app.services.embedding_cache import EmbeddingCache
+from app.services.embedding_service import ImageEmbeddingService
+
+def vector(seed):
+    return np.random.default_rng(seed).standard_normal(2048).astype(np.float32)
+
+def test_memory_tier_evicts_least_recently_used():
+    """The memory tier should stay bounded and drop the oldest unused entry"""
+    print("🔍 Testing LRU eviction...")
+    cache = EmbeddingCache("model-a", max_entries=2)
+    keys = [EmbeddingCache.content_key(bytes([i])) for i in range(3)]
+
+    cache.put(keys[0], vector(0))
+    cache.put(keys[1], vector(1))
+    assert cache.get(keys[0]) is not None  # keys[0] is now the most recently used
+    cache.put(keys[2], vector(2))
+
+    assert cache.get(keys[1]) is None
+    assert np.array_equal(cache.get(keys[0]), vector(0))
+    stats = cache.get_stats()
+    assert stats["memory_entries"] == 2 and stats["evictions"] == 1
+    assert stats["memory_hits"] == 2 and stats["misses"] == 1
+    print(f"✅ Hit rate {stats['hit_rate']}, {stats['evictions']} eviction")
+
+def test_disk_tier_survives_restart_and_is_namespaced_by_model():
+    """Embeddings should persist on disk, but only for the model that produced them"""
+    print("🔍 Testing disk tier...")
+    with tempfile.TemporaryDirectory() as disk_dir:
+        key = EmbeddingCache.content_key(b"same photo")
+        EmbeddingCache("model-a", disk_dir=disk_dir).put(key, vector(7))
+
+        restarted = EmbeddingCache("model-a", disk_dir=disk_dir)
+        cached = restarted.get(key)
+        assert cached.dtype == np.float32 and np.array_equal(cached, vector(7))
+        assert restarted.get_stats()["disk_hits"] == 1
+
+        assert EmbeddingCache("model-b", disk_dir=disk_dir).get(key) is None
+    print("✅ Disk entries reloaded for the same model and ignored for another")
+
+def test_cached_upload_is_not_decoded():
+    """A cache hit answers without decoding; a miss is decoded once, for pixels and hash together"""
+    print("🔍 Testing that cached uploads skip decoding...")
+    service = ImageEmbeddingService()
+    service.cache = EmbeddingCache("model-a")
+    buffer = io.BytesIO()
+    Image.new("RGB", (64, 48), (90, 120, 30)).save(buffer, format="PNG")
+    cached_image, new_image = b"cached photo", buffer.getvalue()
+    service.cache.put(EmbeddingCache.content_key(cached_image), vector(3))
+
+    decodes = []
+    original = embedding_service_module.decode_image_with_hash
+    embedding_service_module.decode_image_with_hash = lambda image_bytes: decodes.append(image_bytes) or original(image_bytes)
+    try:
+        hit = service.prepare_image(cached_image)
+        miss = service.prepare_image(new_image)
+    finally:
+        embedding_service_module.decode_image_with_hash = original
+
+    assert np.array_equal(hit.embedding, vector(3)) and hit.pixels is None
+    assert miss.embedding is None and miss.pixels.shape == (224, 224, 3) and miss.image_hash
+    assert decodes == [new_image]
+    print("✅ Only the uncached image was decoded")
+
+if __name__ == "__main__":
+    test_memory_tier_evicts_least_recently_used()
+    test_disk_tier_survives_restart_and_is_namespaced_by_model()
+    test_cached_upload_is_not_decoded()
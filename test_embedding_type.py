@@ -0,0 +1,48 @@
+"""
+Test the float32 Embedding type (runs offline, no server or model needed)
+"""
+import numpy as np
+from app.models.embedding import Embedding
+
+def test_wraps_model_output_without_copying():
+    """A row of the model's float32 output should be shared, not copied"""
+    print("🔍 Testing zero-copy wrapping...")
+    batch = np.random.default_rng(0).standard_normal((4, 2048)).astype(np.float32)
+    embedding = Embedding(batch[2])
+
+    assert np.shares_memory(embedding.vector, batch)
+    assert embedding.shape == [2048] and len(embedding) == 2048
+    assert embedding.tolist() == batch[2].tolist()
+    assert Embedding.from_any(embedding) is embedding
+    print("✅ Embedding shares memory with the batch output")
+
+def test_stats_match_python_computation():
+    """Vectorized stats should report the same numbers as the old list-based code"""
+    print("🔍 Testing embedding statistics...")
+    values = np.maximum(np.random.default_rng(1).standard_normal(2048), 0).astype(np.float32).tolist()
+    expected = {
+        "min_value": round(min(values), 6),
+        "max_value": round(max(values), 6),
+        "avg_value": round(sum(values) / len(values), 6),
+        "non_zero_count": sum(1 for x in values if x != 0),
+        "total_dimensions": len(values)
+    }
+    assert Embedding(values).stats() == expected
+    print(f"✅ Stats: {expected}")
+
+def test_validate_rejects_bad_vectors():
+    """Wrong sizes and NaN/inf values should be rejected before storing"""
+    print("🔍 Testing validation...")
+    Embedding(np.ones(2048)).validate(2048)
+    for bad in (np.ones(100), np.array([np.nan] + [0.0] * 2047), np.array([np.inf] + [0.0] * 2047)):
+        try:
+            Embedding(bad).validate(2048)
+        except ValueError:
+            continue
+        raise AssertionError("Expected validation to fail")
+    print("✅ Bad vectors rejected")
+
+if __name__ == "__main__":
+    test_wraps_model_output_without_copying()
+    test_stats_match_python_computation()
+    test_validate_rejects_bad_vectors()
@@ -0,0 +1,55 @@
+"""
+Test batch image decoding (runs offline, no server or model needed)
+"""
+import io
+import numpy as np
+from PIL import Image
+from app.services.image_preprocessing import decode_image, decode_images
+from app.services.inference_backends import resnet50_preprocess
+
+def make_image(seed, size=(640, 480), fmt="JPEG"):
+    """Build a random test image in the given format"""
+    rng = np.random.default_rng(seed)
+    pixels = rng.integers(0, 256, size=(size[1], size[0], 3), dtype=np.uint8)
+    buffer = io.BytesIO()
+    Image.fromarray(pixels).save(buffer, format=fmt)
+    return buffer.getvalue()
+
+def test_batch_matches_single_image_decoding():
+    """Parallel batch decoding should give exactly the per-image pixels"""
+    print("🔍 Testing batch decoding...")
+    images = [make_image(i, fmt=fmt) for i, fmt in enumerate(["JPEG", "PNG", "WEBP", "JPEG", "PNG"])]
+
+    batch = decode_images(images)
+
+    assert batch.shape == (5, 224, 224, 3) and batch.dtype == np.uint8
+    for row, image_bytes in zip(batch, images):
+        assert np.array_equal(row, decode_image(image_bytes))
+    print(f"✅ Decoded {len(images)} images into one {batch.shape} buffer")
+
+def test_batch_fills_preallocated_buffer():
+    """A caller-provided buffer should be filled in place and returned"""
+    print("🔍 Testing preallocated buffer...")
+    images = [make_image(i) for i in range(3)]
+    out = np.zeros((3, 224, 224, 3), dtype=np.uint8)
+
+    batch = decode_images(images, out=out)
+
+    assert batch is out
+    assert np.array_equal(resnet50_preprocess(out)[1], resnet50_preprocess(decode_image(images[1])))
+    print("✅ Buffer filled in place")
+
+def test_batch_raises_on_bad_image():
+    """One undecodable image should fail the whole batch"""
+    print("🔍 Testing undecodable image...")
+    try:
+        decode_images([make_image(0), b"not an image", make_image(1)])
+    except Exception as e:
+        print(f"✅ Batch failed with {type(e).__name__}")
+    else:
+        raise AssertionError("Expected the batch to fail")
+
+if __name__ == "__main__":
+    test_batch_matches_single_image_decoding()
+    test_batch_fills_preallocated_buffer()
+    test_batch_raises_on_bad_image()
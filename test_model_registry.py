@@ -0,0 +1,43 @@
+"""
+Test the embedding model registry (runs offline, no server or model needed)
+"""
+import numpy as np
+
+from app.config import config
+from app.services.inference_backends import resnet50_preprocess
+from app.services.model_registry import MODELS, get_model_spec
+
+def test_each_model_has_its_own_collection():
+    """Vectors of different models must never share a collection"""
+    print("🔍 Testing collection routing...")
+    assert get_model_spec("resnet50").collection_name() == config.QDRANT_COLLECTION_NAME
+    assert get_model_spec("resnet50").search_collection_name() == "user_search_embeddings"
+    names = [spec.collection_name() for spec in MODELS.values()]
+    search_names = [spec.search_collection_name() for spec in MODELS.values()]
+    assert len(set(names)) == len(MODELS)
+    assert len(set(search_names)) == len(MODELS)
+    print(f"✅ Collections: {', '.join(names)}")
+
+def test_unknown_model_is_rejected():
+    """A typo in EMBEDDING_MODEL should fail loudly"""
+    print("🔍 Testing unknown model...")
+    try:
+        get_model_spec("resnet51")
+    except ValueError as e:
+        print(f"✅ {str(e)}")
+    else:
+        raise AssertionError("Unknown model was accepted")
+
+def test_numpy_preprocessing():
+    """ResNet50 uses caffe preprocessing; the other models rescale raw pixels themselves"""
+    print("🔍 Testing preprocessing...")
+    pixels = np.random.default_rng(0).integers(0, 256, (2, 224, 224, 3), dtype=np.uint8)
+    assert np.array_equal(get_model_spec("resnet50").preprocess_numpy(pixels), resnet50_preprocess(pixels))
+    raw = get_model_spec("mobilenet_v3_small").preprocess_numpy(pixels)
+    assert raw.dtype == np.float32 and np.array_equal(raw, pixels)
+    print("✅ Preprocessing matches")
+
+if __name__ == "__main__":
+    test_each_model_has_its_own_collection()
+    test_unknown_model_is_rejected()
+    test_numpy_preprocessing()
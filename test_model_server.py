@@ -0,0 +1,100 @@
+"""
+Test the shared model server protocol with a stand-in model (runs offline)
+"""
+import os
+import tempfile
+import threading
+import time
+import numpy as np
+from app.services.model_server import ModelServer, ModelServerClient, _EmbedJob
+
+class FakeEmbeddingService:
+    """Stand-in for ImageEmbeddingService that returns the mean pixel value per image"""
+    model_name = "FakeModel"
+
+    def embed_pixels(self, pixels):
+        if (pixels == 255).all(axis=(1, 2, 3)).any():
+            raise ValueError("White images break this model")
+        means = pixels.reshape(len(pixels), -1).mean(axis=1, dtype=np.float32)
+        return np.repeat(means[:, None], 4, axis=1)
+
+    def get_model_info(self):
+        return {"model_name": self.model_name, "embedding_size": 4}
+
+def start_server():
+    socket_path = os.path.join(tempfile.mkdtemp(), "model.sock")
+    server = ModelServer(FakeEmbeddingService(), socket_path, max_batch_size=8)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    for _ in range(100):
+        if os.path.exists(socket_path):
+            break
+        time.sleep(0.01)
+    return server, socket_path
+
+def test_embed_round_trip():
+    """Pixels sent by a worker come back as float32 vectors in the same order"""
+    print("🔍 Testing model server round trip...")
+    server, socket_path = start_server()
+    client = ModelServerClient(socket_path, timeout=5)
+
+    pixels = np.stack([np.full((224, 224, 3), value, dtype=np.uint8) for value in (10, 20, 30)])
+    embeddings = client.embed(pixels)
+
+    assert embeddings.dtype == np.float32
+    assert embeddings.shape == (3, 4)
+    assert np.allclose(embeddings[:, 0], [10, 20, 30])
+    info = client.get_info()
+    assert info["model_name"] == "FakeModel"
+    assert info["total_images"] == 3
+    print(f"✅ Round trip OK: {embeddings[:, 0].tolist()}")
+
+def test_concurrent_workers():
+    """Several client threads can share the server at once"""
+    print("🔍 Testing concurrent clients...")
+    server, socket_path = start_server()
+    client = ModelServerClient(socket_path, timeout=5)
+    results = {}
+
+    def worker(value):
+        pixels = np.full((1, 224, 224, 3), value, dtype=np.uint8)
+        results[value] = float(client.embed(pixels)[0, 0])
+
+    threads = [threading.Thread(target=worker, args=(value,)) for value in range(1, 9)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert results == {value: float(value) for value in range(1, 9)}
+    print(f"✅ {len(results)} concurrent requests answered in {server.total_batches} batches")
+
+def test_bad_request_fails_only_itself():
+    """A wrong image size is rejected up front; a job that breaks the model does not fail its batch"""
+    print("🔍 Testing per-request failures...")
+    server, socket_path = start_server()
+    client = ModelServerClient(socket_path, timeout=5)
+    try:
+        client.embed(np.zeros((1, 100, 100, 3), dtype=np.uint8))
+        assert False, "wrong image size was accepted"
+    except RuntimeError as e:
+        assert "100x100" in str(e)
+
+    # Queue three jobs before the inference thread runs, so they are merged into one batch
+    batch_server = ModelServer(FakeEmbeddingService(), socket_path + ".unused", max_batch_size=8)
+    jobs = [_EmbedJob(np.full((1, 224, 224, 3), value, dtype=np.uint8)) for value in (10, 255, 30)]
+    for job in jobs:
+        batch_server._jobs.put(job)
+    threading.Thread(target=batch_server._inference_loop, daemon=True).start()
+    for job in jobs:
+        assert job.done.wait(5)
+
+    assert "White images" in jobs[1].error
+    assert jobs[0].error is None and jobs[2].error is None
+    assert jobs[0].embeddings[0, 0] == 10 and jobs[2].embeddings[0, 0] == 30
+    assert client.embed(np.full((1, 224, 224, 3), 7, dtype=np.uint8))[0, 0] == 7
+    print(f"✅ Only the bad requests failed ({batch_server.total_batches} forward passes)")
+
+if __name__ == "__main__":
+    test_embed_round_trip()
+    test_concurrent_workers()
+    test_bad_request_fails_only_itself()
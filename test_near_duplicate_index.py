@@ -0,0 +1,75 @@
+"""
+Test the perceptual-hash near-duplicate index (runs offline, no server or model needed)
+"""
+import io
+import numpy as np
+from PIL import Image, ImageDraw, ImageFilter
+from app.services.image_preprocessing import decode_image, decode_image_with_hash, decode_images, perceptual_hash
+from app.services.near_duplicate_index import NearDuplicateIndex
+
+def make_photo(seed, color_shift=(0, 0, 0), size=800):
+    """Build a smooth photo-like test image (blurred shapes on a light background)"""
+    rng = np.random.default_rng(seed)
+    image = Image.new("RGB", (size, size), tuple(int(x) for x in rng.integers(150, 255, 3)))
+    draw = ImageDraw.Draw(image)
+    for _ in range(10):
+        x0, y0 = rng.integers(0, size, 2)
+        w, h = rng.integers(80, 400, 2)
+        draw.ellipse([x0, y0, x0 + w, y0 + h], fill=tuple(int(x) for x in rng.integers(0, 255, 3)))
+    image = image.filter(ImageFilter.GaussianBlur(5))
+    pixels = np.asarray(image).astype(np.int16) + np.array(color_shift, dtype=np.int16)
+    return Image.fromarray(np.clip(pixels, 0, 255).astype(np.uint8))
+
+def encode(image, fmt="JPEG", **kwargs):
+    buffer = io.BytesIO()
+    image.save(buffer, format=fmt, **kwargs)
+    return buffer.getvalue()
+
+def test_reencoded_copy_matches_stored_image():
+    """A recompressed, resized copy should hit; a different photo should not"""
+    print("🔍 Testing near-duplicate lookup...")
+    index = NearDuplicateIndex(max_distance=4, max_color_diff=12)
+    photo = make_photo(0)
+    index.add("stored-0", perceptual_hash(encode(photo, "PNG")), "model-a")
+    index.add("stored-1", perceptual_hash(encode(make_photo(1), "PNG")), "model-a")
+
+    copy = encode(photo.resize((500, 500)), quality=60)
+    match = index.find(perceptual_hash(copy), "model-a")
+
+    assert match is not None and match[0] == "stored-0"
+    assert index.find(perceptual_hash(encode(make_photo(2))), "model-a") is None
+    print(f"✅ Resized JPEG copy matched stored-0 at distance {match[1]}")
+
+def test_colour_variant_and_other_model_do_not_match():
+    """Same layout in another colour, or a vector from another model, must not be reused"""
+    print("🔍 Testing colour and model scoping...")
+    index = NearDuplicateIndex(max_distance=4, max_color_diff=12)
+    photo = make_photo(3)
+    index.add("stored", perceptual_hash(encode(photo, "PNG")), "model-a")
+
+    recoloured = encode(make_photo(3, color_shift=(60, -40, 0)), "PNG")
+    assert index.find(perceptual_hash(recoloured), "model-a") is None
+    assert index.find(perceptual_hash(encode(photo, "PNG")), "model-b") is None
+
+    index.remove("stored")
+    assert index.find(perceptual_hash(encode(photo, "PNG")), "model-a") is None
+    assert index.get_stats()["entries"] == 0
+    print("✅ Colour variants, other models and removed images are not reused")
+
+def test_hash_comes_from_the_model_decode():
+    """Decoding for the model yields the same hash as perceptual_hash, without a second decode"""
+    print("🔍 Testing hashes taken from the model decode...")
+    images = [encode(make_photo(4)), encode(make_photo(5), "PNG"), b"not an image"]
+    pixels, image_hash = decode_image_with_hash(images[0])
+    assert np.array_equal(pixels, decode_image(images[0])) and image_hash == perceptual_hash(images[0])
+
+    errors, hashes = [], []
+    decode_images(images, errors=errors, hashes=hashes)
+    assert hashes[:2] == [perceptual_hash(images[0]), perceptual_hash(images[1])]
+    assert hashes[2] is None and errors[2] is not None
+    print("✅ Single and batch decodes return the perceptual hash of the decoded pixels")
+
+if __name__ == "__main__":
+    test_reencoded_copy_matches_stored_image()
+    test_colour_variant_and_other_model_do_not_match()
+    test_hash_comes_from_the_model_decode()
@@ -0,0 +1,123 @@
+"""
+Test the in-process NumPy vector store (exact search, user filters, deletes and persistence)
+"""
+import asyncio
+import tempfile
+import numpy as np
+from app.services.numpy_vector_store import NumpyVectorStore
+from app.services.vector_service import QdrantVectorService, create_vector_store
+from app.services.vector_store import VectorStore
+
+async def fill_store(path=""):
+    """Store 50 random catalog vectors and two searches for user-1"""
+    store = NumpyVectorStore(path=path)
+    assert await store.initialize_collection()
+    rng = np.random.default_rng(0)
+    vectors = rng.random((50, store.vector_size), dtype=np.float32)
+    payloads = [{"filename": f"p{i}.jpg", "price": float(i)} for i in range(50)]
+    results = await store.store_embeddings_batch(list(vectors), payloads, chunk_size=16)
+    await store.store_user_search_embedding("user-1", "q1.jpg", vectors[7], 1)
+    await store.store_user_search_embedding("user-2", "q2.jpg", vectors[9], 1)
+    return store, vectors, [result["vector_id"] for result in results]
+
+async def check_exact_search():
+    store, vectors, ids = await fill_store()
+    query = vectors[3] + 0.01
+    normalized = vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+    expected = np.argsort(-(normalized @ (query / np.linalg.norm(query))))[:5]
+    hits = await store.search_similar_images(query, limit=5, score_threshold=0.0)
+    assert [hit["id"] for hit in hits] == [ids[i] for i in expected]
+    assert hits[0]["metadata"]["filename"] == "p3.jpg"
+
+    history = await store.get_user_search_history("user-1")
+    assert [entry["search_query_filename"] for entry in history] == ["q1.jpg"]
+    recommendations = await store.get_user_recommendations("user-1", limit=3)
+    assert recommendations[0]["id"] == ids[7]
+
+    assert await store.delete_embedding(ids[3])
+    assert await store.get_embedding_by_id(ids[3]) is None
+    hits = await store.search_similar_images(query, limit=5, score_threshold=0.0)
+    assert ids[3] not in [hit["id"] for hit in hits]
+    assert (await store.get_collection_info())["points_count"] == 49
+    return store
+
+async def check_persistence(path):
+    store, vectors, ids = await fill_store(path)
+    await store.delete_embedding(ids[0])
+    await store.close()
+
+    reopened = NumpyVectorStore(path=path)
+    assert await reopened.initialize_collection()
+    assert (await reopened.get_collection_info())["points_count"] == 49
+    stored = await reopened.retrieve_embedding(ids[1], include_vector=True)
+    assert stored["metadata"]["filename"] == "p1.jpg"
+    original = vectors[1] / np.linalg.norm(vectors[1])
+    assert np.allclose(stored["embedding_full"], original, atol=1e-6)
+    assert await reopened.get_embedding_by_id(ids[0]) is None
+
+async def check_paging_while_deleting():
+    store, _, ids = await fill_store()
+    seen, offset = [], None
+    while True:
+        points, offset = await store.scroll_points(store.collection_name, limit=7, offset=offset)
+        seen.extend(point.id for point in points)
+        # Delete what this page returned, as an admin cleanup job would
+        await store.delete_points(store.collection_name, [point.id for point in points[::2]])
+        if offset is None:
+            break
+    filtered, _ = await store.scroll_points(
+        store.search_embeddings_collection, limit=10, payload_filter={"user_uid": "user-2"}
+    )
+    return seen, ids, filtered
+
+def test_numpy_store_search_filters_and_delete():
+    """Top-k matches brute force; history and recommendations are filtered by user"""
+    print("🔍 Testing NumPy vector store search...")
+    store = asyncio.run(check_exact_search())
+    print(f"✅ Exact top-5, per-user history and delete work ({store.display_name})")
+
+def test_numpy_store_persistence():
+    """Upserts and deletes survive a restart through the collection logs"""
+    print("🔍 Testing NumPy vector store persistence...")
+    with tempfile.TemporaryDirectory() as path:
+        asyncio.run(check_persistence(path))
+    print("✅ Collection reloaded from its log")
+
+def test_scroll_pages_survive_deletes():
+    """Deleting points between pages neither skips nor repeats the others"""
+    print("🔍 Testing paging while deleting...")
+    seen, ids, filtered = asyncio.run(check_paging_while_deleting())
+    assert sorted(seen) == sorted(ids) and len(seen) == len(set(seen))
+    assert [point.payload["search_query_filename"] for point in filtered] == ["q2.jpg"]
+    print(f"✅ {len(seen)} points paged exactly once while deleting")
+
+def test_incomplete_store_cannot_be_created():
+    """A backend missing a storage primitive fails when it is instantiated, not on first use"""
+    class NoDelete(NumpyVectorStore):
+        delete_points = VectorStore.delete_points
+
+    try:
+        NoDelete(path="")
+        assert False, "incomplete store was instantiated"
+    except TypeError as e:
+        assert "delete_points" in str(e)
+    print("✅ Incomplete backends are rejected at construction")
+
+def test_vector_store_factory():
+    """VECTOR_STORE names select the backend; unknown names are rejected"""
+    print("🔍 Testing vector store factory...")
+    assert isinstance(create_vector_store("numpy"), NumpyVectorStore)
+    assert isinstance(create_vector_store("qdrant"), QdrantVectorService)
+    try:
+        create_vector_store("faiss")
+        assert False, "unknown store accepted"
+    except ValueError as e:
+        assert "numpy" in str(e)
+    print("✅ Factory returns the configured store")
+
+if __name__ == "__main__":
+    test_numpy_store_search_filters_and_delete()
+    test_numpy_store_persistence()
+    test_scroll_pages_survive_deletes()
+    test_incomplete_store_cannot_be_created()
+    test_vector_store_factory()
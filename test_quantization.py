@@ -0,0 +1,64 @@
+"""
+Test quantized collection configuration and search parameters (runs offline against Qdrant's in-memory mode)
+"""
+import asyncio
+import numpy as np
+from qdrant_client.http import models
+from app.config import config
+from app.services.vector_service import QdrantVectorService
+from qdrant_test_helpers import config_override, local_service, record_client_calls
+
+async def check_quantized_search(mode: str):
+    """Create a collection for `mode`, search it and return the search_params and quantization_config sent"""
+    with config_override(QDRANT_QUANTIZATION=mode):
+        service = local_service()
+        calls = record_client_calls(service, "create_collection", "search")
+        assert await service.initialize_collection()
+        vector = np.ones(service.vector_size, dtype=np.float32)
+        await service.store_embeddings_batch([vector], [{"filename": "p.jpg"}])
+        results = await service.search_similar_images(vector, limit=1, oversampling=3.0)
+        assert len(results) == 1
+    return {
+        "quantization_config": calls["create_collection"][0].get("quantization_config"),
+        "search_params": calls["search"][-1].get("search_params")
+    }
+
+async def check_migration():
+    service = local_service()
+    assert await service.initialize_collection()
+    calls = record_client_calls(service, "update_collection")
+    result = await service.migrate_quantization("binary")
+    await service.migrate_quantization("none")
+    return result, calls["update_collection"]
+
+def test_quantized_collection_is_searched_with_rescoring():
+    """Scalar collections are created with int8 quantization and searched with oversampling and rescoring"""
+    print("🔍 Testing scalar quantization...")
+    sent = asyncio.run(check_quantized_search("scalar"))
+    assert sent["quantization_config"].scalar.type == models.ScalarType.INT8
+    quantization = sent["search_params"].quantization
+    assert quantization.oversampling == 3.0 and quantization.rescore is config.QDRANT_SEARCH_RESCORE
+    print("✅ int8 collection searched with oversampling 3.0")
+
+def test_unquantized_collection_keeps_default_search():
+    """Without quantization nothing changes in collection creation or default searches"""
+    print("🔍 Testing unquantized collection...")
+    assert QdrantVectorService.quantization_config("none") is None
+    assert QdrantVectorService()._search_params() is None
+    sent = asyncio.run(check_quantized_search("none"))
+    assert sent["quantization_config"] is None
+    print("✅ float32 collection unchanged")
+
+def test_migration_updates_quantization():
+    """Migrating sends the new quantization, or disables it for 'none'"""
+    print("🔍 Testing quantization migration...")
+    result, calls = asyncio.run(check_migration())
+    assert result["previous"] == "none" and result["quantization"] == "binary"
+    assert isinstance(calls[0]["quantization_config"], models.BinaryQuantization)
+    assert calls[1]["quantization_config"] == models.Disabled.DISABLED
+    print("✅ Migration sends binary, then disabled")
+
+if __name__ == "__main__":
+    test_quantized_collection_is_searched_with_rescoring()
+    test_unquantized_collection_keeps_default_search()
+    test_migration_updates_quantization()
@@ -0,0 +1,48 @@
+"""
+Test runtime profile helpers (runs offline, no server or model needed)
+"""
+import os
+import threading
+from app.services import runtime_profile
+from app.services.runtime_profile import PROFILES, format_cpu_list, parse_cpu_list
+
+def test_cpu_lists_round_trip():
+    """CPU affinity lists should parse and format like taskset/cpuset lists"""
+    print("🔍 Testing CPU list parsing...")
+    cpus = parse_cpu_list("0-3, 8,10-11,2")
+    assert cpus == [0, 1, 2, 3, 8, 10, 11]
+    assert format_cpu_list(cpus) == "0-3,8,10-11"
+    assert parse_cpu_list("") == []
+    print(f"✅ {format_cpu_list(cpus)}")
+
+def test_performance_profile_skips_determinism():
+    """Only the deterministic profile should pay for deterministic kernels"""
+    print("🔍 Testing profiles...")
+    assert PROFILES["performance"]["determinism"] is False
+    assert PROFILES["deterministic"]["determinism"] is True
+    print(f"✅ Profiles: {', '.join(PROFILES)}")
+
+def test_affinity_covers_every_thread():
+    """Pinning from an inference thread must also pin the main thread and the others"""
+    print("🔍 Testing process-wide CPU affinity...")
+    pinned = []
+    setaffinity = os.sched_setaffinity
+    os.sched_setaffinity = lambda thread_id, cpus: pinned.append(thread_id)
+    stop = threading.Event()
+    idle = threading.Thread(target=stop.wait)
+    idle.start()
+    try:
+        worker = threading.Thread(target=runtime_profile._set_process_affinity, args=([0],))
+        worker.start()
+        worker.join()
+    finally:
+        os.sched_setaffinity = setaffinity
+        stop.set()
+        idle.join()
+    assert os.getpid() in pinned and idle.native_id in pinned
+    print(f"✅ {len(pinned)} threads pinned")
+
+if __name__ == "__main__":
+    test_cpu_lists_round_trip()
+    test_performance_profile_skips_determinism()
+    test_affinity_covers_every_thread()
@@ -0,0 +1,50 @@
+"""
+Test HNSW collection settings and per-query search parameters (runs offline against Qdrant's in-memory mode)
+"""
+import asyncio
+import numpy as np
+from app.config import config
+from app.services.vector_service import QdrantVectorService
+from qdrant_test_helpers import local_service, record_client_calls
+
+async def record_calls():
+    """Create both collections, search and recommend, recording what was sent to Qdrant"""
+    service = local_service()
+    calls = record_client_calls(service, "create_collection", "search")
+    assert await service.initialize_collection()
+
+    vector = np.ones(service.vector_size, dtype=np.float32)
+    await service.store_embeddings_batch([vector], [{"filename": "p.jpg"}])
+    await service.store_user_search_embedding("user-1", "q.jpg", vector, 1)
+    await service.search_similar_complete(vector, limit=1, hnsw_ef=256)
+    await service.search_similar_images(vector, limit=1, exact=True)
+    recommendations = await service.get_user_recommendations("user-1", limit=1)
+    assert len(recommendations) == 1
+    created = {call["collection_name"]: call.get("hnsw_config") for call in calls["create_collection"]}
+    searches = [call.get("search_params") for call in calls["search"]]
+    return service, created, searches
+
+def test_collections_are_created_with_hnsw_config():
+    """Both collections get the configured m and ef_construct"""
+    print("🔍 Testing HNSW collection config...")
+    service, created, _ = asyncio.run(record_calls())
+    for name in (service.collection_name, service.search_embeddings_collection):
+        assert created[name].m == config.QDRANT_HNSW_M
+        assert created[name].ef_construct == config.QDRANT_HNSW_EF_CONSTRUCT
+    print(f"✅ Collections created with m={config.QDRANT_HNSW_M}, ef_construct={config.QDRANT_HNSW_EF_CONSTRUCT}")
+
+def test_search_params_per_use_case():
+    """Explicit ef and exact reach Qdrant; recommendations use their own narrower ef"""
+    print("🔍 Testing per-query search params...")
+    _, _, searches = asyncio.run(record_calls())
+    complete, exact, recommendation = searches
+    assert complete.hnsw_ef == 256 and not complete.exact
+    assert exact.exact is True
+    assert recommendation.hnsw_ef == config.QDRANT_RECOMMENDATIONS_HNSW_EF
+    if config.QDRANT_SEARCH_HNSW_EF == 0 and config.QDRANT_QUANTIZATION == "none":
+        assert QdrantVectorService()._search_params() is None
+    print(f"✅ ef=256, exact and recommendations ef={config.QDRANT_RECOMMENDATIONS_HNSW_EF} sent")
+
+if __name__ == "__main__":
+    test_collections_are_created_with_hnsw_config()
+    test_search_params_per_use_case()
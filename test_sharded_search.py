@@ -0,0 +1,120 @@
+"""
+Test sharded exact search over shared memory (worker processes, heap merge, batched queries)
+"""
+import asyncio
+import numpy as np
+from app.services.numpy_vector_store import NumpyVectorStore
+from app.services import sharded_search
+from app.services.sharded_search import ShardedSearchEngine, SharedMatrix, normalize_rows, top_k
+
+def test_sharded_matches_single_process():
+    """Merged shard results equal one exact search over the whole matrix"""
+    print("🔍 Testing sharded search against single-process search...")
+    rng = np.random.default_rng(0)
+    matrix = SharedMatrix(5000, 64)
+    matrix.array[:] = normalize_rows(rng.standard_normal((5000, 64)).astype(np.float32))
+    queries = rng.standard_normal((7, 64)).astype(np.float32)
+    engine = ShardedSearchEngine(3, min_shard_rows=500)
+    engine.start()
+    try:
+        assert len(engine.shards(4900)) == 3
+        hits = engine.search(matrix, 4900, queries, 10, key="catalog")
+        rows, scores = top_k(normalize_rows(queries) @ matrix.array[:4900].T, 10)
+        assert [[row for row, _ in query_hits] for query_hits in hits] == rows.tolist()
+        assert np.allclose([[score for _, score in query_hits] for query_hits in hits], scores, atol=1e-6)
+        assert engine.get_stats()["sharded_searches"] == 1
+
+        # A reallocated matrix is picked up by name under the same key
+        grown = SharedMatrix(6000, 64)
+        grown.array[:5000] = matrix.array
+        grown.array[5000:] = normalize_rows(queries[:1]).repeat(1000, axis=0)
+        best = engine.search(grown, 6000, queries[0], 3, key="catalog")[0]
+        assert all(row >= 5000 for row, _ in best) and abs(best[0][1] - 1.0) < 1e-5
+        grown.release()
+    finally:
+        engine.close()
+        matrix.release()
+    print("✅ 3 shards merged into the exact top 10 for 7 queries")
+
+def test_workers_keep_one_block_per_collection():
+    """Alternating collections reuse their attached blocks; growth only replaces that collection's block"""
+    print("🔍 Testing the per-collection block cache of a search worker...")
+    rng = np.random.default_rng(2)
+    first, second = SharedMatrix(100, 16), SharedMatrix(100, 16)
+    for matrix in (first, second):
+        matrix.array[:] = normalize_rows(rng.standard_normal((100, 16)).astype(np.float32))
+    query = normalize_rows(rng.standard_normal((1, 16)).astype(np.float32))
+    grown = None
+    try:
+        # Run the worker function in this process and inspect its cache
+        for _ in range(3):
+            sharded_search._search_shard("a", first.name, first.shape, 0, 100, query, 5)
+            sharded_search._search_shard("b", second.name, second.shape, 0, 100, query, 5)
+        attached = dict(sharded_search._worker_blocks)
+        assert {key: name for key, (name, _) in attached.items()} == {"a": first.name, "b": second.name}
+
+        sharded_search._search_shard("a", first.name, first.shape, 0, 100, query, 5)
+        assert sharded_search._worker_blocks["a"][1] is attached["a"][1]
+
+        grown = SharedMatrix(200, 16)
+        grown.array[:100] = first.array
+        sharded_search._search_shard("a", grown.name, grown.shape, 0, 100, query, 5)
+        assert sharded_search._worker_blocks["a"][0] == grown.name
+        assert sharded_search._worker_blocks["b"][1] is attached["b"][1]
+        assert attached["a"][1].buf is None  # the replaced block was closed
+    finally:
+        for _, memory in sharded_search._worker_blocks.values():
+            memory.close()
+        sharded_search._worker_blocks.clear()
+        for matrix in (first, second, grown):
+            if matrix is not None:
+                matrix.release()
+    print("✅ Both collections stayed attached; growth replaced only its own block")
+
+async def check_store_batches_concurrent_searches():
+    store = NumpyVectorStore(path="", search_workers=2)
+    store.search_engine.min_shard_rows = 20
+    local = NumpyVectorStore(path="", search_workers=0)
+    assert await store.initialize_collection() and await local.initialize_collection()
+    rng = np.random.default_rng(1)
+    vectors = list(rng.random((100, store.vector_size), dtype=np.float32))
+    payloads = [{"filename": f"p{i}.jpg"} for i in range(100)]
+    for target in (store, local):
+        await target.store_embeddings_batch(vectors, payloads, chunk_size=32)
+
+    queries = vectors[:6]
+    sharded = await asyncio.gather(*(
+        store.search_points(store.collection_name, query, limit=5) for query in queries
+    ))
+    expected = await local.search_points_batch(local.collection_name, queries, limit=5)
+    assert [[p.payload["filename"] for p in hits] for hits in sharded] == \
+        [[p.payload["filename"] for p in hits] for hits in expected]
+    assert all(hits[0].payload["filename"] == f"p{i}.jpg" for i, hits in enumerate(sharded))
+    stats = store.search_engine.get_stats()
+    await store.close()
+    return stats
+
+def test_store_batches_concurrent_searches():
+    """Concurrent searches on the numpy store share sharded passes and match in-process results"""
+    print("🔍 Testing batched sharded searches in the numpy store...")
+    stats = asyncio.run(check_store_batches_concurrent_searches())
+    assert stats["queries"] == 6 and stats["searches"] < 6
+    print(f"✅ 6 concurrent searches answered in {stats['searches']} sharded batches")
+
+def test_workers_start_before_initialization():
+    """The startup hook forks the workers up front; initializing the collections reuses them"""
+    print("🔍 Testing that search workers start before the collections are initialized...")
+    store = NumpyVectorStore(path="", search_workers=2)
+    store.start_search_workers()
+    pool = store.search_engine._pool
+    assert pool is not None and len(pool._processes) == 2
+    assert asyncio.run(store.initialize_collection())
+    assert store.search_engine._pool is pool
+    asyncio.run(store.close())
+    print("✅ 2 workers forked once, before initialize_collection")
+
+if __name__ == "__main__":
+    test_sharded_matches_single_process()
+    test_workers_keep_one_block_per_collection()
+    test_store_batches_concurrent_searches()
+    test_workers_start_before_initialization()
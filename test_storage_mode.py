@@ -0,0 +1,54 @@
+"""
+Test on-disk storage settings and the memory footprint estimate (runs offline against Qdrant's in-memory mode)
+"""
+import asyncio
+import numpy as np
+from qdrant_client.http import models
+from qdrant_test_helpers import config_override, local_service, record_client_calls
+
+async def make_service(on_disk: bool):
+    with config_override(QDRANT_ON_DISK=on_disk):
+        service = local_service()
+        assert await service.initialize_collection()
+    embeddings = [np.ones(service.vector_size, dtype=np.float32)] * 10
+    payloads = [service.build_catalog_payload(filename=f"p{i}.jpg", file_size=1, content_type="image/jpeg",
+                                              processing_time=0.0, model_used="test") for i in range(10)]
+    await service.store_embeddings_batch(embeddings, payloads)
+    return service
+
+async def check_footprints():
+    in_ram = await (await make_service(False)).estimate_memory_footprint()
+    on_disk = await (await make_service(True)).estimate_memory_footprint()
+    return in_ram, on_disk
+
+async def check_migration():
+    service = await make_service(False)
+    calls = record_client_calls(service, "update_collection")
+    result = await service.migrate_storage(on_disk=True)
+    return result, calls["update_collection"][0]
+
+def test_footprint_moves_vectors_out_of_ram():
+    """On-disk vectors count towards disk instead of RAM in the footprint estimate"""
+    print("🔍 Testing memory footprint estimate...")
+    in_ram, on_disk = asyncio.run(check_footprints())
+    vector_bytes = 4 * in_ram["vector_size"] * 10
+    assert in_ram["points_count"] == 10
+    assert in_ram["components"]["vectors"] == {"bytes": vector_bytes, "in_ram": True}
+    assert in_ram["components"]["payload"]["bytes"] > 0
+    assert on_disk["vectors_on_disk"] and not on_disk["components"]["vectors"]["in_ram"]
+    assert on_disk["ram_mb"] < in_ram["ram_mb"] and on_disk["disk_mb"] >= round(vector_bytes / 1024 ** 2, 2)
+    print(f"✅ RAM {in_ram['ram_mb']} MB -> {on_disk['ram_mb']} MB with on-disk vectors")
+
+def test_migration_moves_all_parts_to_disk():
+    """Migrating updates vectors, HNSW graph and payload storage together"""
+    print("🔍 Testing storage migration...")
+    result, call = asyncio.run(check_migration())
+    assert result["previous"] == {"vectors_on_disk": False, "hnsw_on_disk": False, "payload_on_disk": False}
+    assert call["vectors_config"][""] == models.VectorParamsDiff(on_disk=True)
+    assert call["hnsw_config"].on_disk is True
+    assert call["collection_params"].on_disk_payload is True
+    print("✅ Vectors, HNSW graph and payloads moved to disk")
+
+if __name__ == "__main__":
+    test_footprint_moves_vectors_out_of_ram()
+    test_migration_moves_all_parts_to_disk()
@@ -0,0 +1,71 @@
+"""
+Test batch upserts into the catalog collection (runs offline against Qdrant's in-memory mode)
+"""
+import asyncio
+import numpy as np
+from qdrant_client import AsyncQdrantClient
+from app.services.vector_service import QdrantVectorService
+
+async def make_service():
+    """Vector service backed by an in-memory Qdrant instead of the cloud cluster"""
+    service = QdrantVectorService()
+    service.client = AsyncQdrantClient(":memory:")
+    assert await service.initialize_collection()
+    return service
+
+async def check_batch_upsert():
+    service = await make_service()
+    rng = np.random.default_rng(0)
+    embeddings = [rng.standard_normal(service.vector_size).astype(np.float32) for _ in range(10)]
+    embeddings[3] = np.full(service.vector_size, np.nan, dtype=np.float32)
+    payloads = [
+        service.build_catalog_payload(filename=f"p{i}.jpg", file_size=1, content_type="image/jpeg",
+                                      processing_time=0.0, model_used="test", image_hash=f"{i:022x}", model_id="test")
+        for i in range(10)
+    ]
+
+    results = await service.store_embeddings_batch(embeddings, payloads, chunk_size=3, parallel=2)
+    assert len(results) == 10
+    assert results[3]["vector_id"] is None and "NaN" in results[3]["error"]
+    stored = [result["vector_id"] for result in results if result["vector_id"]]
+    assert len(stored) == 9 and all(result["error"] is None for i, result in enumerate(results) if i != 3)
+    assert (await service.client.count(service.collection_name)).count == 9
+    assert len(service.hash_index) == 9
+
+    point = (await service.client.retrieve(service.collection_name, [results[5]["vector_id"]]))[0]
+    assert point.payload["filename"] == "p5.jpg"
+    return len(stored), len(results)
+
+async def check_failed_chunk():
+    service = await make_service()
+    upsert = service.client.upsert
+    calls = []
+
+    async def flaky_upsert(**kwargs):
+        calls.append(kwargs["wait"])
+        if len(calls) == 1:
+            raise ConnectionError("connection reset")
+        return await upsert(**kwargs)
+
+    service.client.upsert = flaky_upsert
+    embeddings = [np.ones(service.vector_size, dtype=np.float32)] * 4
+    results = await service.store_embeddings_batch(embeddings, [{}] * 4, chunk_size=2, parallel=1)
+    assert [result["vector_id"] is None for result in results] == [True, True, False, False]
+    assert "connection reset" in results[0]["error"]
+    assert calls == [False, True]  # Only the last chunk waits for indexing
+
+def test_batch_is_chunked_and_reports_per_item():
+    """Valid points are stored across several chunks; an invalid vector only fails itself"""
+    print("🔍 Testing batch upsert...")
+    stored, total = asyncio.run(check_batch_upsert())
+    print(f"✅ Stored {stored} of {total} points in chunks of 3")
+
+def test_failed_chunk_fails_only_its_items():
+    """A rejected upsert request marks every point of that chunk as failed"""
+    print("🔍 Testing failed chunk...")
+    asyncio.run(check_failed_chunk())
+    print("✅ Only the failed chunk's points report an error")
+
+if __name__ == "__main__":
+    test_batch_is_chunked_and_reports_per_item()
+    test_failed_chunk_fails_only_its_items()